@@ -3,6 +3,8 @@ Integrated Network Platform API
 Combines APIs from both applications
 """
 
+# First, so that import timing (STARTUP_PROFILE=1) sees every later import
+from .startup import startup_profile
 from .main import create_application
 from .endpoints.devices import router as devices_router
 from .endpoints.visualization import router as visualization_router
@@ -2,9 +2,12 @@
 Compatibility Endpoints
 To serve legacy D3 frontend requests using the new architecture.
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from shared.device_handling.device_collector import UnifiedDeviceCollector
 from shared.network_utils.authentication import AuthManager
+from shared.network_utils.link_inference import LinkInferenceEngine
+from shared.services.topology_stream_service import get_topology_stream_service
+from ..responses import encode_response
 import os
 import logging
 
@@ -13,7 +16,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/topology")
-async def get_legacy_topology():
+async def get_legacy_topology(req: Request):
     """
     Serve topology in the format expected by D3 frontend.
     """
@@ -64,23 +67,22 @@ async def get_legacy_topology():
                         node[k] = v
             
             nodes.append(node)
-            
-            # Generate Links
-            # 1. Client -> Switch
-            if d.metadata and d.metadata.get('connected_to_switch'):
-                target = d.metadata.get('connected_to_switch')
-                # Check if target exists in nodes? D3 might handle it, but better safe.
-                links.append({
-                    "source": d.id,
-                    "target": target,
-                    "type": "ethernet"
-                })
-        
-        # Logic to link Switch -> Gate is usually missing in simple collection unless manual
-        # Add basic Uplink logic (All switches -> Gate) if not present?
-        # For now, return what we have.
+
+        # Links come from FortiLink/ISL peers, switch-port clients and LLDP
+        link_index = LinkInferenceEngine(fallback_to_gateway=False).infer([
+            {**n, "metadata": d.metadata or {}} for n, d in zip(nodes, devices, strict=True)
+        ])
+        for node in link_index.synthetic_nodes:
+            nodes.append({**node, "type": "FortiGate", "vendor": "Fortinet"})
+        for edge in link_index.edges:
+            links.append({
+                "source": edge["source"],
+                "target": edge["target"],
+                "type": edge.get("type", "ethernet"),
+                "port": edge.get("port")
+            })
         
-        return {"nodes": nodes, "links": links}
+        return encode_response(req, {"nodes": nodes, "links": links})
 
     except Exception as e:
         logger.error(f"Error generating topology: {e}")
@@ -88,5 +90,5 @@ async def get_legacy_topology():
 
 @router.get("/node-status")
 async def get_node_status():
-    """Return empty or basic status to satisfy D3 polling"""
-    return {}
+    """Current node status from the topology stream (id -> {status, updated_at})"""
+    return get_topology_stream_service().node_status()
@@ -3,15 +3,18 @@ Device Management Endpoints
 Combines device APIs from both applications
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query, Request
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 
 from shared.device_handling.device_collector import UnifiedDeviceCollector
 from shared.device_handling.device_processor import DeviceProcessor, DeviceMatcher
 from shared.device_handling.device_classifier import DeviceClassifier
+from shared.device_handling.device_store import get_device_store, DEFAULT_LIMIT, MAX_LIMIT
 from shared.network_utils.authentication import AuthManager
 from shared.config.config_manager import ConfigManager
+from shared.observability.metrics import tracked_job
+from ..responses import encode_response
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,12 +32,21 @@ class DeviceCredentials(BaseModel):
 
 
 class DeviceFilter(BaseModel):
-    """Device filtering options"""
+    """Device filtering options (query string; comma-separated values are alternatives)"""
     vendor: Optional[str] = None
     device_type: Optional[str] = None
     status: Optional[str] = None
+    model: Optional[str] = None
     capability: Optional[str] = None
 
+    def as_index_filters(self) -> Dict[str, List[str]]:
+        filters = {}
+        for name, value in self.model_dump(exclude_none=True).items():
+            values = [v.strip() for v in value.split(',') if v.strip()]
+            if values:
+                filters['type' if name == 'device_type' else name] = values
+        return filters
+
 
 @router.post("/collect")
 async def collect_devices(credentials: DeviceCredentials, background_tasks: BackgroundTasks, req: Request = None):
@@ -42,7 +54,6 @@ async def collect_devices(credentials: DeviceCredentials, background_tasks: Back
     Collect devices from configured sources
     Combines FortiGate, FortiManager, and Meraki collection
     """
-    print(f"DEBUG: collect_devices endpoint called")
     logger.info(f"Collect request received. Host: {credentials.host}, User: {credentials.username}, Pass provided: {bool(credentials.password)}")
     try:
         # Initialize components
@@ -112,11 +123,11 @@ async def collect_devices(credentials: DeviceCredentials, background_tasks: Back
             token = os.getenv(token_key)
             
             if token:
-                print(f"DEBUG: Found API token for host {credentials.host}")
+                logger.debug(f"Found API token for host {credentials.host}")
             
             # Only authenticate session if no token
             if not token:
-                print(f"DEBUG: Authenticating with session (no token)")
+                logger.debug("Authenticating with session (no token)")
                 auth_manager.authenticate_fortigate(
                     credentials.host,
                     credentials.username,
@@ -124,9 +135,8 @@ async def collect_devices(credentials: DeviceCredentials, background_tasks: Back
                     port=port
                 )
             
-            print(f"DEBUG: Adding background task for FortiGate")
             background_tasks.add_task(
-                collector.collect_from_fortigate,
+                tracked_job('fortigate_collection', collector.collect_from_fortigate),
                 credentials.host,
                 credentials.username,
                 credentials.password,
@@ -138,7 +148,7 @@ async def collect_devices(credentials: DeviceCredentials, background_tasks: Back
             # Meraki authentication
             auth_manager.authenticate_meraki(credentials.api_key)
             background_tasks.add_task(
-                collector.collect_from_meraki,
+                tracked_job('meraki_collection', collector.collect_from_meraki),
                 credentials.api_key,
                 credentials.org_id
             )
@@ -165,47 +175,89 @@ async def collect_devices(credentials: DeviceCredentials, background_tasks: Back
 
 
 @router.get("/")
-async def get_devices(filter: DeviceFilter = None):
-    """Get collected devices with optional filtering"""
+async def get_devices(
+    req: Request,
+    filter: DeviceFilter = Depends(),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (dotted paths allowed)"),
+    sort: str = Query("id", description="Sort field; prefix with - for descending"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    """Get collected devices, filtered from the device indexes and paged by cursor"""
     try:
-        # Initialize collector (would typically use cached/persisted data)
-        auth_manager = AuthManager()
-        collector = UnifiedDeviceCollector(auth_manager)
+        filters = filter.as_index_filters()
+        descending = sort.startswith('-')
+        try:
+            page = get_device_store().query(
+                filters=filters,
+                sort=sort.lstrip('-') or 'id',
+                descending=descending,
+                fields=[f.strip() for f in fields.split(',') if f.strip()] if fields else None,
+                limit=limit,
+                cursor=cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-        devices = collector.get_all_devices()
+        page["filter_applied"] = bool(filters)
+        return encode_response(req, page)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve devices: {str(e)}")
 
-        # Apply filtering if requested
-        if filter:
-            processor = DeviceProcessor()
-            devices = processor.filter_devices(devices, filter.dict(exclude_unset=True))
 
-        return {
-            "devices": devices,
-            "total_count": len(devices),
-            "filter_applied": filter is not None
-        }
+@router.get("/search")
+async def search_devices(
+    req: Request,
+    q: str = Query(..., description="Name, hostname, IP, MAC, serial, category or store fragments"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (dotted paths allowed)"),
+    limit: int = Query(25, ge=1, le=MAX_LIMIT),
+    offset: int = Query(0, ge=0)
+):
+    """Ranked substring search over collected devices"""
+    try:
+        try:
+            results = get_device_store().search(
+                q,
+                fields=[f.strip() for f in fields.split(',') if f.strip()] if fields else None,
+                limit=limit,
+                offset=offset
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
+        return encode_response(req, results)
+
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve devices: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+
+@router.get("/stats")
+async def get_device_stats():
+    """Get statistics about collected devices (maintained counters, no per-request scan)"""
+    try:
+        return get_device_store().stats()
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
 
 
 @router.get("/{device_id}")
 async def get_device(device_id: str):
     """Get detailed information for a specific device"""
     try:
-        auth_manager = AuthManager()
-        collector = UnifiedDeviceCollector(auth_manager)
-
-        # Get device details (would need to implement proper lookup)
-        devices = collector.get_all_devices()
-        device = next((d for d in devices if d.id == device_id), None)
+        device = get_device_store().get(device_id)
 
         if not device:
             raise HTTPException(status_code=404, detail=f"Device {device_id} not found")
 
         # Process device with additional information
         processor = DeviceProcessor()
-        processed_device = processor.process_device(device.__dict__)
+        processed_device = processor.process_device(device)
 
         return processed_device
 
@@ -259,54 +311,6 @@ async def match_device(mac: Optional[str] = None, model: Optional[str] = None, i
         raise HTTPException(status_code=500, detail=f"Device matching failed: {str(e)}")
 
 
-@router.get("/stats")
-async def get_device_stats():
-    """Get statistics about collected devices"""
-    try:
-        auth_manager = AuthManager()
-        collector = UnifiedDeviceCollector(auth_manager)
-        classifier = DeviceClassifier()
-
-        devices = collector.get_all_devices()
-        device_dicts = [device.__dict__ for device in devices]
-
-        # Get classification stats
-        if device_dicts:
-            classified = classifier.classify_devices_batch(device_dicts)
-            category_stats = classifier.get_category_stats(classified)
-        else:
-            category_stats = {}
-
-        # Basic stats
-        vendors = {}
-        device_types = {}
-        statuses = {}
-
-        for device in devices:
-            # Count vendors
-            vendor = getattr(device, 'vendor', 'unknown')
-            vendors[vendor] = vendors.get(vendor, 0) + 1
-
-            # Count device types
-            device_type = getattr(device, 'device_type', 'unknown')
-            device_types[device_type] = device_types.get(device_type, 0) + 1
-
-            # Count statuses
-            status = getattr(device, 'status', 'unknown')
-            statuses[status] = statuses.get(status, 0) + 1
-
-        return {
-            "total_devices": len(devices),
-            "by_vendor": vendors,
-            "by_type": device_types,
-            "by_status": statuses,
-            "by_category": category_stats
-        }
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
-
-
 @router.post("/export")
 async def export_devices(format: str = "json", filepath: Optional[str] = None):
     """Export device data"""
@@ -5,6 +5,7 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import HTMLResponse
 from shared.network_utils.authentication import AuthManager
 from shared.visualization.meraki_visualizer import MerakiVisualizer
+from shared.services.meraki_org_service import get_meraki_org_snapshot_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,9 +13,11 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/visualize/{network_id}", response_class=HTMLResponse)
-async def visualize_network(network_id: str, api_key: str = None):
+async def visualize_network(network_id: str, api_key: str = None, org_id: str = None):
     """
     Generate and serve an interactive topology map for a Meraki network.
+    With org_id, the network is sliced from a cached organization-wide snapshot
+    instead of issuing per-network device calls.
     """
     auth = AuthManager()
     
@@ -29,7 +32,7 @@ async def visualize_network(network_id: str, api_key: str = None):
         logger.error(f"Dashboard auth failed: {e}")
         raise HTTPException(status_code=400, detail=f"Meraki API Error: {str(e)}. Ensure MERAKI_API_KEY is set.")
         
-    viz = MerakiVisualizer(dashboard)
+    viz = MerakiVisualizer(dashboard, org_id=org_id)
     
     # Attempt to get network name
     net_name = f"Network {network_id}"
@@ -51,3 +54,27 @@ async def visualize_network(network_id: str, api_key: str = None):
         raise HTTPException(status_code=404, detail="Visualization produced no content (check logs)")
     
     return html_content
+
+
+@router.post("/orgs/{org_id}/snapshot/refresh")
+async def refresh_org_snapshot(org_id: str, api_key: str = None):
+    """
+    Force a refresh of the cached organization-wide Meraki snapshot.
+    """
+    auth = AuthManager()
+    if api_key:
+        auth.authenticate_meraki(api_key)
+
+    try:
+        dashboard = auth.get_meraki_dashboard()
+    except Exception as e:
+        logger.error(f"Dashboard auth failed: {e}")
+        raise HTTPException(status_code=400, detail=f"Meraki API Error: {str(e)}. Ensure MERAKI_API_KEY is set.")
+
+    snapshot = get_meraki_org_snapshot_service().get_snapshot(dashboard, org_id, refresh=True)
+    return {
+        "org_id": org_id,
+        "device_count": len(snapshot.devices),
+        "network_count": len(snapshot.network_ids),
+        "fetched_at": snapshot.fetched_at
+    }
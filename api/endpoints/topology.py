@@ -3,13 +3,23 @@ Topology Management Endpoints
 Combines topology APIs from both applications
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any, Tuple
+from contextlib import aclosing
+from fastapi import APIRouter, HTTPException, Header, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional, Tuple
 from pydantic import BaseModel
+import json
+import numpy as np
 
-from shared.network_utils.topology_builder import TopologyBuilder
+from shared.network_utils.topology_builder import TopologyBuilder, LAYOUT_ALGORITHMS
+from shared.network_utils.topology_graph import TopologyGraph
+from shared.network_utils.layout_cache import get_layout_cache
+from shared.network_utils.topology_clustering import ClusteredTopology, get_cluster_registry
 from shared.network_utils.data_formatter import NetworkDataFormatter
 from shared.device_handling.device_processor import DeviceProcessor
+from shared.services.topology_stream_service import get_topology_stream_service
+from shared.visualization.renderer import VisualizationRenderer
+from ..responses import encode_response
 
 router = APIRouter()
 
@@ -19,6 +29,15 @@ class TopologyRequest(BaseModel):
     devices: List[Dict[str, Any]]
     connections: List[List[str]]
     layout_algorithm: str = "layered"
+    layout_options: Dict[str, Any] = {}
+
+
+class LodRequest(BaseModel):
+    """Clustered level-of-detail request"""
+    devices: List[Dict[str, Any]]
+    connections: List[Any]
+    group_by: str = "port"  # port, category
+    max_nodes: int = 2000
 
 
 class TopologyAnalysis(BaseModel):
@@ -27,7 +46,7 @@ class TopologyAnalysis(BaseModel):
 
 
 @router.post("/create")
-async def create_topology(request: TopologyRequest):
+async def create_topology(request: TopologyRequest, req: Request):
     """Create network topology from devices and connections"""
     try:
         # Build topology
@@ -38,20 +57,21 @@ async def create_topology(request: TopologyRequest):
         )
 
         # Apply requested layout
-        if request.layout_algorithm == "layered":
-            layout = topology_builder._apply_layered_layout()
-            topology['layout'] = layout
-        elif request.layout_algorithm == "optimized":
-            layout = topology_builder.optimize_layout(topology.get('layout', {}))
-            topology['layout'] = layout
+        if request.layout_algorithm not in LAYOUT_ALGORITHMS:
+            raise HTTPException(status_code=400, detail=f"Unknown layout algorithm: {request.layout_algorithm}")
+        if request.layout_algorithm != "layered":
+            topology['layout'] = topology_builder.apply_layout(request.layout_algorithm, **request.layout_options)
+            topology['metadata']['layout_algorithm'] = request.layout_algorithm
 
-        return {
+        return encode_response(req, {
             "topology": topology,
             "layout_algorithm": request.layout_algorithm,
             "device_count": len(request.devices),
             "connection_count": len(request.connections)
-        }
+        })
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Topology creation failed: {str(e)}")
 
@@ -89,6 +109,7 @@ async def optimize_topology(request: TopologyAnalysis):
     try:
         topology_builder = TopologyBuilder()
         topology_data = request.topology_data
+        topology_builder.build_topology(topology_data.get('devices', []), topology_data.get('connections', []))
 
         # Apply optimization
         optimized_layout = topology_builder.optimize_layout(topology_data.get('layout', {}))
@@ -120,9 +141,16 @@ async def export_topology(topology_data: Dict[str, Any], format: str = "json"):
         elif format == "manifest":
             # Network map 3D manifest format
             devices = topology_data.get('devices', [])
-            connections = topology_data.get('connections', [])
+            graph = TopologyGraph.from_topology(devices, topology_data.get('connections', []))
             layout = topology_data.get('layout', {})
-            exported_data = formatter.export_to_manifest(devices, connections, layout, f"topology_manifest.{format}")
+            exported_data = formatter.export_to_manifest(devices, graph.edge_pairs(), layout, f"topology_manifest.{format}")
+        elif format in VisualizationRenderer.STREAM_FORMATS:
+            # Large documents go out as they are generated rather than inside a JSON body
+            return StreamingResponse(
+                VisualizationRenderer().iter_export(topology_data, format),
+                media_type=VisualizationRenderer.STREAM_FORMATS[format],
+                headers={"Content-Disposition": f'attachment; filename="topology.{format}"'}
+            )
         else:
             raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
 
@@ -142,36 +170,81 @@ async def export_topology(topology_data: Dict[str, Any], format: str = "json"):
 async def get_layout_algorithms():
     """Get available topology layout algorithms"""
     return {
-        "algorithms": [
-            {
-                "name": "layered",
-                "description": "Hierarchical layered layout (core → distribution → access → endpoints)",
-                "best_for": ["enterprise_networks", "hierarchical_topologies"],
-                "complexity": "O(n)"
-            },
-            {
-                "name": "force_directed",
-                "description": "Physics-based force-directed layout",
-                "best_for": ["mesh_networks", "organic_layouts"],
-                "complexity": "O(n²)"
-            },
-            {
-                "name": "circular",
-                "description": "Circular ring layout",
-                "best_for": ["ring_topologies", "equal_weight_devices"],
-                "complexity": "O(n)"
-            },
-            {
-                "name": "optimized",
-                "description": "Minimize crossings and optimize readability",
-                "best_for": ["dense_networks", "presentation_quality"],
-                "complexity": "O(n²)"
-            }
-        ],
+        "algorithms": [{"name": name, **info} for name, info in LAYOUT_ALGORITHMS.items()],
         "default": "layered"
     }
 
 
+@router.get("/layout-cache")
+async def get_layout_cache_stats():
+    """Layout cache hit/miss counters"""
+    return get_layout_cache().stats()
+
+
+@router.post("/lod")
+async def create_lod_view(request: LodRequest):
+    """Cluster endpoints per uplink and port/category; returns the finest view within max_nodes"""
+    try:
+        clustered = ClusteredTopology(request.devices, request.connections, group_by=request.group_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    key = get_cluster_registry().register(clustered)
+    return {
+        "key": key,
+        "levels": clustered.level_summary(),
+        **clustered.initial_view(request.max_nodes)
+    }
+
+
+@router.get("/clusters/{key}/{cluster_id:path}")
+async def expand_cluster(key: str, cluster_id: str, offset: int = 0, limit: int = 500):
+    """Subgraph replacing a cluster node (sub-clusters, or a page of its endpoints)"""
+    clustered = get_cluster_registry().get(key)
+    if clustered is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired clustered topology: {key}")
+    subgraph = clustered.expand(cluster_id, limit=max(1, min(limit, 5000)), offset=max(0, offset))
+    if subgraph is None:
+        raise HTTPException(status_code=404, detail=f"Unknown cluster: {cluster_id}")
+    return subgraph
+
+
+@router.get("/snapshot")
+async def get_topology_snapshot():
+    """Current live topology and the stream version it corresponds to"""
+    return get_topology_stream_service().snapshot()
+
+
+@router.get("/stream")
+async def stream_topology(since: Optional[int] = None, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-sent events: a snapshot (or the deltas missed since `since` / Last-Event-ID),
+    followed by node, link and status deltas as the collector publishes them
+    """
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    async def events():
+        async with aclosing(get_topology_stream_service().subscribe(since=since)) as stream:
+            async for event in stream:
+                yield f"id: {event['version']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.websocket("/ws")
+async def topology_websocket(websocket: WebSocket, since: Optional[int] = None):
+    """WebSocket variant of /stream; one JSON event per message"""
+    await websocket.accept()
+    try:
+        async with aclosing(get_topology_stream_service().subscribe(since=since)) as stream:
+            async for event in stream:
+                await websocket.send_text(json.dumps(event, default=str))
+    except WebSocketDisconnect:
+        pass
+
+
 def analyze_layout_efficiency(topology_data: Dict[str, Any]) -> Dict[str, Any]:
     """Analyze layout efficiency metrics"""
     layout = topology_data.get('layout', {})
@@ -210,17 +283,14 @@ def find_topology_optimizations(topology_data: Dict[str, Any]) -> List[Dict[str,
     optimizations = []
 
     devices = topology_data.get('devices', [])
-    connections = topology_data.get('connections', [])
+    graph = TopologyGraph.from_topology(devices, topology_data.get('connections', []))
+    degrees = graph.degrees
 
     # Check for disconnected devices
-    connected_device_ids = set()
-    for conn in connections:
-        connected_device_ids.add(conn.get('source'))
-        connected_device_ids.add(conn.get('target'))
-
+    isolated = set(graph.isolated_ids())
     disconnected = []
     for device in devices:
-        if device.get('id') not in connected_device_ids:
+        if not device.get('id') or device.get('id') in isolated:
             disconnected.append(device.get('name', device.get('id')))
 
     if disconnected:
@@ -233,12 +303,7 @@ def find_topology_optimizations(topology_data: Dict[str, Any]) -> List[Dict[str,
         })
 
     # Check for single points of failure
-    connection_counts = {}
-    for conn in connections:
-        for device_id in [conn.get('source'), conn.get('target')]:
-            connection_counts[device_id] = connection_counts.get(device_id, 0) + 1
-
-    critical_devices = [did for did, count in connection_counts.items() if count > 10]  # Arbitrary threshold
+    critical_devices = [graph.node_ids[i] for i in np.flatnonzero(degrees > 10).tolist()]  # Arbitrary threshold
 
     if critical_devices:
         optimizations.append({
@@ -4,6 +4,7 @@ Visualization Endpoints
 """
 
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from typing import Dict, Any, Optional, List
 from pydantic import BaseModel
 import json
@@ -12,9 +13,19 @@ from pathlib import Path
 from shared.network_utils.data_formatter import NetworkDataFormatter
 from shared.network_utils.topology_builder import TopologyBuilder
 from shared.visualization.renderer import VisualizationRenderer
+from shared.visualization.artifact_store import get_artifact_store
+from shared.services.topology_stream_service import get_topology_stream_service
 
 router = APIRouter()
 
+ARTIFACT_MEDIA_TYPES = {
+    "glb": "model/gltf-binary",
+    "svg": "image/svg+xml",
+    "drawio": "application/xml",
+    "html": "text/html",
+    "json": "application/json"
+}
+
 
 class TopologyRequest(BaseModel):
     """Topology visualization request"""
@@ -27,8 +38,10 @@ class TopologyRequest(BaseModel):
 class VisualizationExport(BaseModel):
     """Visualization export request"""
     topology_data: Dict[str, Any]
-    format: str = "gltf"  # gltf, svg, json
+    format: str = "gltf"  # gltf, svg, drawio, json
     include_textures: bool = True
+    stream: bool = False  # svg/drawio: send the document in the response instead of writing a file
+
 
 
 @router.post("/topology")
@@ -43,10 +56,11 @@ async def create_topology_visualization(request: TopologyRequest):
         )
 
         # Apply layout
-        if request.layout == "layered":
-            topology = topology_builder._apply_layered_layout()
-        elif request.layout == "optimized":
-            topology = topology_builder.optimize_layout(topology)
+        try:
+            topology['layout'] = topology_builder.apply_layout(request.layout)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        topology['metadata']['layout_algorithm'] = request.layout
 
         # Format for 3D visualization
         formatter = NetworkDataFormatter()
@@ -59,6 +73,8 @@ async def create_topology_visualization(request: TopologyRequest):
             "renderer": request.renderer
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Topology creation failed: {str(e)}")
 
@@ -67,41 +83,33 @@ async def create_topology_visualization(request: TopologyRequest):
 async def export_visualization(request: VisualizationExport, req: Request):
     """Export visualization in specified format"""
     try:
-        config = req.app.state.config
-
-        # Create export directory
-        export_dir = config.config.exports_dir / "static"
-        export_dir.mkdir(parents=True, exist_ok=True)
-
-        # Generate filename
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"topology_{timestamp}.{request.format}"
-        filepath = export_dir / filename
-
-        # Export based on format
-        if request.format == "json":
-            with open(filepath, 'w') as f:
-                json.dump(request.topology_data, f, indent=2)
-        elif request.format == "gltf":
-            # Would integrate GLTF export from network_map_3d
-            renderer = VisualizationRenderer()
-            renderer.export_gltf(request.topology_data, filepath)
-        elif request.format == "svg":
-            # Would integrate SVG export
-            renderer = VisualizationRenderer()
-            renderer.export_svg(request.topology_data, filepath)
-        elif request.format == "html":
-            renderer = VisualizationRenderer()
-            renderer.render_html_viewer(request.topology_data, filepath)
+        if request.stream:
+            if request.format not in VisualizationRenderer.STREAM_FORMATS:
+                raise HTTPException(status_code=400, detail=f"Streaming not supported for format: {request.format}")
+            return StreamingResponse(
+                VisualizationRenderer().iter_export(request.topology_data, request.format),
+                media_type=VisualizationRenderer.STREAM_FORMATS[request.format],
+                headers={"Content-Disposition": f'attachment; filename="topology.{request.format}"'}
+            )
+
+        # Rendered once per topology/format/renderer version; repeats reuse the stored file
+        try:
+            entry = VisualizationRenderer().render_artifact(request.topology_data, request.format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
         return {
             "message": "Visualization exported successfully",
-            "filepath": str(filepath),
-            "url": f"/static/{filename}",
-            "format": request.format
+            "filepath": str(get_artifact_store().path_for(entry)),
+            "url": f"/api/v1/visualization/artifacts/{entry['file']}",
+            "format": request.format,
+            "key": entry["key"],
+            "size": entry["size"],
+            "cached": entry["cached"]
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
 
@@ -110,21 +118,27 @@ async def export_visualization(request: VisualizationExport, req: Request):
 async def list_visualization_scenes(req: Request):
     """List available visualization scenes"""
     try:
+        scenes = [{
+            "name": entry["name"],
+            "format": entry["format"],
+            "path": str(get_artifact_store().path_for(entry)),
+            "url": f"/api/v1/visualization/artifacts/{entry['file']}",
+            "size": entry["size"],
+            "modified": entry["created"]
+        } for entry in get_artifact_store().entries()]
+
+        # The live discovery viewer is a stable page outside the artifact store
         config = req.app.state.config
-        export_dir = config.config.exports_dir / "static"
-
-        scenes = []
-        if export_dir.exists():
-            for file_path in export_dir.glob("*"):
-                if file_path.suffix in ['.json', '.gltf', '.glb', '.svg', '.html'] and file_path.name != "dashboard.html":
-                    scenes.append({
-                        "name": file_path.stem,
-                        "format": file_path.suffix[1:],  # Remove the dot
-                        "path": str(file_path),
-                        "url": f"/static/{file_path.name}",
-                        "size": file_path.stat().st_size,
-                        "modified": file_path.stat().st_mtime
-                    })
+        live_viewer = config.config.exports_dir / "static" / "discovery.html"
+        if live_viewer.exists():
+            scenes.append({
+                "name": live_viewer.stem,
+                "format": "html",
+                "path": str(live_viewer),
+                "url": f"/static/{live_viewer.name}",
+                "size": live_viewer.stat().st_size,
+                "modified": live_viewer.stat().st_mtime
+            })
 
         return {
             "scenes": sorted(scenes, key=lambda x: x['modified'], reverse=True),
@@ -135,6 +149,27 @@ async def list_visualization_scenes(req: Request):
         raise HTTPException(status_code=500, detail=f"Failed to list scenes: {str(e)}")
 
 
+@router.get("/artifacts")
+async def get_artifact_store_stats():
+    """Rendered artifact store size and hit/miss counters"""
+    return get_artifact_store().stats()
+
+
+@router.get("/artifacts/{filename}")
+async def get_artifact(filename: str, req: Request):
+    """Serve a rendered artifact; its name is derived from its content, so it never changes"""
+    entry = get_artifact_store().find(filename)
+    if entry is None or entry["file"] != filename:
+        raise HTTPException(status_code=404, detail=f"Artifact {filename} not found")
+
+    etag = f'"{entry["key"]}"'
+    headers = {"Cache-Control": "public, max-age=31536000, immutable", "ETag": etag}
+    if req.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(get_artifact_store().path_for(entry), headers=headers,
+                        media_type=ARTIFACT_MEDIA_TYPES.get(entry["format"]))
+
+
 @router.get("/scene/{scene_name}")
 async def get_visualization_scene(scene_name: str, req: Request):
     """Get a specific visualization scene"""
@@ -142,11 +177,15 @@ async def get_visualization_scene(scene_name: str, req: Request):
         config = req.app.state.config
         export_dir = config.config.exports_dir
 
-        # Find the scene file
+        # Find the scene file, indexed artifacts first
         scene_file = None
-        for file_path in export_dir.glob(f"{scene_name}.*"):
-            scene_file = file_path
-            break
+        entry = get_artifact_store().find(scene_name)
+        if entry is not None:
+            scene_file = get_artifact_store().path_for(entry)
+        else:
+            for file_path in export_dir.glob(f"{scene_name}.*"):
+                scene_file = file_path
+                break
 
         if not scene_file:
             raise HTTPException(status_code=404, detail=f"Scene {scene_name} not found")
@@ -160,7 +199,8 @@ async def get_visualization_scene(scene_name: str, req: Request):
             scene_data = {
                 "type": scene_file.suffix[1:],
                 "path": str(scene_file),
-                "url": f"/static/{scene_file.name}",
+                "url": (f"/api/v1/visualization/artifacts/{scene_file.name}" if entry is not None
+                        else f"/static/{scene_file.name}"),
                 "size": scene_file.stat().st_size
             }
 
@@ -180,13 +220,13 @@ async def get_available_renderers():
             {
                 "name": "three.js",
                 "description": "WebGL-based 3D renderer",
-                "formats": ["json", "gltf", "obj"],
+                "formats": ["json", "gltf", "glb", "obj"],
                 "features": ["real-time", "interactive", "lighting"]
             },
             {
                 "name": "babylon.js",
                 "description": "Alternative WebGL 3D renderer",
-                "formats": ["json", "gltf"],
+                "formats": ["json", "gltf", "glb"],
                 "features": ["physics", "advanced_materials"]
             },
             {
@@ -242,90 +282,25 @@ async def generate_from_discovery(req: Request):
         if not devices:
             raise HTTPException(status_code=404, detail="No devices found in discovery. Please run discovery first.")
 
-        # Convert devices to dict format for topology builder
-        device_dicts = []
-        for d in devices:
-            # Map device fields to visualization format
-            d_type = getattr(d, 'device_type', 'unknown')
-            if hasattr(d_type, 'value'):
-                d_type = d_type.value
-            elif hasattr(d_type, 'name'):
-                d_type = d_type.name
-            else:
-                d_type = str(d_type)
-
-            dev_dict = {
-                "id": d.id,
-                "name": d.name or d.id,
-                "type": d_type,
-                "vendor": getattr(d, 'vendor', 'unknown'),
-                "ip": getattr(d, 'ip_address', None)
-            }
-            device_dicts.append(dev_dict)
+        # Open viewers pick up only the changes; the page itself is written once and reused
+        stream_event = collector.publish_topology()
 
-        # Build topology with inferred connections
-        topology_builder = TopologyBuilder()
-        connections = []
-        
-        # Identify core devices
-        fortigates = [d for d in device_dicts if 'fortigate' in str(d['type']).lower()]
-        switches = [d for d in device_dicts if 'switch' in str(d['type']).lower()]
-        aps = [d for d in device_dicts if 'ap' in str(d['type']).lower()]
-        clients = [d for d in device_dicts if d not in fortigates and d not in switches and d not in aps]
-        
-        # 1. Connect Switches to FortiGate (assuming star topology for now)
-        if fortigates:
-            core_gate = fortigates[0] # Use first FortiGate as root
-            for sw in switches:
-                connections.append((core_gate['id'], sw['id']))
-                
-            # 2. Connect APs to Switches (distribute evenly or connect to first)
-            # If no switches, connect to FortiGate
-            if switches:
-                for i, ap in enumerate(aps):
-                    # Simple distribution: round-robin APs to switches
-                    target_sw = switches[i % len(switches)]
-                    connections.append((target_sw['id'], ap['id']))
-            else:
-                for ap in aps:
-                    connections.append((core_gate['id'], ap['id']))
-                    
-            # 3. Connect Clients to APs (or Switches/Gate)
-            if aps:
-                for i, client in enumerate(clients):
-                    target_ap = aps[i % len(aps)]
-                    connections.append((target_ap['id'], client['id']))
-            elif switches:
-                for i, client in enumerate(clients):
-                    target_sw = switches[i % len(switches)]
-                    connections.append((target_sw['id'], client['id']))
-            else:
-                for client in clients:
-                    connections.append((core_gate['id'], client['id']))
-        
-        topology = topology_builder.build_topology(device_dicts, connections)
-        
-        # Apply 3D formatting to enrich with models
-        formatter = NetworkDataFormatter()
-        topology = formatter.format_for_3d_visualization(topology)
-        
-        # Generate visualization
         config = req.app.state.config
         export_dir = config.config.exports_dir / "static"
         export_dir.mkdir(parents=True, exist_ok=True)
-        
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"discovery_{timestamp}.html"
+        filename = "discovery.html"
         filepath = export_dir / filename
         
         renderer = VisualizationRenderer()
-        renderer.render_html_viewer(topology, filepath)
+        renderer.render_live_viewer(filepath)
         
         return {
             "message": "Visualization generated from discovery",
             "filepath": str(filepath),
             "url": f"/static/{filename}",
+            "stream": "/api/v1/topology/ws",
+            "version": get_topology_stream_service().version,
+            "changed": stream_event is not None,
             "device_count": len(devices)
         }
 
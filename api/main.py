@@ -3,38 +3,74 @@ Main FastAPI Application
 Unified API combining network management and 3D visualization
 """
 
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
+import asyncio
 import logging
+import time
 from pathlib import Path
 
+from .startup import startup_profile
+from .metrics import platform_metrics
 from .endpoints.devices import router as devices_router
 from .endpoints.visualization import router as visualization_router
 from .endpoints.topology import router as topology_router
 from .endpoints.compat import router as compat_router
 from .endpoints.meraki_vis import router as meraki_vis_router
 from shared.config.config_manager import ConfigManager
+from shared.network_utils.layout_cache import configure_layout_cache
+from shared.visualization.artifact_store import configure_artifact_store
+from shared.services.fortigate_inventory_service import configure_inventory_service, get_fortigate_inventory_service
+from shared.network_utils import mac_vendor
+from shared.device_handling.device_store import get_device_store
+from shared.observability import metrics
+from shared.observability.tracing import configure_tracing, get_tracer
 
 logger = logging.getLogger(__name__)
 
 
+def _route_template(scope) -> str:
+    """Matched route template, e.g. /api/v1/devices/{device_id}"""
+    # FastAPI releases that keep included routers nested record the prefixed template separately
+    effective = (scope.get("fastapi") or {}).get("effective_route_context")
+    template = getattr(effective, "path", None) or getattr(scope.get("route"), "path", None)
+    return template or "unmatched"
+
+
 def create_application(config_file: str = None) -> FastAPI:
     """
     Create the integrated FastAPI application
     Combines APIs from both network_map_3d and enhanced-network-api-corporate
     """
 
-    # Load configuration
-    config_manager = ConfigManager(config_file)
+    # Load configuration; corporate environment detection runs once the server is up
+    with startup_profile.phase("config"):
+        config_manager = ConfigManager(config_file, detect_environment=False)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        startup_profile.mark_ready()
+        # Not awaited: requests are served while detection runs in the default executor
+        app.state.environment_detection = asyncio.get_running_loop().run_in_executor(
+            None, config_manager.detect_environment
+        )
+        # The watcher thread lives only as long as the server, not every app that is built
+        inventory_service.start_watcher(config_manager.config.inventory_reload_interval)
+        try:
+            yield
+        finally:
+            inventory_service.stop_watcher()
 
     # Create FastAPI app
     app = FastAPI(
         title="Integrated Network Platform API",
         description="Unified API for network device management and 3D visualization",
         version="1.0.0",
-        debug=config_manager.config.debug_mode
+        debug=config_manager.config.debug_mode,
+        lifespan=lifespan
     )
 
     # Add CORS middleware
@@ -46,6 +82,36 @@ def create_application(config_file: str = None) -> FastAPI:
         allow_headers=["*"],
     )
 
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # Route templates, not raw paths, keep the label set bounded
+            metrics.http_request_seconds.observe(
+                time.perf_counter() - start,
+                method=request.method,
+                route=_route_template(request.scope),
+                status=str(status)
+            )
+
+    @app.middleware("http")
+    async def trace_requests(request: Request, call_next):
+        path = request.url.path
+        if path == "/metrics" or path.startswith("/debug/"):
+            return await call_next(request)
+        # Continues the caller's trace when it sends a W3C traceparent header
+        with get_tracer().span(f"{request.method} {path}", request.headers.get("traceparent"),
+                               **{"http.method": request.method}) as span:
+            response = await call_next(request)
+            span.name = f"{request.method} {_route_template(request.scope)}"
+            span.set_attribute("http.status_code", response.status_code)
+            return response
+
     # Mount static files for 3D visualization assets
     static_dir = config_manager.config.exports_dir / "static"
     static_dir.mkdir(parents=True, exist_ok=True)
@@ -90,6 +156,34 @@ def create_application(config_file: str = None) -> FastAPI:
         tags=["meraki"]
     )
 
+    with startup_profile.phase("services"):
+        # Layouts are cached process-wide by topology structure
+        configure_layout_cache(
+            max_entries=config_manager.config.layout_cache_size if config_manager.config.cache_enabled else 0,
+            disk_dir=config_manager.config.layout_cache_dir
+        )
+
+        # Rendered exports are stored once per topology/format and evicted by size and age
+        configure_artifact_store(
+            config_manager.config.exports_dir / "artifacts",
+            max_bytes=config_manager.config.artifact_cache_max_mb * 1024 * 1024,
+            max_age=config_manager.config.artifact_cache_max_age_days * 24 * 3600
+        )
+
+        # Store inventory loads in the background once the server starts and is reloaded when the export changes
+        inventory_service = configure_inventory_service(str(config_manager.config.inventory_csv_path))
+
+        # Recent traces are kept in memory for /debug/traces; slow spans are logged
+        configure_tracing(
+            buffer_size=config_manager.config.trace_buffer_size,
+            slow_span_ms=config_manager.config.trace_slow_span_ms
+        )
+
+        # MAC vendor cache lives with the other data; its table is created on first lookup
+        mac_vendor.set_db_path(config_manager.config.data_dir / "mac_vendor_cache.db")
+
+    metrics.registry.register_collector("platform", platform_metrics)
+
     # Store config in app state
     app.state.config = config_manager
 
@@ -116,11 +210,35 @@ def create_application(config_file: str = None) -> FastAPI:
             "status": "healthy",
             "services": {
                 "config": "loaded",
-                "database": "ready",  # Would check actual DB connection
-                "network_clients": "initialized"
+                "environment_detection": "done" if config_manager.environment_detected else "running",
+                "inventory": "ready" if get_fortigate_inventory_service().ready.is_set() else "loading",
+                "devices": len(get_device_store())
             }
         }
 
+    @app.get("/metrics")
+    async def metrics_endpoint():
+        """Prometheus metrics"""
+        return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+    @app.get("/debug/startup")
+    async def startup_report():
+        """Startup phase timings and, with STARTUP_PROFILE=1, the slowest imports"""
+        return startup_profile.report()
+
+    @app.get("/debug/traces")
+    async def recent_traces(limit: int = 50):
+        """Most recent request and collection traces, newest first"""
+        return {"traces": get_tracer().traces(limit)}
+
+    @app.get("/debug/traces/{trace_id}")
+    async def trace_detail(trace_id: str):
+        """All spans of one trace"""
+        trace = get_tracer().trace(trace_id)
+        if trace is None:
+            raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+        return trace
+
     @app.get("/config/status")
     async def config_status(request: Request):
         """Configuration status endpoint"""
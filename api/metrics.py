@@ -0,0 +1,44 @@
+"""
+Platform Metrics
+Scrape-time collector for values other components already maintain: device counts per site,
+cache hit ratios and queue depths
+"""
+
+from typing import List
+
+from shared.observability.metrics import Family, cache_families
+from shared.device_handling.device_store import get_device_store
+from shared.network_utils.layout_cache import get_layout_cache
+from shared.network_utils import mac_vendor
+from shared.visualization.artifact_store import get_artifact_store
+from shared.enterprise.detection_cache import get_detection_cache
+from shared.services.topology_stream_service import get_topology_stream_service
+
+
+def platform_metrics() -> List[Family]:
+    store = get_device_store()
+    stats = store.stats()
+    layout = get_layout_cache()
+    artifacts = get_artifact_store()
+    detection = get_detection_cache()
+    stream = get_topology_stream_service()
+
+    families: List[Family] = [
+        ('devices', 'gauge', 'Devices in the store', [({}, stats['total_devices'])]),
+        ('devices_by_site', 'gauge', 'Devices in the store per site',
+         [({'site': site}, count) for site, count in stats.get('by_site', {}).items()]),
+        ('devices_by_type', 'gauge', 'Devices in the store per type',
+         [({'type': device_type}, count) for device_type, count in stats.get('by_type', {}).items()]),
+        ('topology_stream_subscribers', 'gauge', 'Connected topology stream clients',
+         [({}, stream.subscriber_count)]),
+        ('topology_stream_queue_depth', 'gauge', 'Topology events queued for stream clients',
+         [({}, stream.queue_depth())]),
+    ]
+    families.extend(cache_families({
+        'vendor': (mac_vendor.cache_hits, mac_vendor.cache_misses),
+        'classification': (store.enrich_skipped, store.enriched),
+        'layout': (layout.hits + layout.disk_hits, layout.misses),
+        'artifact': (artifacts.hits, artifacts.misses),
+        'detection': (detection.hits, detection.misses),
+    }))
+    return families
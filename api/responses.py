@@ -0,0 +1,193 @@
+"""
+Response Encoding
+Content negotiation for large API payloads: orjson-backed JSON, gzip/brotli compression and a
+columnar layout (JSON or MessagePack) that stores each list of records column by column
+"""
+
+from fastapi import Request
+from fastapi.responses import Response
+from typing import Dict, List, Any, Tuple
+from enum import Enum
+from operator import itemgetter
+from pathlib import Path
+import gzip
+import logging
+
+import orjson
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.network.columnar+json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack", "application/vnd.msgpack")
+
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+TABLE_MARKER = "$table"
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    """Types orjson does not encode natively"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, Path):
+        return str(value)
+    if hasattr(value, "__dict__"):
+        return vars(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+def _table(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    One column per key (None where a record lacks it). String columns with repeated values
+    (types, vendors, switch serials...) become integer codes into a per-column dictionary.
+    """
+    keys = dict.fromkeys(records[0])
+    uniform = True
+    for record in records:
+        if record.keys() != keys.keys():
+            uniform = False
+            keys.update(dict.fromkeys(record))
+
+    columns: Dict[str, List[Any]] = {}
+    dictionaries: Dict[str, List[Any]] = {}
+    for key in keys:
+        values = list(map(itemgetter(key), records)) if uniform else [record.get(key) for record in records]
+        try:
+            uniques = dict.fromkeys(values)
+        except TypeError:
+            # Nested objects or lists
+            columns[key] = [_columnar(v) for v in values]
+            continue
+        if len(uniques) * 2 <= len(values) and all(v is None or type(v) is str for v in uniques):
+            codes = {v: i for i, v in enumerate(uniques)}
+            columns[key] = list(map(codes.__getitem__, values))
+            dictionaries[key] = list(uniques)
+        else:
+            columns[key] = values
+    return {TABLE_MARKER: len(records), "columns": columns, "dictionaries": dictionaries}
+
+
+def _columnar(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _columnar(v) for key, v in value.items()}
+    if isinstance(value, list):
+        if value and all(isinstance(v, dict) for v in value):
+            return _table(value)
+        return [_columnar(v) for v in value]
+    return value
+
+
+def to_columnar(content: Any) -> Any:
+    """Replace every list of records in content with a {"$table": n, "columns", "dictionaries"} table"""
+    # Round-trip through orjson so dataclasses, enums and models are plain data first
+    return _columnar(orjson.loads(dumps(content)))
+
+
+def from_columnar(content: Any) -> Any:
+    """Inverse of to_columnar (keys that were missing from a record come back as None)"""
+    if isinstance(content, list):
+        return [from_columnar(v) for v in content]
+    if not isinstance(content, dict):
+        return content
+    if TABLE_MARKER not in content:
+        return {key: from_columnar(v) for key, v in content.items()}
+
+    columns = {}
+    for key, values in content["columns"].items():
+        dictionary = content["dictionaries"].get(key)
+        if dictionary is not None:
+            values = list(map(dictionary.__getitem__, values))
+        columns[key] = [from_columnar(v) for v in values]
+    return [{key: columns[key][i] for key in columns} for i in range(content[TABLE_MARKER])]
+
+
+def _accepted(header: str) -> List[str]:
+    """Media types or codings from an Accept/Accept-Encoding header, best first (q=0 dropped)"""
+    ranked: List[Tuple[float, int, str]] = []
+    for position, part in enumerate(header.split(",")):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            label, _, number = param.strip().partition("=")
+            if label == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        if name and q > 0:
+            ranked.append((-q, position, name.strip().lower()))
+    return [name for _, _, name in sorted(ranked)]
+
+
+def negotiate_media_type(accept: str) -> str:
+    for media_type in _accepted(accept or JSON):
+        if media_type == COLUMNAR_JSON:
+            return COLUMNAR_JSON
+        if media_type in MSGPACK_TYPES and msgpack is not None:
+            return MSGPACK
+        if media_type in (JSON, "application/*", "*/*"):
+            return JSON
+    return JSON
+
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    for coding in _accepted(accept_encoding or ""):
+        if coding == "br" and brotli is not None:
+            return "br"
+        if coding in ("gzip", "*"):
+            return "gzip"
+    return "identity"
+
+
+def encode(content: Any, media_type: str) -> bytes:
+    if media_type == MSGPACK:
+        return msgpack.packb(to_columnar(content), use_bin_type=True)
+    if media_type == COLUMNAR_JSON:
+        return orjson.dumps(to_columnar(content))
+    return dumps(content)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def encode_response(request: Request, content: Any, status_code: int = 200) -> Response:
+    """Encode content in the representation and compression the client asked for"""
+    media_type = negotiate_media_type(request.headers.get("accept", ""))
+    body = encode(content, media_type)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+
+    if len(body) >= MIN_COMPRESS_SIZE:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        if encoding != "identity":
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+
+    return Response(content=body, status_code=status_code, media_type=media_type, headers=headers)
@@ -0,0 +1,116 @@
+"""
+Startup Profiling
+Timings for the phases of application startup and, with STARTUP_PROFILE=1, for every module
+imported while the application is created (like `python -X importtime`, but served by the app)
+"""
+
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+REPORT_TOP_IMPORTS = 25
+
+
+class ImportTimer:
+    """
+    Meta path finder that finds nothing itself: it asks the finders after it for the spec and
+    wraps the loader's exec_module to time the module body. Self time excludes nested imports.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self._local = threading.local()
+
+    def find_spec(self, fullname: str, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            loader = spec.loader
+            # Builtin and frozen loaders are shared classes; they are cheap and left alone
+            if loader is not None and not isinstance(loader, type) and hasattr(loader, 'exec_module'):
+                loader.exec_module = self._timed(fullname, loader.exec_module)
+            return spec
+        return None
+
+    def _timed(self, name: str, exec_module):
+        def timed_exec(module):
+            stack = self._local.__dict__.setdefault('stack', [])
+            frame = [0.0]  # time spent in nested imports
+            stack.append(frame)
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                elapsed = time.perf_counter() - start
+                stack.pop()
+                if stack:
+                    stack[-1][0] += elapsed
+                self.timings[name] = {'cumulative_ms': round(elapsed * 1000, 2),
+                                      'self_ms': round((elapsed - frame[0]) * 1000, 2)}
+        return timed_exec
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+
+class StartupProfile:
+    """Phase durations since process start, plus the slowest imports when import timing is on"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Dict[str, Any]] = []
+        self.ready_ms: Optional[float] = None
+        self.import_timer: Optional[ImportTimer] = None
+
+    def enable_import_timing(self):
+        if self.import_timer is None:
+            self.import_timer = ImportTimer()
+            self.import_timer.install()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({'phase': name, 'ms': round((time.perf_counter() - start) * 1000, 2)})
+
+    def mark_ready(self):
+        """Startup is over: stop timing imports and log the summary"""
+        self.ready_ms = round((time.perf_counter() - self.started) * 1000, 2)
+        if self.import_timer is not None:
+            self.import_timer.uninstall()
+        phases = ', '.join(f"{p['phase']}={p['ms']}ms" for p in self.phases)
+        logger.info(f"Application ready in {self.ready_ms} ms ({phases})")
+
+    def report(self, top: int = REPORT_TOP_IMPORTS) -> Dict[str, Any]:
+        report: Dict[str, Any] = {
+            'ready_ms': self.ready_ms,
+            'phases': list(self.phases),
+            'import_timing': self.import_timer is not None
+        }
+        if self.import_timer is not None:
+            timings = self.import_timer.timings
+            slowest = sorted(timings.items(), key=lambda item: -item[1]['self_ms'])[:top]
+            report['modules_imported'] = len(timings)
+            report['slowest_imports'] = [{'module': name, **t} for name, t in slowest]
+        return report
+
+
+startup_profile = StartupProfile()
+if os.getenv('STARTUP_PROFILE', 'false').lower() in ('1', 'true'):
+    startup_profile.enable_import_timing()
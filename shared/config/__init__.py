@@ -4,7 +4,14 @@ Combines configuration from both applications
 """
 
 from .config_manager import ConfigManager, ConfigValidator
-from .environment_detector import EnvironmentDetector
+
+
+def __getattr__(name):
+    # The detector is only needed for diagnostics; import it on first use
+    if name == 'EnvironmentDetector':
+        from .environment_detector import EnvironmentDetector
+        return EnvironmentDetector
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     'ConfigManager',
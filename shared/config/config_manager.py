@@ -60,6 +60,14 @@ class NetworkConfig:
     # Advanced settings
     cache_enabled: bool = True
     cache_ttl: int = 300  # seconds
+    layout_cache_size: int = 32  # layouts kept in memory
+    layout_cache_dir: Optional[Path] = None  # optional on-disk layout tier
+    artifact_cache_max_mb: int = 512  # rendered exports kept under exports/artifacts
+    artifact_cache_max_age_days: float = 7.0
+    inventory_csv_path: Path = field(default_factory=lambda: Path("downloaded_files/vlan10_interfaces.csv"))
+    inventory_reload_interval: float = 5.0  # seconds between inventory change checks
+    trace_buffer_size: int = 100  # recent traces kept for /debug/traces
+    trace_slow_span_ms: float = 1000.0  # spans slower than this are logged
     export_formats: List[str] = field(default_factory=lambda: ["json", "gltf", "svg"])
 
 
@@ -70,12 +78,13 @@ class ConfigManager:
     - enhanced-network-api-corporate config.py and corporate environment detection
     """
 
-    def __init__(self, config_file: Optional[str] = None):
+    def __init__(self, config_file: Optional[str] = None, detect_environment: bool = True):
         self.config = NetworkConfig()
         self.config_sources = []
-        self._load_config(config_file)
+        self.environment_detected = False
+        self._load_config(config_file, detect_environment)
 
-    def _load_config(self, config_file: Optional[str] = None):
+    def _load_config(self, config_file: Optional[str] = None, detect_environment: bool = True):
         """Load configuration from multiple sources"""
 
         # Load from environment variables first
@@ -85,8 +94,9 @@ class ConfigManager:
         if config_file:
             self._load_from_file(config_file)
 
-        # Auto-detect corporate environment
-        self._detect_corporate_environment()
+        # Auto-detect corporate environment (the API defers this until it is serving)
+        if detect_environment:
+            self.detect_environment()
 
         # Validate configuration
         self._validate_config()
@@ -131,6 +141,22 @@ class ConfigManager:
             self.config.data_dir = Path(os.getenv('DATA_DIR'))
         if os.getenv('EXPORTS_DIR'):
             self.config.exports_dir = Path(os.getenv('EXPORTS_DIR'))
+        if os.getenv('LAYOUT_CACHE_DIR'):
+            self.config.layout_cache_dir = Path(os.getenv('LAYOUT_CACHE_DIR'))
+        if os.getenv('LAYOUT_CACHE_SIZE'):
+            self.config.layout_cache_size = int(os.getenv('LAYOUT_CACHE_SIZE'))
+        if os.getenv('ARTIFACT_CACHE_MAX_MB'):
+            self.config.artifact_cache_max_mb = int(os.getenv('ARTIFACT_CACHE_MAX_MB'))
+        if os.getenv('ARTIFACT_CACHE_MAX_AGE_DAYS'):
+            self.config.artifact_cache_max_age_days = float(os.getenv('ARTIFACT_CACHE_MAX_AGE_DAYS'))
+        if os.getenv('INVENTORY_CSV_PATH'):
+            self.config.inventory_csv_path = Path(os.getenv('INVENTORY_CSV_PATH'))
+        if os.getenv('INVENTORY_RELOAD_INTERVAL'):
+            self.config.inventory_reload_interval = float(os.getenv('INVENTORY_RELOAD_INTERVAL'))
+        if os.getenv('TRACE_BUFFER_SIZE'):
+            self.config.trace_buffer_size = int(os.getenv('TRACE_BUFFER_SIZE'))
+        if os.getenv('TRACE_SLOW_SPAN_MS'):
+            self.config.trace_slow_span_ms = float(os.getenv('TRACE_SLOW_SPAN_MS'))
 
         # Load enterprise settings
         self.config.enable_ssl_verification = os.getenv('SSL_VERIFY', 'true').lower() == 'true'
@@ -166,6 +192,11 @@ class ConfigManager:
         except Exception as e:
             logger.error(f"Failed to load config file {config_file}: {e}")
 
+    def detect_environment(self):
+        """Apply corporate environment settings; safe to call from a background thread"""
+        self._detect_corporate_environment()
+        self.environment_detected = True
+
     def _detect_corporate_environment(self):
         """Detect corporate environment settings (from enhanced-network-api-corporate)"""
         # Check for corporate indicators
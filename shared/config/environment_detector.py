@@ -11,8 +11,18 @@ from pathlib import Path
 from typing import Dict, Any, Optional, List
 import logging
 
+from ..enterprise.detection_cache import (DetectionCache, get_detection_cache, fingerprint,
+                                          paths_fingerprint, proxy_fingerprint, NETWORK_MAX_AGE)
+
 logger = logging.getLogger(__name__)
 
+SSL_CUSTOM_CERT_PATHS = [
+    './corporate-ca.pem',
+    './zscaler-ca.pem',
+    './bluecoat-ca.pem',
+    '/etc/ssl/certs/corporate-ca.pem'
+]
+
 
 class EnvironmentDetector:
     """
@@ -21,20 +31,36 @@ class EnvironmentDetector:
     - SSL and proxy detection
     """
 
-    def __init__(self):
+    def __init__(self, cache: Optional[DetectionCache] = None):
         self.environment_info = {}
-
-    def detect_all(self) -> Dict[str, Any]:
-        """Run all environment detection checks"""
+        self.cache = cache or get_detection_cache()
+
+    def detect_all(self, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Run all environment detection checks. The SSL and network probes are served from the
+        detection cache until the certificate files or proxy settings change (network results
+        also expire after a day); refresh=True probes again.
+        """
         logger.info("Detecting environment configuration...")
 
+        verify_paths = ssl.get_default_verify_paths()
+        ssl_paths = [verify_paths.cafile, verify_paths.capath, *SSL_CUSTOM_CERT_PATHS]
         self.environment_info = {
             'is_corporate': self._detect_corporate_environment(),
             'proxy_detected': self._detect_proxy_settings(),
-            'ssl_configuration': self._detect_ssl_configuration(),
+            'ssl_configuration': self.cache.get_or_probe(
+                'environment.ssl_configuration', fingerprint(paths_fingerprint(filter(None, ssl_paths))),
+                self._detect_ssl_configuration, refresh
+            ),
             'certificate_paths': self._find_certificate_paths(),
-            'network_restrictions': self._detect_network_restrictions(),
-            'available_services': self._detect_available_services()
+            'network_restrictions': self.cache.get_or_probe(
+                'environment.network_restrictions', proxy_fingerprint(),
+                self._detect_network_restrictions, refresh, max_age=NETWORK_MAX_AGE
+            ),
+            'available_services': self.cache.get_or_probe(
+                'environment.available_services', proxy_fingerprint(),
+                self._detect_available_services, refresh, max_age=NETWORK_MAX_AGE
+            )
         }
 
         logger.info(f"Environment detection complete: corporate={self.environment_info['is_corporate']}")
@@ -128,14 +154,7 @@ class EnvironmentDetector:
             logger.warning(f"SSL detection error: {e}")
 
         # Check for custom certificate paths
-        custom_paths = [
-            Path('./corporate-ca.pem'),
-            Path('./zscaler-ca.pem'),
-            Path('./bluecoat-ca.pem'),
-            Path('/etc/ssl/certs/corporate-ca.pem')
-        ]
-
-        for cert_path in custom_paths:
+        for cert_path in map(Path, SSL_CUSTOM_CERT_PATHS):
             if cert_path.exists():
                 ssl_info['custom_cert_path'] = str(cert_path)
                 ssl_info['ssl_verify_default'] = False  # Custom cert usually means disable verify
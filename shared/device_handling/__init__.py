@@ -6,10 +6,13 @@ Combines device handling from both applications
 from .device_processor import DeviceProcessor, DeviceMatcher
 from .device_collector import UnifiedDeviceCollector
 from .device_classifier import DeviceClassifier
+from .device_store import DeviceStore, get_device_store
 
 __all__ = [
     'DeviceProcessor',
     'DeviceMatcher',
     'UnifiedDeviceCollector',
-    'DeviceClassifier'
+    'DeviceClassifier',
+    'DeviceStore',
+    'get_device_store'
 ]
\ No newline at end of file
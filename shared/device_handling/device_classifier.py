@@ -9,6 +9,20 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Known vendor OUIs that help with classification
+CATEGORY_OUIS = {
+    'core_router': ['00090F'],  # Fortinet
+    'wireless_ap': ['00090F'],  # Fortinet APs
+    'workstation': ['000C29', '005056', '080027'],  # VMware, VirtualBox
+}
+
+# Model number patterns per category
+MODEL_PATTERNS = {
+    'core_router': [re.compile(p, re.IGNORECASE) for p in (r'fortigate', r'mx\d+', r'asa\d+')],
+    'wireless_ap': [re.compile(p, re.IGNORECASE) for p in (r'fortiap', r'mr\d+', r'ap\d+')],
+    'access_switch': [re.compile(p, re.IGNORECASE) for p in (r'fortiswitch', r'ms\d+', r'sg\d+')]
+}
+
 
 class DeviceClassifier:
     """
@@ -19,6 +33,7 @@ class DeviceClassifier:
 
     def __init__(self):
         self.classification_rules = self._load_default_rules()
+        self._compiled_rules = self._compile_rules()
 
     def _load_default_rules(self) -> Dict[str, Dict[str, Any]]:
         """Load default classification rules"""
@@ -93,9 +108,10 @@ class DeviceClassifier:
         device_copy = device.copy()
 
         # Get classification scores for all categories
+        features = self._device_features(device)
         scores = {}
-        for category, rules in self.classification_rules.items():
-            score = self._calculate_classification_score(device, rules)
+        for category, rules in self._compiled_rules.items():
+            score = self._calculate_classification_score(features, rules)
             if score > 0:
                 scores[category] = score
 
@@ -127,85 +143,61 @@ class DeviceClassifier:
 
         return device_copy
 
-    def _calculate_classification_score(self, device: Dict[str, Any], rules: Dict[str, Any]) -> float:
-        """Calculate how well a device matches classification rules"""
+    def _compile_rules(self) -> Dict[str, Dict[str, Any]]:
+        """Lowercased keyword/vendor/capability sets and applicable patterns per category"""
+        compiled = {}
+        for category, rules in self.classification_rules.items():
+            keywords_text = str(rules.get('keywords', []))
+            compiled[category] = {
+                'keywords': [k.lower() for k in rules.get('keywords', [])],
+                'vendors': {v.lower() for v in rules.get('vendors', [])},
+                'capabilities': {c.lower() for c in rules.get('capabilities', [])},
+                'mac_categories': {cat for cat in CATEGORY_OUIS if cat in keywords_text},
+                'model_patterns': [pattern for cat, patterns in MODEL_PATTERNS.items()
+                                   if cat in keywords_text for pattern in patterns]
+            }
+        return compiled
+
+    def _device_features(self, device: Dict[str, Any]) -> Dict[str, Any]:
+        """Everything the rules look at, derived once per device"""
+        model = (device.get('model') or '').lower()
+        mac = (device.get('mac_address') or device.get('mac') or '').upper().replace(':', '').replace('-', '')
+        return {
+            'name_text': ((device.get('name') or '') + ' ' + (device.get('model') or '')).lower(),
+            'vendor': (device.get('vendor') or '').lower(),
+            'capabilities': {c.lower() for c in device.get('capabilities', [])},
+            'mac_category': next((cat for cat, ouis in CATEGORY_OUIS.items()
+                                  if any(mac.startswith(oui) for oui in ouis)), None) if mac else None,
+            'model': model,
+            'model_has_number': bool(re.search(r'\d+', model))
+        }
+
+    def _calculate_classification_score(self, features: Dict[str, Any], rules: Dict[str, Any]) -> float:
+        """Calculate how well a device matches compiled classification rules"""
         score = 0.0
 
         # Keyword matching in name and model
-        name_text = (device.get('name', '') + ' ' + device.get('model', '')).lower()
-        keywords = rules.get('keywords', [])
-
-        for keyword in keywords:
-            if keyword.lower() in name_text:
+        for keyword in rules['keywords']:
+            if keyword in features['name_text']:
                 score += 2.0  # Strong keyword match
 
         # Vendor matching
-        device_vendor = device.get('vendor', '').lower()
-        rule_vendors = [v.lower() for v in rules.get('vendors', [])]
-
-        if device_vendor in rule_vendors:
+        if features['vendor'] in rules['vendors']:
             score += 3.0  # Vendor match is very strong
 
         # Capability matching
-        device_caps = [c.lower() for c in device.get('capabilities', [])]
-        rule_caps = [c.lower() for c in rules.get('capabilities', [])]
-
-        cap_matches = len(set(device_caps) & set(rule_caps))
-        score += cap_matches * 1.5
+        score += len(features['capabilities'] & rules['capabilities']) * 1.5
 
         # MAC address patterns (for device type hints)
-        mac = device.get('mac_address') or device.get('mac', '')
-        if mac:
-            score += self._score_mac_patterns(mac, rules)
+        if features['mac_category'] in rules['mac_categories']:
+            score += 2.0
 
         # Model-specific patterns
-        model = device.get('model', '').lower()
-        score += self._score_model_patterns(model, rules)
-
-        return score
-
-    def _score_mac_patterns(self, mac: str, rules: Dict[str, Any]) -> float:
-        """Score MAC address patterns"""
-        mac = mac.upper().replace(':', '').replace('-', '')
-
-        # Known vendor OUIs that help with classification
-        category_ouis = {
-            'core_router': ['00090F'],  # Fortinet
-            'wireless_ap': ['00090F'],  # Fortinet APs
-            'workstation': ['000C29', '005056', '080027'],  # VMware, VirtualBox
-        }
-
-        category = None
-        for cat, ouis in category_ouis.items():
-            if any(mac.startswith(oui) for oui in ouis):
-                category = cat
-                break
-
-        if category and category in str(rules.get('keywords', [])):
-            return 2.0
-
-        return 0.0
-
-    def _score_model_patterns(self, model: str, rules: Dict[str, Any]) -> float:
-        """Score model name patterns"""
-        score = 0.0
-
-        # Model number patterns
-        if re.search(r'\d+', model):  # Contains numbers
+        if features['model_has_number']:
             score += 0.5
-
-        # Specific model patterns
-        model_patterns = {
-            'core_router': [r'fortigate', r'mx\d+', r'asa\d+'],
-            'wireless_ap': [r'fortiap', r'mr\d+', r'ap\d+'],
-            'access_switch': [r'fortiswitch', r'ms\d+', r'sg\d+']
-        }
-
-        for category, patterns in model_patterns.items():
-            if category in str(rules.get('keywords', [])):
-                for pattern in patterns:
-                    if re.search(pattern, model, re.IGNORECASE):
-                        score += 1.5
+        for pattern in rules['model_patterns']:
+            if pattern.search(features['model']):
+                score += 1.5
 
         return score
 
@@ -6,9 +6,12 @@ Combines device collection from both applications
 import requests
 import json
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Tuple, Union
 from ..network_utils.network_client import NetworkClient, DeviceType, NetworkDevice
 from ..network_utils.authentication import AuthManager
+from ..network_utils.tls import get_shared_tls
+from ..observability.metrics import collection_seconds, collected_devices
+from ..observability.tracing import get_tracer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -26,9 +29,23 @@ class UnifiedDeviceCollector:
         self.network_client = NetworkClient()
         self.collected_devices = []
 
+    def _timed_collection(self, source: str, host: str, collect, *args, **kwargs) -> List[NetworkDevice]:
+        """Run one collection, recording its duration and device count for host"""
+        with get_tracer().span(f"collect.{source}", host=host) as span, \
+                collection_seconds.time(source=source, host=host):
+            devices = collect(*args, **kwargs)
+            span.set_attribute("devices", len(devices))
+        collected_devices.set(len(devices), source=source, host=host)
+        return devices
+
     def collect_from_fortigate(self, host: str, username: str, password: str, port: int = 443, token: Optional[str] = None) -> List[NetworkDevice]:
         """Collect devices from FortiGate (network_map_3d approach)"""
-        print(f"DEBUG: collect_from_fortigate called. Host: {host}, Port: {port}, Token present: {bool(token)}")
+        logger.debug(f"collect_from_fortigate called. Host: {host}, Port: {port}, Token present: {bool(token)}")
+        return self._timed_collection('fortigate', host, self._collect_from_fortigate,
+                                      host, username, password, port, token)
+
+    def _collect_from_fortigate(self, host: str, username: str, password: str, port: int,
+                                token: Optional[str]) -> List[NetworkDevice]:
         logger.info(f"Collecting devices from FortiGate: {host}:{port}")
 
         session = None
@@ -69,7 +86,11 @@ class UnifiedDeviceCollector:
                     serial=sw_data.get('serial'),
                     model=sw_data.get('model'),
                     status=sw_data.get('status'),
-                    metadata={'ports': sw_data.get('ports')} # Store full port info
+                    metadata={
+                        'ports': sw_data.get('ports'),  # Store full port info (FortiLink/ISL peers, clients)
+                        'fgt_peer_intf_name': sw_data.get('fgt_peer_intf_name'),
+                        'connecting_from': sw_data.get('connecting_from')
+                    }
                 )
                 devices.append(sw_dev)
                 
@@ -113,11 +134,15 @@ class UnifiedDeviceCollector:
         
         # Auto-save to disk
         self.export_devices("data/discovered_devices.json")
+        self.publish_topology()
         
         return devices
 
     def collect_from_fortimanager(self, host: str, username: str, password: str) -> List[NetworkDevice]:
         """Collect devices from FortiManager (enhanced-network-api-corporate approach)"""
+        return self._timed_collection('fortimanager', host, self._collect_from_fortimanager, host, username, password)
+
+    def _collect_from_fortimanager(self, host: str, username: str, password: str) -> List[NetworkDevice]:
         logger.info(f"Collecting devices from FortiManager: {host}")
 
         # Authenticate
@@ -130,6 +155,7 @@ class UnifiedDeviceCollector:
         devices = self._collect_fortimanager_devices(fm_auth)
         self.collected_devices.extend(devices)
         logger.info(f"Collected {len(devices)} devices from FortiManager")
+        self.publish_topology()
         return devices
 
     def _collect_fortimanager_devices(self, fm_auth: Dict[str, Any]) -> List[NetworkDevice]:
@@ -192,6 +218,9 @@ class UnifiedDeviceCollector:
 
     def collect_from_meraki(self, api_key: str, org_id: Optional[str] = None) -> List[NetworkDevice]:
         """Collect devices from Meraki (enhanced-network-api-corporate approach)"""
+        return self._timed_collection('meraki', org_id or 'default', self._collect_from_meraki, api_key, org_id)
+
+    def _collect_from_meraki(self, api_key: str, org_id: Optional[str]) -> List[NetworkDevice]:
         logger.info("Collecting devices from Meraki")
 
         # Set up authentication
@@ -203,6 +232,7 @@ class UnifiedDeviceCollector:
         devices = self._collect_meraki_devices(api_key, org_id)
         self.collected_devices.extend(devices)
         logger.info(f"Collected {len(devices)} devices from Meraki")
+        self.publish_topology()
         return devices
 
     def _collect_meraki_devices(self, api_key: str, org_id: Optional[str] = None) -> List[NetworkDevice]:
@@ -214,11 +244,13 @@ class UnifiedDeviceCollector:
                 'X-Cisco-Meraki-API-Key': api_key,
                 'Content-Type': 'application/json'
             }
+            # Both calls reuse one pooled (and resumable) connection to the dashboard
+            session = get_shared_tls().session()
 
             # Get organizations if not provided
             if not org_id:
                 org_url = "https://api.meraki.com/api/v1/organizations"
-                org_response = requests.get(org_url, headers=headers, timeout=30)
+                org_response = session.get(org_url, headers=headers, timeout=30)
                 org_response.raise_for_status()
                 organizations = org_response.json()
                 if organizations:
@@ -230,7 +262,7 @@ class UnifiedDeviceCollector:
 
             # Get devices from organization
             devices_url = f"https://api.meraki.com/api/v1/organizations/{org_id}/devices"
-            devices_response = requests.get(devices_url, headers=headers, timeout=30)
+            devices_response = session.get(devices_url, headers=headers, timeout=30)
             devices_response.raise_for_status()
 
             device_data = devices_response.json()
@@ -243,7 +275,8 @@ class UnifiedDeviceCollector:
                     ip_address=device_info.get('lanIp'),
                     model=device_info.get('model'),
                     serial=device_info.get('serial'),
-                    status='online' if device_info.get('lanIp') else 'offline'
+                    status='online' if device_info.get('lanIp') else 'offline',
+                    metadata={'network_id': device_info.get('networkId')}
                 )
                 devices.append(device)
 
@@ -269,6 +302,88 @@ class UnifiedDeviceCollector:
         """Get all collected devices"""
         return self.collected_devices.copy()
 
+    def device_dicts(self) -> List[Dict[str, Any]]:
+        """Collected devices in the dict format used by the topology builder and viewers"""
+        device_dicts = []
+        for d in self.collected_devices:
+            d_type = getattr(d, 'device_type', 'unknown')
+            if hasattr(d_type, 'value'):
+                d_type = d_type.value
+            elif hasattr(d_type, 'name'):
+                d_type = d_type.name
+            else:
+                d_type = str(d_type)
+
+            device_dicts.append({
+                "id": d.id,
+                "name": d.name or d.id,
+                "type": d_type,
+                "vendor": getattr(d, 'vendor', 'unknown'),
+                "ip": getattr(d, 'ip_address', None),
+                "mac": getattr(d, 'mac_address', None),
+                "serial": getattr(d, 'serial', None),
+                "model": getattr(d, 'model', None),
+                "status": getattr(d, 'status', None),
+                "metadata": getattr(d, 'metadata', None) or {}
+            })
+        return device_dicts
+
+    def topology_snapshot(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Device dicts (plus inferred synthetic nodes) and inferred links for the collected devices"""
+        from ..network_utils.link_inference import LinkInferenceEngine
+
+        device_dicts = self.device_dicts()
+        link_index = LinkInferenceEngine().infer(device_dicts)
+        device_dicts.extend(link_index.synthetic_nodes)
+        return device_dicts, link_index.edges
+
+    def _place_devices(self, devices: List[Dict[str, Any]], connections: List[Dict[str, Any]]):
+        """
+        Put force-directed layout positions on the device dicts, so viewers pin them instead of
+        simulating. The layout cache makes this free while the topology structure is unchanged.
+        """
+        from ..network_utils.topology_builder import TopologyBuilder
+
+        try:
+            builder = TopologyBuilder()
+            builder.build_topology(devices, connections)
+            positions = builder.apply_layout('force_directed')['positions']
+        except Exception as e:
+            logger.warning(f"Topology layout failed, publishing without positions: {e}")
+            return
+        for device in devices:
+            position = positions.get(device.get('id'))
+            if position is not None:
+                device['x'], device['y'], device['z'] = position['x'], position['y'], position['z']
+
+    def publish_topology(self) -> Optional[Dict[str, Any]]:
+        """
+        Index the collected devices for the device API and push the topology to live viewers.
+        Returns the delta event, or None if nothing changed.
+        """
+        try:
+            from .device_store import get_device_store
+            from ..services.fortigate_inventory_service import get_fortigate_inventory_service
+
+            device_dicts = self.device_dicts()
+            get_fortigate_inventory_service().attach_locations(device_dicts)
+            get_device_store().replace(device_dicts)
+        except Exception as e:
+            logger.error(f"Failed to index collected devices: {e}")
+
+        try:
+            from ..network_utils.data_formatter import NetworkDataFormatter
+            from ..services.topology_stream_service import get_topology_stream_service
+
+            devices, connections = self.topology_snapshot()
+            for device in devices:
+                device['model_path'] = NetworkDataFormatter._get_3d_model_path(device)
+            self._place_devices(devices, connections)
+            return get_topology_stream_service().publish_topology(devices, connections)
+        except Exception as e:
+            logger.error(f"Failed to publish topology update: {e}")
+            return None
+
     def clear_collected_devices(self):
         """Clear the collected devices list"""
         self.collected_devices.clear()
@@ -298,7 +413,7 @@ class UnifiedDeviceCollector:
 
     def load_devices(self, filepath: str) -> bool:
         """Load devices from JSON file"""
-        print(f"DEBUG: Loading devices from {filepath}")
+        logger.debug(f"Loading devices from {filepath}")
         try:
             with open(filepath, 'r') as f:
                 data = json.load(f)
@@ -340,10 +455,8 @@ class UnifiedDeviceCollector:
                 )
                 self.collected_devices.append(device)
                 
-            print(f"DEBUG: Loaded {len(self.collected_devices)} devices")
             logger.info(f"Loaded {len(self.collected_devices)} devices from {filepath}")
             return True
         except Exception as e:
-            print(f"DEBUG: Failed to load devices: {e}")
             logger.error(f"Failed to load devices: {e}")
             return False
\ No newline at end of file
@@ -210,31 +210,22 @@ class DeviceProcessor:
 
     def filter_devices(self, devices: List[Dict[str, Any]],
                       filters: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Filter devices based on criteria"""
-        filtered = devices.copy()
-
-        # Filter by vendor
-        if 'vendor' in filters:
-            vendor_filter = filters['vendor'].lower()
-            filtered = [d for d in filtered if d.get('vendor', '').lower() == vendor_filter]
-
-        # Filter by type
-        if 'type' in filters:
-            type_filter = filters['type'].lower()
-            filtered = [d for d in filtered if d.get('device_type', '').lower() == type_filter]
-
-        # Filter by status
-        if 'status' in filters:
-            status_filter = filters['status'].lower()
-            filtered = [d for d in filtered if d.get('status', '').lower() == status_filter]
-
-        # Filter by capability
-        if 'capability' in filters:
-            capability_filter = filters['capability'].lower()
-            filtered = [d for d in filtered
-                       if capability_filter in [c.lower() for c in d.get('capabilities', [])]]
-
-        return filtered
+        """Filter devices based on criteria (one pass, all criteria per device)"""
+        checks = []
+        for key, field in (('vendor', 'vendor'), ('type', 'device_type'), ('status', 'status')):
+            if key in filters:
+                checks.append((field, filters[key].lower()))
+        capability_filter = filters['capability'].lower() if 'capability' in filters else None
+
+        def matches(device: Dict[str, Any]) -> bool:
+            for field, wanted in checks:
+                if (device.get(field) or '').lower() != wanted:
+                    return False
+            if capability_filter is not None:
+                return any(c.lower() == capability_filter for c in device.get('capabilities', []))
+            return True
+
+        return [d for d in devices if matches(d)]
 
     def group_devices(self, devices: List[Dict[str, Any]],
                      group_by: str = 'vendor') -> Dict[str, List[Dict[str, Any]]]:
@@ -0,0 +1,144 @@
+"""
+Device Search
+Substring search over device names, hostnames, IPs, MACs, serials, categories and store locations,
+backed by an in-memory SQLite FTS5 table with the trigram tokenizer
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+import re
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+SEARCH_COLUMNS = ('name', 'hostname', 'ip', 'mac', 'serial', 'category', 'location')
+COLUMN_WEIGHTS = (10.0, 8.0, 6.0, 6.0, 6.0, 2.0, 3.0)
+# Broad terms can match most of the inventory; only this many matches are ranked
+RANK_CANDIDATES = 2000
+MIN_TERM_LENGTH = 3  # shortest substring the trigram index can match
+
+_MAC_LIKE = re.compile(r'^[0-9a-f]{1,4}([:\-][0-9a-f]{1,4})+[:\-]?$')
+_MAC_SEPARATORS = re.compile(r'[:\-.]')
+
+
+def normalize_mac(mac: Optional[str]) -> str:
+    return _MAC_SEPARATORS.sub('', mac or '').lower()
+
+
+def query_terms(text: str) -> Tuple[List[str], List[str]]:
+    """
+    Index terms (at least MIN_TERM_LENGTH characters; MAC fragments lose their separators)
+    and the shorter terms, which can only re-rank what the index terms found
+    """
+    terms: List[str] = []
+    short: List[str] = []
+    for term in text.lower().split():
+        if _MAC_LIKE.match(term):
+            term = _MAC_SEPARATORS.sub('', term)
+        target = terms if len(term) >= MIN_TERM_LENGTH else short
+        if term not in target:
+            target.append(term)
+    return terms, short
+
+
+def _phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+class DeviceSearchIndex:
+    """
+    One FTS5 row per device. The table is contentless, so the indexed values are kept here
+    to delete rows later.
+    """
+
+    def __init__(self):
+        self._conn = sqlite3.connect(':memory:', check_same_thread=False)
+        self._conn.execute(
+            f"CREATE VIRTUAL TABLE devices USING fts5({', '.join(SEARCH_COLUMNS)}, "
+            f"tokenize='trigram', content='')"
+        )
+        self._rows: Dict[str, Tuple[int, Tuple[str, ...]]] = {}
+        self._ids: Dict[int, str] = {}
+        self._next_row = 1
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def document(self, device: Dict[str, Any]) -> Tuple[str, ...]:
+        metadata = device.get('metadata') or {}
+        categories = [metadata.get('restaurant_category'), device.get('category'), device.get('type')]
+        location = [metadata.get('store_number'), metadata.get('brand'), metadata.get('region'), metadata.get('site')]
+        return (
+            str(device.get('name') or ''),
+            str(metadata.get('hostname') or ''),
+            str(device.get('ip') or ''),
+            normalize_mac(device.get('mac')),
+            str(device.get('serial') or ''),
+            ' '.join(str(c) for c in categories if c),
+            ' '.join(str(part) for part in location if part)
+        )
+
+    def add(self, device_id: str, device: Dict[str, Any]):
+        self.remove(device_id)
+        values = self.document(device)
+        row = self._next_row
+        self._next_row += 1
+        self._conn.execute(
+            f"INSERT INTO devices(rowid, {', '.join(SEARCH_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (row, *values)
+        )
+        self._rows[device_id] = (row, values)
+        self._ids[row] = device_id
+
+    def remove(self, device_id: str):
+        entry = self._rows.pop(device_id, None)
+        if entry is None:
+            return
+        row, values = entry
+        del self._ids[row]
+        # Contentless tables need the originally indexed values to remove a row
+        self._conn.execute(
+            f"INSERT INTO devices(devices, rowid, {', '.join(SEARCH_COLUMNS)}) "
+            f"VALUES ('delete', ?, ?, ?, ?, ?, ?, ?, ?)",
+            (row, *values)
+        )
+
+    def _ranked(self, expression: str) -> List[Tuple[str, float]]:
+        weights = ', '.join(str(w) for w in COLUMN_WEIGHTS)
+        # Ordered before the limit, so the cap keeps the best candidates rather than the first by rowid
+        rows = self._conn.execute(
+            f"SELECT rowid, bm25(devices, {weights}) AS score FROM devices WHERE devices MATCH ? "
+            f"ORDER BY score, rowid LIMIT ?",
+            (expression, RANK_CANDIDATES)
+        ).fetchall()
+        # bm25 is lower-is-better; report higher-is-better scores
+        return [(self._ids[row], round(-score, 4)) for row, score in rows if row in self._ids]
+
+    def search(self, text: str) -> List[Tuple[str, float]]:
+        """
+        (device id, score) pairs, best first: devices matching every term, then devices
+        matching any of them. Each pass ranks at most RANK_CANDIDATES matches.
+        """
+        terms, short = query_terms(text)
+        if not terms:
+            raise ValueError(f"Search needs a term of at least {MIN_TERM_LENGTH} characters")
+
+        results = self._boost(self._ranked(' AND '.join(_phrase(t) for t in terms)), short)
+        if len(terms) > 1 and len(results) < RANK_CANDIDATES:
+            seen = {device_id for device_id, _ in results}
+            extra = self._ranked(' OR '.join(_phrase(t) for t in terms))
+            results.extend(self._boost([r for r in extra if r[0] not in seen], short))
+        return results
+
+    def _boost(self, results: List[Tuple[str, float]], short: List[str]) -> List[Tuple[str, float]]:
+        """Move matches containing the short terms as whole words up (e.g. the 3 in "switch 3")"""
+        if not short or not results:
+            return results
+        patterns = [re.compile(r'\b' + re.escape(term) + r'\b') for term in short]
+        boosted = []
+        for device_id, score in results:
+            text = ' '.join(self._rows[device_id][1]).lower()
+            hits = sum(1 for pattern in patterns if pattern.search(text))
+            boosted.append((device_id, round(score + hits, 4)))
+        boosted.sort(key=lambda r: -r[1])
+        return boosted
@@ -0,0 +1,334 @@
+"""
+Device Store
+Process-wide index of the collected devices: exact-match filters are answered from inverted
+indexes, and results are sorted, projected and paged with opaque cursors
+"""
+
+from typing import Dict, List, Any, Optional, Set, Tuple, Iterable
+from bisect import bisect_left, bisect_right
+import base64
+import json
+import logging
+import threading
+
+from .device_processor import DeviceMatcher
+from .device_classifier import DeviceClassifier
+from .device_search import DeviceSearchIndex
+from ..observability.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+# Filterable fields; capability is matched against the `capabilities` list
+INDEXED_FIELDS = ('vendor', 'type', 'status', 'model', 'capability')
+# Materialized counts, kept up to date as devices are added, changed and removed
+STAT_GROUPS = ('vendor', 'type', 'status', 'category', 'site', 'switch')
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def _index_values(device: Dict[str, Any], field: str) -> Iterable[str]:
+    if field == 'capability':
+        return {str(c).lower() for c in device.get('capabilities') or []}
+    value = device.get(field)
+    return (str(value).lower(),) if value is not None else ()
+
+
+def _group_value(device: Dict[str, Any], group: str) -> str:
+    metadata = device.get('metadata') or {}
+    if group == 'site':
+        value = metadata.get('site') or metadata.get('store_number') or metadata.get('network_id')
+    elif group == 'switch':
+        value = metadata.get('connected_to_switch')
+    else:
+        value = device.get(group)
+    return str(value) if value not in (None, '') else 'unknown'
+
+
+def _sort_key(value: Any) -> Tuple:
+    """Orders None last and never compares numbers with strings"""
+    if value is None:
+        return (2, 0)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value)
+    return (1, str(value).lower())
+
+
+def get_field(device: Dict[str, Any], path: str) -> Any:
+    """Value of a field, with dotted paths into nested dicts (e.g. metadata.connected_to_switch)"""
+    value: Any = device
+    for part in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def project(device: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    if not fields:
+        return device
+    projected = {'id': device.get('id')}
+    for path in fields:
+        projected[path] = get_field(device, path)
+    return projected
+
+
+def encode_cursor(sort_value: Any, device_id: str) -> str:
+    payload = json.dumps([sort_value, device_id], default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, device_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return sort_value, str(device_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class DeviceStore:
+    """
+    Devices by id plus one inverted index per filterable field (lowercased value -> ids).
+    A query intersects the index sets, smallest first, instead of scanning every device.
+    """
+
+    def __init__(self, matcher: Optional[DeviceMatcher] = None, classifier: Optional[DeviceClassifier] = None,
+                 search_index: Optional[DeviceSearchIndex] = None):
+        self.matcher = matcher or DeviceMatcher()
+        self.classifier = classifier or DeviceClassifier()
+        self.search_index = search_index or DeviceSearchIndex()
+        self.version = 0
+        self._devices: Dict[str, Dict[str, Any]] = {}
+        self._sources: Dict[str, Dict[str, Any]] = {}  # device as given, to skip unchanged re-inserts
+        self._counts: Dict[str, Dict[str, int]] = {group: {} for group in STAT_GROUPS}
+        self._indexes: Dict[str, Dict[str, Set[str]]] = {field: {} for field in INDEXED_FIELDS}
+        # Sorted (key, id) lists per sort field, dropped whenever devices change
+        self._orders: Dict[str, List[Tuple[Tuple, str]]] = {}
+        self._lock = threading.RLock()
+        # Re-inserts of an unchanged device skip matching/classification
+        self.enrich_skipped = 0
+        self.enriched = 0
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def _enrich(self, device: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill vendor, capabilities and category once, at insert time"""
+        device = dict(device)
+        if not device.get('capabilities') or device.get('vendor') in (None, '', 'unknown'):
+            info = self.matcher.match(mac=device.get('mac'), model_name=device.get('model') or device.get('name'),
+                                      ip=device.get('ip'))
+            if info['confidence'] > 0.0:
+                if device.get('vendor') in (None, '', 'unknown') and info.get('vendor') not in (None, 'unknown'):
+                    device['vendor'] = info['vendor']
+                device.setdefault('capabilities', info.get('capabilities', []))
+        device.setdefault('capabilities', [])
+        if not device.get('category'):
+            classified = self.classifier.classify_device({
+                'name': device.get('name') or '',
+                'model': device.get('model') or '',
+                'vendor': device.get('vendor') or '',
+                'mac': device.get('mac') or '',
+                'capabilities': device['capabilities']
+            })
+            device['category'] = classified['device_category']
+        return device
+
+    def _add(self, device: Dict[str, Any]):
+        device_id = device['id']
+        self._devices[device_id] = device
+        for field, index in self._indexes.items():
+            for value in _index_values(device, field):
+                index.setdefault(value, set()).add(device_id)
+        for group, counts in self._counts.items():
+            value = _group_value(device, group)
+            counts[value] = counts.get(value, 0) + 1
+        self.search_index.add(device_id, device)
+
+    def _remove(self, device_id: str):
+        device = self._devices.pop(device_id, None)
+        if device is None:
+            return
+        self.search_index.remove(device_id)
+        for field, index in self._indexes.items():
+            for value in _index_values(device, field):
+                ids = index.get(value)
+                if ids is not None:
+                    ids.discard(device_id)
+                    if not ids:
+                        del index[value]
+        for group, counts in self._counts.items():
+            value = _group_value(device, group)
+            counts[value] -= 1
+            if not counts[value]:
+                del counts[value]
+
+    def _put(self, device: Dict[str, Any]) -> bool:
+        """Insert or update one device; False if it is unchanged"""
+        device_id = device['id']
+        if self._sources.get(device_id) == device:
+            self.enrich_skipped += 1
+            return False
+        self._remove(device_id)
+        self._sources[device_id] = device
+        self.enriched += 1
+        self._add(self._enrich(device))
+        return True
+
+    def _changed(self):
+        self._orders = {}
+        self.version += 1
+
+    def replace(self, devices: List[Dict[str, Any]]):
+        """
+        Make the store hold exactly these devices (devices without an id are skipped).
+        Only devices that were added, changed or dropped touch the indexes and counters.
+        """
+        with get_tracer().span("device_store.index", devices=len(devices)) as span, self._lock:
+            incoming = {device['id']: device for device in devices if device.get('id') is not None}
+            removed = [device_id for device_id in self._devices if device_id not in incoming]
+            self._delete(removed)
+            # _put enriches and classifies the devices that changed
+            changed = sum(self._put(device) for device in incoming.values())
+            if removed or changed:
+                self._changed()
+            span.set_attribute("changed", changed)
+            span.set_attribute("removed", len(removed))
+        logger.info(f"Indexed {len(incoming)} devices ({changed} changed, {len(removed)} removed)")
+
+    def upsert(self, devices: List[Dict[str, Any]]):
+        with self._lock:
+            if sum(self._put(device) for device in devices if device.get('id') is not None):
+                self._changed()
+
+    def remove(self, device_ids: List[str]):
+        with self._lock:
+            if self._delete(device_ids):
+                self._changed()
+
+    def _delete(self, device_ids: List[str]) -> int:
+        deleted = 0
+        for device_id in device_ids:
+            if device_id in self._devices:
+                self._remove(device_id)
+                self._sources.pop(device_id, None)
+                deleted += 1
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        """Device counts per group, read from the maintained counters"""
+        with self._lock:
+            stats: Dict[str, Any] = {'total_devices': len(self._devices)}
+            for group, counts in self._counts.items():
+                stats[f'by_{group}'] = dict(counts)
+            return stats
+
+    def get(self, device_id: str) -> Optional[Dict[str, Any]]:
+        return self._devices.get(device_id)
+
+    def all(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._devices.values())
+
+    def sources(self) -> List[Dict[str, Any]]:
+        """Copies of the devices as given (before enrichment), safe to modify and upsert again"""
+        with self._lock:
+            return [{**device, 'metadata': dict(device.get('metadata') or {})} for device in self._sources.values()]
+
+    def search(self, text: str, fields: Optional[List[str]] = None, limit: int = DEFAULT_LIMIT,
+               offset: int = 0) -> Dict[str, Any]:
+        """Ranked substring search over names, addresses, serials, categories and locations"""
+        limit = max(1, min(limit, MAX_LIMIT))
+        with self._lock:
+            ranked = self.search_index.search(text)
+            page = ranked[offset:offset + limit]
+            return {
+                'query': text,
+                'devices': [{**project(self._devices[i], fields), 'score': score} for i, score in page],
+                'count': len(page),
+                'offset': offset,
+                'limit': limit,
+                'has_more': offset + limit < len(ranked),
+                'version': self.version
+            }
+
+    def match_ids(self, filters: Dict[str, List[str]]) -> Set[str]:
+        """Ids matching every filter; values given for one field are alternatives"""
+        with self._lock:
+            candidates: List[Set[str]] = []
+            for field, values in filters.items():
+                if field not in self._indexes:
+                    raise ValueError(f"Unsupported filter: {field}")
+                index = self._indexes[field]
+                ids: Set[str] = set()
+                for value in values:
+                    ids |= index.get(str(value).lower(), set())
+                candidates.append(ids)
+            if not candidates:
+                return set(self._devices)
+            candidates.sort(key=len)
+            return set(candidates[0]).intersection(*candidates[1:])
+
+    def _sorted(self, ids: Set[str], sort: str) -> List[Tuple[Tuple, str]]:
+        """Matching (sort key, id) pairs in ascending order"""
+        def keyed(device_ids):
+            return sorted((_sort_key(get_field(self._devices[i], sort)), i) for i in device_ids)
+
+        # Small selections are cheaper to sort directly than to pick out of the full order
+        if len(ids) * 8 < len(self._devices):
+            return keyed(ids)
+        order = self._orders.get(sort)
+        if order is None:
+            order = self._orders[sort] = keyed(self._devices)
+        if len(ids) == len(self._devices):
+            return order
+        return [key for key in order if key[1] in ids]
+
+    def query(self, filters: Optional[Dict[str, List[str]]] = None, sort: str = 'id',
+              descending: bool = False, fields: Optional[List[str]] = None,
+              limit: int = DEFAULT_LIMIT, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        One page of devices matching filters, ordered by the sort field (ties broken by id).
+        `next_cursor` resumes after the last device returned, and stays valid while devices change.
+        """
+        limit = max(1, min(limit, MAX_LIMIT))
+        with self._lock:
+            ids = self.match_ids(filters or {})
+            order = self._sorted(ids, sort)
+
+            # Pages are slices of the ascending order; descending pages walk it from the end
+            position = None
+            if cursor:
+                sort_value, device_id = decode_cursor(cursor)
+                position = (_sort_key(sort_value), device_id)
+            if descending:
+                end = bisect_left(order, position) if position else len(order)
+                start = max(0, end - limit)
+                page_keys = order[start:end][::-1]
+                has_more = start > 0
+            else:
+                start = bisect_right(order, position) if position else 0
+                page_keys = order[start:start + limit]
+                has_more = start + limit < len(order)
+
+            page = [self._devices[i] for _, i in page_keys]
+            next_cursor = None
+            if has_more and page:
+                last = page[-1]
+                next_cursor = encode_cursor(get_field(last, sort), last['id'])
+
+            return {
+                'devices': [project(device, fields) for device in page],
+                'total_count': len(order),
+                'count': len(page),
+                'next_cursor': next_cursor,
+                'version': self.version
+            }
+
+
+_store = None
+def get_device_store() -> DeviceStore:
+    global _store
+    if _store is None:
+        _store = DeviceStore()
+    return _store
@@ -9,32 +9,208 @@ import json
 import shutil
 import subprocess
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, IO, Iterator, Tuple
 import logging
 import zipfile
+import tarfile
+import tempfile
 import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+MANIFEST_NAME = "deployment-manifest.json"
+BUILD_CACHE_NAME = ".build-cache.json"
+BUILD_CACHE_VERSION = 1
+HASH_WORKERS = 8
+HASH_CHUNK_SIZE = 1024 * 1024
+# Already compressed; deflating them again only costs build time
+STORED_SUFFIXES = (".whl", ".zip", ".gz", ".tgz")
+
+
+def stream_sha256(stream: IO[bytes]) -> str:
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    with open(path, 'rb') as f:
+        return stream_sha256(f)
+
+
+def build_id(files: Dict[str, str]) -> str:
+    """Identity of a build: the hash of its file -> hash map"""
+    return hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()
+
+
+class BuildCache:
+    """File hashes keyed by path, mtime and size, plus the last wheel download, kept between builds"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.hashes: Dict[str, List[Any]] = {}
+        self.wheels: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == BUILD_CACHE_VERSION:
+                self.hashes = data.get("hashes", {})
+                self.wheels = data.get("wheels", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable build cache {path}: {e}")
+
+    def hash_files(self, paths: List[Path]) -> Dict[Path, str]:
+        """SHA-256 of each file; unchanged files come from the cache, the rest are hashed in parallel"""
+        results = {}
+        pending = []
+        for path in paths:
+            stat = path.stat()
+            cached = self.hashes.get(str(path))
+            if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                results[path] = cached[2]
+            else:
+                pending.append((path, stat))
+        self.hits += len(results)
+        self.misses += len(pending)
+
+        with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+            digests = pool.map(file_sha256, [path for path, _ in pending])
+            for (path, stat), digest in zip(pending, digests, strict=True):
+                self.hashes[str(path)] = [stat.st_mtime_ns, stat.st_size, digest]
+                results[path] = digest
+
+        # Files no longer in the build are dropped
+        keep = {str(path) for path in paths}
+        self.hashes = {key: value for key, value in self.hashes.items() if key in keep}
+        return results
+
+    def save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump({"version": BUILD_CACHE_VERSION, "hashes": self.hashes, "wheels": self.wheels}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write build cache {self.path}: {e}")
+
+
+class PackageArchive:
+    """
+    A zip or tar package read member by member, without extracting it. Tar packages are read as a
+    stream, so their manifest has to be the first member (packages built here always start with it).
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self.is_zip = zipfile.is_zipfile(self.path)
+
+    def manifest(self) -> Dict[str, Any]:
+        if self.is_zip:
+            with zipfile.ZipFile(self.path) as zipf:
+                return json.loads(zipf.read(MANIFEST_NAME))
+        with tarfile.open(self.path, mode="r|*") as tar:
+            first = tar.next()
+            if first is None or first.name != MANIFEST_NAME:
+                raise ValueError("Deployment manifest is not the first member of the package")
+            return json.load(tar.extractfile(first))
+
+    def members(self) -> Iterator[Tuple[str, IO[bytes]]]:
+        """(name, file object) for every regular file, in archive order"""
+        if self.is_zip:
+            with zipfile.ZipFile(self.path) as zipf:
+                for info in zipf.infolist():
+                    if not info.is_dir():
+                        with zipf.open(info) as f:
+                            yield info.filename, f
+        else:
+            with tarfile.open(self.path, mode="r|*") as tar:
+                for member in tar:
+                    if member.isfile():
+                        yield member.name, tar.extractfile(member)
+
+    def hash_members(self) -> Dict[str, str]:
+        """SHA-256 of every file; zip members are hashed in parallel, a tar stream in a single pass"""
+        if not self.is_zip:
+            return {name: stream_sha256(f) for name, f in self.members()}
+
+        with zipfile.ZipFile(self.path) as zipf:
+            names = [info.filename for info in zipf.infolist() if not info.is_dir()]
+        local = threading.local()
+        handles = []
+
+        def hash_member(name: str) -> str:
+            # One handle per worker: a ZipFile's file position is shared by its open members
+            if not hasattr(local, 'zipf'):
+                local.zipf = zipfile.ZipFile(self.path)
+                handles.append(local.zipf)
+            with local.zipf.open(name) as f:
+                return stream_sha256(f)
+
+        try:
+            with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+                return dict(zip(names, pool.map(hash_member, names), strict=True))
+        finally:
+            for handle in handles:
+                handle.close()
+
+
+def _sync_file(src: Path, dest: Path) -> bool:
+    """Copy src unless dest is already that file (copy2 keeps mtime, so size and mtime identify it)"""
+    if dest.exists():
+        src_stat, dest_stat = src.stat(), dest.stat()
+        if src_stat.st_size == dest_stat.st_size and src_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+            return False
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(src, dest)
+    return True
+
+
+def _sync_tree(src_dir: Path, dest_dir: Path) -> List[str]:
+    """Mirror src_dir into dest_dir, copying only changed files; returns the relative paths"""
+    rel_paths = sorted(path.relative_to(src_dir).as_posix() for path in src_dir.rglob("*") if path.is_file())
+    copied = sum(_sync_file(src_dir / rel, dest_dir / rel) for rel in rel_paths)
+    wanted = set(rel_paths)
+    for path in list(dest_dir.rglob("*")):
+        if path.is_file() and path.relative_to(dest_dir).as_posix() not in wanted:
+            path.unlink()
+    logger.info(f"  {copied} of {len(rel_paths)} files changed in {src_dir}")
+    return rel_paths
+
 
 class AirGappedDeployment:
     """
     Creates and manages air-gapped deployments for corporate environments
     """
     
-    def __init__(self, output_dir: str = "./air-gapped-deployment"):
+    def __init__(self, output_dir: str = "./air-gapped-deployment", archive_format: str = "zip"):
         self.output_dir = Path(output_dir)
+        self.archive_format = archive_format
         self.deployment_manifest = {}
         self.bundled_dependencies = []
         self.verification_hashes = {}
+        self.build_cache = BuildCache(self.output_dir / BUILD_CACHE_NAME)
         
-    def create_air_gapped_package(self, include_python: bool = False) -> str:
+    def create_air_gapped_package(self, include_python: bool = False, delta: bool = False,
+                                  base_manifest: Optional[str] = None) -> str:
         """
         Create complete air-gapped deployment package
         
+        The staging directory is kept between runs: only changed files are copied, unchanged
+        files are not hashed again and the last wheel download is reused.
+        
         Args:
             include_python: Whether to bundle Python interpreter
+            delta: Package only the files changed since the previous build in output_dir
+            base_manifest: Package only the files changed since this manifest (e.g. a site's install)
             
         Returns:
             str: Path to created package
@@ -45,6 +221,11 @@ class AirGappedDeployment:
         package_dir = self.output_dir / "enhanced-network-api-airgapped"
         package_dir.mkdir(parents=True, exist_ok=True)
         
+        # Read the base before this build overwrites the previous manifest
+        base = None
+        if delta or base_manifest:
+            base = self._load_base_manifest(Path(base_manifest) if base_manifest else package_dir / MANIFEST_NAME)
+        
         # Create deployment manifest
         self.deployment_manifest = {
             "package_type": "air_gapped",
@@ -76,12 +257,18 @@ class AirGappedDeployment:
         # Create installation scripts
         self._create_airgapped_installers(package_dir)
         
-        # Create verification files
-        self._create_verification_files(package_dir)
-        
         # Create documentation
         self._create_airgapped_documentation(package_dir)
         
+        # Hash everything staged (the manifest covers every other file)
+        self._hash_package(package_dir)
+        if base is not None:
+            self._compute_delta(base)
+        
+        # Create verification files
+        self._create_verification_files(package_dir)
+        self.build_cache.save()
+        
         # Create final package
         package_path = self._create_final_package(package_dir)
         
@@ -111,44 +298,35 @@ class AirGappedDeployment:
         }
         
         try:
-            # Extract package to temporary directory
-            temp_dir = Path("./temp-validation")
-            temp_dir.mkdir(exist_ok=True)
+            # Members are hashed straight from the archive; nothing is extracted
+            package = PackageArchive(package_path)
+            manifest = package.manifest()
+            validation_results["manifest_valid"] = True
             
-            with zipfile.ZipFile(package_path, 'r') as zipf:
-                zipf.extractall(temp_dir)
+            actual_hashes = package.hash_members()
             
-            # Validate manifest
-            manifest_file = temp_dir / "deployment-manifest.json"
-            if manifest_file.exists():
-                with open(manifest_file, 'r') as f:
-                    manifest = json.load(f)
-                    validation_results["manifest_valid"] = True
-                    
-                # Validate components
-                components_valid = self._validate_components(temp_dir, manifest)
-                validation_results["components_valid"] = components_valid
-                
-                # Validate dependencies  
-                deps_valid = self._validate_dependencies(temp_dir, manifest)
-                validation_results["dependencies_valid"] = deps_valid
-                
-                # Verify hashes
-                hash_results = self._verify_package_hashes(temp_dir, manifest)
-                validation_results["hash_verification"] = hash_results
-                
-                # Overall validation
-                validation_results["package_valid"] = all([
-                    validation_results["manifest_valid"],
-                    validation_results["components_valid"], 
-                    validation_results["dependencies_valid"]
-                ])
-            else:
-                validation_results["issues"].append("Deployment manifest not found")
+            # Validate components and dependencies
+            missing_components = self._missing_entries(manifest.get("components", []), manifest, actual_hashes)
+            missing_dependencies = self._missing_entries(manifest.get("dependencies", []), manifest, actual_hashes)
+            validation_results["components_valid"] = not missing_components
+            validation_results["dependencies_valid"] = not missing_dependencies
+            validation_results["missing_components"] = missing_components + missing_dependencies
+            
+            # Verify hashes
+            hash_results = {path: actual_hashes.get(path) == expected_hash
+                            for path, expected_hash in self._expected_hashes(manifest).items()}
+            validation_results["hash_verification"] = hash_results
             
-            # Cleanup
-            shutil.rmtree(temp_dir)
+            # Overall validation
+            validation_results["package_valid"] = all([
+                validation_results["manifest_valid"],
+                validation_results["components_valid"], 
+                validation_results["dependencies_valid"],
+                all(hash_results.values())
+            ])
             
+        except KeyError:
+            validation_results["issues"].append("Deployment manifest not found")
         except Exception as e:
             validation_results["issues"].append(f"Validation error: {e}")
             logger.error(f"❌ Package validation failed: {e}")
@@ -175,14 +353,21 @@ class AirGappedDeployment:
             # Create installation directory
             install_path.mkdir(parents=True, exist_ok=True)
             
-            # Extract package
-            with zipfile.ZipFile(package_path, 'r') as zipf:
-                zipf.extractall(install_path)
-            
-            # Load manifest
-            manifest_file = install_path / "deployment-manifest.json"
-            with open(manifest_file, 'r') as f:
-                manifest = json.load(f)
+            # Unpack, verifying each file as it is written (a delta goes on top of the existing install)
+            package = PackageArchive(package_path)
+            manifest = package.manifest()
+            if manifest.get("delta"):
+                if not self._apply_delta_package(package, manifest, install_path):
+                    return False
+                # Updated wheels are only on disk until pip installs them
+                wheels = [install_path / rel_path for rel_path in manifest["delta"]["changed"]
+                          if rel_path.startswith("wheels/") and rel_path.endswith(".whl")]
+                if wheels and not self._install_bundled_dependencies(install_path, wheels):
+                    logger.warning("⚠️  Some updated dependencies may not be installed")
+                return True
+            if not self._stream_install(package, manifest, install_path):
+                return False
+            self._write_manifest(manifest, install_path)
             
             # Install dependencies from bundled wheels
             if not self._install_bundled_dependencies(install_path):
@@ -220,6 +405,7 @@ class AirGappedDeployment:
             "ssl_helper.py",
             "corporate_network_helper.py",
             "certificate_discovery.py",
+            "detection_cache.py",
             "corporate_environment_detector.py",
             "corporate_installer.py",
             "enhanced_network_api_agent.yaml"
@@ -227,24 +413,23 @@ class AirGappedDeployment:
         
         for file_name in core_files:
             src_file = Path(file_name)
+            dest_file = src_dir / file_name
             if src_file.exists():
-                dest_file = src_dir / file_name
-                shutil.copy2(src_file, dest_file)
-                
-                # Calculate hash for verification
-                with open(dest_file, 'rb') as f:
-                    file_hash = hashlib.sha256(f.read()).hexdigest()
-                    self.verification_hashes[file_name] = file_hash
+                copied = _sync_file(src_file, dest_file)
                 
+                # Hashes are filled in by _hash_package
                 self.deployment_manifest["components"].append({
                     "name": file_name,
+                    "path": f"src/{file_name}",
                     "type": "core_component",
-                    "size": dest_file.stat().st_size,
-                    "hash": file_hash
+                    "size": dest_file.stat().st_size
                 })
                 
-                logger.info(f"  ✅ {file_name}")
+                logger.info(f"  ✅ {file_name}" + ("" if copied else " (unchanged)"))
             else:
+                if dest_file.exists():
+                    # Left over from a previous build
+                    dest_file.unlink()
                 logger.warning(f"  ⚠️  {file_name} not found")
     
     def _bundle_api_documentation(self, package_dir: Path) -> None:
@@ -254,22 +439,13 @@ class AirGappedDeployment:
         api_src = Path("./api")
         if api_src.exists():
             api_dest = package_dir / "api"
-            shutil.copytree(api_src, api_dest, exist_ok=True)
-            
-            # Calculate documentation hashes
-            for doc_file in api_dest.rglob("*"):
-                if doc_file.is_file():
-                    rel_path = doc_file.relative_to(api_dest)
-                    with open(doc_file, 'rb') as f:
-                        file_hash = hashlib.sha256(f.read()).hexdigest()
-                        self.verification_hashes[f"api/{rel_path}"] = file_hash
-                    
-                    self.deployment_manifest["components"].append({
-                        "name": f"api/{rel_path}",
-                        "type": "api_documentation",
-                        "size": doc_file.stat().st_size,
-                        "hash": file_hash
-                    })
+            for rel_path in _sync_tree(api_src, api_dest):
+                self.deployment_manifest["components"].append({
+                    "name": f"api/{rel_path}",
+                    "path": f"api/{rel_path}",
+                    "type": "api_documentation",
+                    "size": (api_dest / rel_path).stat().st_size
+                })
             
             logger.info("  ✅ API documentation bundled")
         else:
@@ -293,44 +469,69 @@ class AirGappedDeployment:
             "PySocks>=1.7.1"
         ]
         
+        requirements_text = "\n".join(requirements)
         requirements_file = package_dir / "requirements-airgapped.txt"
-        requirements_file.write_text("\\n".join(requirements))
+        requirements_file.write_text(requirements_text)
+        requirements_hash = hashlib.sha256(requirements_text.encode()).hexdigest()
+        
+        # The previous download is reused while the requirements are unchanged
+        previous = self.build_cache.wheels
+        wheel_names = previous.get("files") or []
+        if (previous.get("requirements") == requirements_hash and wheel_names
+                and all((wheels_dir / name).exists() for name in wheel_names)):
+            self._prune_wheels(wheels_dir, wheel_names)
+            logger.info(f"  ✅ Reusing {len(wheel_names)} downloaded Python packages")
+        else:
+            wheel_names = self._download_wheels(requirements_file, wheels_dir)
+            if wheel_names is None:
+                return
+            self.build_cache.wheels = {"requirements": requirements_hash, "files": wheel_names}
+            logger.info(f"  ✅ Bundled {len(wheel_names)} Python packages")
         
-        # Download wheels for offline installation
+        for wheel_name in wheel_names:
+            self.deployment_manifest["dependencies"].append({
+                "name": wheel_name,
+                "path": f"wheels/{wheel_name}",
+                "type": "python_wheel",
+                "size": (wheels_dir / wheel_name).stat().st_size
+            })
+            self.bundled_dependencies.append(wheel_name)
+    
+    def _download_wheels(self, requirements_file: Path, wheels_dir: Path) -> Optional[List[str]]:
+        """
+        Download wheels for offline installation; the wheel file names, or None on failure.
+        pip downloads into an empty directory, so a version bump leaves only the new wheel behind.
+        """
         try:
-            cmd = [
-                sys.executable, "-m", "pip", "download",
-                "-r", str(requirements_file),
-                "-d", str(wheels_dir),
-                "--no-deps"  # Download only specified packages
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                # List bundled wheels
-                wheel_files = list(wheels_dir.glob("*.whl"))
-                for wheel_file in wheel_files:
-                    with open(wheel_file, 'rb') as f:
-                        file_hash = hashlib.sha256(f.read()).hexdigest()
-                        self.verification_hashes[f"wheels/{wheel_file.name}"] = file_hash
-                    
-                    self.deployment_manifest["dependencies"].append({
-                        "name": wheel_file.name,
-                        "type": "python_wheel",
-                        "size": wheel_file.stat().st_size,
-                        "hash": file_hash
-                    })
-                    
-                    self.bundled_dependencies.append(wheel_file.name)
+            with tempfile.TemporaryDirectory(dir=self.output_dir) as download_dir:
+                cmd = [
+                    sys.executable, "-m", "pip", "download",
+                    "-r", str(requirements_file),
+                    "-d", download_dir,
+                    "--no-deps"  # Download only specified packages
+                ]
                 
-                logger.info(f"  ✅ Bundled {len(wheel_files)} Python packages")
-            else:
+                result = subprocess.run(cmd, capture_output=True, text=True)
+                
+                if result.returncode == 0:
+                    wheel_names = sorted(wheel_file.name for wheel_file in Path(download_dir).glob("*.whl"))
+                    for name in wheel_names:
+                        os.replace(Path(download_dir) / name, wheels_dir / name)
+                    self._prune_wheels(wheels_dir, wheel_names)
+                    return wheel_names
                 logger.warning("  ⚠️  Could not download all dependencies")
                 logger.warning(f"  Error: {result.stderr}")
                 
         except Exception as e:
             logger.warning(f"  ⚠️  Error bundling dependencies: {e}")
+        return None
+    
+    @staticmethod
+    def _prune_wheels(wheels_dir: Path, keep: List[str]) -> None:
+        """Drop staged wheels of an earlier download so old and new versions are never shipped together"""
+        for wheel_file in wheels_dir.glob("*.whl"):
+            if wheel_file.name not in keep:
+                wheel_file.unlink()
     
     def _bundle_python_interpreter(self, package_dir: Path) -> None:
         """Bundle Python interpreter (platform-specific)"""
@@ -558,9 +759,10 @@ if __name__ == "__main__":
         
         # Save verification hashes
         self.deployment_manifest["verification_hashes"] = self.verification_hashes
+        self.deployment_manifest["build_id"] = build_id(self.verification_hashes)
         
         # Create manifest file
-        manifest_file = package_dir / "deployment-manifest.json"
+        manifest_file = package_dir / MANIFEST_NAME
         with open(manifest_file, 'w') as f:
             json.dump(self.deployment_manifest, f, indent=2)
         
@@ -706,61 +908,198 @@ Check the `api/` directory for complete API references.
         
         logger.info("  ✅ Air-gapped documentation created")
     
+    def _hash_package(self, package_dir: Path) -> None:
+        """Hash every staged file except the manifest and fill in the component/dependency hashes"""
+        paths = sorted(path for path in package_dir.rglob("*") if path.is_file() and path.name != MANIFEST_NAME)
+        misses = self.build_cache.misses
+        hashes = self.build_cache.hash_files(paths)
+        self.verification_hashes = {path.relative_to(package_dir).as_posix(): hashes[path] for path in paths}
+        
+        for entry in self.deployment_manifest["components"] + self.deployment_manifest["dependencies"]:
+            entry["hash"] = self.verification_hashes.get(entry["path"])
+        
+        logger.info(f"🔐 Hashed {len(paths)} files ({len(paths) - (self.build_cache.misses - misses)} unchanged)")
+    
+    def _load_base_manifest(self, manifest_path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(manifest_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️  No usable base manifest ({e}); creating a full package")
+            return None
+    
+    def _compute_delta(self, base: Dict[str, Any]) -> None:
+        """Record which files changed or were removed since the base build"""
+        base_files = base.get("verification_hashes", {})
+        changed = sorted(path for path, file_hash in self.verification_hashes.items()
+                         if base_files.get(path) != file_hash)
+        removed = sorted(path for path in base_files if path not in self.verification_hashes)
+        self.deployment_manifest["delta"] = {
+            "base_build_id": base.get("build_id") or build_id(base_files),
+            "base_created_at": base.get("created_at"),
+            "changed": changed,
+            "removed": removed
+        }
+        logger.info(f"📦 Delta: {len(changed)} changed, {len(removed)} removed, "
+                    f"{len(self.verification_hashes) - len(changed)} unchanged")
+    
     def _create_final_package(self, package_dir: Path) -> str:
-        """Create final ZIP package"""
+        """Create final ZIP package (only the changed files and the manifest for a delta)"""
         logger.info("📦 Creating final air-gapped package...")
         
-        package_name = f"enhanced-network-api-airgapped-{datetime.now().strftime('%Y%m%d')}.zip"
+        delta = self.deployment_manifest.get("delta")
+        kind = "airgapped-delta" if delta else "airgapped"
+        extension = "tar.gz" if self.archive_format == "tar.gz" else "zip"
+        package_name = f"enhanced-network-api-{kind}-{datetime.now().strftime('%Y%m%d')}.{extension}"
         package_path = self.output_dir / package_name
         
-        with zipfile.ZipFile(package_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(package_dir):
-                for file in files:
-                    file_path = Path(root) / file
-                    arc_path = file_path.relative_to(package_dir.parent)
-                    zipf.write(file_path, arc_path)
+        # Paths are relative to the package root, where the installer and validator expect them.
+        # The manifest goes first so streaming readers know the expected hashes up front.
+        members = [MANIFEST_NAME] + (delta["changed"] if delta else list(self.verification_hashes))
+        if extension == "tar.gz":
+            with tarfile.open(package_path, 'w:gz') as tar:
+                for rel_path in members:
+                    tar.add(package_dir / rel_path, rel_path)
+        else:
+            with zipfile.ZipFile(package_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                for rel_path in members:
+                    compress_type = zipfile.ZIP_STORED if rel_path.endswith(STORED_SUFFIXES) else zipfile.ZIP_DEFLATED
+                    zipf.write(package_dir / rel_path, rel_path, compress_type=compress_type)
         
         return str(package_path)
     
-    # Validation and installation helper methods would go here...
-    def _validate_components(self, temp_dir: Path, manifest: Dict[str, Any]) -> bool:
-        """Validate that all components are present"""
-        components = manifest.get("components", [])
+    def _apply_delta_package(self, package: PackageArchive, manifest: Dict[str, Any], install_path: Path) -> bool:
+        """Apply a delta package on top of the install of its base build"""
+        delta = manifest["delta"]
+        current_file = install_path / MANIFEST_NAME
+        if not current_file.exists():
+            logger.error("❌ Delta package needs an existing installation")
+            return False
+        with open(current_file, 'r') as f:
+            current = json.load(f)
+        current_id = current.get("build_id") or build_id(current.get("verification_hashes", {}))
+        if current_id != delta["base_build_id"]:
+            logger.error(f"❌ Delta package is for build {delta['base_build_id'][:12]}, "
+                         f"installed build is {current_id[:12]}")
+            return False
         
-        for component in components:
-            component_path = temp_dir / component["name"]
-            if not component_path.exists():
-                return False
+        if not self._stream_install(package, manifest, install_path):
+            return False
+        root = install_path.resolve()
+        for rel_path in delta["removed"]:
+            target = (install_path / rel_path).resolve()
+            if root in target.parents and target.is_file():
+                target.unlink()
+        # The manifest goes last, so an interrupted update still identifies the old build
+        self._write_manifest(manifest, install_path)
         
+        logger.info(f"✅ Applied delta package: {len(delta['changed'])} files updated, "
+                    f"{len(delta['removed'])} removed")
         return True
     
-    def _validate_dependencies(self, temp_dir: Path, manifest: Dict[str, Any]) -> bool:
-        """Validate that all dependencies are present"""
-        dependencies = manifest.get("dependencies", [])
-        
-        for dependency in dependencies:
-            dep_path = temp_dir / "wheels" / dependency["name"]
-            if not dep_path.exists():
+    def _stream_install(self, package: PackageArchive, manifest: Dict[str, Any], install_path: Path) -> bool:
+        """
+        Write each member next to its destination while hashing it, stopping at the first file that
+        does not match the manifest. Files are moved into place only once every one has verified.
+        """
+        expected = self._expected_hashes(manifest)
+        root = install_path.resolve()
+        written: List[Tuple[Path, Path]] = []
+        try:
+            for name, stream in package.members():
+                if name == MANIFEST_NAME:
+                    continue
+                target = (install_path / name).resolve()
+                if name not in expected or root not in target.parents:
+                    logger.error(f"❌ Unexpected file in package: {name}")
+                    return False
+                
+                part = target.with_name(target.name + ".part")
+                part.parent.mkdir(parents=True, exist_ok=True)
+                written.append((part, target))
+                digest = hashlib.sha256()
+                with open(part, 'wb') as out:
+                    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+                        digest.update(chunk)
+                        out.write(chunk)
+                
+                if digest.hexdigest() != expected[name]:
+                    logger.error(f"❌ Hash mismatch: {name}")
+                    return False
+            
+            missing = set(expected) - {target.relative_to(root).as_posix() for _, target in written}
+            if missing:
+                logger.error(f"❌ Package is missing {len(missing)} files, e.g. {sorted(missing)[0]}")
                 return False
+            
+            for part, target in written:
+                os.replace(part, target)
+            written = []
+            logger.info(f"  ✅ {len(expected)} files verified and installed")
+            return True
+        finally:
+            # Anything not moved into place belongs to a failed install
+            for part, _ in written:
+                part.unlink(missing_ok=True)
+    
+    def _write_manifest(self, manifest: Dict[str, Any], install_path: Path) -> None:
+        with open(install_path / MANIFEST_NAME, 'w') as f:
+            json.dump(manifest, f, indent=2)
+    
+    def _install_bundled_dependencies(self, install_path: Path,
+                                      wheel_files: Optional[List[Path]] = None) -> bool:
+        """pip install the bundled wheels (or just wheel_files) without touching the network"""
+        wheels_dir = install_path / "wheels"
+        if wheel_files is None:
+            wheel_files = sorted(wheels_dir.glob("*.whl"))
+        if not wheel_files:
+            logger.warning("⚠️  No bundled wheels to install")
+            return True
         
+        cmd = [sys.executable, "-m", "pip", "install", "--no-index",
+               "--find-links", str(wheels_dir)] + [str(wheel) for wheel in wheel_files]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            logger.warning(f"  Error: {result.stderr}")
+            return False
+        logger.info(f"  ✅ Installed {len(wheel_files)} bundled packages")
         return True
     
-    def _verify_package_hashes(self, temp_dir: Path, manifest: Dict[str, Any]) -> Dict[str, bool]:
-        """Verify package file hashes"""
-        verification_hashes = manifest.get("verification_hashes", {})
-        hash_results = {}
-        
-        for file_path, expected_hash in verification_hashes.items():
-            file_obj = temp_dir / file_path
-            
-            if file_obj.exists():
-                with open(file_obj, 'rb') as f:
-                    actual_hash = hashlib.sha256(f.read()).hexdigest()
-                hash_results[file_path] = (actual_hash == expected_hash)
-            else:
-                hash_results[file_path] = False
-        
-        return hash_results
+    def _setup_bundled_python(self, install_path: Path) -> None:
+        """The interpreter is set up by hand; point at the bundled instructions"""
+        logger.info(f"🐍 Python setup instructions: {install_path / 'python' / 'PYTHON-SETUP.md'}")
+    
+    def _configure_airgapped_environment(self, install_path: Path) -> None:
+        """Make the bundled environment script executable"""
+        env_file = install_path / "air-gapped-environment.sh"
+        if env_file.exists():
+            env_file.chmod(0o755)
+            logger.info(f"⚙️  Environment: source {env_file}")
+    
+    def _run_airgapped_setup(self, install_path: Path) -> None:
+        """Create the directories the offline configuration points at"""
+        (install_path / "certificates").mkdir(exist_ok=True)
+    
+    @staticmethod
+    def _packaged(manifest: Dict[str, Any], rel_path: str) -> bool:
+        """Whether the package carries rel_path (a delta only carries the changed files)"""
+        delta = manifest.get("delta")
+        return delta is None or rel_path in delta["changed"]
+    
+    def _expected_hashes(self, manifest: Dict[str, Any]) -> Dict[str, str]:
+        """Hashes of the files the package carries"""
+        return {path: file_hash for path, file_hash in manifest.get("verification_hashes", {}).items()
+                if self._packaged(manifest, path)}
+    
+    def _missing_entries(self, entries: List[Dict[str, Any]], manifest: Dict[str, Any],
+                         present: Dict[str, str]) -> List[str]:
+        """Components or dependencies the package should carry but does not"""
+        missing = []
+        for entry in entries:
+            rel_path = entry.get("path", entry["name"])
+            if self._packaged(manifest, rel_path) and rel_path not in present:
+                missing.append(rel_path)
+        return missing
 
 
 # CLI interface
@@ -772,6 +1111,9 @@ def main():
     parser.add_argument("--validate", help="Validate air-gapped package")
     parser.add_argument("--install", help="Install air-gapped package")
     parser.add_argument("--include-python", action="store_true", help="Bundle Python interpreter")
+    parser.add_argument("--delta", action="store_true", help="Package only files changed since the previous build")
+    parser.add_argument("--base-manifest", help="Package only files changed since this deployment manifest")
+    parser.add_argument("--format", choices=["zip", "tar.gz"], default="zip", help="Package archive format")
     parser.add_argument("--output-dir", default="./air-gapped-deployment", help="Output directory")
     parser.add_argument("--install-dir", default="./air-gapped-install", help="Installation directory")
     
@@ -780,13 +1122,15 @@ def main():
     # Configure logging
     logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
     
-    deployment = AirGappedDeployment(args.output_dir)
+    deployment = AirGappedDeployment(args.output_dir, archive_format=args.format)
     
     if args.create:
         print("🔒 Creating Air-Gapped Package")
         print("=" * 40)
         package_path = deployment.create_air_gapped_package(
-            include_python=args.include_python
+            include_python=args.include_python,
+            delta=args.delta,
+            base_manifest=args.base_manifest
         )
         print(f"✅ Air-gapped package created: {package_path}")
         print(f"📦 Package size: {Path(package_path).stat().st_size / (1024*1024):.1f} MB")
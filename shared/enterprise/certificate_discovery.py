@@ -11,11 +11,13 @@ import socket
 import subprocess
 import platform
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable
 import logging
 from datetime import datetime
 import hashlib
 import base64
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # Certificate parsing
 try:
@@ -26,25 +28,81 @@ except ImportError:
     CRYPTOGRAPHY_AVAILABLE = False
     print("⚠️  cryptography library not available. Some certificate features may be limited.")
 
+try:
+    from .detection_cache import (DetectionCache, get_detection_cache, fingerprint, env_fingerprint,
+                                  paths_fingerprint, proxy_fingerprint, NETWORK_MAX_AGE)
+except ImportError:
+    from detection_cache import (DetectionCache, get_detection_cache, fingerprint, env_fingerprint,
+                                 paths_fingerprint, proxy_fingerprint, NETWORK_MAX_AGE)
+
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for all discovery sources, and for the validation stage
+DISCOVERY_TIMEOUT = 30
+VALIDATION_TIMEOUT = 60
+VALIDATION_WORKERS = 8
+
+CERT_ENV_VARS = [
+    "ZSCALER_CA_PATH",
+    "CORPORATE_CA_PATH",
+    "SSL_CERT_FILE",
+    "REQUESTS_CA_BUNDLE",
+    "CURL_CA_BUNDLE",
+    "SSL_CERT_DIR"
+]
+
+
+def _file_digest(path: str) -> Optional[str]:
+    """SHA-256 of a file's content, or None if it cannot be read"""
+    try:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    except (OSError, TypeError):
+        return None
+
+
+def _current_validity(validation: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    validation with expired/not_yet_valid worked out for now. Validations are cached by content,
+    so the flags stored when a certificate was first probed go stale as time passes.
+    """
+    details = validation.get("certificate_details") or {}
+    if "not_valid_after" not in details:
+        return validation
+    now = datetime.now()
+    expired = datetime.fromisoformat(details["not_valid_after"]) < now
+    not_yet_valid = datetime.fromisoformat(details["not_valid_before"]) > now
+    issues = [issue for issue in validation.get("issues", []) if issue != "Certificate is expired"]
+    if expired:
+        issues.append("Certificate is expired")
+    return {**validation, "issues": issues,
+            "certificate_details": {**details, "expired": expired, "not_yet_valid": not_yet_valid}}
+
 
 class CorporateCertificateDiscovery:
     """
     Comprehensive SSL certificate discovery and validation for corporate environments
     """
     
-    def __init__(self):
+    def __init__(self, cache: Optional[DetectionCache] = None):
         self.discovered_certificates = []
         self.validation_results = {}
         self.certificate_chains = {}
+        self.cache = cache or get_detection_cache()
+        self._parsed_certificates: Dict[str, Dict[str, Any]] = {}  # by SHA-256 of the certificate data
         
-    def auto_discover_certificates(self) -> Dict[str, Any]:
+    def auto_discover_certificates(self, refresh: bool = False) -> Dict[str, Any]:
         """
-        Automatically discover SSL certificates in corporate environment
+        Automatically discover SSL certificates in corporate environment.
+        The discovery sources run concurrently (bounded by DISCOVERY_TIMEOUT), then each distinct
+        certificate content is validated once. Each step is served from the detection cache while
+        what it looked at is unchanged; refresh=True probes everything again.
         
         Returns:
-            Dict: Discovery results with found certificates and recommendations
+            Dict: Discovery results with found certificates, recommendations and per-source timings
         """
         logger.info("🔍 Starting automated SSL certificate discovery...")
         
@@ -56,38 +114,52 @@ class CorporateCertificateDiscovery:
             "discovery_methods": []
         }
         
-        # 1. Environment variable discovery
-        env_certs = self._discover_from_environment()
-        if env_certs:
-            discovery_results["certificates_found"].extend(env_certs)
-            discovery_results["discovery_methods"].append("environment_variables")
-        
-        # 2. File system discovery
-        fs_certs = self._discover_from_filesystem()
-        if fs_certs:
-            discovery_results["certificates_found"].extend(fs_certs)
-            discovery_results["discovery_methods"].append("filesystem_scan")
-        
-        # 3. System certificate store discovery
-        sys_certs = self._discover_from_system_store()
-        if sys_certs:
-            discovery_results["certificates_found"].extend(sys_certs)
-            discovery_results["discovery_methods"].append("system_certificate_store")
-        
-        # 4. Network-based discovery (test actual SSL connections)
-        network_certs = self._discover_from_network_connections()
-        if network_certs:
-            discovery_results["certificates_found"].extend(network_certs)
-            discovery_results["discovery_methods"].append("network_analysis")
+        cache = self.cache
+        is_windows = platform.system() == "Windows"
+        started = time.perf_counter()
+
+        # 1-4. Discovery sources run concurrently; each is served from the cache while the
+        # environment variables, directories and files it looked at are unchanged
+        sources = [
+            ("environment_variables", "certificates.environment",
+             fingerprint(env_fingerprint(CERT_ENV_VARS), paths_fingerprint(filter(None, map(os.environ.get, CERT_ENV_VARS)))),
+             self._discover_from_environment, None),
+            ("filesystem_scan", "certificates.filesystem",
+             fingerprint(paths_fingerprint(self._filesystem_search_locations())),
+             self._discover_from_filesystem, None),
+            # The Windows store has no file to watch, so it is re-read once a day
+            ("system_certificate_store", "certificates.system_store",
+             fingerprint(paths_fingerprint(self._system_store_locations())),
+             self._discover_from_system_store, NETWORK_MAX_AGE if is_windows else None),
+            ("network_analysis", "certificates.network", proxy_fingerprint(),
+             self._discover_from_network_connections, NETWORK_MAX_AGE),
+            ("corporate_software", "certificates.corporate_software",
+             fingerprint(paths_fingerprint(self._corporate_software_paths())),
+             self._detect_corporate_software, None)
+        ]
+        results, timings = self._run_timed(
+            {name: (lambda section=section, key=key, probe=probe, max_age=max_age:
+                    cache.get_or_probe(section, key, probe, refresh, max_age=max_age))
+             for name, section, key, probe, max_age in sources},
+            timeout=DISCOVERY_TIMEOUT
+        )
+
+        for name, *_ in sources[:4]:
+            if results.get(name):
+                discovery_results["certificates_found"].extend(results[name])
+                discovery_results["discovery_methods"].append(name)
         
         # 5. Corporate software detection
-        corporate_indicators = self._detect_corporate_software()
-        discovery_results["corporate_indicators"] = corporate_indicators
+        discovery_results["corporate_indicators"] = results.get("corporate_software") or []
         
-        # 6. Validate discovered certificates
-        for cert_info in discovery_results["certificates_found"]:
-            validation = self._validate_certificate(cert_info)
-            discovery_results["validation_results"][cert_info["path"]] = validation
+        # 6. Validate discovered certificates, once per distinct file content
+        validation_started = time.perf_counter()
+        discovery_results["validation_results"] = self._validate_certificates(
+            discovery_results["certificates_found"], refresh
+        )
+        timings["validation"] = {"status": "ok", "ms": round((time.perf_counter() - validation_started) * 1000, 1)}
+        timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        discovery_results["timings"] = timings
         
         # 7. Generate recommendations
         discovery_results["recommendations"] = self._generate_certificate_recommendations(discovery_results)
@@ -96,6 +168,87 @@ class CorporateCertificateDiscovery:
         
         return discovery_results
     
+    def _run_timed(self, tasks: Dict[str, Callable[[], Any]], timeout: float,
+                   max_workers: Optional[int] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Run tasks concurrently. Returns results by name (tasks that failed or did not finish
+        within timeout are left out) and per-task {"status", "ms"} timings.
+        """
+        results: Dict[str, Any] = {}
+        timings: Dict[str, Any] = {}
+
+        def timed(task):
+            start = time.perf_counter()
+            try:
+                return "ok", task(), time.perf_counter() - start
+            except Exception as e:
+                return "error", e, time.perf_counter() - start
+
+        executor = ThreadPoolExecutor(max_workers=max_workers or len(tasks) or 1,
+                                      thread_name_prefix="cert-discovery")
+        futures = {executor.submit(timed, task): name for name, task in tasks.items()}
+        done, pending = wait(futures, timeout=timeout)
+        # Stragglers keep running in the background; their results are discarded
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        for future in done:
+            name = futures[future]
+            status, value, elapsed = future.result()
+            timings[name] = {"status": status, "ms": round(elapsed * 1000, 1)}
+            if status == "ok":
+                results[name] = value
+            else:
+                logger.warning(f"Certificate discovery step {name} failed: {value}")
+        for future in pending:
+            name = futures[future]
+            logger.warning(f"Certificate discovery step {name} timed out after {timeout}s")
+            timings[name] = {"status": "timeout", "ms": round(timeout * 1000, 1)}
+        return results, timings
+
+    def _validate_certificates(self, certificates: List[Dict[str, Any]], refresh: bool = False) -> Dict[str, Any]:
+        """
+        Validation results by path. Candidates are grouped by the SHA-256 of their content
+        (bundles are often reachable from several paths and environment variables), and each
+        distinct content is validated once, by a bounded pool.
+        """
+        by_digest: Dict[str, List[Dict[str, Any]]] = {}
+        validation_results: Dict[str, Any] = {}
+        for cert_info in certificates:
+            digest = _file_digest(cert_info["path"])
+            if digest is None:
+                # Missing files and network-discovered entries have no content to share
+                validation_results[cert_info["path"]] = self._validate_certificate(cert_info)
+            else:
+                by_digest.setdefault(digest, []).append(cert_info)
+
+        tasks = {
+            digest: (lambda digest=digest, group=group: self.cache.get_or_probe(
+                f"certificates.validation:{digest}", digest, lambda: self._validate_certificate(group[0]), refresh
+            ))
+            for digest, group in by_digest.items()
+        }
+        results, timings = self._run_timed(tasks, timeout=VALIDATION_TIMEOUT, max_workers=VALIDATION_WORKERS)
+        for digest, group in by_digest.items():
+            if digest in results:
+                validation = _current_validity(results[digest])
+            else:
+                validation = {"issues": [f"Validation {timings[digest]['status']}"], "is_readable": False,
+                              "is_valid_format": False, "certificate_details": {}, "recommendations": []}
+            for cert_info in group:
+                validation_results[cert_info["path"]] = validation
+        return validation_results
+
+    def validate_certificate_chains(self, cert_paths: List[str], test_url: str = "https://httpbin.org") -> Dict[str, Any]:
+        """validate_certificate_chain for several certificates, VALIDATION_WORKERS connection tests at a time"""
+        tasks = {path: (lambda path=path: self.validate_certificate_chain(path, test_url)) for path in dict.fromkeys(cert_paths)}
+        results, timings = self._run_timed(tasks, timeout=VALIDATION_TIMEOUT, max_workers=VALIDATION_WORKERS)
+        for path in tasks:
+            if path not in results:
+                results[path] = {"certificate_path": path, "is_valid": False,
+                                 "issues": [f"Validation {timings[path]['status']}"], "test_results": {},
+                                 "certificate_info": {}, "chain_length": 0}
+        return results
+
     def validate_certificate_chain(self, cert_path: str, test_url: str = "https://httpbin.org") -> Dict[str, Any]:
         """
         Validate certificate chain for a specific certificate
@@ -244,16 +397,7 @@ class CorporateCertificateDiscovery:
         """Discover certificates from environment variables"""
         certificates = []
         
-        env_vars = [
-            "ZSCALER_CA_PATH",
-            "CORPORATE_CA_PATH",
-            "SSL_CERT_FILE", 
-            "REQUESTS_CA_BUNDLE",
-            "CURL_CA_BUNDLE",
-            "SSL_CERT_DIR"
-        ]
-        
-        for var in env_vars:
+        for var in CERT_ENV_VARS:
             cert_path = os.environ.get(var)
             if cert_path and Path(cert_path).exists():
                 certificates.append({
@@ -265,14 +409,9 @@ class CorporateCertificateDiscovery:
         
         return certificates
     
-    def _discover_from_filesystem(self) -> List[Dict[str, Any]]:
-        """Discover certificates from common file system locations"""
-        certificates = []
-        
-        search_locations = []
-        
+    def _filesystem_search_locations(self) -> List[Any]:
         if platform.system() == "Windows":
-            search_locations = [
+            return [
                 r"C:\\Program Files\\Zscaler",
                 r"C:\\Program Files (x86)\\Zscaler",
                 r"C:\\certificates",
@@ -280,15 +419,40 @@ class CorporateCertificateDiscovery:
                 Path.home() / "certificates",
                 Path.home() / ".certificates"
             ]
-        else:
-            search_locations = [
-                "/etc/ssl/certs",
-                "/usr/local/share/ca-certificates",
-                "/opt/certificates",
-                Path.home() / ".certificates",
-                Path.home() / ".ssl",
-                "/usr/share/ca-certificates"
-            ]
+        return [
+            "/etc/ssl/certs",
+            "/usr/local/share/ca-certificates",
+            "/opt/certificates",
+            Path.home() / ".certificates",
+            Path.home() / ".ssl",
+            "/usr/share/ca-certificates"
+        ]
+
+    def _system_store_locations(self) -> List[str]:
+        if platform.system() == "Windows":
+            return []
+        return [
+            "/etc/ssl/certs/ca-certificates.crt",
+            "/etc/pki/tls/certs/ca-bundle.crt",
+            "/etc/ssl/ca-bundle.pem",
+            "/usr/local/etc/ssl/certs/cacert.pem"
+        ]
+
+    def _corporate_software_paths(self) -> List[str]:
+        if platform.system() != "Windows":
+            return []
+        return [
+            r"C:\\Program Files\\Zscaler",
+            r"C:\\Program Files (x86)\\Zscaler",
+            r"C:\\Program Files\\Blue Coat",
+            r"C:\\Program Files (x86)\\Blue Coat"
+        ]
+
+    def _discover_from_filesystem(self) -> List[Dict[str, Any]]:
+        """Discover certificates from common file system locations"""
+        certificates = []
+        
+        search_locations = self._filesystem_search_locations()
         
         # Common certificate file patterns
         cert_patterns = [
@@ -323,14 +487,7 @@ class CorporateCertificateDiscovery:
             certificates.extend(self._discover_windows_cert_store())
         else:
             # Try common system certificate locations
-            system_locations = [
-                "/etc/ssl/certs/ca-certificates.crt",
-                "/etc/pki/tls/certs/ca-bundle.crt",
-                "/etc/ssl/ca-bundle.pem",
-                "/usr/local/etc/ssl/certs/cacert.pem"
-            ]
-            
-            for location in system_locations:
+            for location in self._system_store_locations():
                 if Path(location).exists():
                     certificates.append({
                         "path": location,
@@ -352,9 +509,12 @@ class CorporateCertificateDiscovery:
             ("www.google.com", 443)
         ]
         
-        for host, port in test_sites:
+        # One connection per site, all at once; each is bounded by the socket timeout
+        with ThreadPoolExecutor(max_workers=len(test_sites), thread_name_prefix="cert-probe") as executor:
+            peer_certs = list(executor.map(lambda site: self._get_certificate_from_connection(*site), test_sites))
+        
+        for (host, port), cert_info in zip(test_sites, peer_certs, strict=True):
             try:
-                cert_info = self._get_certificate_from_connection(host, port)
                 if cert_info and cert_info.get("issuer_indicates_interception"):
                     certificates.append({
                         "path": f"network_discovery_{host}",
@@ -459,6 +619,14 @@ class CorporateCertificateDiscovery:
         if not CRYPTOGRAPHY_AVAILABLE:
             return {"error": "cryptography library not available"}
         
+        # The same certificate is often reached through several paths
+        digest = hashlib.sha256(cert_data).hexdigest()
+        parsed = self._parsed_certificates.get(digest)
+        if parsed is None:
+            parsed = self._parsed_certificates[digest] = self._parse_certificate_data(cert_data)
+        return parsed
+    
+    def _parse_certificate_data(self, cert_data: bytes) -> Dict[str, Any]:
         try:
             # Try PEM format first
             try:
@@ -598,10 +766,10 @@ class CorporateCertificateDiscovery:
 
 # Convenience functions
 
-def auto_discover_corporate_certificates() -> Dict[str, Any]:
+def auto_discover_corporate_certificates(refresh: bool = False) -> Dict[str, Any]:
     """Auto-discover corporate certificates"""
     discovery = CorporateCertificateDiscovery()
-    return discovery.auto_discover_certificates()
+    return discovery.auto_discover_certificates(refresh=refresh)
 
 
 def validate_certificate(cert_path: str) -> Dict[str, Any]:
@@ -622,11 +790,12 @@ def main():
     
     parser = argparse.ArgumentParser(description="Corporate Certificate Discovery")
     parser.add_argument("--discover", action="store_true", help="Auto-discover certificates")
-    parser.add_argument("--validate", help="Validate specific certificate")
+    parser.add_argument("--validate", nargs="+", help="Validate specific certificates")
     parser.add_argument("--export-zscaler", action="store_true", help="Export Zscaler certificate")
     parser.add_argument("--create-bundle", nargs="+", help="Create certificate bundle from files")
     parser.add_argument("--test-url", default="https://httpbin.org", help="URL to test certificates against")
     parser.add_argument("--output", help="Output file path")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached discovery results and probe again")
     
     args = parser.parse_args()
     
@@ -637,9 +806,9 @@ def main():
     
     if args.discover:
         print("🔍 Discovering corporate certificates...")
-        results = discovery.auto_discover_certificates()
+        results = discovery.auto_discover_certificates(refresh=args.refresh)
         
-        print(f"\\nFound {len(results['certificates_found'])} certificates:")
+        print(f"\\nFound {len(results['certificates_found'])} certificates in {results['timings']['total_ms']} ms:")
         for cert in results['certificates_found']:
             print(f"  📄 {cert['path']} (from {cert['source']})")
         
@@ -649,14 +818,14 @@ def main():
                 print(f"  💡 {rec}")
     
     if args.validate:
-        print(f"🔐 Validating certificate: {args.validate}")
-        result = discovery.validate_certificate_chain(args.validate, args.test_url)
-        
-        print(f"Valid: {result['is_valid']}")
-        if result['issues']:
-            print("Issues:")
-            for issue in result['issues']:
-                print(f"  ❌ {issue}")
+        results = discovery.validate_certificate_chains(args.validate, args.test_url)
+        for cert_path, result in results.items():
+            print(f"🔐 Validating certificate: {cert_path}")
+            print(f"Valid: {result['is_valid']}")
+            if result['issues']:
+                print("Issues:")
+                for issue in result['issues']:
+                    print(f"  ❌ {issue}")
     
     if args.export_zscaler:
         print("📤 Attempting to export Zscaler certificate...")
@@ -25,16 +25,30 @@ try:
 except ImportError:
     HELPERS_AVAILABLE = False
 
+try:
+    from .detection_cache import (DetectionCache, get_detection_cache, fingerprint, env_fingerprint,
+                                  paths_fingerprint, proxy_fingerprint, NETWORK_MAX_AGE)
+except ImportError:
+    from detection_cache import (DetectionCache, get_detection_cache, fingerprint, env_fingerprint,
+                                 paths_fingerprint, proxy_fingerprint, NETWORK_MAX_AGE)
+
 logger = logging.getLogger(__name__)
 
+CORPORATE_ENV_VARS = [
+    'USERDNSDOMAIN', 'COMPUTERNAME', 'LOGONSERVER',
+    'HTTP_PROXY', 'HTTPS_PROXY', 'CORPORATE_PROXY',
+    'ZSCALER_CA_PATH', 'CORPORATE_CA_PATH'
+]
+
 
 class CorporateEnvironmentDetector:
     """
     Comprehensive corporate environment detection and auto-configuration
     """
     
-    def __init__(self):
+    def __init__(self, cache: Optional[DetectionCache] = None):
         self.detection_id = str(uuid.uuid4())[:8]
+        self.cache = cache or get_detection_cache()
         self.environment_profile = {}
         self.configuration_applied = {}
         self.detection_timestamp = datetime.now()
@@ -47,9 +61,11 @@ class CorporateEnvironmentDetector:
         
         logger.info(f"🏢 Corporate environment detector initialized (ID: {self.detection_id})")
     
-    def perform_comprehensive_detection(self) -> Dict[str, Any]:
+    def perform_comprehensive_detection(self, refresh: bool = False) -> Dict[str, Any]:
         """
-        Perform comprehensive corporate environment detection
+        Perform comprehensive corporate environment detection.
+        System, network, SSL and software probes come from the detection cache while what they
+        depend on is unchanged (network probes also expire after a day); refresh=True re-probes.
         
         Returns:
             Dict: Complete environment profile with recommendations
@@ -71,28 +87,43 @@ class CorporateEnvironmentDetector:
             "risk_assessment": {}
         }
         
+        cache = self.cache
+
         # 1. System Analysis
-        system_info = self._analyze_system_environment()
+        system_info = cache.get_or_probe(
+            "environment.system",
+            fingerprint(env_fingerprint(CORPORATE_ENV_VARS), platform.node(), platform.version()),
+            self._analyze_system_environment, refresh
+        )
         detection_results["system_analysis"] = system_info
         
         # 2. Network Analysis
         if HELPERS_AVAILABLE:
-            network_info = self.network_helper.auto_detect_corporate_network()
-            detection_results["network_analysis"] = network_info
+            network_probe = self.network_helper.auto_detect_corporate_network
         else:
-            network_info = self._basic_network_detection()
-            detection_results["network_analysis"] = network_info
+            network_probe = self._basic_network_detection
+        network_info = cache.get_or_probe(
+            "environment.network", proxy_fingerprint(), network_probe, refresh, max_age=NETWORK_MAX_AGE
+        )
+        detection_results["network_analysis"] = network_info
         
         # 3. SSL/Certificate Analysis
         if HELPERS_AVAILABLE:
-            ssl_info = self.cert_discovery.auto_discover_certificates()
-            detection_results["ssl_analysis"] = ssl_info
+            ssl_info = self.cert_discovery.auto_discover_certificates(refresh=refresh)
         else:
-            ssl_info = self._basic_ssl_detection()
-            detection_results["ssl_analysis"] = ssl_info
+            ssl_info = cache.get_or_probe(
+                "environment.ssl",
+                fingerprint(paths_fingerprint(self._basic_ssl_locations()), proxy_fingerprint()),
+                self._basic_ssl_detection, refresh, max_age=NETWORK_MAX_AGE
+            )
+        detection_results["ssl_analysis"] = ssl_info
         
         # 4. Corporate Software Detection
-        software_info = self._detect_corporate_software()
+        software_info = cache.get_or_probe(
+            "environment.software",
+            fingerprint(paths_fingerprint(path for path, _, _ in self._corporate_software_checks())),
+            self._detect_corporate_software, refresh
+        )
         detection_results["software_analysis"] = software_info
         
         # 5. Calculate Environment Type and Confidence
@@ -234,13 +265,7 @@ class CorporateEnvironmentDetector:
             system_info["corporate_indicators"].append("Domain-joined computer")
         
         # Check environment variables for corporate indicators
-        corporate_env_vars = [
-            'USERDNSDOMAIN', 'COMPUTERNAME', 'LOGONSERVER',
-            'HTTP_PROXY', 'HTTPS_PROXY', 'CORPORATE_PROXY',
-            'ZSCALER_CA_PATH', 'CORPORATE_CA_PATH'
-        ]
-        
-        for var in corporate_env_vars:
+        for var in CORPORATE_ENV_VARS:
             value = os.environ.get(var)
             if value:
                 system_info["environment_variables"][var] = value
@@ -294,6 +319,17 @@ class CorporateEnvironmentDetector:
         
         return network_info
     
+    def _basic_ssl_locations(self) -> List[str]:
+        if platform.system() == "Windows":
+            return [
+                r"C:\\Program Files\\Zscaler\\ZSARoot.pem",
+                r"C:\\certificates\\zscaler-root.pem"
+            ]
+        return [
+            "/etc/ssl/certs/zscaler-root.pem",
+            os.path.expanduser("~/.certificates/zscaler.pem")
+        ]
+
     def _basic_ssl_detection(self) -> Dict[str, Any]:
         """Basic SSL detection when helpers aren't available"""
         logger.info("🔒 Performing basic SSL detection...")
@@ -305,16 +341,7 @@ class CorporateEnvironmentDetector:
         }
         
         # Check common certificate locations
-        if platform.system() == "Windows":
-            common_locations = [
-                r"C:\\Program Files\\Zscaler\\ZSARoot.pem",
-                r"C:\\certificates\\zscaler-root.pem"
-            ]
-        else:
-            common_locations = [
-                "/etc/ssl/certs/zscaler-root.pem",
-                os.path.expanduser("~/.certificates/zscaler.pem")
-            ]
+        common_locations = self._basic_ssl_locations()
         
         for location in common_locations:
             ssl_info["common_locations_checked"].append(location)
@@ -335,20 +362,10 @@ class CorporateEnvironmentDetector:
         
         return ssl_info
     
-    def _detect_corporate_software(self) -> Dict[str, Any]:
-        """Detect installed corporate software"""
-        logger.info("🏢 Detecting corporate software...")
-        
-        software_info = {
-            "ssl_interception": [],
-            "vpn_clients": [],
-            "security_software": [],
-            "management_agents": []
-        }
-        
-        # Common corporate software locations
+    def _corporate_software_checks(self) -> List[Tuple[str, str, str]]:
+        """(path, product, category) for common corporate software locations"""
         if platform.system() == "Windows":
-            software_checks = [
+            return [
                 # SSL Interception
                 (r"C:\\Program Files\\Zscaler", "Zscaler", "ssl_interception"),
                 (r"C:\\Program Files (x86)\\Zscaler", "Zscaler", "ssl_interception"),
@@ -367,22 +384,32 @@ class CorporateEnvironmentDetector:
                 (r"C:\\Program Files\\Microsoft Monitoring Agent", "SCOM Agent", "management_agents"),
                 (r"C:\\Program Files\\Tanium", "Tanium Client", "management_agents")
             ]
-        else:
-            software_checks = [
-                # SSL Interception
-                ("/opt/zscaler", "Zscaler", "ssl_interception"),
-                ("/usr/local/zscaler", "Zscaler", "ssl_interception"),
-                
-                # VPN Clients
-                ("/opt/cisco/anyconnect", "Cisco AnyConnect", "vpn_clients"),
-                ("/usr/local/bin/openconnect", "OpenConnect", "vpn_clients"),
-                
-                # Security Software
-                ("/opt/crowdstrike", "CrowdStrike Falcon", "security_software"),
-                ("/opt/sentinelone", "SentinelOne", "security_software")
-            ]
+        return [
+            # SSL Interception
+            ("/opt/zscaler", "Zscaler", "ssl_interception"),
+            ("/usr/local/zscaler", "Zscaler", "ssl_interception"),
+            
+            # VPN Clients
+            ("/opt/cisco/anyconnect", "Cisco AnyConnect", "vpn_clients"),
+            ("/usr/local/bin/openconnect", "OpenConnect", "vpn_clients"),
+            
+            # Security Software
+            ("/opt/crowdstrike", "CrowdStrike Falcon", "security_software"),
+            ("/opt/sentinelone", "SentinelOne", "security_software")
+        ]
+
+    def _detect_corporate_software(self) -> Dict[str, Any]:
+        """Detect installed corporate software"""
+        logger.info("🏢 Detecting corporate software...")
+        
+        software_info = {
+            "ssl_interception": [],
+            "vpn_clients": [],
+            "security_software": [],
+            "management_agents": []
+        }
         
-        for path, name, category in software_checks:
+        for path, name, category in self._corporate_software_checks():
             if Path(path).exists():
                 software_info[category].append({
                     "name": name,
@@ -732,10 +759,10 @@ python setup-environment.py
 
 # Convenience functions
 
-def detect_corporate_environment() -> Dict[str, Any]:
+def detect_corporate_environment(refresh: bool = False) -> Dict[str, Any]:
     """Detect corporate environment"""
     detector = CorporateEnvironmentDetector()
-    return detector.perform_comprehensive_detection()
+    return detector.perform_comprehensive_detection(refresh=refresh)
 
 
 def auto_configure_corporate_environment() -> Dict[str, Any]:
@@ -754,6 +781,7 @@ def main():
     parser.add_argument("--auto-configure", action="store_true", help="Auto-configure environment")
     parser.add_argument("--generate-portable", action="store_true", help="Generate portable configuration")
     parser.add_argument("--output-dir", default="./portable-config", help="Output directory for portable config")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached detection results and probe again")
     
     args = parser.parse_args()
     
@@ -767,7 +795,7 @@ def main():
         print("=" * 40)
         
         # Perform detection
-        detection_results = detector.perform_comprehensive_detection()
+        detection_results = detector.perform_comprehensive_detection(refresh=args.refresh)
         
         print(f"\\nEnvironment Type: {detection_results['environment_type']}")
         print(f"Confidence Score: {detection_results['confidence_score']:.1f}%")
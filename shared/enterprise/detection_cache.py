@@ -0,0 +1,132 @@
+"""
+Detection Cache
+Persists environment and certificate probe results between runs. Each section is stored with a
+fingerprint of what it depends on (environment variables, file mtimes, proxy settings) and is
+probed again only when that fingerprint changes, the entry expires, or a refresh is requested.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import urllib.request
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "integrated_network_platform" / "detection_cache.json"
+# Network probes have no local signal that the network behind the proxy changed
+NETWORK_MAX_AGE = 24 * 3600
+
+PROXY_ENV_VARS = ('HTTP_PROXY', 'HTTPS_PROXY', 'NO_PROXY', 'ALL_PROXY',
+                  'http_proxy', 'https_proxy', 'no_proxy', 'all_proxy')
+NETWORK_CONFIG_FILES = ('/etc/resolv.conf', '/etc/hosts')
+
+
+def path_state(path: Any) -> List[Any]:
+    """[path, mtime_ns, size]; a directory's mtime changes when entries are added or removed"""
+    try:
+        stat = os.stat(path)
+        return [str(path), stat.st_mtime_ns, stat.st_size]
+    except (OSError, TypeError, ValueError):
+        return [str(path), None, None]
+
+
+def fingerprint(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def env_fingerprint(names: Iterable[str]) -> List[List[Optional[str]]]:
+    return [[name, os.environ.get(name)] for name in names]
+
+
+def paths_fingerprint(paths: Iterable[Any]) -> List[List[Any]]:
+    return [path_state(path) for path in paths]
+
+
+def proxy_fingerprint() -> str:
+    """Proxy variables, the platform proxy settings and the resolver configuration"""
+    try:
+        proxies = urllib.request.getproxies()
+    except Exception:
+        proxies = {}
+    return fingerprint(env_fingerprint(PROXY_ENV_VARS), proxies, paths_fingerprint(NETWORK_CONFIG_FILES))
+
+
+class DetectionCache:
+    """Probe results by section name, stored as one JSON file"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or os.getenv('DETECTION_CACHE_PATH') or DEFAULT_CACHE_PATH)
+        self.hits = 0
+        self.misses = 0
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                if data.get('version') == CACHE_VERSION:
+                    self._entries = data.get('sections', {})
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable detection cache {self.path}: {e}")
+        return self._entries
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump({'version': CACHE_VERSION, 'sections': self._entries}, f, default=str)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            # A read-only home only costs the next run its cache
+            logger.debug(f"Could not write detection cache {self.path}: {e}")
+
+    def get_or_probe(self, section: str, key: str, probe: Callable[[], Any], refresh: bool = False,
+                     max_age: Optional[float] = None) -> Any:
+        """
+        The stored result for section if it was stored under the same fingerprint key (and is
+        younger than max_age), otherwise the result of probe(), which is then stored
+        """
+        with self._lock:
+            entry = self._load().get(section)
+        if (not refresh and entry is not None and entry.get('fingerprint') == key
+                and (max_age is None or time.time() - entry.get('stored_at', 0) < max_age)):
+            self.hits += 1
+            return entry['result']
+
+        self.misses += 1
+        # Stored and returned in the same JSON form, so fresh and cached results look alike
+        result = json.loads(json.dumps(probe(), default=str))
+        with self._lock:
+            self._load()[section] = {'fingerprint': key, 'stored_at': time.time(), 'result': result}
+            self._save()
+        return result
+
+    def invalidate(self, section: Optional[str] = None):
+        """Drop one section, or every section"""
+        with self._lock:
+            entries = self._load()
+            if section is None:
+                entries.clear()
+            else:
+                entries.pop(section, None)
+            self._save()
+
+
+_cache = None
+def get_detection_cache() -> DetectionCache:
+    global _cache
+    if _cache is None:
+        _cache = DetectionCache()
+    return _cache
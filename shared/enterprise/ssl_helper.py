@@ -17,6 +17,12 @@ import warnings
 import logging
 from urllib3.exceptions import InsecureRequestWarning
 
+try:
+    from ..network_utils.tls import add_trusted_cas, mount_shared_tls
+except ImportError:
+    # Standalone copy (air-gapped bundle): sessions keep their own pools
+    add_trusted_cas = mount_shared_tls = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -123,6 +129,10 @@ class CorporateSSLHelper:
             requests.Session: Configured session with corporate SSL handling
         """
         session = requests.Session()
+        if mount_shared_tls is not None:
+            # Custom CAs are trusted by the shared context, so the pool is shared with every other client
+            add_trusted_cas(self.custom_ca_paths)
+            mount_shared_tls(session)
         
         # Configure SSL verification
         if self.custom_ca_paths:
@@ -7,11 +7,18 @@ from .network_client import NetworkClient, DeviceType
 from .authentication import AuthManager
 from .data_formatter import NetworkDataFormatter
 from .topology_builder import TopologyBuilder
+from .topology_graph import TopologyGraph
+from .topology_clustering import ClusteredTopology
+from .link_inference import LinkInferenceEngine, LinkIndex
 
 __all__ = [
     'NetworkClient',
     'DeviceType',
     'AuthManager',
     'NetworkDataFormatter',
-    'TopologyBuilder'
+    'TopologyBuilder',
+    'TopologyGraph',
+    'ClusteredTopology',
+    'LinkInferenceEngine',
+    'LinkIndex'
 ]
\ No newline at end of file
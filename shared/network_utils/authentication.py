@@ -9,12 +9,14 @@ from typing import Optional, Dict, Any
 import logging
 import platform
 import os
+import importlib
+import importlib.util
 import certifi
-try:
-    import meraki
-    MERAKI_AVAILABLE = True
-except ImportError:
-    MERAKI_AVAILABLE = False
+
+from .tls import get_shared_tls, mount_shared_tls
+
+# The Meraki SDK is slow to import; it is loaded the first time a dashboard is created
+MERAKI_AVAILABLE = importlib.util.find_spec("meraki") is not None
 
 logger = logging.getLogger(__name__)
 
@@ -34,8 +36,8 @@ class AuthManager:
     def authenticate_fortigate(self, host: str, username: str, password: str, port: int = 443) -> Optional[requests.Session]:
         """Authenticate with FortiGate (from network_map_3d)"""
         try:
-            session = requests.Session()
-            session.verify = False
+            # Device certificates are self-signed; connections still come from the shared pool
+            session = get_shared_tls().session(verify=False)
 
             # FortiGate login
             login_url = f"https://{host}:{port}/logincheck"
@@ -68,8 +70,7 @@ class AuthManager:
     def authenticate_fortimanager(self, host: str, username: str, password: str) -> Optional[Dict[str, Any]]:
         """Authenticate with FortiManager (from enhanced-network-api-corporate)"""
         try:
-            session = requests.Session()
-            session.verify = False
+            session = get_shared_tls().session(verify=False)
 
             # FortiManager login
             login_url = f"https://{host}/jsonrpc"
@@ -125,6 +126,13 @@ class AuthManager:
             logger.error(f"Failed to configure Meraki: {e}")
             return False
 
+    @staticmethod
+    def _use_shared_tls(dashboard):
+        """Send the SDK's requests through the shared TLS pool (the SDK keeps its own Session)"""
+        req_session = getattr(getattr(dashboard, '_session', None), '_req_session', None)
+        if isinstance(req_session, requests.Session):
+            mount_shared_tls(req_session)
+
     def get_meraki_dashboard(self, api_key: Optional[str] = None):
         """
         Initialize the Meraki Dashboard API with proper SSL configuration.
@@ -138,6 +146,7 @@ class AuthManager:
 
         if not MERAKI_AVAILABLE:
             raise ImportError("Meraki SDK is not available. Install it with: pip install meraki")
+        meraki = importlib.import_module("meraki")
 
         # Check cache
         if "meraki_dashboard" in self.sessions:
@@ -170,6 +179,8 @@ class AuthManager:
                 use_iterator_for_get_pages=False
             )
             
+            self._use_shared_tls(dashboard)
+
             # Test connection
             dashboard.organizations.getOrganizations()
             
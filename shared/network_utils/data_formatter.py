@@ -98,11 +98,16 @@ class NetworkDataFormatter:
     def format_for_3d_visualization(topology_data: Dict[str, Any]) -> Dict[str, Any]:
         """Format data specifically for 3D visualization (from network_map_3d)"""
         devices = []
+        layout_positions = (topology_data.get('layout') or {}).get('positions', {})
         for device in topology_data['devices']:
             # Add 3D-specific fields
+            layout_position = layout_positions.get(device.get('id'))
             device_3d = {
                 **device,
-                'position': device.get('position', {'x': 0, 'y': 0, 'z': 0}),
+                'position': device.get('position') or (
+                    {axis: layout_position.get(axis, 0) for axis in ('x', 'y', 'z')}
+                    if layout_position else {'x': 0, 'y': 0, 'z': 0}
+                ),
                 'model_path': NetworkDataFormatter._get_3d_model_path(device),
                 'icon_path': NetworkDataFormatter._get_icon_path(device),
                 'scale': device.get('scale', 1.0)
@@ -123,11 +128,11 @@ class NetworkDataFormatter:
     def _get_3d_model_path(device: Dict[str, Any]) -> Optional[str]:
         """Get appropriate 3D model path for device"""
         vendor = device.get('vendor')
-        model = device.get('model', '').lower()
+        model = (device.get('model') or '').lower()
 
         if vendor == 'fortinet':
             if 'fortigate' in model:
-                return 'models/assets/fortinet/FG-600E.glb'
+                return 'models/assets/fortinet/FG-100F.glb'
             elif 'fortiswitch' in model:
                 return 'models/assets/fortinet/FS-148E.glb'
             elif 'fortiap' in model:
@@ -140,7 +145,7 @@ class NetworkDataFormatter:
     def _get_icon_path(device: Dict[str, Any]) -> Optional[str]:
         """Get appropriate icon path for device"""
         vendor = device.get('vendor')
-        model = device.get('model', '').lower()
+        model = (device.get('model') or '').lower()
 
         if vendor == 'fortinet':
             if 'fortigate' in model:
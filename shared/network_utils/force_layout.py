@@ -0,0 +1,207 @@
+"""
+Force-Directed Layout
+Fruchterman-Reingold 3D layout with a Barnes-Hut octree for repulsion, vectorized with NumPy
+"""
+
+from typing import Optional
+import logging
+import time
+
+import numpy as np
+
+from .topology_graph import TopologyGraph
+
+logger = logging.getLogger(__name__)
+
+
+class Octree:
+    """
+    Level-indexed octree over a point set.
+    Cells at depth d are the distinct Morton-style keys of the points' grid coordinates,
+    so every level is built with one np.unique and a few bincounts.
+    """
+
+    def __init__(self, points: np.ndarray, max_depth: int = 12):
+        self.points = points
+        n = len(points)
+        lo = points.min(axis=0)
+        self.size = float(max((points.max(axis=0) - lo).max(), 1e-9)) * (1 + 1e-9)
+        self.max_depth = max(1, min(max_depth, int(np.ceil(np.log2(max(n, 2)) / 3)) + 4, 20))
+
+        grid = np.floor((points - lo) / self.size * (1 << self.max_depth)).astype(np.int64)
+        np.clip(grid, 0, (1 << self.max_depth) - 1, out=grid)
+
+        self.body_cell = []   # per level: cell index of each body
+        self.mass = []        # per level: bodies per cell
+        self.com = []         # per level: center of mass per cell
+        self.child_ptr = []   # per level: CSR offsets into child_ids (levels < max_depth)
+        self.child_ids = []
+
+        for depth in range(self.max_depth + 1):
+            shift = self.max_depth - depth
+            cx, cy, cz = (grid >> shift).T
+            keys = (cx << (2 * depth)) | (cy << depth) | cz
+            _, inverse = np.unique(keys, return_inverse=True)
+            inverse = inverse.ravel()
+            mass = np.bincount(inverse).astype(np.float64)
+            com = np.stack(
+                [np.bincount(inverse, weights=points[:, k]) for k in range(3)], axis=1
+            ) / mass[:, None]
+            self.body_cell.append(inverse)
+            self.mass.append(mass)
+            self.com.append(com)
+
+        for depth in range(self.max_depth):
+            parent_of_body = self.body_cell[depth]
+            child_of_body = self.body_cell[depth + 1]
+            child_count = len(self.mass[depth + 1])
+            parent_of_child = np.empty(child_count, dtype=np.int64)
+            parent_of_child[child_of_body] = parent_of_body
+            order = np.argsort(parent_of_child, kind='stable')
+            ptr = np.zeros(len(self.mass[depth]) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(parent_of_child, minlength=len(self.mass[depth])), out=ptr[1:])
+            self.child_ptr.append(ptr)
+            self.child_ids.append(order)
+
+    def _children(self, depth: int, cells: np.ndarray):
+        """Child cells of each cell at depth, with the per-parent child counts"""
+        ptr = self.child_ptr[depth]
+        starts, counts = ptr[cells], ptr[cells + 1] - ptr[cells]
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))
+        return self.child_ids[depth][offsets], counts
+
+    def repulsion(self, k: float, theta: float = 1.0) -> np.ndarray:
+        """
+        Approximate sum over j != i of k^2 * (p_i - p_j) / |p_i - p_j|^2.
+        Walks (target cell, source cell) pairs level by level: well-separated pairs interact through
+        their centers of mass and the force is applied to every body of the target cell, others are
+        opened into their children. This keeps the interaction count linear in the number of bodies.
+        """
+        force = np.zeros_like(self.points)
+        targets = np.zeros(1, dtype=np.int64)
+        sources = np.zeros(1, dtype=np.int64)
+
+        for depth in range(self.max_depth + 1):
+            if not len(targets):
+                break
+            mass, com = self.mass[depth], self.com[depth]
+            same = targets == sources
+            delta = com[targets] - com[sources]
+            dist2 = (delta * delta).sum(axis=1)
+            if depth == self.max_depth:
+                # Leaf cells interact through their centers; bodies sharing a leaf are skipped
+                accept = ~same
+            else:
+                extent = 2 * self.size / (1 << depth)
+                single = (mass[targets] == 1) & (mass[sources] == 1)
+                accept = ~same & (single | (extent * extent < theta * theta * dist2))
+
+            if accept.any():
+                t = targets[accept]
+                contrib = delta[accept] * (k * k * mass[sources[accept]] / np.maximum(dist2[accept], 1e-6))[:, None]
+                cell_force = np.stack(
+                    [np.bincount(t, weights=contrib[:, axis], minlength=len(mass)) for axis in range(3)], axis=1
+                )
+                force += cell_force[self.body_cell[depth]]
+
+            if depth == self.max_depth:
+                break
+
+            # Open everything else, except a single body paired with itself
+            expand = ~accept & ~(same & (mass[targets] == 1))
+            targets, sources = targets[expand], sources[expand]
+            targets, counts = self._children(depth, targets)
+            sources = np.repeat(sources, counts)
+            sources, counts = self._children(depth, sources)
+            targets = np.repeat(targets, counts)
+
+        return force
+
+
+class ForceDirectedLayout:
+    """
+    3D force-directed layout for a TopologyGraph.
+    Repulsion uses a Barnes-Hut octree (O(n log n) per iteration), attraction is one pass over
+    the edge arrays, and nodes are held on their layer plane (y = layer * layer_spacing).
+    Results are deterministic for a given seed; iterations stop early when the time budget runs out.
+    """
+
+    def __init__(self, iterations: int = 150, time_budget: float = 5.0, seed: int = 42,
+                 edge_length: float = 120.0, layer_spacing: float = 200.0, theta: float = 1.0,
+                 constrain_layers: bool = True):
+        self.iterations = iterations
+        self.time_budget = time_budget
+        self.seed = seed
+        self.edge_length = edge_length
+        self.layer_spacing = layer_spacing
+        self.theta = theta
+        self.constrain_layers = constrain_layers
+        self.iterations_run = 0
+
+    def initial_positions(self, graph: TopologyGraph) -> np.ndarray:
+        """Seeded positions: each layer spread over a disc sized for its population"""
+        rng = np.random.default_rng(self.seed)
+        n = graph.node_count
+        positions = np.zeros((n, 3), dtype=np.float64)
+        if not n:
+            return positions
+        for code in np.unique(graph.layers).tolist():
+            members = np.flatnonzero(graph.layers == code)
+            radius = self.edge_length * np.sqrt(len(members))
+            angle = rng.uniform(0, 2 * np.pi, len(members))
+            r = radius * np.sqrt(rng.uniform(0, 1, len(members)))
+            positions[members, 0] = r * np.cos(angle)
+            positions[members, 2] = r * np.sin(angle)
+        positions[:, 1] = self._layer_y(graph)
+        return positions
+
+    def _layer_y(self, graph: TopologyGraph) -> np.ndarray:
+        # Dense rank of the layers present so empty layers leave no gaps
+        present, rank = np.unique(graph.layers, return_inverse=True)
+        return rank.ravel().astype(np.float64) * self.layer_spacing
+
+    def compute(self, graph: TopologyGraph, positions: Optional[np.ndarray] = None,
+                temperature: Optional[float] = None) -> np.ndarray:
+        """
+        Run the simulation and return an (n, 3) array of x, y, z positions.
+        Pass positions (and a lower starting temperature) to refine an existing layout.
+        """
+        n = graph.node_count
+        positions = self.initial_positions(graph) if positions is None else np.array(positions, dtype=np.float64)
+        self.iterations_run = 0
+        if n < 2:
+            return positions
+
+        k = self.edge_length
+        layer_y = self._layer_y(graph)
+        src, dst = graph.edge_src, graph.edge_dst
+        temperature = temperature if temperature is not None else k * np.sqrt(n) / 2
+        cooling = temperature / max(self.iterations, 1)
+        deadline = time.perf_counter() + self.time_budget
+
+        for _ in range(self.iterations):
+            displacement = Octree(positions).repulsion(k, self.theta)
+
+            if len(src):
+                delta = positions[src] - positions[dst]
+                dist = np.maximum(np.sqrt((delta * delta).sum(axis=1)), 1e-6)
+                pull = delta * (dist / k)[:, None]
+                for axis in range(3):
+                    displacement[:, axis] -= np.bincount(src, weights=pull[:, axis], minlength=n)
+                    displacement[:, axis] += np.bincount(dst, weights=pull[:, axis], minlength=n)
+
+            if self.constrain_layers:
+                displacement[:, 1] = 0
+
+            length = np.maximum(np.sqrt((displacement * displacement).sum(axis=1)), 1e-9)
+            positions += displacement * (np.minimum(length, temperature) / length)[:, None]
+            if self.constrain_layers:
+                positions[:, 1] = layer_y
+
+            temperature = max(temperature - cooling, k * 0.01)
+            self.iterations_run += 1
+            if time.perf_counter() > deadline:
+                logger.info(f"Force layout stopped after {self.iterations_run} iterations (time budget)")
+                break
+
+        return positions
@@ -0,0 +1,196 @@
+"""
+Layout Cache
+Caches computed layouts by a canonical hash of the topology structure and layout parameters
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+import hashlib
+import json
+import logging
+import threading
+
+import numpy as np
+
+from .topology_graph import TopologyGraph
+
+logger = logging.getLogger(__name__)
+
+
+def parameters_key(algorithm: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Stable hash of the algorithm name and its parameters"""
+    payload = json.dumps({'algorithm': algorithm, 'params': params or {}}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def structure_hash(graph: TopologyGraph) -> str:
+    """
+    Canonical hash of the node set (with layers) and undirected edge set.
+    Independent of device and connection order; edges are hashed as pairs of sorted-id ranks.
+    """
+    ids = np.array(graph.node_ids, dtype=object)
+    order = np.argsort(ids, kind='stable')
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+
+    digest = hashlib.sha256()
+    digest.update('\x1f'.join(ids[order].tolist()).encode())
+    digest.update(graph.layers[order].tobytes())
+
+    if graph.edge_count:
+        a, b = rank[graph.edge_src], rank[graph.edge_dst]
+        lo, hi = np.minimum(a, b), np.maximum(a, b)
+        edge_order = np.lexsort((hi, lo))
+        digest.update(np.stack([lo[edge_order], hi[edge_order]], axis=1).tobytes())
+    return digest.hexdigest()
+
+
+def _copy_layout(layout: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy deep enough that callers can mutate positions without touching the cache"""
+    copied = dict(layout)
+    for key in ('positions', 'ports'):
+        if isinstance(layout.get(key), dict):
+            copied[key] = {node: dict(pos) for node, pos in layout[key].items()}
+    if isinstance(layout.get('dimensions'), dict):
+        copied['dimensions'] = dict(layout['dimensions'])
+    return copied
+
+
+class LayoutCache:
+    """
+    LRU cache of layouts keyed by (structure hash, parameters key).
+    An optional disk tier keeps layouts across restarts; memory misses fall back to it.
+    """
+
+    def __init__(self, max_entries: int = 32, disk_dir: Optional[Path] = None, max_disk_entries: int = 256):
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_entries = max_disk_entries
+        self._entries: 'OrderedDict[Tuple[str, str], Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, structure: str, params: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        key = (structure, params)
+        with self._lock:
+            layout = self._entries.get(key)
+            if layout is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _copy_layout(layout)
+
+        layout = self._read_disk(key)
+        if layout is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._remember(key, layout)
+        return _copy_layout(layout)
+
+    def put(self, structure: str, params: str, layout: Dict[str, Any]):
+        if not self.enabled:
+            return
+        stored = _copy_layout(layout)
+        self._remember((structure, params), stored)
+        self._write_disk((structure, params), stored)
+
+    def nearest(self, params: str, node_ids: List[str], min_overlap: float = 0.8) -> Optional[Dict[str, Any]]:
+        """
+        Cached layout with the same parameters whose node set overlaps node_ids the most
+        (Jaccard >= min_overlap). Used to warm-start a layout after a few nodes changed.
+        """
+        wanted = set(node_ids)
+        best, best_score = None, min_overlap
+        with self._lock:
+            candidates = [layout for (_, p), layout in self._entries.items() if p == params]
+        for layout in candidates:
+            cached = layout.get('positions', {})
+            common = sum(1 for node in cached if node in wanted)
+            score = common / max(len(wanted) + len(cached) - common, 1)
+            if score >= best_score:
+                best, best_score = layout, score
+        return best
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.disk_dir:
+            for path in self.disk_dir.glob('*.json'):
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'disk_dir': str(self.disk_dir) if self.disk_dir else None
+        }
+
+    def _remember(self, key: Tuple[str, str], layout: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = layout
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key: Tuple[str, str]) -> Optional[Path]:
+        return self.disk_dir / f"{key[0][:32]}-{key[1]}.json" if self.disk_dir else None
+
+    def _read_disk(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        path = self._disk_path(key)
+        if not path or not path.exists():
+            return None
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            if entry.get('structure') != key[0]:
+                return None
+            path.touch()
+            return entry['layout']
+        except Exception as e:
+            logger.warning(f"Failed to read cached layout {path}: {e}")
+            return None
+
+    def _write_disk(self, key: Tuple[str, str], layout: Dict[str, Any]):
+        path = self._disk_path(key)
+        if not path:
+            return
+        try:
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump({'structure': key[0], 'layout': layout}, f, default=str)
+            tmp_path.replace(path)
+
+            files = sorted(self.disk_dir.glob('*.json'), key=lambda p: p.stat().st_mtime)
+            for stale in files[:max(len(files) - self.max_disk_entries, 0)]:
+                stale.unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"Failed to write cached layout {path}: {e}")
+
+
+_cache = None
+def get_layout_cache() -> LayoutCache:
+    global _cache
+    if _cache is None:
+        _cache = LayoutCache()
+    return _cache
+
+
+def configure_layout_cache(max_entries: int = 32, disk_dir: Optional[Path] = None) -> LayoutCache:
+    """Replace the process-wide cache (called once at application startup)"""
+    global _cache
+    _cache = LayoutCache(max_entries=max_entries, disk_dir=disk_dir)
+    return _cache
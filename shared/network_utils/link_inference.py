@@ -0,0 +1,237 @@
+"""
+Link Inference
+Builds real topology edges from collected switch-controller data instead of synthetic links
+"""
+
+import re
+from typing import Dict, List, Any, Tuple, Optional, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAC_NORMALIZE_PATTERN = re.compile(r'[^0-9A-Fa-f]')
+
+# Higher wins when two sources describe the same device pair
+SOURCE_PRIORITY = {
+    'fallback': 0,
+    'lldp': 1,
+    'detected_device': 2,
+    'port_client': 3,
+    'isl': 4,
+    'fortilink': 5,
+}
+
+
+def normalize_mac(mac: Optional[str]) -> Optional[str]:
+    """Normalize a MAC to AA:BB:CC:DD:EE:FF, or None if it is not a MAC"""
+    if not mac or not isinstance(mac, str):
+        return None
+    clean = MAC_NORMALIZE_PATTERN.sub('', mac.upper())
+    if len(clean) != 12:
+        return None
+    return ':'.join(clean[i:i + 2] for i in range(0, 12, 2))
+
+
+def _device_role(device: Dict[str, Any]) -> str:
+    device_type = str(device.get('type') or device.get('device_type') or '').lower()
+    if hasattr(device.get('device_type'), 'value'):
+        device_type = device['device_type'].value
+    if any(k in device_type for k in ('fortigate', 'gateway', 'router', 'firewall', 'appliance')):
+        return 'gateway'
+    if 'switch' in device_type:
+        return 'switch'
+    if device_type in ('ap', 'wireless') or 'fortiap' in device_type or device_type.endswith('_ap') \
+            or 'access_point' in device_type:
+        return 'ap'
+    return 'client'
+
+
+class LinkIndex:
+    """
+    Edge list plus adjacency index over device ids.
+    Adding an edge and listing a node's neighbors are O(1)/O(degree).
+    """
+
+    def __init__(self):
+        self.edges: List[Dict[str, Any]] = []
+        self.adjacency: Dict[str, List[int]] = {}
+        self.synthetic_nodes: List[Dict[str, Any]] = []
+        self._pairs: Dict[Tuple[str, str], int] = {}
+
+    @classmethod
+    def from_connections(cls, connections: Iterable[Any]) -> 'LinkIndex':
+        """Index an existing connection list (tuples or source/target dicts)"""
+        index = cls()
+        for conn in connections:
+            if isinstance(conn, (list, tuple)) and len(conn) >= 2:
+                index.add(conn[0], conn[1], via='input')
+            elif isinstance(conn, dict) and conn.get('source') and conn.get('target'):
+                extra = {k: v for k, v in conn.items() if k not in ('source', 'target')}
+                index.add(conn['source'], conn['target'], via=extra.pop('via', 'input'), **extra)
+        return index
+
+    def add(self, source: str, target: str, via: str, **attrs) -> bool:
+        """Add an undirected edge; keeps the higher-priority source for duplicate pairs"""
+        if not source or not target or source == target:
+            return False
+        key = (source, target) if source <= target else (target, source)
+        existing = self._pairs.get(key)
+        if existing is not None:
+            edge = self.edges[existing]
+            if SOURCE_PRIORITY.get(via, 1) > SOURCE_PRIORITY.get(edge['via'], 1):
+                edge.update({'source': source, 'target': target, 'via': via, **attrs})
+            return False
+
+        self._pairs[key] = len(self.edges)
+        self.adjacency.setdefault(source, []).append(len(self.edges))
+        self.adjacency.setdefault(target, []).append(len(self.edges))
+        self.edges.append({'source': source, 'target': target, 'via': via, **attrs})
+        return True
+
+    def has_edge(self, a: str, b: str) -> bool:
+        return ((a, b) if a <= b else (b, a)) in self._pairs
+
+    def neighbors(self, device_id: str) -> List[str]:
+        result = []
+        for edge_idx in self.adjacency.get(device_id, []):
+            edge = self.edges[edge_idx]
+            result.append(edge['target'] if edge['source'] == device_id else edge['source'])
+        return result
+
+    def degree(self, device_id: str) -> int:
+        return len(self.adjacency.get(device_id, []))
+
+    def as_tuples(self) -> List[Tuple[str, str]]:
+        return [(e['source'], e['target']) for e in self.edges]
+
+    def __len__(self) -> int:
+        return len(self.edges)
+
+
+class LinkInferenceEngine:
+    """
+    Infers device links from data the collector already stores:
+    - client metadata connected_to_switch / connected_port
+    - FortiSwitch port FortiLink and ISL peer fields
+    - switch-port detected devices matched to AP MACs
+    - LLDP neighbor lists on device metadata
+    Every source is a single pass over devices or ports, so inference is O(V+E).
+    """
+
+    def __init__(self, fallback_to_gateway: bool = True):
+        self.fallback_to_gateway = fallback_to_gateway
+
+    def infer(self, devices: List[Dict[str, Any]]) -> LinkIndex:
+        index = LinkIndex()
+
+        by_id: Dict[str, Dict[str, Any]] = {}
+        by_mac: Dict[str, str] = {}
+        by_name: Dict[str, str] = {}
+        roles: Dict[str, str] = {}
+        gateways: List[str] = []
+
+        for device in devices:
+            device_id = device.get('id')
+            if not device_id:
+                continue
+            by_id[device_id] = device
+            role = _device_role(device)
+            roles[device_id] = role
+            if role == 'gateway':
+                gateways.append(device_id)
+            mac = normalize_mac(device.get('mac') or device.get('mac_address'))
+            if mac:
+                by_mac.setdefault(mac, device_id)
+            for key in ('serial', 'name', 'hostname'):
+                if device.get(key):
+                    by_name.setdefault(str(device[key]).lower(), device_id)
+
+        def resolve(name: Optional[str] = None, mac: Optional[str] = None) -> Optional[str]:
+            if mac:
+                found = by_mac.get(normalize_mac(mac))
+                if found:
+                    return found
+            if name:
+                if name in by_id:
+                    return name
+                return by_name.get(str(name).lower())
+            return None
+
+        for device_id, device in by_id.items():
+            metadata = device.get('metadata') or {}
+
+            # 1. Client -> switch port, recorded by the collector
+            switch_id = metadata.get('connected_to_switch')
+            if switch_id:
+                target = resolve(switch_id)
+                if target:
+                    index.add(target, device_id, via='port_client', type='ethernet',
+                              port=metadata.get('connected_port'), vlan=metadata.get('vlan'))
+
+            if roles[device_id] == 'switch':
+                self._infer_switch_ports(index, device_id, device, metadata, resolve, gateways)
+
+            # 4. LLDP neighbors reported by any device
+            for neighbor in metadata.get('lldp_neighbors') or metadata.get('lldp') or []:
+                if not isinstance(neighbor, dict):
+                    continue
+                peer = resolve(
+                    neighbor.get('system_name') or neighbor.get('name'),
+                    neighbor.get('chassis_id') or neighbor.get('mac')
+                )
+                if peer:
+                    index.add(peer, device_id, via='lldp', type='lldp',
+                              port=neighbor.get('local_port'), peer_port=neighbor.get('port_id'))
+
+        if self.fallback_to_gateway and gateways:
+            root = gateways[0]
+            for device_id, role in roles.items():
+                if device_id != root and device_id not in index.adjacency and role != 'gateway':
+                    index.add(root, device_id, via='fallback', type='l3')
+
+        logger.info(f"Inferred {len(index)} links for {len(by_id)} devices")
+        return index
+
+    def _infer_switch_ports(self, index: LinkIndex, switch_id: str, device: Dict[str, Any],
+                            metadata: Dict[str, Any], resolve, gateways: List[str]):
+        uplink_intf = metadata.get('fgt_peer_intf_name') or device.get('fgt_peer_intf_name')
+
+        for port in metadata.get('ports') or device.get('ports') or []:
+            port_name = port.get('interface') or port.get('name')
+
+            # 2a. FortiLink uplink to the managing FortiGate
+            if port.get('fortilink_port') or port.get('fgt_peer_device_name'):
+                gateway = resolve(port.get('fgt_peer_device_name'))
+                if not gateway and len(gateways) == 1:
+                    gateway = gateways[0]
+                if not gateway and port.get('fgt_peer_device_name'):
+                    gateway = self._synthetic_gateway(index, port['fgt_peer_device_name'], gateways)
+                if gateway:
+                    index.add(gateway, switch_id, via='fortilink', type='fortilink',
+                              port=port_name, peer_port=port.get('fgt_peer_port_name') or uplink_intf)
+
+            # 2b. Inter-switch links and trunks
+            peer_ref = port.get('isl_peer_device_sn') or port.get('isl_peer_device_name')
+            if peer_ref:
+                peer = resolve(peer_ref)
+                if peer:
+                    index.add(switch_id, peer, via='isl', type='isl', port=port_name,
+                              peer_port=port.get('isl_peer_port_name'),
+                              trunk=port.get('isl_peer_trunk_name'))
+
+            # 3. Devices detected on the port (APs and any client not already linked)
+            for connected in port.get('connected_devices') or []:
+                peer = resolve(connected.get('device_name'), connected.get('device_mac'))
+                if peer and peer != switch_id:
+                    index.add(switch_id, peer, via='detected_device', type='ethernet',
+                              port=port_name, vlan=connected.get('vlan'))
+
+    def _synthetic_gateway(self, index: LinkIndex, name: str, gateways: List[str]) -> str:
+        """Placeholder node for a FortiLink peer that was not collected as a device"""
+        node_id = f"fortigate:{name}"
+        if node_id not in gateways:
+            gateways.append(node_id)
+            index.synthetic_nodes.append({
+                'id': node_id, 'name': name, 'type': 'fortigate', 'vendor': 'fortinet', 'synthetic': True
+            })
+        return node_id
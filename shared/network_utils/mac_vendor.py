@@ -1,22 +1,30 @@
 import sqlite3
 import logging
-import requests
 import os
+import threading
+import importlib.util
 from pathlib import Path
 
+from .tls import get_shared_tls
+
 logger = logging.getLogger(__name__)
 
-try:
-    from mac_vendor_lookup import MacLookup
-except ImportError:
-    MacLookup = None
+# mac_vendor_lookup pulls in aiohttp; it is imported on first use, not at startup
+MAC_LOOKUP_AVAILABLE = importlib.util.find_spec("mac_vendor_lookup") is not None
+_mac_lookup_class = None
 
 # Default DB Path
 DB_PATH = Path(os.path.expanduser("~")) / "mac_vendor_cache.db"
+_db_ready = False
+_db_lock = threading.Lock()
+# Cache DB lookups that found a vendor (hits) or had to fall through to MacLookup/the API (misses)
+cache_hits = 0
+cache_misses = 0
 
 def set_db_path(path: Path):
-    global DB_PATH
+    global DB_PATH, _db_ready
     DB_PATH = path
+    _db_ready = False
 
 def _init_db():
     try:
@@ -33,15 +41,68 @@ def _init_db():
     except Exception as e:
         logger.warning(f"Could not initialize MAC vendor DB: {e}")
 
-# Call init immediately on import (or lazy?)
-_init_db()
+def _ensure_db():
+    """Create the cache table on first use (once per DB path)"""
+    global _db_ready
+    if _db_ready:
+        return
+    with _db_lock:
+        if not _db_ready:
+            _init_db()
+            _db_ready = True
+
+def _mac_lookup():
+    """MacLookup class, or None if mac_vendor_lookup is not installed"""
+    global _mac_lookup_class
+    if _mac_lookup_class is None and MAC_LOOKUP_AVAILABLE:
+        from mac_vendor_lookup import MacLookup
+        _mac_lookup_class = MacLookup
+    return _mac_lookup_class
+
+_session = None
+
+def _api_session():
+    """One pooled session for the API fallback; lookups for a whole device list reuse its connection"""
+    global _session
+    if _session is None:
+        _session = get_shared_tls().session()
+    return _session
+
+_oui_refresh_thread = None
+_oui_refresh_lock = threading.Lock()
+
+def _refresh_oui_database():
+    MacLookup = _mac_lookup()
+    try:
+        MacLookup().lookup("00:00:00:00:00:00")
+    except Exception:
+        try:
+            MacLookup().update_vendors()
+            logger.info("OUI database refreshed")
+        except Exception as e:
+            logger.warning(f"OUI database refresh failed: {e}")
+
+def refresh_oui_database_async() -> bool:
+    """Verify/refresh the MacLookup OUI list in a background thread (at most once per process)"""
+    global _oui_refresh_thread
+    if not MAC_LOOKUP_AVAILABLE:
+        return False
+    with _oui_refresh_lock:
+        if _oui_refresh_thread is None:
+            _oui_refresh_thread = threading.Thread(
+                target=_refresh_oui_database, name="oui-refresh", daemon=True
+            )
+            _oui_refresh_thread.start()
+    return True
 
 def get_vendor(mac: str) -> str:
     """Get vendor for MAC address (Cached DB -> MacLookup -> API)"""
+    global cache_hits, cache_misses
     if not mac:
         return None
         
     mac_clean = mac.upper().replace(":", "").replace("-", "").replace(".", "")
+    _ensure_db()
     
     # 1. Check DB
     try:
@@ -51,12 +112,15 @@ def get_vendor(mac: str) -> str:
         row = c.fetchone()
         conn.close()
         if row:
+            cache_hits += 1
             return row[0]
     except Exception as e:
         pass
+    cache_misses += 1
 
     # 2. Lookup
     vendor = None
+    MacLookup = _mac_lookup()
     if MacLookup:
         try:
             mac_formatted = ":".join(mac_clean[i:i+2] for i in range(0, 12, 2))
@@ -67,7 +131,7 @@ def get_vendor(mac: str) -> str:
     # 3. API Fallback
     if not vendor:
         try:
-            resp = requests.get(f"https://api.macvendors.com/{mac_clean}", timeout=3)
+            resp = _api_session().get(f"https://api.macvendors.com/{mac_clean}", timeout=3)
             if resp.status_code == 200:
                 vendor = resp.text
         except:
@@ -10,6 +10,9 @@ from typing import Dict, List, Any, Optional, Union
 from dataclasses import dataclass
 import logging
 
+from .tls import get_shared_tls, mount_shared_tls
+from ..observability.tracing import get_tracer, traced
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,11 +57,11 @@ class NetworkClient:
         self.meraki_config = meraki_config
         self.timeout = timeout
         
-        # Use provided authenticated session or create new one
+        # Use provided authenticated session or create new one; both use the shared TLS pool
         if fortigate_auth:
-            self.session = fortigate_auth
+            self.session = mount_shared_tls(fortigate_auth)
         else:
-            self.session = requests.Session()
+            self.session = get_shared_tls().session(verify=False)
             
         self.session.verify = False  # Handle SSL certificates
         self.discovered_endpoints = {}
@@ -67,7 +70,10 @@ class NetworkClient:
         """Probe for valid endpoints to handle version differences."""
         if self.discovered_endpoints:
             return
+        self._probe_endpoints()
 
+    @traced("network_client.discovery")
+    def _probe_endpoints(self):
         logger.info("[🔍] Auto-discovering valid API endpoints...")
         
         candidates = {
@@ -119,6 +125,27 @@ class NetworkClient:
             if k not in self.discovered_endpoints:
                 self.discovered_endpoints[k] = v
 
+    def get_monitor(self, path: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """GET a FortiOS monitor endpoint (path relative to /api/v2/monitor/)"""
+        if not self.fortigate_host:
+            return None
+
+        url = f'https://{self.fortigate_host}:{self.fortigate_port}/api/v2/monitor/{path.lstrip("/")}'
+        query = dict(params or {})
+        if self.fortigate_token:
+            query['access_token'] = self.fortigate_token
+
+        with get_tracer().span("network_client.get_monitor", path=path) as span:
+            try:
+                response = self.session.get(url, params=query, timeout=self.timeout)
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                span.status = 'error'
+                span.error = str(e)
+                logger.error(f"Monitor request {path} failed: {e}")
+                return None
+
     def get_connected_clients(self, device_type: DeviceType = DeviceType.FORTIGATE) -> List[NetworkDevice]:
         """Get connected clients from specified device type"""
         if device_type == DeviceType.FORTIGATE and self.fortigate_host:
@@ -257,10 +284,23 @@ class NetworkClient:
                     id=ap_data.get('serial', ''),
                     name=ap_data.get('name', ap_data.get('serial', 'Unknown')),
                     device_type=DeviceType.FORTIAP,
-                    ip_address=ap_data.get('ip'),
+                    ip_address=ap_data.get('ip') or ap_data.get('connecting_from'),
+                    mac_address=ap_data.get('board_mac'),
                     model=ap_data.get('model'),
                     serial=ap_data.get('serial'),
-                    status=ap_data.get('status', 'unknown')
+                    status=ap_data.get('status', 'unknown'),
+                    metadata={
+                        'connecting_interface': ap_data.get('connecting_interface'),
+                        'lldp_neighbors': [
+                            {
+                                'local_port': n.get('local_port'),
+                                'chassis_id': n.get('chassis_id'),
+                                'system_name': n.get('system_name'),
+                                'port_id': n.get('port_id')
+                            }
+                            for n in ap_data.get('lldp', []) if isinstance(n, dict)
+                        ]
+                    }
                 )
                 aps.append(ap)
             return aps
@@ -0,0 +1,269 @@
+"""
+Shared TLS
+One process-wide SSL context (certifi/system CAs plus the corporate CAs found on this host) and one
+connection pool for every outbound HTTPS client. Kept-alive connections are shared across
+sessions, and new connections resume the last TLS session seen for the host instead of doing a
+full handshake.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple, Union
+import hashlib
+import logging
+import os
+import ssl
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..observability.metrics import observe_upstream
+from ..observability.tracing import current_span, get_tracer
+
+try:
+    import certifi
+except ImportError:
+    certifi = None
+
+logger = logging.getLogger(__name__)
+
+# Host pools kept by the shared adapter (fleet sweeps talk to many devices) and connections per host
+POOL_HOSTS = 256
+POOL_CONNECTIONS_PER_HOST = 10
+MAX_RESUMABLE_SESSIONS = 4096
+CORPORATE_CA_ENV_VARS = ("ZSCALER_CA_PATH", "CORPORATE_CA_PATH")
+
+
+class _ResumableSocket(ssl.SSLSocket):
+    """Hands its session back to the context on close, once TLS 1.3 tickets have arrived"""
+
+    def _real_close(self):
+        context = self.context
+        if isinstance(context, ResumingSSLContext) and self._sslobj is not None:
+            context.remember(self)
+        super()._real_close()
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """Client context that offers the last session seen for (hostname, address, port) on new connections"""
+
+    sslsocket_class = _ResumableSocket
+
+    def __init__(self, *args, **kwargs):
+        self._sessions: "OrderedDict[Tuple, ssl.SSLSession]" = OrderedDict()
+        self._sessions_lock = threading.Lock()
+        self.handshakes = 0
+        self.resumed = 0
+
+    def wrap_socket(self, sock, server_side=False, do_handshake_on_connect=True, suppress_ragged_eofs=True,
+                    server_hostname=None, session=None):
+        key = None
+        if not server_side:
+            try:
+                key = (server_hostname, *sock.getpeername()[:2])
+            except (OSError, TypeError):
+                key = None
+            if session is None and key is not None:
+                with self._sessions_lock:
+                    session = self._sessions.get(key)
+        ssock = super().wrap_socket(sock, server_side=server_side, do_handshake_on_connect=do_handshake_on_connect,
+                                    suppress_ragged_eofs=suppress_ragged_eofs, server_hostname=server_hostname,
+                                    session=session)
+        ssock._resume_key = key
+        if key is not None and do_handshake_on_connect:
+            self.handshakes += 1
+            if ssock.session_reused:
+                self.resumed += 1
+            self.remember(ssock)
+        return ssock
+
+    def remember(self, ssock: ssl.SSLSocket):
+        key = getattr(ssock, '_resume_key', None)
+        if key is None:
+            return
+        try:
+            session = ssock.session
+        except (ValueError, AttributeError):
+            return
+        if session is None:
+            return
+        with self._sessions_lock:
+            self._sessions[key] = session
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > MAX_RESUMABLE_SESSIONS:
+                self._sessions.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {'handshakes': self.handshakes, 'resumed': self.resumed, 'cached_sessions': len(self._sessions)}
+
+
+def _client_context(verify: bool = True) -> ResumingSSLContext:
+    """Same defaults as ssl.create_default_context, as a ResumingSSLContext"""
+    context = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    if verify:
+        context.check_hostname = True
+        context.verify_mode = ssl.CERT_REQUIRED
+        context.load_default_certs(ssl.Purpose.SERVER_AUTH)
+    else:
+        # Devices with self-signed management certificates (FortiGate, FortiManager)
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+class SharedTLS:
+    """
+    Contexts by verify setting: True (trusted CAs), False (no verification) and, for requests'
+    verify=<path>, the trusted CAs plus that bundle. Each is built once, CA files deduplicated
+    by content.
+    """
+
+    def __init__(self, ca_paths: Optional[List[str]] = None):
+        self.ca_paths = list(ca_paths) if ca_paths is not None else discover_ca_paths()
+        self._contexts: Dict[Any, ResumingSSLContext] = {}
+        self._lock = threading.Lock()
+        self._adapter: Optional[HTTPAdapter] = None
+
+    def _load_cas(self, context: ssl.SSLContext, paths: List[str]):
+        seen = set()
+        for path in paths:
+            try:
+                if os.path.isdir(path):
+                    context.load_verify_locations(capath=path)
+                    continue
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError as e:
+                logger.warning(f"Skipping CA {path}: {e}")
+                continue
+            digest = hashlib.sha256(data).hexdigest()
+            if digest in seen:
+                continue
+            seen.add(digest)
+            try:
+                context.load_verify_locations(cadata=data.decode('ascii', errors='ignore'))
+            except (ssl.SSLError, ValueError):
+                # DER or otherwise not PEM
+                try:
+                    context.load_verify_locations(cadata=data)
+                except (ssl.SSLError, ValueError) as e:
+                    logger.warning(f"Skipping CA {path}: {e}")
+
+    def context(self, verify: Union[bool, str, None] = True) -> ResumingSSLContext:
+        key = False if verify is False else (verify if isinstance(verify, str) else True)
+        context = self._contexts.get(key)
+        if context is not None:
+            return context
+        with self._lock:
+            context = self._contexts.get(key)
+            if context is None:
+                context = _client_context(verify=key is not False)
+                if key is not False:
+                    extra = [verify] if isinstance(key, str) else []
+                    self._load_cas(context, self.ca_paths + extra)
+                self._contexts[key] = context
+                logger.info(f"Built shared TLS context (verify={key})")
+            return context
+
+    def adapter(self) -> HTTPAdapter:
+        if self._adapter is None:
+            with self._lock:
+                if self._adapter is None:
+                    self._adapter = SharedTLSAdapter(self)
+        return self._adapter
+
+    def session(self, verify: Union[bool, str] = True) -> requests.Session:
+        """A requests session on the shared pool"""
+        session = requests.Session()
+        session.verify = verify
+        mount_shared_tls(session, self)
+        return session
+
+    def stats(self) -> Dict[str, Any]:
+        return {str(key): context.stats() for key, context in self._contexts.items()}
+
+
+class SharedTLSAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections use the shared contexts; one instance serves every session"""
+
+    def __init__(self, tls: SharedTLS):
+        self.tls = tls
+        super().__init__(pool_connections=POOL_HOSTS, pool_maxsize=POOL_CONNECTIONS_PER_HOST)
+
+    # requests calls this hook from 2.32.0 on (hence the requirements pin)
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+        if host_params.get("scheme") == "https":
+            # The bundle is already in the context; urllib3 would otherwise load it into the shared context
+            pool_kwargs.pop("ca_certs", None)
+            pool_kwargs.pop("ca_cert_dir", None)
+            pool_kwargs["ssl_context"] = self.tls.context(verify)
+        return host_params, pool_kwargs
+
+    def send(self, request, **kwargs):
+        # Every outbound API call passes here, so this is where they are counted and timed
+        if current_span() is not None:
+            with get_tracer().span("http.client", **{"http.method": request.method,
+                                                     "http.url": request.url.split("?", 1)[0]}) as span:
+                request.headers['traceparent'] = span.traceparent()
+                response = self._timed_send(request, **kwargs)
+                span.set_attribute("http.status_code", response.status_code)
+                return response
+        return self._timed_send(request, **kwargs)
+
+    def _timed_send(self, request, **kwargs):
+        start = time.perf_counter()
+        status = 'error'
+        try:
+            response = super().send(request, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            observe_upstream(request.url, status, time.perf_counter() - start)
+
+
+def discover_ca_paths() -> List[str]:
+    """certifi's bundle plus corporate CAs named by environment variables"""
+    paths = []
+    if certifi is not None:
+        paths.append(certifi.where())
+    for var in CORPORATE_CA_ENV_VARS:
+        path = os.environ.get(var)
+        if path and os.path.exists(path):
+            paths.append(path)
+    return paths
+
+
+def mount_shared_tls(session: requests.Session, tls: Optional["SharedTLS"] = None) -> requests.Session:
+    """Route a session's HTTPS traffic through the shared pool and contexts"""
+    session.mount("https://", (tls or get_shared_tls()).adapter())
+    return session
+
+
+def get_ssl_context(verify: Union[bool, str] = True) -> ssl.SSLContext:
+    """For clients that take an SSLContext directly (httpx: verify=get_ssl_context())"""
+    return get_shared_tls().context(verify)
+
+
+_tls = None
+def get_shared_tls() -> SharedTLS:
+    global _tls
+    if _tls is None:
+        _tls = SharedTLS()
+    return _tls
+
+
+def add_trusted_cas(ca_paths: List[str]) -> SharedTLS:
+    """Trust more CAs process-wide; the contexts are rebuilt only if a path is new"""
+    current = get_shared_tls()
+    new = [path for path in ca_paths if path not in current.ca_paths]
+    return configure_shared_tls(current.ca_paths + new) if new else current
+
+
+def configure_shared_tls(ca_paths: List[str]) -> SharedTLS:
+    """Replace the process-wide contexts, e.g. with the CAs the corporate SSL helper discovered"""
+    global _tls
+    _tls = SharedTLS(ca_paths)
+    return _tls
@@ -5,11 +5,46 @@ Combines topology building from both applications
 
 from typing import Dict, List, Any, Tuple, Optional
 import math
-import random
 import logging
 
+import numpy as np
+
+from .topology_graph import TopologyGraph, LAYERS
+from .force_layout import ForceDirectedLayout
+from .tree_layout import TreeLayout
+from .layout_cache import LayoutCache, get_layout_cache, parameters_key, structure_hash
+from ..observability.tracing import current_span, traced
+
 logger = logging.getLogger(__name__)
 
+LAYOUT_ALGORITHMS = {
+    'layered': {
+        'description': 'Hierarchical layered layout (core → distribution → access → endpoints)',
+        'best_for': ['enterprise_networks', 'hierarchical_topologies'],
+        'complexity': 'O(n)'
+    },
+    'force_directed': {
+        'description': 'Barnes-Hut force-directed 3D layout with each layer on its own plane',
+        'best_for': ['mesh_networks', 'large_topologies', 'organic_layouts'],
+        'complexity': 'O(n log n) per iteration'
+    },
+    'tree': {
+        'description': 'Tidy tree grouping clients under their switch and port (FortiGate → switch → port → client)',
+        'best_for': ['site_networks', 'large_access_layers'],
+        'complexity': 'O(n) per tree level'
+    },
+    'radial': {
+        'description': 'Tree layout wrapped into rings around the gateway',
+        'best_for': ['site_networks', 'overview_diagrams'],
+        'complexity': 'O(n) per tree level'
+    },
+    'optimized': {
+        'description': 'Layered layout ordered to reduce crossings, with wide layers wrapped into grids',
+        'best_for': ['dense_networks', 'presentation_quality'],
+        'complexity': 'O(n log n + E)'
+    }
+}
+
 
 class TopologyBuilder:
     """
@@ -18,18 +53,30 @@ class TopologyBuilder:
     - Network topology from enhanced-network-api-corporate
     """
 
-    def __init__(self):
+    def __init__(self, layout_cache: Optional[LayoutCache] = None):
         self.devices = []
         self.connections = []
+        self.graph = TopologyGraph.from_topology([], [])
+        self.tree_layout: Optional[TreeLayout] = None
+        self.layout_cache = layout_cache if layout_cache is not None else get_layout_cache()
+        self._devices_by_id = {}
+        self._structure_hash: Optional[str] = None
 
+    @traced("topology.build")
     def build_topology(self, devices: List[Dict[str, Any]],
                        connections: List[Tuple[str, str]]) -> Dict[str, Any]:
         """Build complete network topology"""
         self.devices = devices
         self.connections = connections
+        self.graph = TopologyGraph.from_topology(devices, connections)
+        self._structure_hash = None
+        self._devices_by_id = {}
+        for device in devices:
+            if device.get('id'):
+                self._devices_by_id.setdefault(device['id'], device)
 
         # Apply layout algorithm
-        layout = self._apply_layered_layout()
+        layout = self.apply_layout('layered')
 
         # Add topology metadata
         topology = {
@@ -49,7 +96,8 @@ class TopologyBuilder:
     def _apply_layered_layout(self) -> Dict[str, Any]:
         """Apply layered layout algorithm (from network_map_3d)"""
         # Group devices by type/layer
-        layers = self._group_devices_by_layer()
+        layers = self.graph.layer_members()
+        node_ids = self.graph.node_ids
 
         # Calculate positions for each layer
         layout_positions = {}
@@ -57,24 +105,18 @@ class TopologyBuilder:
         device_spacing = 150  # Horizontal spacing between devices
 
         current_y = 0
-        for layer_name, layer_devices in layers.items():
+        for layer_name, members in layers.items():
             # Center devices in this layer
-            layer_width = len(layer_devices) * device_spacing
-            start_x = -layer_width / 2
-
-            for i, device in enumerate(layer_devices):
-                device_id = device.get('id')
-                if device_id:
-                    x = start_x + i * device_spacing
-                    y = current_y
-                    z = random.uniform(-50, 50)  # Add some depth variation
-
-                    layout_positions[device_id] = {
-                        'x': x,
-                        'y': y,
-                        'z': z,
-                        'layer': layer_name
-                    }
+            layer_width = len(members) * device_spacing
+            xs = (-layer_width / 2 + np.arange(len(members)) * device_spacing).tolist()
+
+            for position, (i, x) in enumerate(zip(members.tolist(), xs, strict=True)):
+                layout_positions[node_ids[i]] = {
+                    'x': x,
+                    'y': current_y,
+                    'z': ((position % 5) - 2) * 25.0,  # Deterministic depth stagger
+                    'layer': layer_name
+                }
 
             current_y += layer_height
 
@@ -82,44 +124,194 @@ class TopologyBuilder:
             'positions': layout_positions,
             'layers': list(layers.keys()),
             'dimensions': {
-                'width': max(len(layer) * device_spacing for layer in layers.values()),
+                'width': max((len(layer) * device_spacing for layer in layers.values()), default=0),
                 'height': len(layers) * layer_height,
                 'depth': 100
             }
         }
 
-    def _group_devices_by_layer(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Group devices into logical layers"""
-        layers = {
-            'core': [],      # Core switches, routers
-            'distribution': [],  # Distribution switches
-            'access': [],    # Access switches, APs
-            'endpoints': []  # End devices, clients
+    @traced("topology.layout")
+    def apply_layout(self, algorithm: str = 'layered', **options) -> Dict[str, Any]:
+        """
+        Run one of LAYOUT_ALGORITHMS over the current topology.
+        Results are cached by topology structure and parameters, so an unchanged topology skips
+        layout entirely; a force-directed miss warm-starts from the closest cached layout.
+        """
+        if algorithm not in LAYOUT_ALGORITHMS:
+            raise ValueError(f"Unknown layout algorithm: {algorithm}")
+
+        cache = self.layout_cache
+        params = dict(options)
+        if algorithm in ('tree', 'radial'):
+            params['ports'] = sorted(self._port_assignments().items())
+        params_key = parameters_key(algorithm, params)
+        structure = self.structure_hash
+
+        cached = cache.get(structure, params_key)
+        span = current_span()
+        span.set_attribute("algorithm", algorithm)
+        span.set_attribute("cached", cached is not None)
+        if cached is not None:
+            if algorithm in ('tree', 'radial'):
+                self.tree_layout = None
+            cached['cached'] = True
+            return cached
+
+        if algorithm == 'layered':
+            layout = self._apply_layered_layout()
+        elif algorithm == 'force_directed':
+            warm_start = cache.nearest(params_key, self.graph.node_ids) if cache.enabled else None
+            layout = self._apply_force_directed_layout(
+                warm_start=warm_start.get('positions') if warm_start else None, **options
+            )
+        elif algorithm in ('tree', 'radial'):
+            layout = self._apply_tree_layout(radial=algorithm == 'radial')
+        else:
+            layout = self.optimize_layout(self._apply_layered_layout())
+
+        cache.put(structure, params_key, layout)
+        layout['cached'] = False
+        return layout
+
+    @property
+    def structure_hash(self) -> str:
+        """Canonical hash of the current node and edge sets"""
+        if self._structure_hash is None:
+            self._structure_hash = structure_hash(self.graph)
+        return self._structure_hash
+
+    def _apply_force_directed_layout(self, iterations: int = 150, time_budget: float = 5.0, seed: int = 42,
+                                     warm_start: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Barnes-Hut force-directed 3D layout, with each layer kept on its own plane"""
+        engine = ForceDirectedLayout(iterations=iterations, time_budget=time_budget, seed=seed)
+        if warm_start:
+            # Known nodes keep their place, new ones start next to their placed neighbors
+            initial = engine.initial_positions(self.graph)
+            known = np.zeros(self.graph.node_count, dtype=bool)
+            for i, node_id in enumerate(self.graph.node_ids):
+                pos = warm_start.get(node_id)
+                if pos is not None:
+                    initial[i, 0], initial[i, 2] = pos['x'], pos['z']
+                    known[i] = True
+            self._place_near_neighbors(initial, known)
+            engine.iterations = max(10, iterations // 5)
+            coords = engine.compute(self.graph, positions=initial, temperature=engine.edge_length)
+        else:
+            coords = engine.compute(self.graph)
+
+        layout_positions = {}
+        for node_id, layer_code, (x, y, z) in zip(self.graph.node_ids, self.graph.layers.tolist(), coords.tolist(),
+                                                 strict=True):
+            layout_positions[node_id] = {'x': x, 'y': y, 'z': z, 'layer': LAYERS[layer_code]}
+
+        extent = coords.max(axis=0) - coords.min(axis=0) if len(coords) else np.zeros(3)
+        return {
+            'positions': layout_positions,
+            'layers': list(self.graph.layer_members().keys()),
+            'dimensions': {
+                'width': float(extent[0]),
+                'height': float(extent[1]),
+                'depth': float(extent[2])
+            },
+            'algorithm': 'force_directed',
+            'iterations': engine.iterations_run,
+            'seed': seed,
+            'warm_start': bool(warm_start)
         }
 
-        for device in self.devices:
-            device_type = device.get('type', '').lower()
-            vendor = device.get('vendor', '').lower()
-            name = device.get('name', '').lower()
-
-            # Classification logic
-            if any(keyword in device_type for keyword in ['router', 'gateway', 'fortigate']):
-                layers['core'].append(device)
-            elif any(keyword in device_type for keyword in ['switch', 'fortiswitch']):
-                if 'core' in name or 'distribution' in name:
-                    layers['distribution'].append(device)
-                else:
-                    layers['access'].append(device)
-            elif any(keyword in device_type for keyword in ['ap', 'access_point', 'fortiap']):
-                layers['access'].append(device)
-            elif any(keyword in device_type for keyword in ['client', 'endpoint', 'device']):
-                layers['endpoints'].append(device)
-            else:
-                # Default to access layer
-                layers['access'].append(device)
-
-        # Remove empty layers
-        return {k: v for k, v in layers.items() if v}
+    def _place_near_neighbors(self, positions: np.ndarray, known: np.ndarray):
+        """Move unknown nodes to the mean x/z of their known neighbors (if any)"""
+        src, dst = self.graph.edge_src, self.graph.edge_dst
+        n = self.graph.node_count
+        sums = np.zeros((n, 2))
+        counts = np.zeros(n)
+        for a, b in ((src, dst), (dst, src)):
+            use = known[b] & ~known[a]
+            counts += np.bincount(a[use], minlength=n)
+            for column, axis in enumerate((0, 2)):
+                sums[:, column] += np.bincount(a[use], weights=positions[b[use], axis], minlength=n)
+        placed = counts > 0
+        offset = np.random.default_rng(n).normal(scale=10.0, size=(int(placed.sum()), 2))
+        positions[placed, 0] = sums[placed, 0] / counts[placed] + offset[:, 0]
+        positions[placed, 2] = sums[placed, 1] / counts[placed] + offset[:, 1]
+
+    def _apply_tree_layout(self, radial: bool = False) -> Dict[str, Any]:
+        """Tree/radial layout with clients grouped under their switch port"""
+        self.tree_layout = TreeLayout(radial=radial)
+        self.tree_layout.compute(self.graph, ports=self._port_assignments())
+        return self._tree_layout_result()
+
+    def relayout_subtree(self, device_id: str) -> Dict[str, Any]:
+        """
+        Update the tree layout after devices under device_id changed (call build_topology with the
+        new data first). Only that subtree moves; 'moved' lists the ids that did.
+        """
+        if self.tree_layout is None:
+            layout = self._apply_tree_layout()
+            layout['moved'] = list(layout['positions'])
+            return layout
+        moved = self.tree_layout.relayout_subtree(self.graph, device_id, ports=self._port_assignments())
+        layout = self._tree_layout_result()
+        layout['moved'] = moved
+        return layout
+
+    def _port_assignments(self) -> Dict[str, Tuple[str, str]]:
+        """device id -> (switch id, port) from client metadata and port-level links"""
+        ports = {}
+        for device_id, device in self._devices_by_id.items():
+            metadata = device.get('metadata') or {}
+            if metadata.get('connected_to_switch') and metadata.get('connected_port'):
+                ports[device_id] = (metadata['connected_to_switch'], str(metadata['connected_port']))
+        for conn in self.connections:
+            if isinstance(conn, dict) and conn.get('type') == 'ethernet' and conn.get('port'):
+                ports.setdefault(conn.get('target'), (conn.get('source'), str(conn['port'])))
+        return ports
+
+    def _tree_layout_result(self) -> Dict[str, Any]:
+        tree = self.tree_layout
+        node_count = self.graph.node_count
+        coords = tree.positions.tolist()
+        parents = tree.parent.tolist()
+
+        layout_positions = {}
+        for i, (node_id, layer_code) in enumerate(zip(self.graph.node_ids, self.graph.layers.tolist(), strict=True)):
+            x, y, z = coords[i]
+            layout_positions[node_id] = {
+                'x': x, 'y': y, 'z': z,
+                'layer': LAYERS[layer_code],
+                'parent': tree.node_ids[parents[i]] if parents[i] >= 0 else None
+            }
+
+        port_positions = {}
+        for i in range(node_count, len(tree.node_ids)):
+            x, y, z = coords[i]
+            switch_id = tree.node_ids[parents[i]]
+            port_positions[tree.node_ids[i]] = {
+                'x': x, 'y': y, 'z': z,
+                'switch': switch_id,
+                'port': tree.node_ids[i][len(switch_id) + len('#port:'):]
+            }
+
+        extent = tree.positions.max(axis=0) - tree.positions.min(axis=0) if len(coords) else np.zeros(3)
+        return {
+            'positions': layout_positions,
+            'ports': port_positions,
+            'layers': list(self.graph.layer_members().keys()),
+            'dimensions': {
+                'width': float(extent[0]),
+                'height': float(extent[1]),
+                'depth': float(extent[2])
+            },
+            'algorithm': 'radial' if tree.radial else 'tree'
+        }
+
+    def _group_devices_by_layer(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Group devices into logical layers (core, distribution, access, endpoints)"""
+        graph = self.graph
+        layers = {}
+        for layer_name, members in graph.layer_members().items():
+            layers[layer_name] = [self._devices_by_id[graph.node_ids[i]] for i in members.tolist()]
+        return layers
 
     def add_device_relationships(self) -> List[Tuple[str, str]]:
         """Add logical relationships between devices"""
@@ -153,16 +345,23 @@ class TopologyBuilder:
         """Find devices related to the given device"""
         related = []
 
-        # This would implement logic to find related devices
-        # For now, return empty list as this requires more complex analysis
-        # In a full implementation, this would analyze the connection data
+        for neighbor_id in self.graph.neighbors(device_id):
+            neighbor = self._devices_by_id.get(neighbor_id)
+            if not neighbor:
+                continue
+            neighbor_type = str(neighbor.get('type', '')).lower()
+            if any(t in neighbor_type for t in related_types):
+                related.append(neighbor_id)
 
         return related
 
     def optimize_layout(self, layout: Dict[str, Any]) -> Dict[str, Any]:
-        """Optimize layout to reduce crossings and improve readability"""
-        # Simple optimization: adjust positions to reduce overlap
-        positions = layout['positions']
+        """
+        Optimize layout to reduce crossings and improve readability.
+        Layers are processed top-down; each layer is ordered by the barycenter of its neighbors in
+        the layers above, then wrapped into a square grid on its plane instead of one long row.
+        """
+        positions = layout.get('positions', {})
 
         # Separate devices by layer
         layer_positions = {}
@@ -172,36 +371,51 @@ class TopologyBuilder:
                 layer_positions[layer] = []
             layer_positions[layer].append((device_id, pos))
 
-        # Optimize each layer
+        # Optimize each layer, top-down
         optimized_positions = {}
-        for layer, devices in layer_positions.items():
-            optimized_layer = self._optimize_layer(devices)
+        for layer, devices in sorted(layer_positions.items(), key=lambda item: min(p.get('y', 0) for _, p in item[1])):
+            optimized_layer = self._optimize_layer(devices, optimized_positions)
             optimized_positions.update(optimized_layer)
 
         layout['positions'] = optimized_positions
         layout['optimized'] = True
+        if optimized_positions:
+            xs = [p['x'] for p in optimized_positions.values()]
+            zs = [p.get('z', 0) for p in optimized_positions.values()]
+            layout.setdefault('dimensions', {}).update({
+                'width': max(xs) - min(xs),
+                'depth': max(zs) - min(zs)
+            })
 
         return layout
 
-    def _optimize_layer(self, devices: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
-        """Optimize device positions within a layer"""
+    def _optimize_layer(self, devices: List[Tuple[str, Dict[str, Any]]],
+                        placed: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+        """Order a layer by neighbor barycenter and wrap it into rows along z"""
         if len(devices) <= 1:
             return {device_id: pos for device_id, pos in devices}
 
-        # Sort by x position
-        devices.sort(key=lambda x: x[1]['x'])
+        placed = placed or {}
+
+        def barycenter(item: Tuple[str, Dict[str, Any]]) -> float:
+            xs = [placed[n]['x'] for n in self.graph.neighbors(item[0]) if n in placed]
+            return sum(xs) / len(xs) if xs else item[1].get('x', 0)
+
+        devices.sort(key=barycenter)
 
         # Adjust spacing to prevent overlap
         min_spacing = 120
+        columns = math.ceil(math.sqrt(len(devices)))
+        rows = math.ceil(len(devices) / columns)
         optimized = {}
 
-        current_x = devices[0][1]['x']
-        for device_id, pos in devices:
+        for i, (device_id, pos) in enumerate(devices):
+            row, column = divmod(i, columns)
             optimized[device_id] = {
                 **pos,
-                'x': current_x
+                'x': (column - (columns - 1) / 2) * min_spacing,
+                'z': (row - (rows - 1) / 2) * min_spacing
             }
-            current_x += min_spacing
 
         return optimized
 
@@ -217,49 +431,28 @@ class TopologyBuilder:
         connections = topology.get('connections', [])
         positions = topology.get('layout', {}).get('positions', {})
 
-        # Check for orphaned devices
-        connected_device_ids = set()
-        for conn in connections:
-            if isinstance(conn, tuple):
-                source, target = conn
-            elif isinstance(conn, dict):
-                source = conn.get('source')
-                target = conn.get('target')
-            else:
-                continue
-            connected_device_ids.add(source)
-            connected_device_ids.add(target)
-
-        for device in devices:
-            device_id = device.get('id')
-            if device_id and device_id not in connected_device_ids:
-                validation_results['warnings'].append(f"Device {device_id} has no connections")
-
-        # Check for missing positions
-        for device in devices:
-            device_id = device.get('id')
-            if not device_id:
-                validation_results['errors'].append("Device found without ID")
-            elif device_id not in positions:
-                validation_results['warnings'].append(f"Device {device_id} has no position")
-
-        # Check for invalid connections
-        device_ids = {d.get('id') for d in devices if d.get('id')}
-        for conn in connections:
-            # Handle both tuple and dict formats
-            if isinstance(conn, tuple):
-                source, target = conn
-            elif isinstance(conn, dict):
-                source = conn.get('source')
-                target = conn.get('target')
-            else:
-                validation_results['errors'].append(f"Invalid connection format: {conn}")
-                continue
-
-            if source not in device_ids:
-                validation_results['errors'].append(f"Connection source {source} not found in devices")
-            if target not in device_ids:
-                validation_results['errors'].append(f"Connection target {target} not found in devices")
+        graph = TopologyGraph.from_topology(devices, connections)
+        warnings = validation_results['warnings']
+        errors = validation_results['errors']
+
+        # Orphaned devices and missing positions
+        degrees = graph.degrees.tolist()
+        for device_id, degree in zip(graph.node_ids, degrees, strict=True):
+            if not degree:
+                warnings.append(f"Device {device_id} has no connections")
+        for device_id in graph.node_ids:
+            if device_id not in positions:
+                warnings.append(f"Device {device_id} has no position")
+        errors.extend(["Device found without ID"] * graph.missing_id_count)
+
+        # Invalid connections
+        for conn in graph.malformed_edges:
+            errors.append(f"Invalid connection format: {conn}")
+        for source, target in graph.invalid_edges:
+            if source not in graph.index:
+                errors.append(f"Connection source {source} not found in devices")
+            if target not in graph.index:
+                errors.append(f"Connection target {target} not found in devices")
 
         if validation_results['errors']:
             validation_results['valid'] = False
@@ -0,0 +1,321 @@
+"""
+Topology Clustering
+Server-side level-of-detail for large topologies: endpoints are collapsed into cluster nodes per
+uplink device and per port or restaurant category, and clusters are expanded on demand
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+import math
+import threading
+
+import numpy as np
+
+from .topology_graph import TopologyGraph, LAYER_INDEX, _edge_endpoints
+
+logger = logging.getLogger(__name__)
+
+ENDPOINT_LAYER = LAYER_INDEX['endpoints']
+GROUP_BY = ('port', 'category')
+
+# Detail levels: 0 = endpoints collapsed per uplink, 1 = per uplink and port/category, 2 = everything
+LEVEL_UPLINK, LEVEL_GROUP, LEVEL_FULL = 0, 1, 2
+
+# Above this many devices viewers start from a clustered level of detail
+LOD_MAX_NODES = 2000
+
+
+def _view_node(device: Dict[str, Any]) -> Dict[str, Any]:
+    """Node fields the 3D viewer uses, plus layout coordinates when the device has them"""
+    node = {
+        'id': device.get('id'),
+        'name': device.get('name', device.get('id')),
+        'type': device.get('type', 'unknown'),
+        'vendor': device.get('vendor', 'unknown'),
+        'val': 10
+    }
+    if device.get('x') is not None:
+        node.update(x=device['x'], y=device.get('y'), z=device.get('z'))
+    return node
+
+
+class _Level:
+    """Cluster assignment for one detail level"""
+
+    def __init__(self, keys: List[Tuple[str, ...]], member_cluster: np.ndarray):
+        self.keys = keys                        # cluster index -> (uplink id, [group])
+        self.member_cluster = member_cluster    # node index -> cluster index, -1 when shown as itself
+        self.sizes = np.bincount(member_cluster[member_cluster >= 0], minlength=len(keys))
+
+
+class ClusteredTopology:
+    """
+    A topology with precomputed detail levels.
+    Every endpoint is assigned to its uplink (the non-endpoint neighbour deepest in the hierarchy)
+    and to a group on that uplink: the switch port it is patched into, or its restaurant category.
+    Infrastructure devices are always shown; endpoints sharing an uplink/group collapse into one
+    cluster node once there are at least `min_cluster_size` of them.
+    """
+
+    def __init__(self, devices: List[Dict[str, Any]], connections: List[Any],
+                 group_by: str = 'port', min_cluster_size: int = 2):
+        if group_by not in GROUP_BY:
+            raise ValueError(f"Unsupported group_by: {group_by}")
+        self.group_by = group_by
+        self.min_cluster_size = min_cluster_size
+        self.graph = TopologyGraph.from_topology(devices, connections)
+        self.devices: Dict[str, Dict[str, Any]] = {}
+        for device in devices:
+            self.devices.setdefault(device.get('id'), device)
+
+        self.is_endpoint = self.graph.layers == ENDPOINT_LAYER
+        self.positions = self._positions()
+        self._centroids: Dict[int, np.ndarray] = {}
+        self.uplink = self._uplinks()
+        groups = self._groups(connections)
+
+        n = self.graph.node_count
+        self.levels: Dict[int, _Level] = {}
+        for level, with_group in ((LEVEL_UPLINK, False), (LEVEL_GROUP, True)):
+            keys: Dict[Tuple[str, ...], int] = {}
+            assignment = np.full(n, -1, dtype=np.int64)
+            for i in np.flatnonzero(self.is_endpoint).tolist():
+                uplink = self.graph.node_ids[self.uplink[i]] if self.uplink[i] >= 0 else ''
+                key = (uplink, groups[i]) if with_group else (uplink,)
+                assignment[i] = keys.setdefault(key, len(keys))
+            level_keys = list(keys)
+            # Small groups are shown as individual endpoints
+            sizes = np.bincount(assignment[assignment >= 0], minlength=len(level_keys))
+            small = np.flatnonzero(sizes < min_cluster_size)
+            assignment[np.isin(assignment, small)] = -1
+            self.levels[level] = _Level(level_keys, assignment)
+
+        self._cluster_index: Dict[str, Tuple[int, int]] = {}
+        for level, data in self.levels.items():
+            for c, key in enumerate(data.keys):
+                if data.sizes[c]:
+                    self._cluster_index[self.cluster_id(level, key)] = (level, c)
+
+    # Construction helpers
+
+    def _positions(self) -> Optional[np.ndarray]:
+        """Layout coordinates per node (n x 3), or None unless every device has them"""
+        coords = []
+        for node_id in self.graph.node_ids:
+            device = self.devices.get(node_id) or {}
+            if device.get('x') is None:
+                return None
+            coords.append((device['x'], device.get('y') or 0.0, device.get('z') or 0.0))
+        return np.array(coords, dtype=float).reshape(-1, 3)
+
+    def _uplinks(self) -> np.ndarray:
+        """For each endpoint, the index of its non-endpoint neighbour with the deepest layer (-1 if none)"""
+        graph = self.graph
+        rows = np.repeat(np.arange(graph.node_count), graph.degrees)
+        cols = graph.indices.astype(np.int64)
+        mask = self.is_endpoint[rows] & ~self.is_endpoint[cols]
+        rows, cols = rows[mask], cols[mask]
+        uplink = np.full(graph.node_count, -1, dtype=np.int64)
+        if len(rows):
+            order = np.lexsort((-graph.layers[cols].astype(np.int64), rows))
+            rows, cols = rows[order], cols[order]
+            first = np.ones(len(rows), dtype=bool)
+            first[1:] = rows[1:] != rows[:-1]
+            uplink[rows[first]] = cols[first]
+        return uplink
+
+    def _groups(self, connections: List[Any]) -> List[str]:
+        """Group label per node: the port on its uplink, or its restaurant category"""
+        groups = [''] * self.graph.node_count
+        if self.group_by == 'port':
+            index = self.graph.index
+            for conn in connections:
+                if not isinstance(conn, dict) or not conn.get('port'):
+                    continue
+                endpoints = _edge_endpoints(conn)
+                s, t = index.get(endpoints[0]), index.get(endpoints[1])
+                if s is None or t is None:
+                    continue
+                for child, parent in ((t, s), (s, t)):
+                    if self.is_endpoint[child] and self.uplink[child] == parent:
+                        groups[child] = str(conn['port'])
+        for i in np.flatnonzero(self.is_endpoint).tolist():
+            if groups[i]:
+                continue
+            device = self.devices.get(self.graph.node_ids[i]) or {}
+            metadata = device.get('metadata') or {}
+            if self.group_by == 'port':
+                groups[i] = str(metadata.get('connected_port') or device.get('port') or 'unknown')
+            else:
+                groups[i] = str(metadata.get('restaurant_category') or device.get('restaurant_category')
+                                or 'uncategorized')
+        return groups
+
+    # Views
+
+    @staticmethod
+    def cluster_id(level: int, key: Tuple[str, ...]) -> str:
+        return f"cluster{level}:" + ':'.join(key)
+
+    def node_count(self, level: int) -> int:
+        if level == LEVEL_FULL:
+            return self.graph.node_count
+        data = self.levels[level]
+        return int((data.member_cluster < 0).sum() + np.count_nonzero(data.sizes))
+
+    def level_summary(self) -> List[Dict[str, Any]]:
+        return [{'level': level, 'nodes': self.node_count(level)} for level in (LEVEL_UPLINK, LEVEL_GROUP, LEVEL_FULL)]
+
+    def pick_level(self, max_nodes: int) -> int:
+        """Finest level whose node count fits in max_nodes (the coarsest level if none does)"""
+        for level in (LEVEL_FULL, LEVEL_GROUP):
+            if self.node_count(level) <= max_nodes:
+                return level
+        return LEVEL_UPLINK
+
+    def _centroid(self, level: int, c: int) -> Optional[List[float]]:
+        """Mean position of a cluster's members, when the topology has a layout"""
+        if self.positions is None:
+            return None
+        if level not in self._centroids:
+            data = self.levels[level]
+            clustered = data.member_cluster >= 0
+            sums = np.stack([np.bincount(data.member_cluster[clustered], weights=self.positions[clustered, axis],
+                                         minlength=len(data.keys)) for axis in range(3)], axis=1)
+            self._centroids[level] = sums / np.maximum(data.sizes, 1)[:, None]
+        return self._centroids[level][c].tolist()
+
+    def _cluster_node(self, level: int, c: int) -> Dict[str, Any]:
+        data = self.levels[level]
+        key = data.keys[c]
+        count = int(data.sizes[c])
+        label = 'clients' if level == LEVEL_UPLINK else f"clients ({key[1]})"
+        node = {
+            'id': self.cluster_id(level, key),
+            'name': f"{count} {label}",
+            'type': 'cluster',
+            'vendor': 'cluster',
+            'cluster': True,
+            'level': level,
+            'count': count,
+            'uplink': key[0] or None,
+            'group': key[1] if len(key) > 1 else None,
+            'val': 10 + 4 * math.log2(count)
+        }
+        centroid = self._centroid(level, c)
+        if centroid is not None:
+            node['x'], node['y'], node['z'] = centroid
+        return node
+
+    def _representatives(self, level: int) -> np.ndarray:
+        """Node index -> index of what stands for it (itself, or node_count + cluster)"""
+        n = self.graph.node_count
+        rep = np.arange(n, dtype=np.int64)
+        if level != LEVEL_FULL:
+            assignment = self.levels[level].member_cluster
+            clustered = assignment >= 0
+            rep[clustered] = n + assignment[clustered]
+        return rep
+
+    def _links(self, rep: np.ndarray, id_of) -> List[Dict[str, Any]]:
+        src, dst = rep[self.graph.edge_src], rep[self.graph.edge_dst]
+        keep = src != dst
+        src, dst = src[keep], dst[keep]
+        if not len(src):
+            return []
+        pairs = np.unique(np.stack([np.minimum(src, dst), np.maximum(src, dst)], axis=1), axis=0)
+        return [{'source': id_of(a), 'target': id_of(b)} for a, b in pairs.tolist()]
+
+    def view(self, level: int) -> Dict[str, Any]:
+        """Nodes and links for a detail level"""
+        n = self.graph.node_count
+        ids = self.graph.node_ids
+        rep = self._representatives(level)
+        nodes = [_view_node(self.devices[ids[i]]) for i in np.flatnonzero(rep == np.arange(n)).tolist()]
+        if level != LEVEL_FULL:
+            data = self.levels[level]
+            nodes.extend(self._cluster_node(level, c) for c in np.flatnonzero(data.sizes).tolist())
+
+        def id_of(r: int) -> str:
+            return ids[r] if r < n else self.cluster_id(level, self.levels[level].keys[r - n])
+
+        return {'level': level, 'nodes': nodes, 'links': self._links(rep, id_of)}
+
+    def initial_view(self, max_nodes: int = LOD_MAX_NODES) -> Dict[str, Any]:
+        return self.view(self.pick_level(max_nodes))
+
+    def expand(self, cluster_id: str, limit: int = 500, offset: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Subgraph that replaces a cluster node: an uplink cluster opens into its port/category
+        clusters, a group cluster into its endpoints (paged by offset/limit). None if unknown.
+        """
+        found = self._cluster_index.get(cluster_id)
+        if found is None:
+            return None
+        level, c = found
+        ids = self.graph.node_ids
+        members = np.flatnonzero(self.levels[level].member_cluster == c)
+        uplink = self.levels[level].keys[c][0] or None
+
+        if level == LEVEL_UPLINK:
+            sub = self.levels[LEVEL_GROUP].member_cluster[members]
+            subclusters = np.unique(sub[sub >= 0])
+            if len(subclusters) > 1 or (len(subclusters) == 1 and (sub < 0).any()):
+                nodes = [self._cluster_node(LEVEL_GROUP, s) for s in subclusters.tolist()]
+                nodes += [_view_node(self.devices[ids[i]]) for i in members[sub < 0].tolist()]
+                links = [{'source': uplink, 'target': node['id']} for node in nodes] if uplink else []
+                return {'cluster': cluster_id, 'nodes': nodes, 'links': links,
+                        'total': len(nodes), 'offset': 0, 'limit': len(nodes), 'has_more': False}
+
+        page = members[offset:offset + limit]
+        nodes = [_view_node(self.devices[ids[i]]) for i in page.tolist()]
+        in_page = np.zeros(self.graph.node_count, dtype=bool)
+        in_page[page] = True
+        touches = in_page[self.graph.edge_src] | in_page[self.graph.edge_dst]
+        links = [{'source': ids[s], 'target': ids[t]} for s, t in
+                 zip(self.graph.edge_src[touches].tolist(), self.graph.edge_dst[touches].tolist(), strict=True)]
+        return {
+            'cluster': cluster_id,
+            'nodes': nodes,
+            'links': links,
+            'total': int(len(members)),
+            'offset': offset,
+            'limit': limit,
+            'has_more': offset + limit < len(members)
+        }
+
+
+class ClusterRegistry:
+    """Recently clustered topologies, so viewers can expand clusters after the page is built"""
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, ClusteredTopology]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, clustered: ClusteredTopology) -> str:
+        from .layout_cache import structure_hash
+
+        key = f"{structure_hash(clustered.graph)[:16]}-{clustered.group_by}"
+        with self._lock:
+            self._entries[key] = clustered
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return key
+
+    def get(self, key: str) -> Optional[ClusteredTopology]:
+        with self._lock:
+            clustered = self._entries.get(key)
+            if clustered is not None:
+                self._entries.move_to_end(key)
+            return clustered
+
+
+_registry = None
+def get_cluster_registry() -> ClusterRegistry:
+    global _registry
+    if _registry is None:
+        _registry = ClusterRegistry()
+    return _registry
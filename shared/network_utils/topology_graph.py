@@ -0,0 +1,217 @@
+"""
+Topology Graph
+Compact graph core for topologies: integer node ids, CSR adjacency arrays and id<->index maps
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Any, Tuple, Optional, Iterable
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LAYERS = ('core', 'distribution', 'access', 'endpoints')
+LAYER_INDEX = {name: i for i, name in enumerate(LAYERS)}
+
+
+@lru_cache(maxsize=1024)
+def _type_layer(device_type: str) -> str:
+    """Layer for a device type; 'switch' means the device name decides"""
+    if any(keyword in device_type for keyword in ['router', 'gateway', 'fortigate']):
+        return 'core'
+    if any(keyword in device_type for keyword in ['switch', 'fortiswitch']):
+        return 'switch'
+    if any(keyword in device_type for keyword in ['ap', 'access_point', 'fortiap']):
+        return 'access'
+    if any(keyword in device_type for keyword in ['client', 'endpoint', 'device']):
+        return 'endpoints'
+    # Default to access layer
+    return 'access'
+
+
+def classify_layer(device: Dict[str, Any]) -> str:
+    """Logical layer of a device (core -> distribution -> access -> endpoints)"""
+    layer = _type_layer(str(device.get('type') or '').lower())
+    if layer == 'switch':
+        name = str(device.get('name') or '').lower()
+        return 'distribution' if 'core' in name or 'distribution' in name else 'access'
+    return layer
+
+
+def _edge_endpoints(conn: Any) -> Optional[Tuple[Any, Any]]:
+    if isinstance(conn, (list, tuple)) and len(conn) >= 2:
+        return conn[0], conn[1]
+    if isinstance(conn, dict):
+        return conn.get('source'), conn.get('target')
+    return None
+
+
+class TopologyGraph:
+    """
+    Undirected topology graph in CSR form.
+    Node i's neighbors are indices[indptr[i]:indptr[i + 1]].
+    Construction is O(V + E log E); degree, isolation and neighbor queries are array operations.
+    """
+
+    def __init__(self, node_ids: List[str], edge_src: np.ndarray, edge_dst: np.ndarray,
+                 layers: Optional[np.ndarray] = None, index: Optional[Dict[str, int]] = None):
+        self.node_ids = node_ids
+        self.index: Dict[str, int] = index if index is not None else {
+            node_id: i for i, node_id in enumerate(node_ids)
+        }
+        self.edge_src = edge_src
+        self.edge_dst = edge_dst
+        self.layers = layers if layers is not None else np.full(len(node_ids), LAYER_INDEX['access'], dtype=np.int8)
+
+        # Diagnostics collected while building from raw topology data
+        self.missing_id_count = 0
+        self.duplicate_ids: List[str] = []
+        self.invalid_edges: List[Tuple[Any, Any]] = []
+        self.malformed_edges: List[Any] = []
+
+        self._build_csr()
+
+    @classmethod
+    def from_topology(cls, devices: Iterable[Dict[str, Any]], connections: Iterable[Any]) -> 'TopologyGraph':
+        """Build from the devices/connections lists used throughout the API"""
+        node_ids: List[str] = []
+        layers: List[int] = []
+        seen: Dict[str, int] = {}
+        missing_ids = 0
+        duplicates = []
+
+        for device in devices:
+            device_id = device.get('id')
+            if not device_id:
+                missing_ids += 1
+                continue
+            if device_id in seen:
+                duplicates.append(device_id)
+                continue
+            seen[device_id] = len(node_ids)
+            node_ids.append(device_id)
+            layers.append(LAYER_INDEX[classify_layer(device)])
+
+        src: List[int] = []
+        dst: List[int] = []
+        invalid = []
+        malformed = []
+        for conn in connections:
+            endpoints = _edge_endpoints(conn)
+            if endpoints is None:
+                malformed.append(conn)
+                continue
+            s = seen.get(endpoints[0])
+            t = seen.get(endpoints[1])
+            if s is None or t is None:
+                invalid.append(endpoints)
+                continue
+            src.append(s)
+            dst.append(t)
+
+        graph = cls(
+            node_ids,
+            np.asarray(src, dtype=np.int32),
+            np.asarray(dst, dtype=np.int32),
+            np.asarray(layers, dtype=np.int8),
+            index=seen
+        )
+        graph.missing_id_count = missing_ids
+        graph.duplicate_ids = duplicates
+        graph.invalid_edges = invalid
+        graph.malformed_edges = malformed
+        return graph
+
+    def _build_csr(self):
+        n = len(self.node_ids)
+        src, dst = self.edge_src, self.edge_dst
+
+        # Drop self-loops and collapse duplicate undirected pairs
+        keep = src != dst
+        src, dst = src[keep], dst[keep]
+        if len(src):
+            lo = np.minimum(src, dst).astype(np.int64)
+            hi = np.maximum(src, dst).astype(np.int64)
+            _, first = np.unique(lo * max(n, 1) + hi, return_index=True)
+            first.sort()
+            src, dst = src[first], dst[first]
+        self.edge_src, self.edge_dst = src, dst
+
+        rows = np.concatenate([src, dst])
+        cols = np.concatenate([dst, src])
+        order = np.argsort(rows, kind='stable')
+        self.indices = cols[order].astype(np.int32)
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=self.indptr[1:])
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_src)
+
+    @property
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def neighbor_indices(self, i: int) -> np.ndarray:
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def neighbors(self, node_id: str) -> List[str]:
+        i = self.index.get(node_id)
+        if i is None:
+            return []
+        return [self.node_ids[j] for j in self.neighbor_indices(i)]
+
+    def isolated_ids(self) -> List[str]:
+        return [self.node_ids[i] for i in np.flatnonzero(self.degrees == 0)]
+
+    def layer_members(self) -> Dict[str, np.ndarray]:
+        """Node indices per non-empty layer, in layer order then input order"""
+        members = {}
+        for code, name in enumerate(LAYERS):
+            idx = np.flatnonzero(self.layers == code)
+            if len(idx):
+                members[name] = idx
+        return members
+
+    def bfs_levels(self, roots: Iterable[int]) -> np.ndarray:
+        """Hop distance from the nearest root (-1 if unreachable), O(V+E)"""
+        level = np.full(self.node_count, -1, dtype=np.int32)
+        frontier = np.unique(np.asarray(list(roots), dtype=np.int32))
+        if not len(frontier):
+            return level
+        level[frontier] = 0
+        depth = 0
+        while len(frontier):
+            depth += 1
+            starts, ends = self.indptr[frontier], self.indptr[frontier + 1]
+            counts = ends - starts
+            if not counts.sum():
+                break
+            offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            candidates = np.unique(self.indices[offsets])
+            frontier = candidates[level[candidates] == -1]
+            level[frontier] = depth
+        return level
+
+    def connected_components(self) -> np.ndarray:
+        """Dense component label per node via min-label propagation with pointer jumping"""
+        labels = np.arange(self.node_count, dtype=np.int64)
+        if not self.edge_count:
+            return labels.astype(np.int32)
+        while True:
+            previous = labels.copy()
+            np.minimum.at(labels, self.edge_src, labels[self.edge_dst])
+            np.minimum.at(labels, self.edge_dst, labels[self.edge_src])
+            labels = labels[labels]
+            if np.array_equal(labels, previous):
+                break
+        return np.unique(labels, return_inverse=True)[1].astype(np.int32)
+
+    def edge_pairs(self) -> List[Tuple[str, str]]:
+        ids = self.node_ids
+        return [(ids[s], ids[t]) for s, t in zip(self.edge_src.tolist(), self.edge_dst.tolist(), strict=True)]
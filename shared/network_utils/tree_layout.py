@@ -0,0 +1,309 @@
+"""
+Tree Layout
+Tidy hierarchical and radial layouts for FortiGate -> switch -> port -> client trees
+"""
+
+from typing import Dict, List, Any, Tuple, Optional, Iterable
+import logging
+import math
+import re
+
+import numpy as np
+
+from .topology_graph import TopologyGraph, LAYER_INDEX
+
+logger = logging.getLogger(__name__)
+
+DIGITS_PATTERN = re.compile(r'(\d+)')
+
+
+def _natural_key(value: str) -> List[Any]:
+    """port2 sorts before port10"""
+    return [int(part) if part.isdigit() else part for part in DIGITS_PATTERN.split(value)]
+
+
+def port_node_id(parent_id: str, port: str) -> str:
+    return f"{parent_id}#port:{port}"
+
+
+class TreeLayout:
+    """
+    Tidy tree layout following the Reingold-Tilford rules: subtrees never overlap, parents are
+    centered over their children and identical subtrees are drawn identically.
+
+    The spanning tree comes from a BFS over the CSR graph starting at the core layer. Clients with a
+    known switch port hang under a virtual port node, and a node whose children are all leaves packs
+    them into a square block (rows along z) instead of one long row. Widths are accumulated
+    bottom-up and offsets assigned top-down one generation at a time, so the whole layout is a
+    constant number of array passes per tree level.
+    """
+
+    def __init__(self, level_gap: float = 200.0, sibling_gap: float = 150.0, block_threshold: int = 6,
+                 radial: bool = False):
+        self.level_gap = level_gap
+        self.sibling_gap = sibling_gap
+        self.block_threshold = block_threshold
+        self.radial = radial
+
+        self.node_ids: List[str] = []
+        self.virtual_ids: List[str] = []
+        self.parent = np.zeros(0, dtype=np.int64)
+        self.generation = np.zeros(0, dtype=np.int64)
+        self.width = np.zeros(0)
+        self.left = np.zeros(0)
+        self.row = np.zeros(0, dtype=np.int64)
+        self.positions = np.zeros((0, 3))
+        self._index: Dict[str, int] = {}
+        self._span = (0.0, 0.0)
+
+    # Public API
+
+    def compute(self, graph: TopologyGraph, roots: Optional[Iterable[str]] = None,
+                ports: Optional[Dict[str, Tuple[str, str]]] = None) -> np.ndarray:
+        """
+        Lay out the graph. ports maps a device id to (switch id, port name).
+        Returns an (n, 3) array aligned with node_ids (graph nodes first, then virtual port nodes).
+        """
+        self._build(graph, roots, ports)
+        self._measure()
+        self._place_roots()
+        self._place_children(np.ones(len(self.node_ids), dtype=bool))
+        total = float((self.left + self.width).max() - self.left.min()) if len(self.node_ids) else 0.0
+        self._span = (float(self.left.min()) if len(self.node_ids) else 0.0, max(total, 1.0))
+        self.positions = self._coordinates()
+        return self.positions
+
+    def relayout_subtree(self, graph: TopologyGraph, node_id: str, roots: Optional[Iterable[str]] = None,
+                         ports: Optional[Dict[str, Tuple[str, str]]] = None) -> List[str]:
+        """
+        Re-run the layout after the topology under node_id changed, moving only that subtree.
+        If the subtree outgrew its slot, the nearest ancestor whose slot still fits is relaid instead;
+        if none fits, the whole tree is laid out again. Returns the ids whose position changed.
+        """
+        if not self.node_ids:
+            self.compute(graph, roots, ports)
+            return list(self.node_ids)
+
+        old_index = self._index
+        old_left, old_width, old_row, old_positions = self.left, self.width, self.row, self.positions
+        span = self._span
+
+        self._build(graph, roots, ports)
+        self._measure()
+        previous = np.fromiter((old_index.get(node, -1) for node in self.node_ids), dtype=np.int64,
+                               count=len(self.node_ids))
+
+        anchor = self._index.get(node_id)
+        while anchor is not None:
+            if previous[anchor] >= 0 and self.width[anchor] <= old_width[previous[anchor]]:
+                break
+            anchor = int(self.parent[anchor]) if self.parent[anchor] >= 0 else None
+
+        if anchor is None:
+            self.compute(graph, roots, ports)
+            return list(self.node_ids)
+
+        # Keep every node outside the subtree where it was
+        inside = self._descendants(anchor)
+        known = previous >= 0
+        self.left = np.where(known, old_left[np.maximum(previous, 0)], 0.0)
+        self.row = np.where(known, old_row[np.maximum(previous, 0)], 0)
+        old = previous[anchor]
+        self.left[anchor] = old_left[old] + (old_width[old] - self.width[anchor]) / 2
+        inside[anchor] = False
+        self._place_children(inside)
+        inside[anchor] = True
+
+        self._span = span
+        positions = self._coordinates()
+        kept = ~inside & known
+        positions[kept] = old_positions[previous[kept]]
+        self.positions = positions
+
+        changed = ~known | np.any(positions != old_positions[np.maximum(previous, 0)], axis=1)
+        return [self.node_ids[i] for i in np.flatnonzero(changed).tolist()]
+
+    def level_of(self, i: int) -> float:
+        return self.generation[i] / 2
+
+    # Tree construction
+
+    def _build(self, graph: TopologyGraph, roots: Optional[Iterable[str]],
+               ports: Optional[Dict[str, Tuple[str, str]]]):
+        n = graph.node_count
+        parent = np.full(n, -1, dtype=np.int64)
+        depth = np.full(n, -1, dtype=np.int64)
+
+        if roots is not None:
+            root_idx = np.array([graph.index[r] for r in roots if r in graph.index], dtype=np.int64)
+        else:
+            root_idx = np.flatnonzero(graph.layers == LAYER_INDEX['core'])
+        self._bfs(graph, root_idx, parent, depth)
+
+        # Components without a root start at their best-connected node
+        unvisited = np.flatnonzero(depth == -1)
+        if len(unvisited):
+            labels = graph.connected_components()[unvisited]
+            order = np.lexsort((unvisited, -graph.degrees[unvisited], labels))
+            first = np.unique(labels[order], return_index=True)[1]
+            self._bfs(graph, unvisited[order][first], parent, depth)
+
+        node_ids = list(graph.node_ids)
+        generation = list((depth * 2).tolist())
+        parents = parent.tolist()
+        rank = list(range(n))
+
+        # Virtual port nodes between a switch and its clients
+        virtual_ids = []
+        if ports:
+            groups: Dict[Tuple[int, str], int] = {}
+            for child_id, (switch_id, port) in ports.items():
+                c, p = graph.index.get(child_id), graph.index.get(switch_id)
+                if c is None or p is None or not port or parents[c] != p:
+                    continue
+                key = (p, str(port))
+                v = groups.get(key)
+                if v is None:
+                    v = len(node_ids)
+                    groups[key] = v
+                    node_ids.append(port_node_id(switch_id, str(port)))
+                    virtual_ids.append(node_ids[-1])
+                    generation.append(generation[p] + 1)
+                    parents.append(p)
+                    rank.append(0)
+                parents[c] = v
+            for position, key in enumerate(sorted(groups, key=lambda key: _natural_key(key[1]))):
+                rank[groups[key]] = n + position
+
+        self.node_ids = node_ids
+        self.virtual_ids = virtual_ids
+        self._index = {node_id: i for i, node_id in enumerate(node_ids)}
+        self.parent = np.asarray(parents, dtype=np.int64)
+        self.generation = np.asarray(generation, dtype=np.int64)
+        self._rank = np.asarray(rank, dtype=np.int64)
+
+    @staticmethod
+    def _bfs(graph: TopologyGraph, frontier: np.ndarray, parent: np.ndarray, depth: np.ndarray):
+        frontier = np.unique(frontier)
+        if not len(frontier):
+            return
+        depth[frontier] = 0
+        while len(frontier):
+            starts = graph.indptr[frontier]
+            counts = graph.indptr[frontier + 1] - starts
+            total = int(counts.sum())
+            if not total:
+                break
+            offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+            candidates = graph.indices[offsets].astype(np.int64)
+            sources = np.repeat(frontier, counts)
+            fresh = depth[candidates] == -1
+            candidates, first = np.unique(candidates[fresh], return_index=True)
+            parent[candidates] = sources[fresh][first]
+            depth[candidates] = depth[parent[candidates]] + 1
+            frontier = candidates
+
+    # Measurement and placement
+
+    def _measure(self):
+        """Subtree widths bottom-up, plus sibling offsets within each parent"""
+        count = len(self.node_ids)
+        gap = self.sibling_gap
+        has_parent = self.parent >= 0
+        child_parent = self.parent[has_parent]
+
+        self.child_count = np.bincount(child_parent, minlength=count)
+        is_leaf = self.child_count == 0
+        inner_children = np.bincount(self.parent[has_parent & ~is_leaf], minlength=count)
+        self.block = (self.child_count > self.block_threshold) & (inner_children == 0)
+        self.columns = np.where(self.block, np.ceil(np.sqrt(self.child_count)), 0).astype(np.int64)
+
+        width = np.full(count, gap)
+        children_width = np.zeros(count)
+        for generation in np.unique(self.generation)[::-1].tolist():
+            members = np.flatnonzero(self.generation == generation)
+            width[members] = np.where(
+                self.block[members],
+                self.columns[members] * gap,
+                np.maximum(gap, children_width[members])
+            )
+            attached = members[self.parent[members] >= 0]
+            np.add.at(children_width, self.parent[attached], width[attached])
+        self.width = width
+        self.children_width = children_width
+
+        # Children sorted by parent, then rank: offset before each child and its index among siblings
+        children = np.flatnonzero(has_parent)
+        order = children[np.lexsort((self._rank[children], self.parent[children]))]
+        widths = width[order]
+        running = np.cumsum(widths) - widths
+        group_start = np.r_[True, self.parent[order][1:] != self.parent[order][:-1]] if len(order) else np.zeros(0, bool)
+        start_index = np.maximum.accumulate(np.where(group_start, np.arange(len(order)), 0)) if len(order) else order
+        self.offset = np.zeros(count)
+        self.sibling_index = np.zeros(count, dtype=np.int64)
+        self.offset[order] = running - running[start_index]
+        self.sibling_index[order] = np.arange(len(order)) - start_index
+
+        # First and last child of every parent, for centering
+        self.first_child = np.full(count, -1, dtype=np.int64)
+        self.last_child = np.full(count, -1, dtype=np.int64)
+        self.last_child[self.parent[order]] = order
+        self.first_child[self.parent[order][::-1]] = order[::-1]
+
+    def _place_roots(self):
+        count = len(self.node_ids)
+        self.left = np.zeros(count)
+        self.row = np.zeros(count, dtype=np.int64)
+        roots = np.flatnonzero(self.parent < 0)
+        roots = roots[np.argsort(self._rank[roots], kind='stable')]
+        widths = self.width[roots] + self.sibling_gap
+        self.left[roots] = np.cumsum(widths) - widths
+
+    def _place_children(self, mask: np.ndarray):
+        """Assign left edges top-down for the masked nodes (their parents must already be placed)"""
+        gap = self.sibling_gap
+        for generation in np.unique(self.generation).tolist():
+            members = np.flatnonzero((self.generation == generation) & (self.parent >= 0) & mask)
+            if not len(members):
+                continue
+            p = self.parent[members]
+            in_block = self.block[p]
+            columns = np.maximum(self.columns[p], 1)
+            column = self.sibling_index[members] % columns
+            self.row[members] = np.where(in_block, self.sibling_index[members] // columns, 0)
+            self.left[members] = np.where(
+                in_block,
+                self.left[p] + column * gap,
+                self.left[p] + (self.width[p] - self.children_width[p]) / 2 + self.offset[members]
+            )
+
+    def _descendants(self, anchor: int) -> np.ndarray:
+        inside = np.zeros(len(self.node_ids), dtype=bool)
+        inside[anchor] = True
+        for generation in np.unique(self.generation).tolist():
+            if generation <= self.generation[anchor]:
+                continue
+            members = np.flatnonzero((self.generation == generation) & (self.parent >= 0))
+            inside[members] = inside[self.parent[members]]
+        return inside
+
+    def _coordinates(self) -> np.ndarray:
+        start, total = self._span
+        center = self.left + self.width / 2
+        # Parents sit midway between their outermost children (blocks stay centered on their grid)
+        inner = (self.first_child >= 0) & ~self.block
+        for generation in np.unique(self.generation)[::-1].tolist():
+            members = np.flatnonzero((self.generation == generation) & inner)
+            center[members] = (center[self.first_child[members]] + center[self.last_child[members]]) / 2
+        level = self.generation / 2
+        positions = np.zeros((len(self.node_ids), 3))
+        if self.radial:
+            angle = 2 * math.pi * (center - start) / total
+            radius = (level + self.row * 0.25) * self.level_gap
+            positions[:, 0] = radius * np.cos(angle)
+            positions[:, 2] = radius * np.sin(angle)
+        else:
+            positions[:, 0] = center - start - total / 2
+            positions[:, 1] = level * self.level_gap
+            positions[:, 2] = self.row * self.sibling_gap
+        return positions
@@ -0,0 +1,8 @@
+"""
+Observability Module
+Process metrics served at /metrics
+"""
+
+from .metrics import MetricsRegistry, Counter, Gauge, Histogram, registry
+
+__all__ = ['MetricsRegistry', 'Counter', 'Gauge', 'Histogram', 'registry']
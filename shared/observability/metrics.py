@@ -0,0 +1,288 @@
+"""
+Metrics
+Counters, gauges and histograms kept in process and served in the Prometheus text format
+(0.0.4, which OpenMetrics scrapers also read). Values other components already count (cache
+hits, device totals) are read by collectors at scrape time instead of being copied here.
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Any, Tuple, Callable, Iterable
+from urllib.parse import urlsplit
+import functools
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COLLECTION_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# A (name, type, help, [(labels, value), ...]) family produced by a collector at scrape time
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _sample_line(name: str, labels: Dict[str, str], value: float) -> str:
+    if labels:
+        rendered = ','.join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+        return f"{name}{{{rendered}}} {_format_value(value)}"
+    return f"{name} {_format_value(value)}"
+
+
+class _Metric:
+    type = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames) or any(name not in labels for name in self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key, strict=True))
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            return [(f"{self.name}_total", self._labels(key), value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    type = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    """Cumulative buckets plus _sum and _count per label set"""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (not cumulative) counts, then sum and count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def samples(self):
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                labels = self._labels(key)
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts, strict=True):
+                    cumulative += bucket_count
+                    lines.append((f"{self.name}_bucket", {**labels, 'le': _format_value(bound)}, cumulative))
+                lines.append((f"{self.name}_sum", labels, total))
+                lines.append((f"{self.name}_count", labels, count))
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics plus collectors that report values owned by other components"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], Iterable[Family]]] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def register_collector(self, name: str, collector: Callable[[], Iterable[Family]]):
+        """Run collector on every scrape; registering the same name again replaces it"""
+        self._collectors[name] = collector
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            samples = metric.samples()
+            if not samples:
+                continue
+            # The 0.0.4 format names a counter family after its _total sample
+            family = f"{metric.name}_total" if metric.type == 'counter' else metric.name
+            lines.append(f"# HELP {family} {_escape(metric.help)}")
+            lines.append(f"# TYPE {family} {metric.type}")
+            lines.extend(_sample_line(name, labels, value) for name, labels, value in samples)
+
+        for collector_name, collector in list(self._collectors.items()):
+            try:
+                families = list(collector())
+            except Exception as e:
+                # One broken source must not take the whole scrape down
+                logger.warning(f"Metrics collector {collector_name} failed: {e}")
+                continue
+            for name, metric_type, help, samples in families:
+                lines.append(f"# HELP {name} {_escape(help)}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.extend(_sample_line(name, labels, value) for labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+http_request_seconds = registry.histogram(
+    'http_request_duration_seconds', 'API request latency by route template',
+    ('method', 'route', 'status'))
+upstream_request_seconds = registry.histogram(
+    'upstream_request_duration_seconds', 'Outbound FortiOS/FortiManager/Meraki API calls by endpoint',
+    ('service', 'endpoint', 'status'))
+collection_seconds = registry.histogram(
+    'collector_collection_duration_seconds', 'Device collection time per source and host',
+    ('source', 'host'), buckets=COLLECTION_BUCKETS)
+collected_devices = registry.gauge(
+    'collector_devices', 'Devices found by the last collection per source and host', ('source', 'host'))
+background_jobs = registry.gauge(
+    'background_jobs', 'Background jobs waiting to run (queued) or running', ('job', 'state'))
+background_job_seconds = registry.histogram(
+    'background_job_duration_seconds', 'Background job run time', ('job',), buckets=COLLECTION_BUCKETS)
+
+
+# Path segments that are identifiers (serials, org/network ids, MACs, IPs) rather than endpoint names
+_ID_SEGMENT = re.compile(r'^(?!v\d+$)(?=.*\d)[\w.:%-]+$|^[A-Za-z0-9_-]{20,}$')
+
+
+def endpoint_label(path: str) -> str:
+    """/api/v1/organizations/123/devices -> /api/v1/organizations/{id}/devices"""
+    return '/'.join('{id}' if _ID_SEGMENT.match(segment) else segment for segment in path.split('/')) or '/'
+
+
+def upstream_service(host: str, path: str) -> str:
+    if host.endswith('meraki.com'):
+        return 'meraki'
+    if path.startswith('/jsonrpc'):
+        return 'fortimanager'
+    if path.startswith('/api/v2') or path.startswith('/logincheck') or path.startswith('/logout'):
+        return 'fortios'
+    return host
+
+
+def observe_upstream(url: str, status: str, seconds: float):
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    upstream_request_seconds.observe(seconds, service=upstream_service(parts.hostname or '', path),
+                                     endpoint=endpoint_label(path), status=status)
+
+
+def tracked_job(job: str, func: Callable) -> Callable:
+    """Wrap func for a background queue: counted as queued now, as running while it runs"""
+    background_jobs.inc(job=job, state='queued')
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        background_jobs.dec(job=job, state='queued')
+        background_jobs.inc(job=job, state='running')
+        try:
+            with background_job_seconds.time(job=job):
+                return func(*args, **kwargs)
+        finally:
+            background_jobs.dec(job=job, state='running')
+    return run
+
+
+def cache_families(caches: Dict[str, Tuple[float, float]]) -> List[Family]:
+    """Hit/miss counters and the hit ratio for caches given as name -> (hits, misses)"""
+    hits = [({'cache': name}, h) for name, (h, _) in caches.items()]
+    misses = [({'cache': name}, m) for name, (_, m) in caches.items()]
+    ratio = [({'cache': name}, h / (h + m) if h + m else 0.0) for name, (h, m) in caches.items()]
+    return [
+        ('cache_hits_total', 'counter', 'Cache hits', hits),
+        ('cache_misses_total', 'counter', 'Cache misses', misses),
+        ('cache_hit_ratio', 'gauge', 'Cache hits / lookups since start', ratio),
+    ]
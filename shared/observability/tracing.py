@@ -0,0 +1,206 @@
+"""
+Tracing
+Lightweight spans for the collect -> enrich -> classify -> layout -> render path. The current
+span lives in a context variable, so nesting follows the call stack (threads inherit it through
+in_current_context). Ids and exported fields follow OpenTelemetry and W3C trace context, so an
+incoming traceparent header continues an upstream trace; no collector is needed. Recent traces
+are kept in a ring buffer for /debug/traces.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Dict, List, Any, Optional, Callable, Iterator, Tuple
+import functools
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+TRACE_BUFFER_SIZE = 100
+SLOW_SPAN_MS = 1000.0
+# A runaway loop of spans must not hold the whole trace in memory
+MAX_SPANS_PER_TRACE = 2000
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+_current: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(trace_id, parent span_id) from a W3C traceparent header"""
+    match = _TRACEPARENT.match((header or '').strip().lower())
+    if not match or match.group(1) == '0' * 32 or match.group(2) == '0' * 16:
+        return None
+    return match.group(1), match.group(2)
+
+
+class Span:
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'attributes', 'status', 'error',
+                 'start_ns', 'end_ns', '_start')
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.status = 'ok'
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self._start = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def end(self):
+        self.end_ns = self.start_ns + int((time.perf_counter() - self._start) * 1e9)
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """OpenTelemetry span field names"""
+        return {
+            'name': self.name,
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_id,
+            'startTimeUnixNano': self.start_ns,
+            'endTimeUnixNano': self.end_ns,
+            'durationMs': round(self.duration_ms, 3),
+            'attributes': dict(self.attributes),
+            'status': {'code': 'ERROR' if self.status == 'error' else 'OK', 'message': self.error}
+        }
+
+
+class Tracer:
+    """Creates spans and keeps the most recent traces, finished spans grouped by trace id"""
+
+    def __init__(self, buffer_size: int = TRACE_BUFFER_SIZE, slow_span_ms: float = SLOW_SPAN_MS):
+        self.buffer_size = buffer_size
+        self.slow_span_ms = slow_span_ms
+        self._traces: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, traceparent: Optional[str] = None, **attributes) -> Iterator[Span]:
+        """A child of the current span, or a new root (continuing traceparent if given)"""
+        parent = _current.get()
+        if parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            trace_id, parent_id = parse_traceparent(traceparent) or (os.urandom(16).hex(), None)
+        span = Span(name, trace_id, parent_id, attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = 'error'
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current.reset(token)
+            span.end()
+            self._record(span, is_root=parent is None)
+
+    def _record(self, span: Span, is_root: bool):
+        with self._lock:
+            trace = self._traces.get(span.trace_id)
+            if trace is None:
+                trace = self._traces[span.trace_id] = {'trace_id': span.trace_id, 'root': None,
+                                                       'spans': [], 'dropped_spans': 0}
+                while len(self._traces) > self.buffer_size:
+                    self._traces.popitem(last=False)
+            if len(trace['spans']) < MAX_SPANS_PER_TRACE:
+                trace['spans'].append(span)
+            else:
+                trace['dropped_spans'] += 1
+            if is_root:
+                # Local root; its parent (if any) is in the caller's process
+                trace['root'] = span
+
+        if span.duration_ms >= self.slow_span_ms:
+            logger.warning(f"Slow span {span.name}: {span.duration_ms:.0f} ms "
+                           f"(trace {span.trace_id}, {span.attributes})")
+
+    def traces(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Summaries of the most recent traces, newest first"""
+        with self._lock:
+            recent = list(self._traces.values())[-limit:][::-1]
+            summaries = []
+            for trace in recent:
+                root = trace['root'] or min(trace['spans'], key=lambda s: s.start_ns)
+                summaries.append({
+                    'trace_id': trace['trace_id'],
+                    'name': root.name,
+                    'start_time_unix_nano': root.start_ns,
+                    'duration_ms': round(root.duration_ms, 3),
+                    'complete': trace['root'] is not None,
+                    'span_count': len(trace['spans']),
+                    'errors': sum(1 for s in trace['spans'] if s.status == 'error')
+                })
+            return summaries
+
+    def trace(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        """Every recorded span of a trace, in start order"""
+        with self._lock:
+            trace = self._traces.get(trace_id)
+            if trace is None:
+                return None
+            spans = sorted(trace['spans'], key=lambda s: s.start_ns)
+            return {
+                'trace_id': trace_id,
+                'complete': trace['root'] is not None,
+                'dropped_spans': trace['dropped_spans'],
+                'spans': [s.to_dict() for s in spans]
+            }
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def traced(name: Optional[str] = None, **attributes) -> Callable:
+    """Decorator: run the function in a span (named after its qualified name by default)"""
+    def decorate(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(span_name, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def in_current_context(func: Callable) -> Callable:
+    """func bound to a copy of the caller's context, for executor.submit; spans then nest across threads"""
+    context = copy_context()
+    return functools.partial(context.run, func)
+
+
+_tracer = None
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(slow_span_ms=float(os.getenv('TRACE_SLOW_SPAN_MS', SLOW_SPAN_MS)))
+    return _tracer
+
+
+def configure_tracing(buffer_size: int = TRACE_BUFFER_SIZE, slow_span_ms: float = SLOW_SPAN_MS) -> Tracer:
+    global _tracer
+    _tracer = Tracer(buffer_size=buffer_size, slow_span_ms=slow_span_ms)
+    return _tracer
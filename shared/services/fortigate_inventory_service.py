@@ -7,12 +7,22 @@ import logging
 import csv
 import os
 import ipaddress
-from typing import Dict, List, Optional, Any
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from typing import Dict, List, Optional, Any, Callable
 from datetime import datetime
 from dataclasses import dataclass
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# Device metadata written by attach_locations
+LOCATION_KEYS = ('store_number', 'brand', 'region')
+
 @dataclass
 class FortiGateLocation:
     store_number: str
@@ -22,55 +32,300 @@ class FortiGateLocation:
     brand: str
     region: Optional[str] = None
     status: str = "unknown"
+    prefix_length: int = 24
+
+    @property
+    def network(self) -> str:
+        return str(ipaddress.ip_network(f"{self.ip_address}/{self.prefix_length}", strict=False))
+
+
+def ip_to_int(ip: Optional[str]) -> Optional[int]:
+    """IPv4 address as an integer, or None if it is not one"""
+    try:
+        return int.from_bytes(socket.inet_aton(ip), 'big') if ip and ip.count('.') == 3 else None
+    except (OSError, TypeError):
+        return None
+
+
+class CidrIndex:
+    """
+    Longest-prefix match over IPv4 networks: one sorted array of network addresses per prefix
+    length, searched from the longest prefix down. A lookup is a binary search per distinct
+    prefix length (usually one or two), and lookup_many does the same for a whole batch in numpy.
+    """
+
+    def __init__(self, entries: List[Any]):
+        by_length: Dict[int, Dict[int, Any]] = {}
+        for network, value in entries:
+            by_length.setdefault(network.prefixlen, {})[int(network.network_address)] = value
+        self.levels = []
+        for length in sorted(by_length, reverse=True):
+            mask = (0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF
+            starts = sorted(by_length[length])
+            self.levels.append((mask, starts, np.array(starts, dtype=np.uint32),
+                                [by_length[length][start] for start in starts]))
+
+    def lookup(self, ip: Optional[str]) -> Optional[Any]:
+        address = ip_to_int(ip)
+        if address is None:
+            return None
+        for mask, starts, _, values in self.levels:
+            network = address & mask
+            i = bisect_right(starts, network) - 1
+            if i >= 0 and starts[i] == network:
+                return values[i]
+        return None
+
+    def lookup_many(self, ips: List[Optional[str]]) -> List[Optional[Any]]:
+        addresses = [ip_to_int(ip) for ip in ips]
+        valid = np.array([a is not None for a in addresses], dtype=bool)
+        packed = np.array([a or 0 for a in addresses], dtype=np.uint32)
+        found = np.full(len(ips), -1, dtype=np.int64)
+        level_of = np.full(len(ips), -1, dtype=np.int64)
+        for level, (mask, _, starts, _) in enumerate(self.levels):
+            pending = valid & (found < 0)
+            if not pending.any() or not len(starts):
+                continue
+            networks = packed[pending] & np.uint32(mask)
+            i = np.clip(np.searchsorted(starts, networks, side='right') - 1, 0, None)
+            hit = starts[i] == networks
+            rows = np.flatnonzero(pending)[hit]
+            found[rows] = i[hit]
+            level_of[rows] = level
+        return [self.levels[lv][3][idx] if idx >= 0 else None for lv, idx in zip(level_of.tolist(), found.tolist(), strict=True)]
+
+
+def _determine_region(store: str, ip: str) -> str:
+    # Simplified region logic
+    if "SONIC" in store: return "central"
+    if "BWW" in store: return "east"
+    if "ARG" in store: return "west"
+    return "unknown"
+
+
+def location_from_row(row: Dict[str, Any]) -> Optional[FortiGateLocation]:
+    """Location from an inventory row (store_number, ip_address as CIDR, mgmtintname, brand)"""
+    store = str(row.get('store_number') or '').strip()
+    ip_cidr = str(row.get('ip_address') or '').strip()
+    if not store or not ip_cidr:
+        return None
+    try:
+        # Rows without a prefix keep the historical /24 assumption
+        interface = ipaddress.ip_interface(ip_cidr if '/' in ip_cidr else f"{ip_cidr}/24")
+    except ValueError:
+        logger.warning(f"Skipping store {store}: invalid address {ip_cidr}")
+        return None
+    ip_addr = str(interface.ip)
+    return FortiGateLocation(
+        store_number=store,
+        mgmt_interface=row.get('mgmtintname') or '',
+        ip_address=ip_addr,
+        subnet_mask=str(interface.netmask),
+        brand=row.get('brand') or 'Unknown',
+        region=row.get('region') or _determine_region(store, ip_addr),
+        prefix_length=interface.network.prefixlen
+    )
+
+
+class InventorySource(ABC):
+    """A list of store locations. `signature()` changes whenever the list may have changed."""
+
+    name = 'source'
+
+    @abstractmethod
+    def signature(self) -> Any:
+        ...
+
+    @abstractmethod
+    def load(self) -> List[FortiGateLocation]:
+        ...
+
+
+class CsvInventorySource(InventorySource):
+    """The VLAN10 interface export; reloaded when its mtime or size changes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = f"csv:{path}"
+
+    def signature(self) -> Any:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def load(self) -> List[FortiGateLocation]:
+        if not os.path.exists(self.path):
+            logger.error(f"Inventory CSV not found: {self.path}")
+            return []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return [loc for loc in map(location_from_row, csv.DictReader(f)) if loc is not None]
+
+
+class CallableInventorySource(InventorySource):
+    """
+    Rows from a function, e.g. a FortiManager ADOM device list or Meraki org networks mapped to
+    store_number/ip_address/brand. Without a change signal it is refetched every `interval` seconds.
+    """
+
+    def __init__(self, name: str, fetch: Callable[[], List[Dict[str, Any]]], interval: float = 3600.0):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+
+    def signature(self) -> Any:
+        return int(time.time() // self.interval)
+
+    def load(self) -> List[FortiGateLocation]:
+        return [loc for loc in map(location_from_row, self.fetch()) if loc is not None]
+
+
+class _Inventory:
+    """Immutable locations + index, swapped in whole on reload"""
+
+    def __init__(self, locations: Dict[str, FortiGateLocation]):
+        self.locations = locations
+        entries = []
+        for loc in locations.values():
+            network = ipaddress.ip_network(loc.network)
+            if network.version == 4:
+                entries.append((network, loc))
+        self.index = CidrIndex(entries)
+        self.loaded_at = time.time()
+
 
 class FortiGateInventoryService:
-    def __init__(self, csv_path: str = "downloaded_files/vlan10_interfaces.csv"):
+    """
+    Store locations merged from one or more sources (later sources win on the same store number).
+    Readers always see a complete inventory: reloads build a new one and swap it in. With
+    `lazy=True` nothing is loaded in the constructor; `start_watcher()` loads in the background
+    and then polls the sources for changes, and lookups return None until the first load is done.
+    """
+
+    def __init__(self, csv_path: str = "downloaded_files/vlan10_interfaces.csv",
+                 sources: Optional[List[InventorySource]] = None, lazy: bool = False):
         self.csv_path = csv_path
-        self.locations: Dict[str, FortiGateLocation] = {}
-        self._load_fortigate_inventory()
+        self.sources = sources if sources is not None else [CsvInventorySource(csv_path)]
+        self._inventory = _Inventory({})
+        self._signatures: Dict[str, Any] = {}
+        self._loaded: Dict[str, List[FortiGateLocation]] = {}
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.ready = threading.Event()
+        if not lazy:
+            self.reload(force=True)
 
-    def _load_fortigate_inventory(self) -> None:
-        if not os.path.exists(self.csv_path):
-            logger.error(f"Inventory CSV not found: {self.csv_path}")
-            return
-            
+    @property
+    def locations(self) -> Dict[str, FortiGateLocation]:
+        return self._inventory.locations
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Reload sources whose signature changed (all with force); True if the inventory was swapped.
+        Devices already in the device store get their store locations re-attached.
+        """
+        with self._reload_lock:
+            changed = False
+            for source in self.sources:
+                signature = source.signature()
+                if not force and source.name in self._loaded and signature == self._signatures.get(source.name):
+                    continue
+                try:
+                    self._loaded[source.name] = source.load()
+                    self._signatures[source.name] = signature
+                    changed = True
+                except Exception as e:
+                    # Keep serving what this source returned last time
+                    logger.error(f"Failed to load inventory source {source.name}: {e}")
+
+            if changed or not self.ready.is_set():
+                merged: Dict[str, FortiGateLocation] = {}
+                for source in self.sources:
+                    for loc in self._loaded.get(source.name, []):
+                        merged[loc.store_number] = loc
+                self._inventory = _Inventory(merged)
+                logger.info(f"Inventory loaded: {len(merged)} locations from {len(self.sources)} sources")
+            self.ready.set()
+        if changed:
+            self._refresh_device_store()
+        return changed
+
+    def _refresh_device_store(self):
+        """Re-attach locations to indexed devices so their metadata and by_site counts follow the inventory"""
         try:
-            with open(self.csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    store = row.get('store_number', '').strip()
-                    ip_cidr = row.get('ip_address', '').strip()
-                    if not store or not ip_cidr: continue
-                    
-                    ip_addr = ip_cidr.split('/')[0] if '/' in ip_cidr else ip_cidr
-                    
-                    self.locations[store] = FortiGateLocation(
-                        store_number=store,
-                        mgmt_interface=row.get('mgmtintname', ''),
-                        ip_address=ip_addr,
-                        subnet_mask="255.255.255.0", # Simplified
-                        brand=row.get('brand', 'Unknown'),
-                        region=self._determine_region(store, ip_addr)
-                    )
+            from ..device_handling.device_store import get_device_store
+
+            store = get_device_store()
+            devices = store.sources()
+            if devices:
+                self.attach_locations(devices)
+                # Only devices whose metadata changed are re-indexed
+                store.upsert(devices)
         except Exception as e:
-            logger.error(f"Failed to load inventory: {e}")
+            logger.error(f"Failed to refresh device store locations: {e}")
+
+    def start_watcher(self, interval: float = 5.0):
+        """Load in a background thread, then check the sources for changes every `interval` seconds"""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        def watch():
+            while True:
+                try:
+                    self.reload(force=not self.ready.is_set())
+                except Exception as e:
+                    logger.error(f"Inventory reload failed: {e}")
+                if self._stop.wait(interval):
+                    return
+
+        self._stop.clear()
+        self._watcher = threading.Thread(target=watch, name="inventory-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
 
     def _determine_region(self, store: str, ip: str) -> str:
-        # Simplified region logic
-        if "SONIC" in store: return "central"
-        if "BWW" in store: return "east"
-        if "ARG" in store: return "west"
-        return "unknown"
+        return _determine_region(store, ip)
 
     def get_location_by_ip(self, ip: str) -> Optional[FortiGateLocation]:
-        for loc in self.locations.values():
-            if loc.ip_address == ip:
-                return loc
-        return None
+        """Store whose subnet contains ip (longest prefix wins)"""
+        return self._inventory.index.lookup(ip)
+
+    def get_locations_by_ip(self, ips: List[Optional[str]]) -> List[Optional[FortiGateLocation]]:
+        return self._inventory.index.lookup_many(ips)
+
+    def attach_locations(self, devices: List[Dict[str, Any]]) -> int:
+        """
+        Record store_number, brand and region in the metadata of every device whose IP is in a
+        store subnet, in one batch lookup, and drop them from devices that are no longer in one.
+        Returns the number of devices matched.
+        """
+        if not devices:
+            return 0
+        matched = 0
+        locations = self._inventory.index.lookup_many([d.get('ip') for d in devices])
+        for device, loc in zip(devices, locations, strict=True):
+            if loc is None:
+                for key in LOCATION_KEYS:
+                    (device.get('metadata') or {}).pop(key, None)
+                continue
+            metadata = device.get('metadata')
+            if metadata is None:
+                metadata = device['metadata'] = {}
+            metadata.update({'store_number': loc.store_number, 'brand': loc.brand, 'region': loc.region})
+            matched += 1
+        return matched
 
     def get_inventory_summary(self) -> Dict[str, Any]:
+        inventory = self._inventory
         brands = {}
-        for loc in self.locations.values():
+        for loc in inventory.locations.values():
             if loc.brand not in brands:
                 brands[loc.brand] = {"count": 0, "regions": set()}
             brands[loc.brand]["count"] += 1
@@ -82,8 +337,11 @@ class FortiGateInventoryService:
             b["regions"] = list(b["regions"])
 
         return {
-            "total_locations": len(self.locations),
-            "brands": brands
+            "total_locations": len(inventory.locations),
+            "brands": brands,
+            "loaded": self.ready.is_set(),
+            "loaded_at": inventory.loaded_at if self.ready.is_set() else None,
+            "sources": [source.name for source in self.sources]
         }
 
 _svc = None
@@ -92,3 +350,16 @@ def get_fortigate_inventory_service() -> FortiGateInventoryService:
     if _svc is None:
         _svc = FortiGateInventoryService()
     return _svc
+
+
+def configure_inventory_service(csv_path: str,
+                                sources: Optional[List[InventorySource]] = None) -> FortiGateInventoryService:
+    """
+    Replace the process-wide service with a lazily loaded one (called at startup). Nothing is
+    loaded until the server's lifespan calls `start_watcher()`.
+    """
+    global _svc
+    if _svc is not None:
+        _svc.stop_watcher()
+    _svc = FortiGateInventoryService(csv_path, sources=sources, lazy=True)
+    return _svc
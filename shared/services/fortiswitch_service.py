@@ -5,9 +5,12 @@ Provides logic for discovering and managing FortiSwitch devices with parallel da
 
 import logging
 import re
+import time
 from typing import List, Dict, Any, Optional
 from concurrent.futures import ThreadPoolExecutor
 
+from ..observability.tracing import get_tracer, in_current_context, traced
+
 logger = logging.getLogger(__name__)
 
 class FortiSwitchService:
@@ -30,6 +33,7 @@ class FortiSwitchService:
             return mac # Return raw if invalid length
         return ':'.join(clean_mac[i:i+2] for i in range(0, 12, 2))
 
+    @traced("fortiswitch.discovery")
     def get_enhanced_switches(self) -> List[Dict[str, Any]]:
         """
         Get switches with aggregated device information (DHCP/ARP/Detected) using parallel fetching.
@@ -37,11 +41,12 @@ class FortiSwitchService:
         logger.info("Starting Optimized FortiSwitch Discovery (Sync-Parallel)...")
         
         # 1. Parallel Fetch using ThreadPoolExecutor
+        # Each call runs in a copy of this context so its spans nest under the discovery span
         with ThreadPoolExecutor(max_workers=4) as executor:
-            future_switches = executor.submit(self.fgt_client.get_monitor, "switch-controller/managed-switch/status")
-            future_detected = executor.submit(self.fgt_client.get_monitor, "switch-controller/detected-device")
-            future_dhcp = executor.submit(self.fgt_client.get_monitor, "system/dhcp")
-            future_arp = executor.submit(self.fgt_client.get_monitor, "system/arp")
+            future_switches = executor.submit(in_current_context(self.fgt_client.get_monitor), "switch-controller/managed-switch/status")
+            future_detected = executor.submit(in_current_context(self.fgt_client.get_monitor), "switch-controller/detected-device")
+            future_dhcp = executor.submit(in_current_context(self.fgt_client.get_monitor), "system/dhcp")
+            future_arp = executor.submit(in_current_context(self.fgt_client.get_monitor), "system/arp")
             
             # Retrieve results (blocking until ready)
             try:
@@ -58,52 +63,62 @@ class FortiSwitchService:
         arp_map = self._build_arp_map(arp_data)
         detected_map = self._build_detected_map(detected_data)
 
-        # 3. Aggregate
+        # 3. Aggregate; classification is timed in total rather than with a span per device
         switches = []
         raw_switches = switches_data.get("results", []) if isinstance(switches_data, dict) else []
-        
-        for sw in raw_switches:
-            serial = sw.get("serial")
+        classify_seconds = 0.0
+        classified = 0
+
+        with get_tracer().span("fortiswitch.enrich", switches=len(raw_switches)) as span:
+            for sw in raw_switches:
+                serial = sw.get("serial")
             
-            # Enrich ports
-            enriched_ports = []
-            for port in sw.get("ports", []):
-                port_name = port.get("interface")
-                port_key = f"{serial}:{port_name}"
+                # Enrich ports
+                enriched_ports = []
+                for port in sw.get("ports", []):
+                    port_name = port.get("interface")
+                    port_key = f"{serial}:{port_name}"
                 
-                connected = []
-                # Use detected map first (Layer 2 truth)
-                if port_key in detected_map:
-                    for ddev in detected_map[port_key]:
-                        mac = ddev.get("mac") # Already normalized in build_map
+                    connected = []
+                    # Use detected map first (Layer 2 truth)
+                    if port_key in detected_map:
+                        for ddev in detected_map[port_key]:
+                            mac = ddev.get("mac") # Already normalized in build_map
                         
-                        # Data fusion
-                        dhcp_info = dhcp_map.get(mac, {})
-                        arp_info = arp_map.get(mac, {})
+                            # Data fusion
+                            dhcp_info = dhcp_map.get(mac, {})
+                            arp_info = arp_map.get(mac, {})
                         
-                        device_info = {
-                            "device_name": dhcp_info.get("hostname") or f"Device-{mac[-4:]}",
-                            "device_mac": mac,
-                            "device_ip": dhcp_info.get("ip") or arp_info.get("ip", "Unknown"),
-                            "manufacturer": ddev.get("manufacturer", "Unknown"),
-                            "vlan": ddev.get("vlan_id"),
-                            "source": "switch_controller",
-                            "status": "online"
-                        }
+                            device_info = {
+                                "device_name": dhcp_info.get("hostname") or f"Device-{mac[-4:]}",
+                                "device_mac": mac,
+                                "device_ip": dhcp_info.get("ip") or arp_info.get("ip", "Unknown"),
+                                "manufacturer": ddev.get("manufacturer", "Unknown"),
+                                "vlan": ddev.get("vlan_id"),
+                                "source": "switch_controller",
+                                "status": "online"
+                            }
                         
-                        # Restaurant Classification
-                        device_info = self.restaurant_service.enhance_device_info(device_info)
-                        connected.append(device_info)
+                            # Restaurant Classification
+                            started = time.perf_counter()
+                            device_info = self.restaurant_service.enhance_device_info(device_info)
+                            classify_seconds += time.perf_counter() - started
+                            classified += 1
+                            connected.append(device_info)
                 
-                port["connected_devices"] = connected
-                enriched_ports.append(port)
-            
-            sw["ports"] = enriched_ports
-            switches.append(sw)
+                    port["connected_devices"] = connected
+                    enriched_ports.append(port)
             
+                sw["ports"] = enriched_ports
+                switches.append(sw)
+
+            span.set_attribute("devices", classified)
+            span.set_attribute("classify_ms", round(classify_seconds * 1000, 3))
+
         logger.info(f"Optimized Discovery Complete. Found {len(switches)} switches.")
         return switches
 
+    @traced("fortiswitch.build_dhcp_map")
     def _build_dhcp_map(self, data):
         mapping = {}
         if not isinstance(data, dict): return mapping
@@ -113,6 +128,7 @@ class FortiSwitchService:
                 mapping[mac] = entry
         return mapping
 
+    @traced("fortiswitch.build_arp_map")
     def _build_arp_map(self, data):
         mapping = {}
         if not isinstance(data, dict): return mapping
@@ -122,6 +138,7 @@ class FortiSwitchService:
                 mapping[mac] = entry
         return mapping
 
+    @traced("fortiswitch.build_detected_map")
     def _build_detected_map(self, data):
         mapping = {}
         if not isinstance(data, dict): return mapping
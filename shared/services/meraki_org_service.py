@@ -0,0 +1,232 @@
+"""
+Meraki Organization Snapshot Service
+Fetches organization-wide Meraki data with bulk endpoints once per org and caches it,
+so per-network visualizations can be sliced from a shared snapshot.
+"""
+
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAC_NORMALIZE_PATTERN = re.compile(r'[^0-9A-Fa-f]')
+
+
+def _normalize_mac(mac: Optional[str]) -> Optional[str]:
+    if not mac or not isinstance(mac, str):
+        return None
+    clean = MAC_NORMALIZE_PATTERN.sub('', mac).upper()
+    return clean if len(clean) == 12 else None
+
+
+def _lldp_fields(entries: Any) -> Dict[str, str]:
+    """Flatten Meraki [{'name': ..., 'value': ...}] LLDP/CDP lists into a dict"""
+    if isinstance(entries, dict):
+        return {str(k).lower(): v for k, v in entries.items()}
+    fields = {}
+    for entry in entries or []:
+        if isinstance(entry, dict) and entry.get('name'):
+            fields[entry['name'].lower()] = entry.get('value')
+    return fields
+
+
+@dataclass
+class MerakiOrgSnapshot:
+    """Organization-wide device, status, uplink and LLDP/CDP data"""
+    org_id: str
+    devices: List[Dict[str, Any]] = field(default_factory=list)
+    statuses: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    uplinks: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    discovery: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    fetched_at: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        self._by_network: Dict[str, List[Dict[str, Any]]] = {}
+        for device in self.devices:
+            self._by_network.setdefault(device.get('networkId'), []).append(device)
+
+    @property
+    def network_ids(self) -> List[str]:
+        return [nid for nid in self._by_network if nid]
+
+    def network_devices(self, network_id: str) -> List[Dict[str, Any]]:
+        """Devices of one network, merged with their status and uplink entries"""
+        devices = []
+        for device in self._by_network.get(network_id, []):
+            serial = device.get('serial')
+            merged = dict(device)
+            status = self.statuses.get(serial)
+            if status:
+                merged['status'] = status.get('status', merged.get('status'))
+                if not merged.get('lanIp') and status.get('lanIp'):
+                    merged['lanIp'] = status['lanIp']
+            if serial in self.uplinks:
+                merged['uplinks'] = self.uplinks[serial]
+            devices.append(merged)
+        return devices
+
+    def network_links(self, network_id: str) -> List[Dict[str, Any]]:
+        """Infrastructure links of one network inferred from LLDP/CDP neighbors"""
+        devices = self._by_network.get(network_id, [])
+        by_mac = {}
+        by_name = {}
+        by_ip = {}
+        for device in devices:
+            serial = device.get('serial')
+            mac = _normalize_mac(device.get('mac'))
+            if mac:
+                by_mac[mac] = serial
+            if device.get('name'):
+                by_name[device['name'].lower()] = serial
+            if device.get('lanIp'):
+                by_ip[device['lanIp']] = serial
+
+        links = []
+        seen = set()
+        for device in devices:
+            serial = device.get('serial')
+            for port in self.discovery.get(serial, []):
+                for proto in ('lldp', 'cdp'):
+                    fields = _lldp_fields(port.get(proto))
+                    if not fields:
+                        continue
+                    neighbor = (
+                        by_mac.get(_normalize_mac(fields.get('chassis id')))
+                        or by_mac.get(_normalize_mac(fields.get('device id')))
+                        or by_name.get(str(fields.get('system name') or fields.get('device id') or '').lower())
+                        or by_ip.get(fields.get('management address') or fields.get('address'))
+                    )
+                    if not neighbor or neighbor == serial:
+                        continue
+                    key = tuple(sorted((neighbor, serial)))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    links.append({
+                        'source': neighbor,
+                        'target': serial,
+                        'type': 'lldp',
+                        'interface': port.get('portId'),
+                        'neighbor_port': fields.get('port id')
+                    })
+                    break
+        return links
+
+
+class MerakiOrgSnapshotService:
+    """
+    Caches one MerakiOrgSnapshot per organization.
+    Concurrent requests for the same org share a single fetch.
+    """
+
+    def __init__(self, ttl: int = 300):
+        self.ttl = ttl
+        self._snapshots: Dict[str, MerakiOrgSnapshot] = {}
+        self._clients: Dict[Tuple[str, str], Tuple[float, List[Dict[str, Any]]]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, org_id: str) -> threading.Lock:
+        with self._guard:
+            if org_id not in self._locks:
+                self._locks[org_id] = threading.Lock()
+            return self._locks[org_id]
+
+    def _is_fresh(self, fetched_at: float) -> bool:
+        return (time.time() - fetched_at) < self.ttl
+
+    def get_snapshot(self, dashboard, org_id: str, refresh: bool = False) -> MerakiOrgSnapshot:
+        """Return the cached snapshot for org_id, fetching it if missing or stale"""
+        snapshot = self._snapshots.get(org_id)
+        if snapshot and not refresh and self._is_fresh(snapshot.fetched_at):
+            return snapshot
+
+        with self._lock_for(org_id):
+            # Another request may have refreshed it while we waited
+            snapshot = self._snapshots.get(org_id)
+            if snapshot and not refresh and self._is_fresh(snapshot.fetched_at):
+                return snapshot
+
+            snapshot = self._fetch_snapshot(dashboard, org_id)
+            self._snapshots[org_id] = snapshot
+            return snapshot
+
+    def _fetch_snapshot(self, dashboard, org_id: str) -> MerakiOrgSnapshot:
+        logger.info(f"Fetching Meraki org snapshot for {org_id}")
+        started = time.time()
+
+        devices = self._call(dashboard.organizations.getOrganizationDevices, org_id)
+
+        statuses = {}
+        for entry in self._call(dashboard.organizations.getOrganizationDevicesStatuses, org_id):
+            if entry.get('serial'):
+                statuses[entry['serial']] = entry
+
+        uplinks = {}
+        for entry in self._call(dashboard.organizations.getOrganizationUplinksStatuses, org_id):
+            if entry.get('serial'):
+                uplinks[entry['serial']] = entry.get('uplinks', [])
+
+        discovery = {}
+        switch_api = getattr(dashboard, 'switch', None)
+        if switch_api is not None:
+            for entry in self._call(switch_api.getOrganizationSwitchPortsTopologyDiscoveryByDevice, org_id):
+                if entry.get('serial'):
+                    discovery[entry['serial']] = entry.get('ports', [])
+
+        snapshot = MerakiOrgSnapshot(
+            org_id=org_id,
+            devices=devices,
+            statuses=statuses,
+            uplinks=uplinks,
+            discovery=discovery
+        )
+        logger.info(
+            f"Meraki org snapshot {org_id}: {len(devices)} devices across "
+            f"{len(snapshot.network_ids)} networks in {time.time() - started:.2f}s"
+        )
+        return snapshot
+
+    def _call(self, method, org_id: str) -> List[Dict[str, Any]]:
+        try:
+            result = method(org_id, total_pages='all')
+            return result if isinstance(result, list) else []
+        except Exception as e:
+            logger.warning(f"Meraki bulk call {getattr(method, '__name__', method)} failed for {org_id}: {e}")
+            return []
+
+    def get_network_clients(self, dashboard, network_id: str, timespan: int = 86400) -> List[Dict[str, Any]]:
+        """Network clients have no org-wide equivalent, so cache them per network with the same TTL"""
+        key = (network_id, str(timespan))
+        cached = self._clients.get(key)
+        if cached and self._is_fresh(cached[0]):
+            return cached[1]
+
+        clients = dashboard.networks.getNetworkClients(network_id, timespan=timespan, total_pages='all')
+        clients = clients if isinstance(clients, list) else []
+        self._clients[key] = (time.time(), clients)
+        return clients
+
+    def invalidate(self, org_id: Optional[str] = None):
+        """Drop cached snapshots (all orgs when org_id is None)"""
+        if org_id is None:
+            self._snapshots.clear()
+            self._clients.clear()
+        else:
+            snapshot = self._snapshots.pop(org_id, None)
+            if snapshot:
+                for network_id in snapshot.network_ids:
+                    for key in [k for k in self._clients if k[0] == network_id]:
+                        self._clients.pop(key, None)
+
+
+_svc = None
+def get_meraki_org_snapshot_service() -> MerakiOrgSnapshotService:
+    global _svc
+    if _svc is None:
+        _svc = MerakiOrgSnapshotService()
+    return _svc
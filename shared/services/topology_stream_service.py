@@ -0,0 +1,261 @@
+"""
+Topology Stream Service
+Keeps the current topology and fans out an initial snapshot plus node/link/status deltas to
+WebSocket and SSE subscribers, so viewers update live instead of reloading the whole graph.
+Topologies above max_nodes are streamed at a clustered level of detail; viewers expand clusters
+through the topology cluster API.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Any, Optional, Tuple, AsyncIterator
+
+from ..network_utils.topology_clustering import LOD_MAX_NODES, ClusteredTopology, get_cluster_registry
+
+logger = logging.getLogger(__name__)
+
+# Fields sent to viewers for every node; everything else stays server-side
+NODE_FIELDS = ('id', 'name', 'type', 'vendor', 'ip', 'mac', 'status', 'model', 'model_path', 'synthetic',
+               'x', 'y', 'z')
+
+RESYNC = object()
+
+
+def _link_key(link: Dict[str, Any]) -> Tuple[str, str]:
+    source, target = str(link.get('source')), str(link.get('target'))
+    return (source, target) if source <= target else (target, source)
+
+
+def _link_attrs(link: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in link.items() if key not in ('source', 'target')}
+
+
+def stream_node(device: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact viewer payload for a device dict"""
+    node = {key: device.get(key) for key in NODE_FIELDS if device.get(key) is not None}
+    metadata = device.get('metadata') or {}
+    if metadata.get('restaurant_category'):
+        node['restaurant_category'] = metadata['restaurant_category']
+    if metadata.get('connected_port'):
+        node['port'] = metadata['connected_port']
+    return node
+
+
+def stream_link(connection: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(connection, (list, tuple)) and len(connection) >= 2:
+        return {'source': connection[0], 'target': connection[1]}
+    if isinstance(connection, dict) and connection.get('source') and connection.get('target'):
+        link = {'source': connection['source'], 'target': connection['target']}
+        for key in ('type', 'port', 'via'):
+            if connection.get(key):
+                link[key] = connection[key]
+        return link
+    return None
+
+
+class _Subscriber:
+    def __init__(self, queue: asyncio.Queue, loop: asyncio.AbstractEventLoop):
+        self.queue = queue
+        self.loop = loop
+
+    def deliver(self, event: Any):
+        """Runs on the subscriber's loop; a subscriber that falls behind gets a fresh snapshot"""
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = RESYNC
+        self.queue.put_nowait(event)
+
+
+class TopologyStreamService:
+    """
+    Current topology plus a versioned event log.
+    Publishers (the collector, discovery endpoints) hand in full topologies or status maps;
+    the service diffs them and pushes only what changed. Recent events are kept in a ring buffer
+    so a reconnecting client can resume from the last version it saw.
+    """
+
+    def __init__(self, history: int = 256, queue_size: int = 512, max_nodes: int = LOD_MAX_NODES):
+        self.version = 0
+        # Streamed nodes and links (the clustered view above max_nodes); devices holds every device node
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.links: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.devices: Dict[str, Dict[str, Any]] = {}
+        self.status: Dict[str, Dict[str, Any]] = {}
+        # ClusterRegistry key of the streamed view, None while every device is streamed
+        self.clusters: Optional[str] = None
+        self.max_nodes = max_nodes
+        self.queue_size = queue_size
+        self._history: deque = deque(maxlen=history)
+        self._subscribers: List[_Subscriber] = []
+        self._lock = threading.Lock()
+
+    # Publishing
+
+    def publish_topology(self, devices: List[Dict[str, Any]], connections: List[Any]) -> Optional[Dict[str, Any]]:
+        """Replace the current topology, emitting a delta if anything changed"""
+        devices_by_id = {}
+        for device in devices:
+            if device.get('id'):
+                devices_by_id[device['id']] = stream_node(device)
+        nodes, clusters = devices_by_id, None
+        if len(devices_by_id) > self.max_nodes:
+            clusters, nodes, connections = self._clustered_view(devices, connections, devices_by_id)
+
+        with self._lock:
+            links = {}
+            for connection in connections:
+                link = stream_link(connection)
+                if not link or link['source'] not in nodes or link['target'] not in nodes:
+                    continue
+                key = _link_key(link)
+                if key in links:
+                    continue
+                # Links are undirected; keep the orientation viewers already have
+                current = self.links.get(key)
+                links[key] = current if current is not None and _link_attrs(current) == _link_attrs(link) else link
+
+            added = [node for node_id, node in nodes.items() if node_id not in self.nodes]
+            updated = [node for node_id, node in nodes.items()
+                       if node_id in self.nodes and self.nodes[node_id] != node]
+            removed = [node_id for node_id in self.nodes if node_id not in nodes]
+            links_added = [link for key, link in links.items() if self.links.get(key) != link]
+            links_removed = [list(key) for key in self.links if key not in links]
+
+            now = time.time()
+            for node_id in [node_id for node_id in self.status if node_id not in devices_by_id]:
+                del self.status[node_id]
+            for node_id, node in devices_by_id.items():
+                if node.get('status') and self.devices.get(node_id) != node:
+                    self.status[node_id] = {'status': node['status'], 'updated_at': now}
+            clusters_changed = clusters != self.clusters
+            self.nodes, self.links, self.devices, self.clusters = nodes, links, devices_by_id, clusters
+
+            if not (added or updated or removed or links_added or links_removed or clusters_changed):
+                return None
+            event = {
+                'type': 'delta',
+                'nodes': {'added': added, 'updated': updated, 'removed': removed},
+                'links': {'added': links_added, 'removed': links_removed}
+            }
+            if clusters_changed:
+                event['clusters'] = clusters
+            return self._emit(event)
+
+    def _clustered_view(self, devices: List[Dict[str, Any]], connections: List[Any],
+                        devices_by_id: Dict[str, Dict[str, Any]]) -> Tuple[str, Dict[str, Dict[str, Any]], List[Any]]:
+        """Registry key, nodes and links of the level of detail that fits in max_nodes"""
+        clustered = ClusteredTopology(devices, connections)
+        key = get_cluster_registry().register(clustered)
+        view = clustered.initial_view(self.max_nodes)
+        # Devices keep their full stream payload; cluster nodes come from the clustered view
+        nodes = {node['id']: devices_by_id.get(node['id'], node) for node in view['nodes']}
+        return key, nodes, view['links']
+
+    def publish_status(self, statuses: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update node status values (id -> status string); emits only the ones that changed"""
+        with self._lock:
+            now = time.time()
+            changed = {}
+            for node_id, status in statuses.items():
+                if node_id not in self.devices or self.devices[node_id].get('status') == status:
+                    continue
+                # Devices hidden in a cluster are still reported, for viewers that expanded it
+                self.devices[node_id] = {**self.devices[node_id], 'status': status}
+                if node_id in self.nodes:
+                    self.nodes[node_id] = {**self.nodes[node_id], 'status': status}
+                self.status[node_id] = {'status': status, 'updated_at': now}
+                changed[node_id] = status
+            if not changed:
+                return None
+            return self._emit({'type': 'status', 'status': changed})
+
+    def _emit(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        # Caller holds the lock
+        self.version += 1
+        event['version'] = self.version
+        self._history.append(event)
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+            except RuntimeError:
+                # Event loop closed underneath us
+                self._subscribers.remove(subscriber)
+        return event
+
+    # Reading
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            'type': 'snapshot',
+            'version': self.version,
+            'nodes': list(self.nodes.values()),
+            'links': list(self.links.values()),
+            'clusters': self.clusters
+        }
+
+    def node_status(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return dict(self.status)
+
+    def _replay(self, since: Optional[int]) -> Optional[List[Dict[str, Any]]]:
+        """Events after `since`, or None if they are no longer all in the ring buffer"""
+        if since is None or since > self.version:
+            return None
+        if since == self.version:
+            return []
+        events = [event for event in self._history if event['version'] > since]
+        if not events or events[0]['version'] != since + 1:
+            return None
+        return events
+
+    async def subscribe(self, since: Optional[int] = None, heartbeat: float = 15.0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield a snapshot (or the missed deltas when resuming from `since`), then live events.
+        Yields {'type': 'heartbeat'} when idle so dead connections get noticed.
+        """
+        subscriber = _Subscriber(asyncio.Queue(maxsize=self.queue_size), asyncio.get_running_loop())
+        with self._lock:
+            initial = self._replay(since)
+            if initial is None:
+                initial = [self._snapshot()]
+            self._subscribers.append(subscriber)
+
+        try:
+            for event in initial:
+                yield event
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield {'type': 'heartbeat', 'version': self.version}
+                    continue
+                yield self.snapshot() if event is RESYNC else event
+        finally:
+            with self._lock:
+                if subscriber in self._subscribers:
+                    self._subscribers.remove(subscriber)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def queue_depth(self) -> int:
+        """Events queued for subscribers and not yet sent"""
+        with self._lock:
+            return sum(subscriber.queue.qsize() for subscriber in self._subscribers)
+
+
+_svc = None
+def get_topology_stream_service() -> TopologyStreamService:
+    global _svc
+    if _svc is None:
+        _svc = TopologyStreamService()
+    return _svc
@@ -4,5 +4,7 @@ Visualization Module
 """
 
 from .renderer import VisualizationRenderer
+from .glb_writer import GlbWriter
+from .artifact_store import ArtifactStore
 
-__all__ = ['VisualizationRenderer']
\ No newline at end of file
+__all__ = ['VisualizationRenderer', 'GlbWriter', 'ArtifactStore']
\ No newline at end of file
@@ -0,0 +1,182 @@
+"""
+Artifact Store
+Content-addressed storage for rendered exports: an artifact is keyed by a hash of the topology,
+the format, the renderer version and render options, so an unchanged topology is rendered once
+"""
+
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable
+import hashlib
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'index.json'
+
+
+def topology_digest(topology_data: Dict[str, Any]) -> str:
+    """Hash of the topology content, independent of dict key order"""
+    payload = json.dumps(topology_data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def artifact_key(topology_hash: str, format: str, renderer_version: str,
+                 options: Optional[Dict[str, Any]] = None) -> str:
+    payload = json.dumps([topology_hash, format, renderer_version, options or {}], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class ArtifactStore:
+    """
+    Rendered files named by their key, plus a JSON index (size, format, timestamps, hits) so
+    listings never rescan the directory. Entries unused for max_age seconds are dropped, then the
+    least recently used until the store fits in max_bytes.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = 512 * 1024 * 1024, max_age: float = 7 * 24 * 3600):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._index: Dict[str, Dict[str, Any]] = self._load_index()
+
+    def path_for(self, entry: Dict[str, Any]) -> Path:
+        return self.root / entry['file']
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            if not self.path_for(entry).exists():
+                del self._index[key]
+                self._save_index()
+                return None
+            entry['last_access'] = time.time()
+            entry['hits'] = entry.get('hits', 0) + 1
+            return dict(entry)
+
+    def get_or_create(self, key: str, format: str, produce: Callable[[Path], Any],
+                      name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Return the entry for key, calling produce(path) to render it on a miss.
+        The returned dict carries `cached` to tell hits from fresh renders.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            return {**entry, 'cached': True}
+
+        self.misses += 1
+        filename = f"{key}.{format}"
+        # Keep the real extension on the temporary file; some writers normalise the suffix
+        tmp_path = self.root / f".tmp-{threading.get_ident()}-{filename}"
+        try:
+            if produce(tmp_path) is False or not tmp_path.exists():
+                raise RuntimeError(f"Rendering {format} artifact failed")
+            tmp_path.replace(self.root / filename)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        now = time.time()
+        entry = {
+            'key': key,
+            'file': filename,
+            'format': format,
+            'name': name or key,
+            'size': (self.root / filename).stat().st_size,
+            'created': now,
+            'last_access': now,
+            'hits': 0
+        }
+        with self._lock:
+            self._index[key] = entry
+            self._evict()
+            self._save_index()
+        return {**entry, 'cached': False}
+
+    def entries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(entry) for entry in self._index.values()]
+
+    def find(self, key_or_name: str) -> Optional[Dict[str, Any]]:
+        """Entry by key, file name or display name"""
+        with self._lock:
+            entry = self._index.get(key_or_name)
+            if entry is None:
+                entry = next((e for e in self._index.values()
+                              if key_or_name in (e['file'], e['name'])), None)
+            return dict(entry) if entry else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(entry['size'] for entry in self._index.values())
+            return {
+                'entries': len(self._index),
+                'bytes': total,
+                'max_bytes': self.max_bytes,
+                'max_age': self.max_age,
+                'hits': self.hits,
+                'misses': self.misses,
+                'root': str(self.root)
+            }
+
+    def _evict(self):
+        # Caller holds the lock
+        cutoff = time.time() - self.max_age
+        victims = [key for key, entry in self._index.items() if entry['last_access'] < cutoff]
+        expired = set(victims)
+        lru = sorted((key for key in self._index if key not in expired), key=lambda k: self._index[k]['last_access'])
+        total = sum(self._index[key]['size'] for key in lru)
+        # The most recent artifact is kept even if it alone exceeds max_bytes
+        for key in lru[:-1]:
+            if total <= self.max_bytes:
+                break
+            victims.append(key)
+            total -= self._index[key]['size']
+        for key in victims:
+            entry = self._index.pop(key)
+            self.path_for(entry).unlink(missing_ok=True)
+        if victims:
+            logger.info(f"Evicted {len(victims)} rendered artifacts")
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        path = self.root / INDEX_FILE
+        if not path.exists():
+            return {}
+        try:
+            with open(path, 'r') as f:
+                index = json.load(f)
+            return {key: entry for key, entry in index.items() if (self.root / entry['file']).exists()}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable artifact index {path}: {e}")
+            return {}
+
+    def _save_index(self):
+        # Caller holds the lock
+        path = self.root / INDEX_FILE
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self._index, f)
+        tmp_path.replace(path)
+
+
+_store = None
+def get_artifact_store() -> ArtifactStore:
+    global _store
+    if _store is None:
+        _store = ArtifactStore(Path('./exports/artifacts'))
+    return _store
+
+
+def configure_artifact_store(root: Path, max_bytes: int, max_age: float) -> ArtifactStore:
+    """Replace the process-wide store (called once at application startup)"""
+    global _store
+    _store = ArtifactStore(root, max_bytes=max_bytes, max_age=max_age)
+    return _store
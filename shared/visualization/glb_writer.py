@@ -0,0 +1,368 @@
+"""
+GLB Writer
+Binary glTF 2.0 export of a topology, with same-model devices drawn as GPU instances
+"""
+
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+import json
+import logging
+import struct
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+GLB_MAGIC = 0x46546C67
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+FLOAT = 5126
+UNSIGNED_SHORT = 5123
+UNSIGNED_INT = 5125
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+MODE_LINES = 1
+
+INSTANCING = 'EXT_mesh_gpu_instancing'
+
+# Size (largest extent, scene units) each device model is scaled to, matching the HTML viewer
+MODEL_SIZE = 30.0
+BOX_SIZE = 20.0
+
+TYPE_COLORS = {
+    'fortigate': (0.85, 0.15, 0.15, 1.0),
+    'firewall': (0.85, 0.15, 0.15, 1.0),
+    'router': (0.85, 0.45, 0.10, 1.0),
+    'fortiswitch': (0.15, 0.45, 0.85, 1.0),
+    'switch': (0.15, 0.45, 0.85, 1.0),
+    'fortiap': (0.20, 0.70, 0.35, 1.0),
+    'access_point': (0.20, 0.70, 0.35, 1.0),
+    'client': (0.65, 0.65, 0.70, 1.0),
+}
+DEFAULT_COLOR = (0.7, 0.7, 0.9, 1.0)
+
+
+def _box_geometry() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Unit cube centred on the origin: 24 vertices (flat normals) and 36 indices"""
+    positions, normals, indices = [], [], []
+    for axis in range(3):
+        for sign in (-1.0, 1.0):
+            normal = [0.0, 0.0, 0.0]
+            normal[axis] = sign
+            u, v = [(axis + 1) % 3, (axis + 2) % 3]
+            base = len(positions)
+            for a, b in ((-1, -1), (1, -1), (1, 1), (-1, 1)):
+                corner = [0.0, 0.0, 0.0]
+                corner[axis] = sign * 0.5
+                corner[u] = a * 0.5
+                corner[v] = b * 0.5
+                positions.append(corner)
+                normals.append(normal)
+            quad = [0, 1, 2, 0, 2, 3] if sign > 0 else [0, 2, 1, 0, 3, 2]
+            indices.extend(base + i for i in quad)
+    return (np.array(positions, dtype=np.float32), np.array(normals, dtype=np.float32),
+            np.array(indices, dtype=np.uint16))
+
+
+class GlbWriter:
+    """
+    Builds a single-buffer GLB for a topology.
+    Devices are grouped by model; each group is one node whose mesh is drawn once per device through
+    EXT_mesh_gpu_instancing. Models referenced by `model_path` (see format_for_3d_visualization) are
+    embedded from their .glb files; devices without a usable model get a coloured box per type.
+    Links become one LINES mesh. Output depends only on the topology, so identical input gives
+    identical bytes.
+    """
+
+    def __init__(self, asset_root: Optional[Path] = None):
+        self.asset_root = Path(asset_root) if asset_root else Path('.')
+        self._reset()
+
+    def _reset(self):
+        self.doc: Dict[str, Any] = {
+            'asset': {'version': '2.0', 'generator': 'Integrated Network Platform'},
+            'scene': 0,
+            'scenes': [{'name': 'NetworkTopology', 'nodes': []}],
+            'nodes': [],
+            'meshes': [],
+            'materials': [],
+            'accessors': [],
+            'bufferViews': [],
+            'buffers': []
+        }
+        self._chunks: List[bytes] = []
+        self._offset = 0
+        self._meshes: Dict[str, Tuple[int, float]] = {}
+        self._box: Optional[Dict[str, int]] = None
+
+    # Buffer management
+
+    def _add_view(self, data: bytes, target: Optional[int] = None, stride: Optional[int] = None) -> int:
+        padding = (-self._offset) % 4
+        if padding:
+            self._chunks.append(b'\x00' * padding)
+            self._offset += padding
+        view = {'buffer': 0, 'byteOffset': self._offset, 'byteLength': len(data)}
+        if target:
+            view['target'] = target
+        if stride:
+            view['byteStride'] = stride
+        self._chunks.append(data)
+        self._offset += len(data)
+        self.doc['bufferViews'].append(view)
+        return len(self.doc['bufferViews']) - 1
+
+    def _add_accessor(self, array: np.ndarray, accessor_type: str, target: Optional[int] = None,
+                      bounds: bool = False) -> int:
+        component = {np.dtype(np.float32): FLOAT, np.dtype(np.uint16): UNSIGNED_SHORT,
+                     np.dtype(np.uint32): UNSIGNED_INT}[array.dtype]
+        array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+        accessor = {
+            'bufferView': self._add_view(array.tobytes(), target),
+            'componentType': component,
+            'count': int(array.shape[0]),
+            'type': accessor_type
+        }
+        if bounds:
+            flat = array.reshape(array.shape[0], -1)
+            accessor['min'] = [float(v) for v in flat.min(axis=0)]
+            accessor['max'] = [float(v) for v in flat.max(axis=0)]
+        self.doc['accessors'].append(accessor)
+        return len(self.doc['accessors']) - 1
+
+    # Meshes
+
+    def _box_mesh(self, device_type: str) -> Tuple[int, float]:
+        key = f"box:{device_type}"
+        if key not in self._meshes:
+            if self._box is None:
+                positions, normals, indices = _box_geometry()
+                self._box = {
+                    'POSITION': self._add_accessor(positions, 'VEC3', ARRAY_BUFFER, bounds=True),
+                    'NORMAL': self._add_accessor(normals, 'VEC3', ARRAY_BUFFER),
+                    'indices': self._add_accessor(indices, 'SCALAR', ELEMENT_ARRAY_BUFFER)
+                }
+            self.doc['materials'].append({
+                'name': f"{device_type}_material",
+                'pbrMetallicRoughness': {
+                    'baseColorFactor': list(TYPE_COLORS.get(device_type, DEFAULT_COLOR)),
+                    'metallicFactor': 0.0,
+                    'roughnessFactor': 0.5
+                }
+            })
+            self.doc['meshes'].append({
+                'name': f"{device_type}_box",
+                'primitives': [{
+                    'attributes': {'POSITION': self._box['POSITION'], 'NORMAL': self._box['NORMAL']},
+                    'indices': self._box['indices'],
+                    'material': len(self.doc['materials']) - 1
+                }]
+            })
+            self._meshes[key] = (len(self.doc['meshes']) - 1, BOX_SIZE)
+        return self._meshes[key]
+
+    def _resolve_asset(self, model_path: str) -> Optional[Path]:
+        path = Path(model_path)
+        for candidate in (path, self.asset_root / path):
+            if candidate.suffix == '.glb' and candidate.is_file():
+                return candidate
+        return None
+
+    def _asset_mesh(self, model_path: str) -> Optional[Tuple[int, float]]:
+        """Embed the first mesh of a .glb asset; returns (mesh index, scale to MODEL_SIZE)"""
+        key = f"asset:{model_path}"
+        if key in self._meshes:
+            return self._meshes[key]
+
+        path = self._resolve_asset(model_path)
+        try:
+            asset, binary = self._read_glb(path) if path else (None, b'')
+        except Exception as e:
+            logger.warning(f"Failed to read model {path}: {e}")
+            asset = None
+        if not asset or not asset.get('meshes'):
+            self._meshes[key] = None
+            return None
+        if any('sparse' in accessor for accessor in asset.get('accessors', [])):
+            logger.warning(f"Model {path} uses sparse accessors, drawing devices as boxes instead")
+            self._meshes[key] = None
+            return None
+
+        views: Dict[int, int] = {}
+        accessors: Dict[int, int] = {}
+        materials: Dict[int, int] = {}
+
+        def copy_accessor(index: int) -> int:
+            if index not in accessors:
+                source = dict(asset['accessors'][index])
+                view_index = source.get('bufferView')
+                if view_index is not None:
+                    if view_index not in views:
+                        view = asset['bufferViews'][view_index]
+                        start = view.get('byteOffset', 0)
+                        views[view_index] = self._add_view(binary[start:start + view['byteLength']],
+                                                           view.get('target'), view.get('byteStride'))
+                    source['bufferView'] = views[view_index]
+                self.doc['accessors'].append(source)
+                accessors[index] = len(self.doc['accessors']) - 1
+            return accessors[index]
+
+        def copy_material(index: int) -> int:
+            if index not in materials:
+                # Textures are not embedded; keep the factors
+                material = json.loads(json.dumps(asset['materials'][index]))
+                pbr = material.get('pbrMetallicRoughness', {})
+                for container in (material, pbr):
+                    for name in [k for k in container if k.endswith('Texture')]:
+                        del container[name]
+                self.doc['materials'].append(material)
+                materials[index] = len(self.doc['materials']) - 1
+            return materials[index]
+
+        mesh = asset['meshes'][0]
+        primitives = []
+        for primitive in mesh['primitives']:
+            copied = {'attributes': {name: copy_accessor(index) for name, index in primitive['attributes'].items()
+                                     if not name.startswith('_')}}
+            if 'indices' in primitive:
+                copied['indices'] = copy_accessor(primitive['indices'])
+            if 'material' in primitive and asset.get('materials'):
+                copied['material'] = copy_material(primitive['material'])
+            if 'mode' in primitive:
+                copied['mode'] = primitive['mode']
+            primitives.append(copied)
+
+        extent = 0.0
+        for primitive in mesh['primitives']:
+            position = asset['accessors'][primitive['attributes']['POSITION']]
+            if 'min' in position and 'max' in position:
+                extent = max(extent, max(hi - lo for lo, hi in zip(position['min'], position['max'], strict=True)))
+        scale = MODEL_SIZE / extent if extent > 0 else 1.0
+
+        self.doc['meshes'].append({'name': mesh.get('name') or path.stem, 'primitives': primitives})
+        self._meshes[key] = (len(self.doc['meshes']) - 1, scale)
+        return self._meshes[key]
+
+    @staticmethod
+    def _read_glb(path: Path) -> Tuple[Dict[str, Any], bytes]:
+        data = path.read_bytes()
+        magic, version, _ = struct.unpack_from('<III', data, 0)
+        if magic != GLB_MAGIC or version != 2:
+            raise ValueError("not a glTF 2.0 binary")
+        offset, document, binary = 12, None, b''
+        while offset + 8 <= len(data):
+            length, chunk_type = struct.unpack_from('<II', data, offset)
+            chunk = data[offset + 8:offset + 8 + length]
+            if chunk_type == CHUNK_JSON:
+                document = json.loads(chunk)
+            elif chunk_type == CHUNK_BIN:
+                binary = chunk
+            offset += 8 + length
+        return document, binary
+
+    # Scene
+
+    def build(self, topology_data: Dict[str, Any]) -> bytes:
+        """GLB bytes for the topology"""
+        self._reset()
+        # Canonical device order, so the output does not depend on input ordering
+        devices = sorted((d for d in topology_data.get('devices', []) if d.get('id') is not None),
+                         key=lambda d: str(d['id']))
+        positions = (topology_data.get('layout') or {}).get('positions', {})
+
+        ids = [str(d['id']) for d in devices]
+        coords = np.zeros((len(devices), 3), dtype=np.float32)
+        for i, device in enumerate(devices):
+            position = positions.get(device['id']) or device.get('position') or {}
+            coords[i] = (position.get('x', 0), position.get('y', 0), position.get('z', 0))
+
+        # Embed models in a fixed order, then group devices by the mesh that draws them
+        models = sorted({str(d['model_path']) for d in devices if d.get('model_path')})
+        usable = {model_path for model_path in models if self._asset_mesh(model_path)}
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for i, device in enumerate(devices):
+            model_path = str(device.get('model_path'))
+            device_type = str(device.get('type') or 'unknown').lower()
+            group_key = ('asset', model_path) if model_path in usable else ('box', device_type)
+            groups.setdefault(group_key, []).append(i)
+
+        scene_nodes = self.doc['scenes'][0]['nodes']
+        for group_key in sorted(groups):
+            kind, name = group_key
+            mesh_index, scale = self._asset_mesh(name) if kind == 'asset' else self._box_mesh(name)
+            members = groups[group_key]
+            translation = coords[members]
+            scales = np.full((len(members), 3), scale, dtype=np.float32)
+            self.doc['nodes'].append({
+                'name': Path(name).stem if kind == 'asset' else name,
+                'mesh': mesh_index,
+                'extensions': {INSTANCING: {'attributes': {
+                    'TRANSLATION': self._add_accessor(translation, 'VEC3'),
+                    'SCALE': self._add_accessor(scales, 'VEC3')
+                }}},
+                'extras': {'device_ids': [ids[i] for i in members]}
+            })
+            scene_nodes.append(len(self.doc['nodes']) - 1)
+
+        self._add_links(topology_data.get('connections', []), ids, coords)
+
+        if self._offset:
+            self.doc['buffers'].append({'byteLength': self._offset})
+        if any(INSTANCING in node.get('extensions', {}) for node in self.doc['nodes']):
+            self.doc['extensionsUsed'] = [INSTANCING]
+            self.doc['extensionsRequired'] = [INSTANCING]
+        for key in ('meshes', 'materials', 'accessors', 'bufferViews', 'buffers'):
+            if not self.doc[key]:
+                del self.doc[key]
+        return self._pack()
+
+    def _add_links(self, connections: List[Any], ids: List[str], coords: np.ndarray):
+        index = {device_id: i for i, device_id in enumerate(ids)}
+        pairs = []
+        for connection in connections:
+            if isinstance(connection, dict):
+                source, target = connection.get('source'), connection.get('target')
+            elif isinstance(connection, (list, tuple)) and len(connection) >= 2:
+                source, target = connection[0], connection[1]
+            else:
+                continue
+            a, b = index.get(str(source)), index.get(str(target))
+            if a is not None and b is not None and a != b:
+                pairs.append((min(a, b), max(a, b)))
+        if not pairs:
+            return
+
+        pairs = np.unique(np.array(pairs, dtype=np.int64), axis=0)
+        vertices = coords[pairs.reshape(-1)]
+        self.doc['materials'].append({
+            'name': 'link_material',
+            'pbrMetallicRoughness': {'baseColorFactor': [0.6, 0.8, 1.0, 1.0], 'metallicFactor': 0.0, 'roughnessFactor': 1.0}
+        })
+        self.doc['meshes'].append({
+            'name': 'links',
+            'primitives': [{
+                'attributes': {'POSITION': self._add_accessor(vertices, 'VEC3', ARRAY_BUFFER, bounds=True)},
+                'material': len(self.doc['materials']) - 1,
+                'mode': MODE_LINES
+            }]
+        })
+        self.doc['nodes'].append({'name': 'links', 'mesh': len(self.doc['meshes']) - 1})
+        self.doc['scenes'][0]['nodes'].append(len(self.doc['nodes']) - 1)
+
+    def _pack(self) -> bytes:
+        document = json.dumps(self.doc, separators=(',', ':')).encode()
+        document += b' ' * ((-len(document)) % 4)
+        binary = b''.join(self._chunks)
+        binary += b'\x00' * ((-len(binary)) % 4)
+
+        length = 12 + 8 + len(document) + (8 + len(binary) if binary else 0)
+        parts = [struct.pack('<III', GLB_MAGIC, 2, length), struct.pack('<II', len(document), CHUNK_JSON), document]
+        if binary:
+            parts += [struct.pack('<II', len(binary), CHUNK_BIN), binary]
+        return b''.join(parts)
+
+    def write(self, topology_data: Dict[str, Any], output_path: Path) -> Path:
+        output_path = Path(output_path)
+        output_path.write_bytes(self.build(topology_data))
+        return output_path
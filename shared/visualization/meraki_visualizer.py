@@ -9,24 +9,17 @@ from pathlib import Path
 import uuid
 import json
 from ..network_utils import mac_vendor
+from ..services.meraki_org_service import get_meraki_org_snapshot_service
 
-# Initialize Config to get paths
-try:
-    cm = ConfigManager()
-    if cm.config.data_dir:
-        mac_vendor.set_db_path(cm.config.data_dir / "mac_vendor_cache.db")
-        # Re-init DB at new path
-        mac_vendor._init_db()
-except Exception:
-    pass
+logger = logging.getLogger(__name__)
 
 # Wrapper for legacy compatibility in this file
 def get_vendor_from_mac(mac):
     return mac_vendor.get_vendor(mac)
 
 def update_oui_database():
-    # Pass through or implement if needed
-    pass
+    # Runs in a background thread so renders never wait on the OUI download
+    return mac_vendor.refresh_oui_database_async()
 
 # --- MAPS ---
 VENDOR_DEVICE_TYPE_MAP = {
@@ -60,6 +53,7 @@ CONNECTION_STYLES = {
     'uplink': {'color': '#00C853', 'width': 3, 'dashes': False, 'label': 'Uplink', 'highlight': '#00C853', 'arrow': True},
     'switch': {'color': '#2196F3', 'width': 2, 'dashes': False, 'label': 'Switch Connection', 'highlight': '#2196F3', 'arrow': True},
     'wireless': {'color': '#FF9800', 'width': 2, 'dashes': True, 'label': 'Wireless Connection', 'highlight': '#FF9800', 'arrow': False},
+    'lldp': {'color': '#2196F3', 'width': 3, 'dashes': False, 'label': 'LLDP/CDP Neighbor', 'highlight': '#2196F3', 'arrow': False},
     'wired': {'color': '#607D8B', 'width': 1, 'dashes': False, 'label': 'Wired Client', 'highlight': '#607D8B', 'arrow': True},
     'unknown': {'color': '#9E9E9E', 'width': 1, 'dashes': True, 'label': 'Unknown Connection', 'highlight': '#9E9E9E', 'arrow': False}
 }
@@ -86,21 +80,29 @@ class MerakiVisualizer:
     """
     Enhanced Meraki Visualizer class
     """
-    def __init__(self, dashboard):
+    def __init__(self, dashboard, org_id=None, snapshot_service=None):
         self.dashboard = dashboard
+        self.org_id = org_id
+        self.snapshot_service = snapshot_service
 
-    def create_visualization(self, network_id, network_name):
+    def create_visualization(self, network_id, network_name, org_id=None):
         try:
-            if MacLookup:
-                try:
-                    MacLookup().lookup("00:00:00:00:00:00")
-                except:
-                    update_oui_database()
+            update_oui_database()
 
-            devices = self.dashboard.networks.getNetworkDevices(network_id)
-            clients = self.dashboard.networks.getNetworkClients(network_id, timespan=86400)
+            org_id = org_id or self.org_id
+            if org_id:
+                # Org mode: slice this network out of the shared bulk snapshot
+                service = self.snapshot_service or get_meraki_org_snapshot_service()
+                snapshot = service.get_snapshot(self.dashboard, org_id)
+                devices = snapshot.network_devices(network_id)
+                links = snapshot.network_links(network_id)
+                clients = service.get_network_clients(self.dashboard, network_id)
+            else:
+                devices = self.dashboard.networks.getNetworkDevices(network_id)
+                clients = self.dashboard.networks.getNetworkClients(network_id, timespan=86400)
+                links = None
             
-            topology_data = self.build_topology(devices, clients)
+            topology_data = self.build_topology(devices, clients, links)
             topology_data['network_name'] = network_name
             
             return self.generate_html(topology_data, network_name)
@@ -187,8 +189,20 @@ class MerakiVisualizer:
         # Infrastructure Links
         existing = set()
         for l in topology['links']: existing.add((l['source'], l['target']))
+
+        # LLDP/CDP links are authoritative; only networks without them fall back to inference
+        discovered_networks = set()
+        for l in links or []:
+            if l['source'] not in device_map or l['target'] not in device_map:
+                continue
+            if (l['source'], l['target']) not in existing:
+                topology['links'].append(l)
+                existing.add((l['source'], l['target']))
+            discovered_networks.add(device_map[l['target']].get('networkId'))
         
         for nid, rels in device_relationships.items():
+            if nid in discovered_networks:
+                continue
             # App -> Switch
             for app in rels['appliances']:
                 for sw in rels['switches']:
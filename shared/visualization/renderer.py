@@ -4,12 +4,157 @@ Handles 3D visualization exports (GLTF, SVG) from network_map_3d
 """
 
 import json
+from html import escape as escape_html
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, List, Any, Iterator, Optional
 import logging
 
+from shared.network_utils.topology_graph import TopologyGraph
+from shared.network_utils.tree_layout import TreeLayout
+from shared.network_utils.topology_clustering import LOD_MAX_NODES, ClusteredTopology, get_cluster_registry
+from .glb_writer import GlbWriter
+from .xml_stream import XmlStream, write_chunks
+from .artifact_store import ArtifactStore, artifact_key, get_artifact_store, topology_digest
+from shared.observability.tracing import traced
+
 logger = logging.getLogger(__name__)
 
+# Bump whenever a change alters rendered output, so cached artifacts are not reused
+RENDERER_VERSION = "3"
+
+# Cluster API prefix; a clustered topology is expanded under CLUSTERS_PATH + registry key + '/'
+CLUSTERS_PATH = "/api/v1/topology/clusters/"
+
+# Replaces a clicked cluster node with its contents from the cluster API (paged for big clusters).
+# __EXPAND_PATH__ is substituted with the cluster endpoint for this page's topology; the live
+# viewer starts without one and takes it from the stream.
+CLUSTER_EXPAND_JS = '''
+        window.clusterExpandPath = "__EXPAND_PATH__";
+        (function() {
+            const nextOffset = {};
+            const endId = end => (typeof end === 'object' ? end.id : end);
+
+            Graph.onNodeClick(cluster => {
+                const expandPath = window.clusterExpandPath;
+                if (!cluster.cluster || !expandPath) return;
+                const offsetKey = expandPath + cluster.id;
+                const offset = nextOffset[offsetKey] || 0;
+                fetch(expandPath + encodeURIComponent(cluster.id) + '?offset=' + offset)
+                    .then(response => response.ok ? response.json() : Promise.reject(response.status))
+                    .then(sub => {
+                        const data = Graph.graphData();
+                        let nodes = data.nodes;
+                        let links = data.links;
+                        if (sub.has_more) {
+                            nextOffset[offsetKey] = sub.offset + sub.limit;
+                            cluster.count = sub.total - nextOffset[offsetKey];
+                            cluster.name = cluster.count + ' more clients';
+                        } else {
+                            nodes = nodes.filter(n => n.id !== cluster.id);
+                            links = links.filter(l => endId(l.source) !== cluster.id && endId(l.target) !== cluster.id);
+                        }
+                        const known = new Set(nodes.map(n => n.id));
+                        sub.nodes.forEach(n => {
+                            if (known.has(n.id)) return;
+                            known.add(n.id);
+                            // Laid-out members keep their own (pinned) place, others start at the cluster
+                            nodes.push(n.x === undefined ? Object.assign(n, {x: cluster.x, y: cluster.y, z: cluster.z})
+                                                         : Object.assign(n, {fx: n.x, fy: n.y, fz: n.z}));
+                        });
+                        sub.links.forEach(l => {
+                            if (known.has(l.source) && known.has(l.target)) links.push(l);
+                        });
+                        Graph.graphData({nodes: nodes, links: links});
+                    })
+                    .catch(err => console.warn('Cluster expand failed', cluster.id, err));
+            });
+        })();
+'''
+
+# Applies snapshot/delta/status events from the topology stream to the open graph.
+# Kept out of the f-string template so braces stay readable; __STREAM_PATH__ and __CLUSTERS_PATH__
+# are substituted.
+LIVE_STREAM_JS = '''
+        (function() {
+            const streamPath = "__STREAM_PATH__";
+            const clustersPath = "__CLUSTERS_PATH__";
+            let version = null;
+            let retryDelay = 1000;
+
+            const endId = end => (typeof end === 'object' ? end.id : end);
+            const linkKey = (s, t) => (s < t ? s + '|' + t : t + '|' + s);
+            const placed = n => n.x !== undefined;
+            // Server-side layout positions are pinned (fx/fy/fz) so the browser does not re-simulate them
+            const toNode = n => Object.assign({val: 10, name: n.id, type: 'unknown', vendor: 'unknown'}, n,
+                                              placed(n) ? {fx: n.x, fy: n.y, fz: n.z} : {});
+            const toLink = l => Object.assign({}, l, {source: endId(l.source), target: endId(l.target)});
+
+            function useLayout(nodes) {
+                // The DAG layout overrides pinned coordinates, so it only runs for unplaced topologies
+                if (nodes.length) Graph.dagMode(nodes.every(placed) ? null : 'lr');
+            }
+
+            function useClusters(ev) {
+                // Clustered streams name the registry entry their cluster nodes expand from
+                if ('clusters' in ev) window.clusterExpandPath = ev.clusters ? clustersPath + ev.clusters + '/' : '';
+            }
+
+            function applySnapshot(ev) {
+                useClusters(ev);
+                useLayout(ev.nodes);
+                Graph.graphData({nodes: ev.nodes.map(toNode), links: ev.links.map(toLink)});
+            }
+
+            function applyDelta(ev) {
+                useClusters(ev);
+                const data = Graph.graphData();
+                const nodes = new Map(data.nodes.map(n => [n.id, n]));
+                ev.nodes.removed.forEach(id => nodes.delete(id));
+                ev.nodes.updated.forEach(n => {
+                    // New object so the node is re-rendered; unplaced nodes keep their current position
+                    const current = nodes.get(n.id) || {};
+                    nodes.set(n.id, placed(n) ? toNode(n) : Object.assign(toNode(n), {x: current.x, y: current.y, z: current.z}));
+                });
+                ev.nodes.added.forEach(n => nodes.set(n.id, toNode(n)));
+                useLayout(ev.nodes.added.concat(ev.nodes.updated));
+
+                const removed = new Set(ev.links.removed.map(pair => linkKey(pair[0], pair[1])));
+                const links = new Map();
+                data.links.forEach(l => {
+                    const s = endId(l.source), t = endId(l.target);
+                    if (!removed.has(linkKey(s, t)) && nodes.has(s) && nodes.has(t)) links.set(linkKey(s, t), toLink(l));
+                });
+                ev.links.added.forEach(l => links.set(linkKey(l.source, l.target), toLink(l)));
+                Graph.graphData({nodes: Array.from(nodes.values()), links: Array.from(links.values())});
+            }
+
+            function applyStatus(ev) {
+                Graph.graphData().nodes.forEach(n => {
+                    if (n.id in ev.status) n.status = ev.status[n.id];
+                });
+            }
+
+            function connect() {
+                const scheme = location.protocol === 'https:' ? 'wss://' : 'ws://';
+                const query = version === null ? '' : '?since=' + version;
+                const socket = new WebSocket(scheme + location.host + streamPath + query);
+                socket.onopen = () => { retryDelay = 1000; };
+                socket.onmessage = msg => {
+                    const ev = JSON.parse(msg.data);
+                    if (ev.type === 'snapshot') applySnapshot(ev);
+                    else if (ev.type === 'delta') applyDelta(ev);
+                    else if (ev.type === 'status') applyStatus(ev);
+                    version = ev.version;
+                };
+                socket.onclose = () => {
+                    setTimeout(connect, retryDelay);
+                    retryDelay = Math.min(retryDelay * 2, 30000);
+                };
+            }
+            connect();
+        })();
+'''
+
 
 class VisualizationRenderer:
     """
@@ -17,6 +162,9 @@ class VisualizationRenderer:
     Based on network_map_3d export functionality
     """
 
+    # Formats generated incrementally (see iter_export), with their media types
+    STREAM_FORMATS = {"svg": "image/svg+xml", "drawio": "application/xml"}
+
     def __init__(self, models_dir: Optional[str] = None, icons_dir: Optional[str] = None):
         self.models_dir = Path(models_dir) if models_dir else Path("./models")
         self.icons_dir = Path(icons_dir) if icons_dir else Path("./icons")
@@ -26,18 +174,12 @@ class VisualizationRenderer:
         self.icons_dir.mkdir(parents=True, exist_ok=True)
 
     def export_gltf(self, topology_data: Dict[str, Any], output_path: Path) -> bool:
-        """Export topology as GLTF 3D model"""
+        """Export topology as a binary glTF (.glb) scene with instanced device meshes"""
         try:
-            # Create GLTF structure
-            gltf_data = self._create_gltf_structure(topology_data)
-
-            # For now, export as JSON (would need proper GLTF binary format implementation)
-            # In a full implementation, this would create binary GLTF files
-            json_output = output_path.with_suffix('.json')
-            with open(json_output, 'w') as f:
-                json.dump(gltf_data, f, indent=2)
+            glb_output = GlbWriter(asset_root=self.models_dir.parent).write(
+                topology_data, Path(output_path).with_suffix('.glb'))
 
-            logger.info(f"GLTF data exported to {json_output}")
+            logger.info(f"GLB scene exported to {glb_output}")
             return True
 
         except Exception as e:
@@ -47,10 +189,7 @@ class VisualizationRenderer:
     def export_svg(self, topology_data: Dict[str, Any], output_path: Path) -> bool:
         """Export topology as SVG (2D visualization)"""
         try:
-            svg_content = self._create_svg_content(topology_data)
-
-            with open(output_path, 'w') as f:
-                f.write(svg_content)
+            write_chunks(self.iter_svg(topology_data), output_path)
 
             logger.info(f"SVG exported to {output_path}")
             return True
@@ -62,107 +201,7 @@ class VisualizationRenderer:
     def export_drawio(self, topology_data: Dict[str, Any], output_path: Path, layout: str = "hierarchical") -> bool:
         """Export topology as DrawIO XML"""
         try:
-            from datetime import datetime, timezone
-            
-            # Template
-            xml_template = (
-                "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
-                "<mxfile host=\"app.diagrams.net\" modified=\"{}\" agent=\"5.0\" "
-                "etag=\"{}\" version=\"21.6.5\" type=\"device\">\n"
-                "  <diagram name=\"Network Topology\" id=\"topology\">\n"
-                "    <mxGraphModel dx=\"1422\" dy=\"794\" grid=\"1\" gridSize=\"10\" "
-                "guides=\"1\" tooltips=\"1\" connect=\"1\" arrows=\"1\" fold=\"1\" "
-                "page=\"1\" pageScale=\"1\" pageWidth=\"1169\" pageHeight=\"827\" "
-                "math=\"0\" shadow=\"0\">\n"
-                "      <root>\n"
-                "        <mxCell id=\"0\" />\n"
-                "        <mxCell id=\"1\" parent=\"0\" />\n"
-                "        {}  <!-- Cells will be inserted here -->\n"
-                "      </root>\n"
-                "    </mxGraphModel>\n"
-                "  </diagram>\n"
-                "</mxfile>"
-            ).format(datetime.now(timezone.utc).isoformat(), datetime.now(timezone.utc).timestamp(), "")
-
-            cells = []
-            cell_id = 2
-            
-            # Nodes and Links
-            nodes = topology_data.get("nodes", [])
-            # Handle different formats (devices vs nodes)
-            if not nodes and "devices" in topology_data:
-                nodes = topology_data["devices"]
-                
-            links = topology_data.get("links", [])
-            if not links and "connections" in topology_data:
-                links_raw = topology_data["connections"]
-                # Normalize links
-                links = []
-                for l in links_raw:
-                    if isinstance(l, (list, tuple)) and len(l) >= 2:
-                        links.append({"source": l[0], "target": l[1]})
-                    elif isinstance(l, dict):
-                        links.append(l)
-
-            # Calculate Layout
-            positions = self._calculate_drawio_positions(nodes, layout)
-            
-            # Helper to map node ID to cell ID for linking
-            node_id_to_cell_id = {}
-
-            # Device cells
-            for node in nodes:
-                # Handle different ID fields
-                nid = node.get("id")
-                pos = positions.get(nid, {"x": 100, "y": 100})
-                style = self._get_drawio_style(node)
-                
-                # Format Label
-                label = node.get("name", node.get("hostname", "Device"))
-                if node.get("ip") or node.get("ip_address"):
-                    label += f"\\n{node.get('ip') or node.get('ip_address')}"
-                if node.get("type"):
-                     label += f"\\n{node.get('type')}"
-
-                cell_xml = (
-                    f"        <mxCell id=\"{cell_id}\" value=\"{label}\" style=\"{style}\" "
-                    f"vertex=\"1\" parent=\"1\">\n"
-                    f"          <mxGeometry x=\"{pos['x']}\" y=\"{pos['y']}\" width=\"120\" height=\"60\" as=\"geometry\" />\n"
-                    f"        </mxCell>"
-                )
-                cells.append(cell_xml)
-                node_id_to_cell_id[nid] = cell_id
-                cell_id += 1
-
-            # Link cells
-            for link in links:
-                src_id = link.get("source")
-                tgt_id = link.get("target") 
-                
-                if src_id not in node_id_to_cell_id or tgt_id not in node_id_to_cell_id:
-                    continue
-
-                src_cell = node_id_to_cell_id[src_id]
-                tgt_cell = node_id_to_cell_id[tgt_id]
-                
-                style = "strokeColor=#6c757d;strokeWidth=2;endArrow=none;startArrow=none;"
-
-                cell_xml = (
-                    f"        <mxCell id=\"{cell_id}\" style=\"{style}\" edge=\"1\" parent=\"1\" "
-                    f"source=\"{src_cell}\" target=\"{tgt_cell}\">\n"
-                    f"          <mxGeometry width=\"50\" height=\"50\" relative=\"1\" as=\"geometry\">\n"
-                    f"            <mxPoint x=\"0\" y=\"0\" as=\"sourcePoint\" />\n"
-                    f"            <mxPoint x=\"0\" y=\"0\" as=\"targetPoint\" />\n"
-                    f"          </mxGeometry>\n"
-                    f"        </mxCell>"
-                )
-                cells.append(cell_xml)
-                cell_id += 1
-
-            final_xml = xml_template.replace("        {}  <!-- Cells will be inserted here -->", "\n".join(cells))
-            
-            with open(output_path, 'w') as f:
-                f.write(final_xml)
+            write_chunks(self.iter_drawio(topology_data, layout), output_path)
 
             logger.info(f"DrawIO XML exported to {output_path}")
             return True
@@ -171,10 +210,153 @@ class VisualizationRenderer:
             logger.error(f"DrawIO export failed: {e}")
             return False
 
-    def _calculate_drawio_positions(self, nodes: list, layout: str) -> dict:
-        """Calculate simple grid/layered positions"""
+    @traced("render.artifact")
+    def render_artifact(self, topology_data: Dict[str, Any], format: str,
+                        store: Optional[ArtifactStore] = None) -> Dict[str, Any]:
+        """
+        Render through the artifact store, returning its index entry.
+        An unchanged topology in the same format is served from the existing file.
+        """
+        format = "glb" if format == "gltf" else format
+        producers = {
+            "glb": lambda path: self.export_gltf(topology_data, path),
+            "svg": lambda path: self.export_svg(topology_data, path),
+            "drawio": lambda path: self.export_drawio(topology_data, path),
+            "html": lambda path: self.render_html_viewer(topology_data, path),
+            "json": lambda path: path.write_text(json.dumps(topology_data, indent=2, default=str)),
+        }
+        if format not in producers:
+            raise ValueError(f"Unsupported export format: {format}")
+
+        store = store or get_artifact_store()
+        key = artifact_key(topology_digest(topology_data), format, RENDERER_VERSION)
+        entry = store.get_or_create(key, format, producers[format], name=f"topology_{key[:12]}")
+
+        devices = topology_data.get("devices", [])
+        if format == "html" and entry["cached"] and len(devices) > LOD_MAX_NODES:
+            # A cached clustered page still needs its clusters registered for expansion
+            get_cluster_registry().register(ClusteredTopology(devices, topology_data.get("connections", [])))
+        return entry
+
+    def iter_export(self, topology_data: Dict[str, Any], format: str) -> Iterator[bytes]:
+        """Byte chunks of an SVG or DrawIO export, for writing to a file or a StreamingResponse"""
+        if format == "svg":
+            return self.iter_svg(topology_data)
+        if format == "drawio":
+            return self.iter_drawio(topology_data)
+        raise ValueError(f"Unsupported streaming format: {format}")
+
+    @staticmethod
+    def _topology_links(topology_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Links as dicts from either `links` or `connections` (pairs or dicts)"""
+        links = topology_data.get("links", [])
+        if not links and "connections" in topology_data:
+            links = []
+            for l in topology_data["connections"]:
+                if isinstance(l, (list, tuple)) and len(l) >= 2:
+                    links.append({"source": l[0], "target": l[1]})
+                elif isinstance(l, dict):
+                    links.append(l)
+        return links
+
+    def iter_drawio(self, topology_data: Dict[str, Any], layout: str = "hierarchical") -> Iterator[bytes]:
+        """DrawIO XML as a stream of byte chunks"""
+        from datetime import datetime, timezone
+
+        nodes = topology_data.get("nodes", [])
+        # Handle different formats (devices vs nodes)
+        if not nodes and "devices" in topology_data:
+            nodes = topology_data["devices"]
+        links = self._topology_links(topology_data)
+
+        # Calculate Layout
+        positions = self._calculate_drawio_positions(nodes, layout, links)
+
+        now = datetime.now(timezone.utc)
+        xml = XmlStream()
+        xml.start_document()
+        xml.start("mxfile", {"host": "app.diagrams.net", "modified": now.isoformat(), "agent": "5.0",
+                             "etag": now.timestamp(), "version": "21.6.5", "type": "device"})
+        xml.start("diagram", {"name": "Network Topology", "id": "topology"})
+        xml.start("mxGraphModel", {
+            "dx": 1422, "dy": 794, "grid": 1, "gridSize": 10, "guides": 1, "tooltips": 1, "connect": 1,
+            "arrows": 1, "fold": 1, "page": 1, "pageScale": 1, "pageWidth": 1169, "pageHeight": 827,
+            "math": 0, "shadow": 0
+        })
+        xml.start("root")
+        xml.element("mxCell", {"id": 0})
+        xml.element("mxCell", {"id": 1, "parent": 0})
+
+        # Helper to map node ID to cell ID for linking
+        node_id_to_cell_id = {}
+        cell_id = 2
+
+        # Device cells
+        for node in nodes:
+            nid = node.get("id")
+            pos = positions.get(nid, {"x": 100, "y": 100})
+
+            # Labels are HTML (html=1 in the style), so escape the text before it is XML-escaped
+            label = [node.get("name", node.get("hostname", "Device"))]
+            if node.get("ip") or node.get("ip_address"):
+                label.append(node.get("ip") or node.get("ip_address"))
+            if node.get("type"):
+                label.append(node.get("type"))
+
+            xml.start("mxCell", {"id": cell_id, "value": "\n".join(escape_html(str(part)) for part in label),
+                                 "style": self._get_drawio_style(node), "vertex": 1, "parent": 1})
+            xml.element("mxGeometry", {"x": pos["x"], "y": pos["y"], "width": 120, "height": 60, "as": "geometry"})
+            xml.end("mxCell")
+            node_id_to_cell_id[nid] = cell_id
+            cell_id += 1
+            if xml.full:
+                yield xml.drain()
+
+        # Link cells
+        style = "strokeColor=#6c757d;strokeWidth=2;endArrow=none;startArrow=none;"
+        for link in links:
+            src_cell = node_id_to_cell_id.get(link.get("source"))
+            tgt_cell = node_id_to_cell_id.get(link.get("target"))
+            if src_cell is None or tgt_cell is None:
+                continue
+
+            xml.start("mxCell", {"id": cell_id, "style": style, "edge": 1, "parent": 1,
+                                 "source": src_cell, "target": tgt_cell})
+            xml.start("mxGeometry", {"width": 50, "height": 50, "relative": 1, "as": "geometry"})
+            xml.element("mxPoint", {"x": 0, "y": 0, "as": "sourcePoint"})
+            xml.element("mxPoint", {"x": 0, "y": 0, "as": "targetPoint"})
+            xml.end("mxGeometry")
+            xml.end("mxCell")
+            cell_id += 1
+            if xml.full:
+                yield xml.drain()
+
+        xml.end("root")
+        xml.end("mxGraphModel")
+        xml.end("diagram")
+        xml.end("mxfile")
+        yield xml.drain()
+
+    def _calculate_drawio_positions(self, nodes: list, layout: str, links: Optional[list] = None) -> dict:
+        """Calculate tree (when links are known), layered or grid positions"""
         positions = {}
-        if layout == "hierarchical":
+        if layout == "hierarchical" and links:
+            # Tidy tree: clients grouped under their switch and port, large groups wrapped into blocks
+            graph = TopologyGraph.from_topology(nodes, links)
+            ports = {
+                link.get("target"): (link.get("source"), str(link["port"]))
+                for link in links if link.get("port") and link.get("type") == "ethernet"
+            }
+            tree = TreeLayout(level_gap=150, sibling_gap=220)
+            coords = tree.compute(graph, ports=ports)
+            if len(coords):
+                min_x = coords[:, 0].min()
+                for node_id, (x, y, z) in zip(graph.node_ids, coords[:graph.node_count].tolist(), strict=True):
+                    positions[node_id] = {
+                        "x": round(100 + x - min_x),
+                        "y": round(100 + y + z / tree.sibling_gap * 80),
+                    }
+        elif layout == "hierarchical":
             layers = {"fortigate": 0, "firewall": 0, "interface": 1, "switch": 1, "fortiswitch": 1, "ap": 2, "fortiap": 2, "client": 3}
             layer_nodes = {}
 
@@ -219,68 +401,8 @@ class VisualizationRenderer:
                 break
         return style
 
-    def _create_gltf_structure(self, topology_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create GLTF JSON structure for 3D topology"""
-        devices = topology_data.get('devices', [])
-        layout = topology_data.get('layout', {})
-
-        # GLTF structure (simplified)
-        gltf = {
-            "asset": {
-                "version": "2.0",
-                "generator": "Integrated Network Platform"
-            },
-            "scenes": [{
-                "name": "NetworkTopology",
-                "nodes": []
-            }],
-            "nodes": [],
-            "meshes": [],
-            "materials": [],
-            "textures": [],
-            "images": [],
-            "buffers": [],
-            "bufferViews": [],
-            "accessors": []
-        }
-
-        # Add devices as nodes
-        for i, device in enumerate(devices):
-            position = layout.get('positions', {}).get(device.get('id'), {'x': 0, 'y': 0, 'z': 0})
-
-            node = {
-                "name": device.get('name', f"Device_{i}"),
-                "translation": [position['x'], position['y'], position['z']],
-                "mesh": i
-            }
-            gltf["nodes"].append(node)
-
-            # Add mesh (simplified cube for now)
-            mesh = {
-                "name": f"Mesh_{i}",
-                "primitives": [{
-                    "attributes": {
-                        "POSITION": 0  # Would need actual vertex data
-                    },
-                    "material": 0
-                }]
-            }
-            gltf["meshes"].append(mesh)
-
-        # Add basic material
-        gltf["materials"].append({
-            "name": "DeviceMaterial",
-            "pbrMetallicRoughness": {
-                "baseColorFactor": [0.7, 0.7, 0.9, 1.0],
-                "metallicFactor": 0.0,
-                "roughnessFactor": 0.5
-            }
-        })
-
-        return gltf
-
-    def _create_svg_content(self, topology_data: Dict[str, Any]) -> str:
-        """Create SVG content for 2D topology visualization"""
+    def iter_svg(self, topology_data: Dict[str, Any]) -> Iterator[bytes]:
+        """SVG for 2D topology visualization as a stream of byte chunks"""
         devices = topology_data.get('devices', [])
         connections = topology_data.get('connections', [])
         layout = topology_data.get('layout', {})
@@ -288,10 +410,10 @@ class VisualizationRenderer:
         # Calculate bounds
         positions = layout.get('positions', {})
         if positions:
-            x_coords = [pos['x'] for pos in positions.values()]
-            y_coords = [pos['y'] for pos in positions.values()]
-            min_x, max_x = min(x_coords), max(x_coords)
-            min_y, max_y = min(y_coords), max(y_coords)
+            min_x = min(pos['x'] for pos in positions.values())
+            max_x = max(pos['x'] for pos in positions.values())
+            min_y = min(pos['y'] for pos in positions.values())
+            max_y = max(pos['y'] for pos in positions.values())
         else:
             min_x = min_y = 0
             max_x = max_y = 1000
@@ -299,30 +421,29 @@ class VisualizationRenderer:
         width = max(max_x - min_x + 200, 800)
         height = max(max_y - min_y + 200, 600)
 
-        # SVG header
-        svg = f'''<?xml version="1.0" encoding="UTF-8"?>
-<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">
-  <defs>
-    <marker id="arrowhead" markerWidth="10" markerHeight="7"
-     refX="9" refY="3.5" orient="auto">
-      <polygon points="0 0, 10 3.5, 0 7" fill="#666" />
-    </marker>
-  </defs>
-
-  <!-- Background -->
-  <rect width="100%" height="100%" fill="#f8f9fa" stroke="#dee2e6" stroke-width="1"/>
-
-  <!-- Title -->
-  <text x="20" y="30" font-family="Arial, sans-serif" font-size="16" font-weight="bold" fill="#333">
-    Network Topology Visualization
-  </text>
-'''
+        # Offset positions to center of SVG
+        offset_x = -min_x + 100
+        offset_y = -min_y + 100
+
+        xml = XmlStream()
+        xml.start_document()
+        xml.start('svg', {'width': width, 'height': height, 'xmlns': 'http://www.w3.org/2000/svg'})
+        xml.start('defs')
+        xml.start('marker', {'id': 'arrowhead', 'markerWidth': 10, 'markerHeight': 7,
+                             'refX': 9, 'refY': 3.5, 'orient': 'auto'})
+        xml.element('polygon', {'points': '0 0, 10 3.5, 0 7', 'fill': '#666'})
+        xml.end('marker')
+        xml.end('defs')
+        xml.element('rect', {'width': '100%', 'height': '100%', 'fill': '#f8f9fa',
+                             'stroke': '#dee2e6', 'stroke-width': 1})
+        xml.element('text', {'x': 20, 'y': 30, 'font-family': 'Arial, sans-serif', 'font-size': 16,
+                             'font-weight': 'bold', 'fill': '#333'}, 'Network Topology Visualization')
 
         # Draw connections first (so they appear behind devices)
         for connection in connections:
             source_id = None
             target_id = None
-            
+
             if isinstance(connection, (list, tuple)) and len(connection) >= 2:
                 source_id = connection[0]
                 target_id = connection[1]
@@ -333,17 +454,13 @@ class VisualizationRenderer:
             if source_id in positions and target_id in positions:
                 source_pos = positions[source_id]
                 target_pos = positions[target_id]
-
-                # Offset positions to center of SVG
-                offset_x = -min_x + 100
-                offset_y = -min_y + 100
-
-                svg += f'''
-  <!-- Connection {source_id} -> {target_id} -->
-  <line x1="{source_pos['x'] + offset_x}" y1="{source_pos['y'] + offset_y}"
-        x2="{target_pos['x'] + offset_x}" y2="{target_pos['y'] + offset_y}"
-        stroke="#666" stroke-width="2" marker-end="url(#arrowhead)"/>
-'''
+                xml.element('line', {
+                    'x1': source_pos['x'] + offset_x, 'y1': source_pos['y'] + offset_y,
+                    'x2': target_pos['x'] + offset_x, 'y2': target_pos['y'] + offset_y,
+                    'stroke': '#666', 'stroke-width': 2, 'marker-end': 'url(#arrowhead)'
+                })
+                if xml.full:
+                    yield xml.drain()
 
         # Draw devices
         for device in devices:
@@ -352,27 +469,25 @@ class VisualizationRenderer:
 
             if device_id in positions:
                 pos = positions[device_id]
-                offset_x = -min_x + 100
-                offset_y = -min_y + 100
-
-                # Device rectangle
-                svg += f'''
-  <!-- Device {device_name} -->
-  <rect x="{pos['x'] + offset_x - 40}" y="{pos['y'] + offset_y - 20}"
-        width="80" height="40" fill="#fff" stroke="#333" stroke-width="2" rx="5"/>
-  <text x="{pos['x'] + offset_x}" y="{pos['y'] + offset_y + 5}"
-        text-anchor="middle" font-family="Arial, sans-serif" font-size="12" fill="#333">
-    {device_name}
-  </text>
-'''
-
-        svg += '\n</svg>'
-        return svg
-
-    def render_html_viewer(self, topology_data: Dict[str, Any], output_path: Path) -> bool:
+                xml.element('rect', {'x': pos['x'] + offset_x - 40, 'y': pos['y'] + offset_y - 20,
+                                     'width': 80, 'height': 40, 'fill': '#fff', 'stroke': '#333',
+                                     'stroke-width': 2, 'rx': 5})
+                xml.element('text', {'x': pos['x'] + offset_x, 'y': pos['y'] + offset_y + 5,
+                                     'text-anchor': 'middle', 'font-family': 'Arial, sans-serif',
+                                     'font-size': 12, 'fill': '#333'}, device_name)
+                if xml.full:
+                    yield xml.drain()
+
+        xml.end('svg')
+        yield xml.drain()
+
+    @traced("render.html_viewer")
+    def render_html_viewer(self, topology_data: Dict[str, Any], output_path: Path,
+                           stream_path: Optional[str] = None, max_nodes: int = LOD_MAX_NODES,
+                           group_by: str = "port") -> bool:
         """Create HTML viewer for 3D topology (Three.js based)"""
         try:
-            html_content = self._create_html_viewer_content(topology_data)
+            html_content = self._create_html_viewer_content(topology_data, stream_path, max_nodes, group_by)
 
             with open(output_path, 'w') as f:
                 f.write(html_content)
@@ -384,11 +499,42 @@ class VisualizationRenderer:
             logger.error(f"HTML viewer creation failed: {e}")
             return False
 
-    def _create_html_viewer_content(self, topology_data: Dict[str, Any]) -> str:
-        """Create HTML content for 3D topology viewer using 3d-force-graph"""
+    def render_live_viewer(self, output_path: Path, stream_path: str = "/api/v1/topology/ws") -> bool:
+        """
+        Write a viewer that loads the graph from the topology stream and applies deltas in place.
+        The page does not embed any topology, so it only needs writing once; unchanged pages are left alone.
+        """
+        try:
+            html_content = self._create_html_viewer_content({}, stream_path)
+            if output_path.exists() and output_path.read_text() == html_content:
+                return True
+            with open(output_path, 'w') as f:
+                f.write(html_content)
+            logger.info(f"Live HTML viewer created at {output_path}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Live HTML viewer creation failed: {e}")
+            return False
+
+    def _create_html_viewer_content(self, topology_data: Dict[str, Any], stream_path: Optional[str] = None,
+                                    max_nodes: int = LOD_MAX_NODES, group_by: str = "port") -> str:
+        """
+        Create HTML content for 3D topology viewer using 3d-force-graph; subscribes to stream_path if given.
+        Topologies with more than max_nodes devices are inlined at a clustered level of detail;
+        clicking a cluster fetches its contents from the topology API.
+        """
         devices = topology_data.get('devices', [])
         connections = topology_data.get('connections', [])
 
+        if len(devices) > max_nodes:
+            clustered = ClusteredTopology(devices, connections, group_by=group_by)
+            cluster_key = get_cluster_registry().register(clustered)
+            view = clustered.initial_view(max_nodes)
+            graph_data = {"nodes": view["nodes"], "links": view["links"]}
+            lod_js = CLUSTER_EXPAND_JS.replace('__EXPAND_PATH__', f"{CLUSTERS_PATH}{cluster_key}/")
+            return self._viewer_html(graph_data, stream_path, lod_js)
+
         # Prepare nodes
         nodes = []
         for device in devices:
@@ -416,8 +562,15 @@ class VisualizationRenderer:
             "nodes": nodes,
             "links": links
         }
+        return self._viewer_html(graph_data, stream_path)
 
-        graph_data_js = json.dumps(graph_data, indent=2)
+    def _viewer_html(self, graph_data: Dict[str, Any], stream_path: Optional[str] = None, lod_js: str = '') -> str:
+        graph_data_js = json.dumps(graph_data, separators=(',', ':'))
+        live_js = ''
+        if stream_path:
+            live_js = LIVE_STREAM_JS.replace('__STREAM_PATH__', stream_path).replace('__CLUSTERS_PATH__', CLUSTERS_PATH)
+            # Streamed topologies may be clustered, so live pages can always expand clusters
+            lod_js = lod_js or CLUSTER_EXPAND_JS.replace('__EXPAND_PATH__', '')
 
         # Icon mapping
         icon_map = {
@@ -606,7 +759,7 @@ class VisualizationRenderer:
             .nodeLabel(node => {{
                 return `<div style="background: rgba(0,0,0,0.8); color: white; padding: 5px; border-radius: 4px; border: 1px solid rgba(255,255,255,0.2); box-shadow: 0 0 10px rgba(0,255,255,0.3);">
                     <b>${{node.name}}</b><br>
-                    ${{node.vendor}} ${{node.type}}
+                    ${{node.vendor}} ${{node.type}}${{node.status ? '<br>' + node.status : ''}}
                 </div>`;
             }});
             
@@ -628,6 +781,7 @@ class VisualizationRenderer:
         const starMat = new THREE.PointsMaterial({{color: 0x888888, size: 0.5}});
         const starField = new THREE.Points(starGeo, starMat);
         Graph.scene().add(starField);
+{live_js}{lod_js}
     </script>
 </body>
 </html>'''
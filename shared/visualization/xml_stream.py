@@ -0,0 +1,88 @@
+"""
+XML Stream
+Incremental XML output for large exports: elements are escaped as they are emitted and handed out
+as byte chunks, so a document can go to a file or an HTTP response without being held in memory
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional
+
+CHUNK_SIZE = 64 * 1024
+
+_SPECIAL = re.compile(r'[&<>"\t\n\r\x00-\x08\x0b\x0c\x0e-\x1f]')
+# Characters XML 1.0 does not allow at all
+_INVALID = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def escape_text(value: Any) -> str:
+    value = str(value)
+    if _SPECIAL.search(value) is None:
+        return value
+    return _INVALID.sub('', value).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def escape_attr(value: Any) -> str:
+    value = str(value)
+    if _SPECIAL.search(value) is None:
+        return value
+    return (escape_text(value).replace('"', '&quot;')
+            .replace('\n', '&#10;').replace('\r', '&#13;').replace('\t', '&#9;'))
+
+
+class XmlStream:
+    """Indented XML writer that buffers output until `drain()`"""
+
+    def __init__(self, indent: str = '  '):
+        self._parts: List[str] = []
+        self._size = 0
+        self._indent = indent
+        self._depth = 0
+
+    def start_document(self):
+        self._write('<?xml version="1.0" encoding="UTF-8"?>\n')
+
+    def start(self, name: str, attrs: Optional[Dict[str, Any]] = None):
+        self._write(f"{self._pad()}<{name}{self._attrs(attrs)}>\n")
+        self._depth += 1
+
+    def end(self, name: str):
+        self._depth -= 1
+        self._write(f"{self._pad()}</{name}>\n")
+
+    def element(self, name: str, attrs: Optional[Dict[str, Any]] = None, text: Optional[Any] = None):
+        if text is None or text == '':
+            self._write(f"{self._pad()}<{name}{self._attrs(attrs)}/>\n")
+        else:
+            self._write(f"{self._pad()}<{name}{self._attrs(attrs)}>{escape_text(text)}</{name}>\n")
+
+    @property
+    def full(self) -> bool:
+        """True once enough output is buffered to be worth sending"""
+        return self._size >= CHUNK_SIZE
+
+    def drain(self) -> bytes:
+        data = ''.join(self._parts).encode('utf-8')
+        self._parts.clear()
+        self._size = 0
+        return data
+
+    def _write(self, text: str):
+        self._parts.append(text)
+        self._size += len(text)
+
+    def _pad(self) -> str:
+        return self._indent * self._depth
+
+    @staticmethod
+    def _attrs(attrs: Optional[Dict[str, Any]]) -> str:
+        if not attrs:
+            return ''
+        return ''.join(f' {key}="{escape_attr(value)}"' for key, value in attrs.items() if value is not None)
+
+
+def write_chunks(chunks: Iterable[bytes], output_path: Path):
+    """Write a chunk iterator (e.g. iter_svg) to a file"""
+    with open(output_path, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
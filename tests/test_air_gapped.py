@@ -0,0 +1,155 @@
+import io
+import json
+import os
+import tarfile
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+
+from shared.enterprise import air_gapped_deployment
+from shared.enterprise.air_gapped_deployment import AirGappedDeployment, MANIFEST_NAME
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "ssl_helper.py").write_text("# helper\n")
+    (tmp_path / "api").mkdir()
+    (tmp_path / "api" / "fortinet.json").write_text("{}")
+    (tmp_path / "api" / "meraki.json").write_text("{}")
+
+    downloads, installs = [], []
+
+    def fake_pip(cmd, **kwargs):
+        if "install" in cmd:
+            installs.append(cmd)
+            return SimpleNamespace(returncode=0, stderr="")
+        downloads.append(cmd)
+        wheels_dir = cmd[cmd.index("-d") + 1]
+        with open(os.path.join(wheels_dir, "requests-2.0-py3-none-any.whl"), "wb") as f:
+            f.write(b"wheel")
+        return SimpleNamespace(returncode=0, stderr="")
+
+    monkeypatch.setattr(air_gapped_deployment.subprocess, "run", fake_pip)
+    return tmp_path, downloads, installs
+
+
+def test_rebuild_reuses_hashes_and_wheels(project):
+    _, downloads, _ = project
+    AirGappedDeployment("out").create_air_gapped_package()
+
+    deployment = AirGappedDeployment("out")
+    deployment.create_air_gapped_package()
+
+    assert len(downloads) == 1
+    # Only the regenerated scripts and docs are hashed again
+    assert deployment.build_cache.hits >= 4
+    manifest = deployment.deployment_manifest
+    assert manifest["verification_hashes"]["src/ssl_helper.py"] == manifest["components"][0]["hash"]
+
+
+def test_delta_package_applies_on_top_of_install(project):
+    tmp_path, _, _ = project
+    full = AirGappedDeployment("out").create_air_gapped_package()
+    install_dir = tmp_path / "site"
+    with zipfile.ZipFile(full) as zipf:
+        zipf.extractall(install_dir)
+
+    (tmp_path / "ssl_helper.py").write_text("# helper v2\n")
+    (tmp_path / "api" / "meraki.json").unlink()
+    delta = AirGappedDeployment("out").create_air_gapped_package(delta=True)
+
+    with zipfile.ZipFile(delta) as zipf:
+        names = set(zipf.namelist())
+    assert "src/ssl_helper.py" in names
+    assert "api/fortinet.json" not in names and "wheels/requests-2.0-py3-none-any.whl" not in names
+
+    assert AirGappedDeployment("out").install_air_gapped_package(delta, str(install_dir))
+    assert (install_dir / "src" / "ssl_helper.py").read_text() == "# helper v2\n"
+    assert not (install_dir / "api" / "meraki.json").exists()
+    with open(install_dir / MANIFEST_NAME) as f:
+        assert json.load(f)["delta"]["removed"] == ["api/meraki.json"]
+
+    # The same delta no longer matches the updated install
+    assert not AirGappedDeployment("out").install_air_gapped_package(delta, str(install_dir))
+
+
+def test_delta_installs_updated_wheels(project):
+    tmp_path, _, installs = project
+    full = AirGappedDeployment("out").create_air_gapped_package()
+    install_dir = tmp_path / "site"
+    assert AirGappedDeployment("out").install_air_gapped_package(full, str(install_dir))
+    installs.clear()
+
+    # A rebuilt wheel reaches the site only through the delta
+    wheel = tmp_path / "out" / "enhanced-network-api-airgapped" / "wheels" / "requests-2.0-py3-none-any.whl"
+    wheel.write_bytes(b"wheel v2")
+    delta = AirGappedDeployment("out").create_air_gapped_package(delta=True)
+
+    assert AirGappedDeployment("out").install_air_gapped_package(delta, str(install_dir))
+    assert (install_dir / "wheels" / wheel.name).read_bytes() == b"wheel v2"
+    assert len(installs) == 1 and installs[0][-1] == str(install_dir / "wheels" / wheel.name)
+
+
+def test_version_bump_replaces_old_wheel(project, monkeypatch):
+    tmp_path, _, _ = project
+    AirGappedDeployment("out").create_air_gapped_package()
+
+    def fake_download(cmd, **kwargs):
+        wheels_dir = cmd[cmd.index("-d") + 1]
+        with open(os.path.join(wheels_dir, "requests-2.1-py3-none-any.whl"), "wb") as f:
+            f.write(b"wheel 2.1")
+        return SimpleNamespace(returncode=0, stderr="")
+
+    monkeypatch.setattr(air_gapped_deployment.subprocess, "run", fake_download)
+    deployment = AirGappedDeployment("out")
+    deployment.build_cache.wheels = {}  # as after a requirements change
+    package = deployment.create_air_gapped_package()
+
+    wheels = sorted(p.name for p in (tmp_path / "out" / "enhanced-network-api-airgapped" / "wheels").iterdir())
+    assert wheels == ["requests-2.1-py3-none-any.whl"]
+    with zipfile.ZipFile(package) as zipf:
+        assert [n for n in zipf.namelist() if n.startswith("wheels/")] == ["wheels/requests-2.1-py3-none-any.whl"]
+
+
+def _tamper(package, name, data):
+    """Rewrite the package with different content for one member"""
+    tampered = package + ".tampered"
+    if zipfile.is_zipfile(package):
+        with zipfile.ZipFile(package) as src, zipfile.ZipFile(tampered, "w") as dst:
+            for info in src.infolist():
+                dst.writestr(info.filename, data if info.filename == name else src.read(info))
+    else:
+        with tarfile.open(package) as src, tarfile.open(tampered, "w:gz") as dst:
+            for member in src.getmembers():
+                content = data if member.name == name else src.extractfile(member).read()
+                member.size = len(content)
+                dst.addfile(member, io.BytesIO(content))
+    return tampered
+
+
+@pytest.mark.parametrize("archive_format", ["zip", "tar.gz"])
+def test_validation_streams_and_detects_tampering(project, archive_format):
+    tmp_path, _, _ = project
+    package = AirGappedDeployment("out", archive_format=archive_format).create_air_gapped_package()
+    assert package.endswith(archive_format)
+
+    results = AirGappedDeployment("out").validate_air_gapped_package(package)
+    assert results["package_valid"] and all(results["hash_verification"].values())
+    assert not (tmp_path / "temp-validation").exists()
+
+    results = AirGappedDeployment("out").validate_air_gapped_package(
+        _tamper(package, "src/ssl_helper.py", b"# tampered\n"))
+    assert not results["package_valid"]
+    assert results["hash_verification"]["src/ssl_helper.py"] is False
+
+
+def test_install_stops_at_first_mismatch(project):
+    tmp_path, _, _ = project
+    package = AirGappedDeployment("out", archive_format="tar.gz").create_air_gapped_package()
+    package = _tamper(package, "src/ssl_helper.py", b"# tampered\n")
+
+    install_dir = tmp_path / "site"
+    assert not AirGappedDeployment("out").install_air_gapped_package(package, str(install_dir))
+    assert not [path for path in install_dir.rglob("*") if path.is_file()]
@@ -44,3 +44,16 @@ def test_config_status():
     data = response.json()
     assert "paths" in data
     assert "features" in data
+
+def test_visualization_export_streams_svg():
+    """SVG exports can be streamed straight back instead of written to disk"""
+    topology_data = {
+        "devices": [{"id": "a", "name": "A & B"}],
+        "connections": [],
+        "layout": {"positions": {"a": {"x": 0, "y": 0}}}
+    }
+    response = client.post("/api/v1/visualization/export",
+                           json={"topology_data": topology_data, "format": "svg", "stream": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("image/svg+xml")
+    assert "A &amp; B" in response.text
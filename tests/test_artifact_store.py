@@ -0,0 +1,68 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from api.main import create_application
+from shared.visualization import artifact_store
+from shared.visualization.artifact_store import ArtifactStore, artifact_key, topology_digest
+from shared.visualization.renderer import RENDERER_VERSION, VisualizationRenderer
+
+TOPOLOGY = {
+    "devices": [{"id": "a", "name": "A"}, {"id": "b", "name": "B"}],
+    "connections": [["a", "b"]],
+    "layout": {"positions": {"a": {"x": 0, "y": 0}, "b": {"x": 100, "y": 0}}}
+}
+
+
+def test_render_artifact_is_deduplicated(tmp_path):
+    """The same topology and format render once; key order does not matter"""
+    store = ArtifactStore(tmp_path)
+    renderer = VisualizationRenderer()
+
+    first = renderer.render_artifact(TOPOLOGY, "svg", store=store)
+    reordered = {key: TOPOLOGY[key] for key in reversed(list(TOPOLOGY))}
+    second = renderer.render_artifact(reordered, "svg", store=store)
+
+    assert first["cached"] is False and second["cached"] is True
+    assert first["file"] == second["file"]
+    drawio = renderer.render_artifact(TOPOLOGY, "drawio", store=store)
+    assert drawio["file"] != first["file"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([first["file"], drawio["file"], "index.json"])
+    assert ArtifactStore(tmp_path).find(first["key"])["size"] == first["size"]
+
+
+def test_eviction_by_size_and_age(tmp_path):
+    store = ArtifactStore(tmp_path, max_bytes=250, max_age=3600)
+
+    def write(size):
+        return lambda path: path.write_bytes(b"x" * size)
+
+    store.get_or_create("old", "bin", write(100))
+    store.get_or_create("mid", "bin", write(100))
+    store.get("old")  # now more recently used than "mid"
+    store.get_or_create("new", "bin", write(100))
+    assert sorted(e["key"] for e in store.entries()) == ["new", "old"]
+    assert not (tmp_path / "mid.bin").exists()
+
+    store._index["old"]["last_access"] = time.time() - 7200
+    store.get_or_create("newest", "bin", write(10))
+    assert sorted(e["key"] for e in store.entries()) == ["new", "newest"]
+
+
+def test_artifact_served_with_immutable_headers(tmp_path, monkeypatch):
+    client = TestClient(create_application())
+    monkeypatch.setattr(artifact_store, "_store", ArtifactStore(tmp_path))
+
+    response = client.post("/api/v1/visualization/export", json={"topology_data": TOPOLOGY, "format": "svg"})
+    assert response.status_code == 200
+    export = response.json()
+    assert export["key"] == artifact_key(topology_digest(TOPOLOGY), "svg", RENDERER_VERSION)
+
+    artifact = client.get(export["url"])
+    assert artifact.status_code == 200
+    assert "immutable" in artifact.headers["cache-control"]
+    assert client.get(export["url"], headers={"If-None-Match": artifact.headers["etag"]}).status_code == 304
+
+    assert client.post("/api/v1/visualization/export", json={"topology_data": TOPOLOGY, "format": "svg"}).json()["cached"]
+    scenes = client.get("/api/v1/visualization/scenes").json()["scenes"]
+    assert export["url"] in [scene["url"] for scene in scenes]
@@ -0,0 +1,79 @@
+import time
+
+from shared.enterprise import certificate_discovery
+from shared.enterprise.certificate_discovery import CorporateCertificateDiscovery
+from shared.enterprise.detection_cache import DetectionCache
+
+
+def _discovery(tmp_path, monkeypatch, found):
+    discovery = CorporateCertificateDiscovery(cache=DetectionCache(str(tmp_path / "cache.json")))
+    monkeypatch.setattr(discovery, "_discover_from_environment", lambda: found)
+    monkeypatch.setattr(discovery, "_discover_from_filesystem", lambda: [])
+    monkeypatch.setattr(discovery, "_discover_from_system_store", lambda: [])
+    monkeypatch.setattr(discovery, "_discover_from_network_connections", lambda: [])
+    monkeypatch.setattr(discovery, "_detect_corporate_software", lambda: [])
+    return discovery
+
+
+def test_same_content_is_validated_once(tmp_path, monkeypatch):
+    pem = "-----BEGIN CERTIFICATE-----\nnot really\n-----END CERTIFICATE-----\n"
+    for name in ("a.pem", "b.pem"):
+        (tmp_path / name).write_text(pem)
+    (tmp_path / "c.pem").write_text("something else")
+    found = [{"path": str(tmp_path / name), "source": "test", "type": "file"} for name in ("a.pem", "b.pem", "c.pem")]
+    found.append({"path": "network_discovery_example.com", "source": "network_analysis", "type": "network_discovered"})
+
+    discovery = _discovery(tmp_path, monkeypatch, found)
+    validated = []
+    original = discovery._validate_certificate
+    monkeypatch.setattr(discovery, "_validate_certificate", lambda info: validated.append(info["path"]) or original(info))
+
+    results = discovery.auto_discover_certificates()
+    assert len(validated) == 3  # a/b share content; the network entry has none
+    assert results["validation_results"][found[0]["path"]] is results["validation_results"][found[1]["path"]]
+    assert results["validation_results"][found[2]["path"]]["is_valid_format"] is False
+    assert set(results["timings"]) >= {"environment_variables", "filesystem_scan", "network_analysis",
+                                       "validation", "total_ms"}
+
+
+def test_slow_source_times_out(tmp_path, monkeypatch):
+    discovery = _discovery(tmp_path, monkeypatch, [])
+    monkeypatch.setattr(discovery, "_discover_from_network_connections", lambda: time.sleep(2) or [])
+    monkeypatch.setattr(certificate_discovery, "DISCOVERY_TIMEOUT", 0.2)
+
+    started = time.perf_counter()
+    results = discovery.auto_discover_certificates()
+    assert time.perf_counter() - started < 1.5
+    assert results["timings"]["network_analysis"]["status"] == "timeout"
+    assert results["timings"]["environment_variables"]["status"] == "ok"
+    assert "network_analysis" not in results["discovery_methods"]
+
+
+def test_failed_validation_is_not_reported_as_timeout(tmp_path, monkeypatch):
+    (tmp_path / "a.pem").write_text("content")
+    discovery = _discovery(tmp_path, monkeypatch, [])
+
+    def broken(info):
+        raise OSError("unreadable")
+    monkeypatch.setattr(discovery, "_validate_certificate", broken)
+
+    results = discovery._validate_certificates([{"path": str(tmp_path / "a.pem"), "source": "test", "type": "file"}])
+    assert results[str(tmp_path / "a.pem")]["issues"] == ["Validation error"]
+
+
+def test_cached_validation_rechecks_expiry(tmp_path, monkeypatch):
+    (tmp_path / "a.pem").write_text("content")
+    discovery = _discovery(tmp_path, monkeypatch, [])
+    # As probed while the certificate was still valid
+    stored = {"issues": [], "is_readable": True, "is_valid_format": True, "recommendations": [],
+              "certificate_details": {"not_valid_before": "2020-01-01T00:00:00",
+                                      "not_valid_after": "2021-01-01T00:00:00",
+                                      "expired": False, "not_yet_valid": False}}
+    monkeypatch.setattr(discovery, "_validate_certificate", lambda info: stored)
+    certificates = [{"path": str(tmp_path / "a.pem"), "source": "test", "type": "file"}]
+
+    for _ in range(2):  # fresh probe, then the cached entry
+        validation = discovery._validate_certificates(certificates)[str(tmp_path / "a.pem")]
+        assert validation["certificate_details"]["expired"] is True
+        assert validation["issues"] == ["Certificate is expired"]
+    assert discovery.cache.hits == 1
@@ -0,0 +1,56 @@
+import os
+
+from shared.enterprise.detection_cache import DetectionCache, fingerprint, path_state
+from shared.enterprise.certificate_discovery import CorporateCertificateDiscovery
+
+
+def test_results_persist_until_fingerprint_changes(tmp_path):
+    calls = []
+
+    def probe():
+        calls.append(1)
+        return {"found": len(calls)}
+
+    cert = tmp_path / "corp.pem"
+    cert.write_text("a")
+    cache_path = tmp_path / "cache.json"
+
+    cache = DetectionCache(str(cache_path))
+    assert cache.get_or_probe("certs", fingerprint(path_state(cert)), probe) == {"found": 1}
+
+    # A new process reads the persisted result
+    cache = DetectionCache(str(cache_path))
+    assert cache.get_or_probe("certs", fingerprint(path_state(cert)), probe) == {"found": 1}
+    assert cache.hits == 1 and len(calls) == 1
+
+    cert.write_text("changed")
+    os.utime(cert, ns=(0, 10**9))
+    assert cache.get_or_probe("certs", fingerprint(path_state(cert)), probe) == {"found": 2}
+    assert cache.get_or_probe("certs", fingerprint(path_state(cert)), probe, refresh=True) == {"found": 3}
+    assert cache.get_or_probe("certs", fingerprint(path_state(cert)), probe, max_age=0) == {"found": 4}
+
+
+def test_certificate_discovery_only_reprobes_changed_parts(tmp_path, monkeypatch):
+    probes = []
+    discovery = CorporateCertificateDiscovery(cache=DetectionCache(str(tmp_path / "cache.json")))
+    for name in ("_discover_from_environment", "_discover_from_filesystem", "_discover_from_system_store",
+                 "_discover_from_network_connections", "_detect_corporate_software"):
+        monkeypatch.setattr(discovery, name, lambda name=name: probes.append(name) or [])
+
+    first = discovery.auto_discover_certificates()
+    first.pop("timings")
+    assert len(probes) == 5
+
+    probes.clear()
+    second = discovery.auto_discover_certificates()
+    second.pop("timings")
+    assert second == first
+    assert probes == []
+
+    monkeypatch.setenv("HTTPS_PROXY", "http://proxy.corp:8080")
+    discovery.auto_discover_certificates()
+    assert probes == ["_discover_from_network_connections"]
+
+    probes.clear()
+    discovery.auto_discover_certificates(refresh=True)
+    assert len(probes) == 5
@@ -0,0 +1,158 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import create_application
+from shared.device_handling import device_search, device_store
+from shared.device_handling.device_store import DeviceStore
+
+
+def _devices(n):
+    return [{
+        "id": f"dev{i:03d}",
+        "name": f"Device {i}",
+        "type": "fortiswitch" if i % 5 == 0 else "client",
+        "vendor": "Fortinet" if i % 5 == 0 else "unknown",
+        "model": "FortiSwitch 148F" if i % 5 == 0 else None,
+        "status": "online" if i % 2 else "offline",
+        "metadata": {"connected_to_switch": f"S{i % 3}"}
+    } for i in range(n)]
+
+
+def test_filters_use_indexes_and_capabilities():
+    store = DeviceStore()
+    store.replace(_devices(20))
+
+    page = store.query(filters={"type": ["FortiSwitch"], "status": ["offline"]})
+    assert [d["id"] for d in page["devices"]] == ["dev000", "dev010"]
+    # Capabilities come from the model matcher at insert time
+    assert store.query(filters={"capability": ["poe"]})["total_count"] == 4
+    assert store.query(filters={"status": ["online", "offline"]})["total_count"] == 20
+    with pytest.raises(ValueError):
+        store.query(filters={"ip": ["10.0.0.1"]})
+
+    store.upsert([{"id": "dev000", "type": "client", "status": "online"}])
+    assert store.query(filters={"type": ["fortiswitch"]})["total_count"] == 3
+
+
+@pytest.mark.parametrize("sort,descending", [("id", False), ("metadata.connected_to_switch", True)])
+def test_cursor_pages_cover_every_device_once(sort, descending):
+    store = DeviceStore()
+    store.replace(_devices(23))
+
+    seen, cursor = [], None
+    while True:
+        page = store.query(sort=sort, descending=descending, limit=5, cursor=cursor, fields=[sort])
+        seen.extend(page["devices"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(d["id"] for d in seen) == [f"dev{i:03d}" for i in range(23)]
+    values = [(d[sort], d["id"]) for d in seen]
+    assert values == sorted(values, reverse=descending)
+    assert set(seen[0]) == {"id", sort}
+
+
+def test_devices_endpoint_query_string(monkeypatch):
+    store = DeviceStore()
+    store.replace(_devices(12))
+    monkeypatch.setattr(device_store, "_store", store)
+    client = TestClient(create_application())
+
+    response = client.get("/api/v1/devices/", params={"status": "online", "fields": "name,status",
+                                                     "sort": "-id", "limit": 4})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total_count"] == 6 and body["filter_applied"]
+    assert [d["id"] for d in body["devices"]] == ["dev011", "dev009", "dev007", "dev005"]
+    assert body["devices"][0] == {"id": "dev011", "name": "Device 11", "status": "online"}
+
+    rest = client.get("/api/v1/devices/", params={"status": "online", "sort": "-id", "cursor": body["next_cursor"]})
+    assert [d["id"] for d in rest.json()["devices"]] == ["dev003", "dev001"]
+    assert client.get("/api/v1/devices/", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/api/v1/devices/dev003").json()["status"] == "online"
+
+
+def test_stats_counters_follow_changes():
+    store = DeviceStore()
+    devices = _devices(10)
+    store.replace(devices)
+
+    stats = store.stats()
+    assert stats["total_devices"] == 10
+    assert stats["by_type"] == {"fortiswitch": 2, "client": 8}
+    assert stats["by_switch"] == {"S0": 4, "S1": 3, "S2": 3}
+    assert sum(stats["by_category"].values()) == 10
+
+    changed = [dict(d) for d in devices[:8]]
+    changed[0]["status"] = "online"
+    version = store.version
+    store.replace(changed)
+    stats = store.stats()
+    assert stats["total_devices"] == 8
+    assert stats["by_status"] == {"online": 5, "offline": 3}
+    assert "unknown" not in stats["by_status"]
+
+    store.replace(changed)
+    assert store.version == version + 1  # unchanged devices are not re-indexed
+
+    store.remove(["dev001", "missing"])
+    assert store.stats()["by_switch"]["S1"] == 2
+
+
+def test_stats_endpoint(monkeypatch):
+    store = DeviceStore()
+    store.replace(_devices(6))
+    monkeypatch.setattr(device_store, "_store", store)
+    client = TestClient(create_application())
+
+    response = client.get("/api/v1/devices/stats")
+    assert response.status_code == 200
+    assert response.json()["by_status"] == {"offline": 3, "online": 3}
+
+
+def test_search_ranks_partial_matches():
+    store = DeviceStore()
+    store.replace(_devices(12) + [
+        {"id": "pos1", "name": "POS Terminal 1", "ip": "10.12.34.21", "mac": "AA:BB:CC:12:34:56",
+         "serial": "FGT60F1234", "metadata": {"restaurant_category": "pos", "store_number": "1234"}},
+        {"id": "pos2", "name": "POS Terminal 2", "ip": "10.55.0.21", "mac": "AA:BB:CC:99:00:01",
+         "metadata": {"restaurant_category": "pos", "store_number": "5678"}}
+    ])
+
+    results = store.search("pos terminal at store 1234")
+    assert [d["id"] for d in results["devices"][:2]] == ["pos1", "pos2"]
+    assert results["devices"][0]["score"] >= results["devices"][1]["score"]
+
+    assert [d["id"] for d in store.search("cc-12-34")["devices"]] == ["pos1"]
+    assert [d["id"] for d in store.search("10.55")["devices"]] == ["pos2"]
+    assert store.search("device", limit=5, fields=["name"])["has_more"]
+    with pytest.raises(ValueError):
+        store.search("at")
+
+    store.remove(["pos1"])
+    assert [d["id"] for d in store.search("1234")["devices"]] == []
+
+
+def test_search_caps_candidates_by_score(monkeypatch):
+    monkeypatch.setattr(device_search, "RANK_CANDIDATES", 20)
+    store = DeviceStore()
+    # The best match is indexed last, after more than RANK_CANDIDATES weaker ones
+    store.replace([{"id": f"sw{i}", "name": f"Switch {i}", "serial": "FGT60F"} for i in range(50)]
+                  + [{"id": "best", "name": "FGT60F", "serial": "FGT60F"}])
+
+    results = store.search("fgt60f", limit=100)
+    assert results["count"] == 20
+    assert results["devices"][0]["id"] == "best"
+
+
+def test_search_endpoint(monkeypatch):
+    store = DeviceStore()
+    store.replace(_devices(6))
+    monkeypatch.setattr(device_store, "_store", store)
+    client = TestClient(create_application())
+
+    response = client.get("/api/v1/devices/search", params={"q": "Device 3", "fields": "name"})
+    assert response.status_code == 200
+    assert response.json()["devices"][0] == {"id": "dev003", "name": "Device 3", "score": response.json()["devices"][0]["score"]}
+    assert client.get("/api/v1/devices/search", params={"q": "x"}).status_code == 400
@@ -0,0 +1,124 @@
+import os
+import random
+import time
+
+from shared.device_handling import device_store
+from shared.device_handling.device_store import DeviceStore
+from shared.services.fortigate_inventory_service import CallableInventorySource, FortiGateInventoryService
+
+
+def _inventory(tmp_path, rows):
+    path = tmp_path / "vlan10_interfaces.csv"
+    path.write_text("store_number,mgmtintname,ip_address,brand\n" +
+                    "".join(f"{store},vlan10,{ip},{brand}\n" for store, ip, brand in rows))
+    return FortiGateInventoryService(str(path))
+
+
+def test_lookup_uses_real_prefixes(tmp_path):
+    service = _inventory(tmp_path, [
+        ("SONIC0001", "10.1.0.1/16", "Sonic"),
+        ("BWW0002", "10.1.2.1/26", "BWW"),
+        ("ARG0003", "10.9.9.1", "Arbys"),
+        ("BAD", "not-an-ip", "x")
+    ])
+
+    assert service.locations["BWW0002"].subnet_mask == "255.255.255.192"
+    assert service.locations["ARG0003"].network == "10.9.9.0/24"
+    assert "BAD" not in service.locations
+
+    assert service.get_location_by_ip("10.1.2.1").store_number == "BWW0002"
+    assert service.get_location_by_ip("10.1.2.77").store_number == "SONIC0001"  # outside the /26
+    assert service.get_location_by_ip("10.1.200.5").store_number == "SONIC0001"
+    assert service.get_location_by_ip("10.9.9.254").store_number == "ARG0003"
+    assert service.get_location_by_ip("10.2.0.1") is None
+    assert service.get_location_by_ip("fe80::1") is None
+
+
+def test_batch_matches_single_lookups(tmp_path):
+    rows = [(f"S{i:04d}", f"10.{i // 256}.{i % 256}.1/24", "Sonic") for i in range(0, 2000, 3)]
+    service = _inventory(tmp_path, rows + [("WIDE", "10.0.0.1/12", "BWW")])
+    random.seed(7)
+    ips = [f"10.{random.randrange(20)}.{random.randrange(256)}.{random.randrange(256)}" for _ in range(500)]
+    ips += [None, "", "garbage", "192.168.1.1"]
+
+    batch = service.get_locations_by_ip(ips)
+    assert batch == [service.get_location_by_ip(ip) for ip in ips]
+    assert {loc.store_number for loc in batch if loc} >= {"WIDE"}
+
+    devices = [{"id": "a", "ip": "10.0.3.9"}, {"id": "b", "ip": "172.16.0.1", "metadata": {"x": 1}}]
+    assert service.attach_locations(devices) == 1
+    assert devices[0]["metadata"] == {"store_number": "S0003", "brand": "Sonic", "region": "unknown"}
+    assert devices[1]["metadata"] == {"x": 1}
+
+
+def test_reload_swaps_in_changed_file(tmp_path):
+    service = _inventory(tmp_path, [("S0001", "10.1.0.1/24", "Sonic")])
+    path = tmp_path / "vlan10_interfaces.csv"
+    assert service.reload() is False  # unchanged
+
+    before = service._inventory
+    path.write_text("store_number,mgmtintname,ip_address,brand\nS0002,vlan10,10.2.0.1/24,BWW\n")
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert service.reload() is True
+    assert service._inventory is not before
+    assert service.get_location_by_ip("10.1.0.5") is None
+    assert service.get_location_by_ip("10.2.0.5").store_number == "S0002"
+
+
+def test_reload_refreshes_indexed_devices(tmp_path, monkeypatch):
+    store = DeviceStore()
+    monkeypatch.setattr(device_store, "_store", store)
+    service = _inventory(tmp_path, [("S0001", "10.1.0.1/16", "Sonic")])
+    devices = [{"id": "a", "name": "POS", "ip": "10.1.2.9"}, {"id": "b", "name": "KDS", "ip": "10.9.0.1"}]
+    service.attach_locations(devices)
+    store.replace(devices)
+    assert store.stats()["by_site"] == {"S0001": 1, "unknown": 1}
+
+    path = tmp_path / "vlan10_interfaces.csv"
+    path.write_text("store_number,mgmtintname,ip_address,brand\nS0002,vlan10,10.1.2.1/24,BWW\n")
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert service.reload() is True
+
+    assert store.get("a")["metadata"]["store_number"] == "S0002"
+    assert store.get("a")["metadata"]["brand"] == "BWW"
+    assert store.stats()["by_site"] == {"S0002": 1, "unknown": 1}
+
+
+def test_reload_clears_removed_store(tmp_path, monkeypatch):
+    store = DeviceStore()
+    monkeypatch.setattr(device_store, "_store", store)
+    service = _inventory(tmp_path, [("S0001", "10.1.0.1/16", "Sonic")])
+    devices = [{"id": "a", "name": "POS", "ip": "10.1.2.9", "metadata": {"x": 1}}]
+    service.attach_locations(devices)
+    store.replace(devices)
+
+    path = tmp_path / "vlan10_interfaces.csv"
+    path.write_text("store_number,mgmtintname,ip_address,brand\nS0009,vlan10,10.50.0.1/16,BWW\n")
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert service.reload() is True
+
+    assert store.get("a")["metadata"] == {"x": 1}
+    assert store.stats()["by_site"] == {"unknown": 1}
+
+
+def test_failed_source_keeps_previous_data_and_lazy_start(tmp_path):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        if len(calls) > 1:
+            raise ConnectionError("adom unavailable")
+        return [{"store_number": "M0001", "ip_address": "10.5.0.1/24", "brand": "Sonic"}]
+
+    source = CallableInventorySource("fortimanager", fetch, interval=3600)
+    service = FortiGateInventoryService(sources=[source], lazy=True)
+    assert not service.ready.is_set()
+    assert service.get_location_by_ip("10.5.0.9") is None  # nothing loaded yet, no blocking
+
+    service.start_watcher(interval=60)
+    assert service.ready.wait(5)
+    service.stop_watcher()
+    assert service.get_location_by_ip("10.5.0.9").store_number == "M0001"
+
+    assert service.reload(force=True) is False
+    assert service.get_location_by_ip("10.5.0.9").store_number == "M0001"
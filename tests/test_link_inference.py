@@ -0,0 +1,58 @@
+import pytest
+from shared.network_utils.link_inference import LinkInferenceEngine, LinkIndex
+
+@pytest.fixture
+def discovered_devices():
+    return [
+        {"id": "FGT1", "name": "Store-FGT", "type": "fortigate"},
+        {"id": "SW1", "name": "SW1", "type": "fortiswitch", "metadata": {"ports": [
+            {"interface": "port24", "fortilink_port": True, "fgt_peer_device_name": "Store-FGT"},
+            {"interface": "port23", "isl_peer_device_sn": "SW2", "isl_peer_port_name": "port23",
+             "isl_peer_trunk_name": "_FlInK1_ICL0_"},
+            {"interface": "port5", "connected_devices": [{"device_mac": "aa-bb-cc-00-00-01"}]}
+        ]}},
+        {"id": "SW2", "name": "SW2", "type": "fortiswitch", "metadata": {"ports": [
+            {"interface": "port23", "isl_peer_device_sn": "SW1", "isl_peer_port_name": "port23"}
+        ]}},
+        {"id": "AP1", "name": "Lobby AP", "type": "fortiap", "mac": "AA:BB:CC:00:00:01"},
+        {"id": "c1", "name": "pos1", "type": "client",
+         "metadata": {"connected_to_switch": "SW2", "connected_port": "port7"}},
+        {"id": "c2", "name": "laptop", "type": "client"}
+    ]
+
+def test_infer_links_from_switch_data(discovered_devices):
+    """FortiLink, ISL, detected AP and port-client links are real edges"""
+    index = LinkInferenceEngine().infer(discovered_devices)
+
+    assert index.has_edge("FGT1", "SW1")
+    assert index.has_edge("SW1", "SW2")
+    assert index.has_edge("SW1", "AP1")
+    assert index.has_edge("SW2", "c1")
+    # The ISL is reported from both ends but indexed once
+    assert len([e for e in index.edges if e["via"] == "isl"]) == 1
+
+    client_edge = index.edges[index.adjacency["c1"][0]]
+    assert client_edge["port"] == "port7"
+
+    # Unplaced client falls back to the gateway instead of a round-robin AP
+    assert index.neighbors("c2") == ["FGT1"]
+    assert index.edges[index.adjacency["c2"][0]]["via"] == "fallback"
+
+def test_infer_without_fallback(discovered_devices):
+    index = LinkInferenceEngine(fallback_to_gateway=False).infer(discovered_devices)
+    assert "c2" not in index.adjacency
+
+def test_synthetic_gateway_for_uncollected_fortigate():
+    devices = [
+        {"id": "SW1", "type": "fortiswitch", "metadata": {"ports": [
+            {"interface": "port24", "fortilink_port": True, "fgt_peer_device_name": "FGT-A"}
+        ]}}
+    ]
+    index = LinkInferenceEngine().infer(devices)
+    assert [n["id"] for n in index.synthetic_nodes] == ["fortigate:FGT-A"]
+    assert index.has_edge("fortigate:FGT-A", "SW1")
+
+def test_link_index_from_connections():
+    index = LinkIndex.from_connections([("a", "b"), {"source": "b", "target": "c"}, ("b", "a")])
+    assert len(index) == 2
+    assert sorted(index.neighbors("b")) == ["a", "c"]
@@ -46,3 +46,62 @@ def test_meraki_topology_build(mock_dashboard):
     link = topo["links"][0]
     assert link["source"] == "c1"
     assert link["target"] == "d1"
+
+@pytest.fixture
+def mock_org_dashboard():
+    dashboard = MagicMock()
+    dashboard.organizations.getOrganizationDevices.return_value = [
+        {"serial": "MX-1", "model": "MX68", "name": "Edge FW", "networkId": "N_1", "mac": "aa:aa:aa:00:00:01"},
+        {"serial": "MS-1", "model": "MS120", "name": "Core SW", "networkId": "N_1", "mac": "aa:aa:aa:00:00:02"},
+        {"serial": "MR-1", "model": "MR36", "name": "Lobby AP", "networkId": "N_1", "mac": "aa:aa:aa:00:00:03"},
+        {"serial": "MS-2", "model": "MS120", "name": "Other SW", "networkId": "N_2", "mac": "aa:aa:aa:00:00:04"}
+    ]
+    dashboard.organizations.getOrganizationDevicesStatuses.return_value = [
+        {"serial": "MX-1", "status": "online", "lanIp": "10.0.0.1"}
+    ]
+    dashboard.organizations.getOrganizationUplinksStatuses.return_value = [
+        {"serial": "MX-1", "uplinks": [{"interface": "wan1", "status": "active"}]}
+    ]
+    dashboard.switch.getOrganizationSwitchPortsTopologyDiscoveryByDevice.return_value = [
+        {"serial": "MS-1", "ports": [
+            {"portId": "1", "lldp": [{"name": "Chassis ID", "value": "AA:AA:AA:00:00:01"}]},
+            {"portId": "5", "cdp": [{"name": "Device ID", "value": "aaaaaa000003"}]}
+        ]}
+    ]
+    dashboard.networks.getNetworkClients.return_value = [
+        {"id": "k1", "mac": "00:11:22:33:44:55", "description": "POS 1", "recentDeviceSerial": "MS-1"}
+    ]
+    return dashboard
+
+def test_meraki_org_snapshot_mode(mock_org_dashboard):
+    """Org mode slices networks from one cached bulk snapshot"""
+    from shared.services.meraki_org_service import MerakiOrgSnapshotService
+
+    service = MerakiOrgSnapshotService(ttl=300)
+    visualizer = MerakiVisualizer(mock_org_dashboard, org_id="O_1", snapshot_service=service)
+
+    html = visualizer.create_visualization("N_1", "Store 1")
+    assert html is not None
+    assert "Core SW" in html
+    assert "Other SW" not in html
+
+    visualizer.create_visualization("N_2", "Store 2")
+
+    # Bulk endpoints hit once for both networks; no per-network device calls
+    assert mock_org_dashboard.organizations.getOrganizationDevices.call_count == 1
+    mock_org_dashboard.networks.getNetworkDevices.assert_not_called()
+
+def test_meraki_org_snapshot_lldp_links(mock_org_dashboard):
+    """LLDP/CDP neighbors replace the inferred appliance/switch cross product"""
+    from shared.services.meraki_org_service import MerakiOrgSnapshotService
+
+    snapshot = MerakiOrgSnapshotService().get_snapshot(mock_org_dashboard, "O_1")
+    devices = snapshot.network_devices("N_1")
+    assert next(d for d in devices if d["serial"] == "MX-1")["status"] == "online"
+
+    links = snapshot.network_links("N_1")
+    assert {(l["source"], l["target"]) for l in links} == {("MX-1", "MS-1"), ("MR-1", "MS-1")}
+
+    topo = MerakiVisualizer(mock_org_dashboard).build_topology(devices, [], links)
+    infra = [l for l in topo["links"] if l["type"] in ("uplink", "switch", "lldp")]
+    assert len(infra) == 2
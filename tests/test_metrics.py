@@ -0,0 +1,57 @@
+from fastapi.testclient import TestClient
+
+from api.main import create_application
+from shared.observability import metrics
+from shared.observability.metrics import MetricsRegistry, endpoint_label, observe_upstream, tracked_job
+
+
+def test_render_text_format():
+    registry = MetricsRegistry()
+    calls = registry.counter("calls", "Calls made", ("endpoint",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    calls.inc(endpoint='/a "b"')
+    latency.observe(0.1)
+    latency.observe(5)
+    registry.register_collector("extra", lambda: [("things", "gauge", "Things", [({"kind": "x"}, 2)])])
+
+    lines = registry.render().splitlines()
+    assert "# TYPE calls_total counter" in lines
+    assert 'calls_total{endpoint="/a \\"b\\""} 1' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 1' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in lines
+    assert "latency_seconds_count 2" in lines
+    assert 'things{kind="x"} 2' in lines
+
+
+def test_upstream_endpoints_are_templated():
+    assert endpoint_label("/api/v1/organizations/123456/devices") == "/api/v1/organizations/{id}/devices"
+    assert endpoint_label("/api/v2/monitor/switch-controller/managed-switch/status") == \
+        "/api/v2/monitor/switch-controller/managed-switch/status"
+
+    observe_upstream("https://api.meraki.com/api/v1/organizations/42/devices", "200", 0.2)
+    assert metrics.upstream_request_seconds.count(
+        service="meraki", endpoint="/api/v1/organizations/{id}/devices", status="200") >= 1
+
+
+def test_tracked_job_moves_from_queued_to_running():
+    seen = []
+    job = tracked_job("test_job", lambda: seen.append(metrics.background_jobs.value(job="test_job", state="running")))
+    assert metrics.background_jobs.value(job="test_job", state="queued") == 1
+    job()
+    assert seen == [1]
+    assert metrics.background_jobs.value(job="test_job", state="queued") == 0
+    assert metrics.background_jobs.value(job="test_job", state="running") == 0
+
+
+def test_metrics_endpoint():
+    client = TestClient(create_application())
+    client.get("/api/v1/devices/stats")
+    client.get("/api/v1/devices/no-such-device")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'route="/api/v1/devices/stats",status="200"' in response.text
+    assert 'route="/api/v1/devices/{device_id}",status="404"' in response.text
+    assert 'cache_hit_ratio{cache="layout"}' in response.text
+    assert "devices " in response.text
@@ -65,3 +65,98 @@ def test_renderer_svg_generation(temp_output_dir):
     content = output_path.read_text()
     assert "<svg" in content
     assert "Device 1" in content
+
+def test_drawio_positions_follow_tree():
+    """Hierarchical DrawIO positions nest clients under their switch instead of one flat row"""
+    renderer = VisualizationRenderer()
+    nodes = [{"id": "fgt", "type": "fortigate"}, {"id": "sw1", "type": "switch"}, {"id": "sw2", "type": "switch"}] + \
+        [{"id": f"c{i}", "type": "client"} for i in range(40)]
+    links = [{"source": "fgt", "target": "sw1"}, {"source": "fgt", "target": "sw2"}] + \
+        [{"source": "sw1" if i < 20 else "sw2", "target": f"c{i}", "type": "ethernet", "port": f"port{i % 2 + 1}"}
+         for i in range(40)]
+
+    positions = renderer._calculate_drawio_positions(nodes, "hierarchical", links)
+
+    assert positions["fgt"]["y"] < positions["sw1"]["y"] < positions["c0"]["y"]
+    sw1_clients = [positions[f"c{i}"]["x"] for i in range(20)]
+    sw2_clients = [positions[f"c{i}"]["x"] for i in range(20, 40)]
+    assert max(sw1_clients) < min(sw2_clients)
+    assert max(sw1_clients) - min(sw1_clients) < 20 * 220
+
+def test_live_viewer_subscribes_to_stream(temp_output_dir):
+    """The live viewer embeds no topology and connects to the stream instead"""
+    renderer = VisualizationRenderer()
+    output_path = temp_output_dir / "live.html"
+
+    assert renderer.render_live_viewer(output_path) is True
+    content = output_path.read_text()
+    assert '"/api/v1/topology/ws"' in content
+    assert 'const gData = {"nodes":[],"links":[]};' in content
+    assert 'window.clusterExpandPath = "";' in content
+
+    mtime = output_path.stat().st_mtime_ns
+    assert renderer.render_live_viewer(output_path) is True
+    assert output_path.stat().st_mtime_ns == mtime
+
+def _read_glb(path):
+    import struct
+    data = path.read_bytes()
+    magic, version, length = struct.unpack_from("<III", data, 0)
+    json_length, _ = struct.unpack_from("<II", data, 12)
+    document = json.loads(data[20:20 + json_length])
+    bin_length, _ = struct.unpack_from("<II", data, 20 + json_length)
+    return magic, version, length, len(data), document, bin_length
+
+def test_glb_export_instances_devices(temp_output_dir):
+    """GLB export embeds the referenced model once and draws same-model devices as instances"""
+    renderer = VisualizationRenderer(models_dir=str(Path(__file__).parent.parent / "models"))
+    devices = [{"id": "fgt", "type": "fortigate", "model_path": "models/assets/fortinet/FG-100F.glb",
+                "position": {"x": 0, "y": 0, "z": 0}}]
+    devices += [{"id": f"c{i}", "type": "client", "position": {"x": i * 10, "y": 100, "z": 0}} for i in range(200)]
+    topology_data = {"devices": devices, "connections": [["fgt", f"c{i}"] for i in range(200)]}
+
+    assert renderer.export_gltf(topology_data, temp_output_dir / "scene.gltf") is True
+    output_path = temp_output_dir / "scene.glb"
+    magic, version, length, size, document, bin_length = _read_glb(output_path)
+
+    assert (magic, version, length) == (0x46546C67, 2, size)
+    assert document["extensionsRequired"] == ["EXT_mesh_gpu_instancing"]
+    assert bin_length >= document["buffers"][0]["byteLength"]
+    assert all(v["byteOffset"] + v["byteLength"] <= document["buffers"][0]["byteLength"] for v in document["bufferViews"])
+
+    nodes = {node["name"]: node for node in document["nodes"]}
+    assert nodes["FG-100F"]["extras"]["device_ids"] == ["fgt"]
+    clients = nodes["client"]["extensions"]["EXT_mesh_gpu_instancing"]["attributes"]
+    assert document["accessors"][clients["TRANSLATION"]]["count"] == 200
+    assert len(document["meshes"]) == 3  # FortiGate model, client box, links
+
+    # Byte-for-byte deterministic, independent of device order
+    renderer.export_gltf({**topology_data, "devices": devices[::-1]}, temp_output_dir / "again.glb")
+    assert (temp_output_dir / "again.glb").read_bytes() == output_path.read_bytes()
+
+def test_drawio_export_escapes_labels(temp_output_dir):
+    """DrawIO cells are actually written and labels survive XML/HTML special characters"""
+    import xml.etree.ElementTree as ET
+    renderer = VisualizationRenderer()
+    topology_data = {
+        "devices": [{"id": "a", "name": 'R&D "core" <fw>', "type": "fortigate"}, {"id": "b", "name": "sw", "type": "switch"}],
+        "connections": [["a", "b"]]
+    }
+
+    output_path = temp_output_dir / "topology.drawio"
+    assert renderer.export_drawio(topology_data, output_path) is True
+
+    cells = ET.parse(output_path).getroot().findall(".//mxCell")
+    assert cells[2].get("value") == "R&amp;D &quot;core&quot; &lt;fw&gt;\nfortigate"
+    assert [c.get("edge") for c in cells].count("1") == 1
+
+def test_large_viewer_starts_clustered():
+    """Past max_nodes the viewer inlines clusters plus the expand hook instead of every client"""
+    renderer = VisualizationRenderer()
+    devices = [{"id": "sw1", "type": "switch"}] + [{"id": f"c{i}", "type": "client"} for i in range(50)]
+    connections = [["sw1", f"c{i}"] for i in range(50)]
+
+    content = renderer._create_html_viewer_content({"devices": devices, "connections": connections}, max_nodes=10)
+    assert '"id":"c7"' not in content
+    assert '"cluster":true' in content
+    assert "/api/v1/topology/clusters/" in content
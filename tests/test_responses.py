@@ -0,0 +1,51 @@
+import orjson
+from fastapi.testclient import TestClient
+
+from api.main import create_application
+from api.responses import COLUMNAR_JSON, from_columnar, negotiate_encoding, negotiate_media_type, to_columnar
+from shared.network_utils.network_client import DeviceType, NetworkDevice
+
+
+def test_columnar_round_trip_with_dictionaries():
+    nodes = [{"id": f"c{i}", "type": "client", "connected_to_switch": f"S{i % 3}", "rssi": -40 - i}
+             for i in range(12)]
+    content = {"nodes": nodes, "links": [], "total": 12}
+
+    columnar = to_columnar(content)
+    table = columnar["nodes"]
+    assert table["$table"] == 12
+    assert table["dictionaries"]["connected_to_switch"] == ["S0", "S1", "S2"]
+    assert table["columns"]["connected_to_switch"][:4] == [0, 1, 2, 0]
+    assert "id" not in table["dictionaries"]
+    assert from_columnar(columnar) == content
+
+    # Dataclasses and enums are flattened first
+    device = NetworkDevice(id="fg", name="FG", device_type=DeviceType.FORTIGATE)
+    assert from_columnar(to_columnar({"devices": [device]}))["devices"][0]["device_type"] == "fortigate"
+
+
+def test_negotiation():
+    assert negotiate_media_type("") == "application/json"
+    assert negotiate_media_type(f"application/json;q=0.5, {COLUMNAR_JSON}") == COLUMNAR_JSON
+    assert negotiate_media_type("text/html") == "application/json"
+    assert negotiate_encoding("gzip;q=0.8, identity") == "gzip"
+    assert negotiate_encoding("gzip;q=0") == "identity"
+
+
+def test_topology_create_negotiated_encoding():
+    client = TestClient(create_application())
+    devices = [{"id": "core", "type": "fortigate"}] + [{"id": f"d{i}", "type": "client"} for i in range(50)]
+    payload = {"devices": devices, "connections": [["core", f"d{i}"] for i in range(50)]}
+
+    plain = client.post("/api/v1/topology/create", json=payload)
+    assert plain.headers["content-type"] == "application/json"
+    assert plain.json()["device_count"] == 51
+
+    response = client.post("/api/v1/topology/create", json=payload,
+                           headers={"Accept": COLUMNAR_JSON, "Accept-Encoding": "gzip"})
+    assert response.headers["content-type"] == COLUMNAR_JSON
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    decoded = from_columnar(response.json())
+    assert decoded["topology"]["devices"] == plain.json()["topology"]["devices"]
+    assert len(orjson.dumps(response.json())) < len(plain.content)
@@ -0,0 +1,61 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from api.startup import StartupProfile
+from shared.config.config_manager import ConfigManager
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_vendor_sdks_are_not_imported_at_startup(tmp_path):
+    code = (
+        "import sys; import api.main; from shared.network_utils import mac_vendor; "
+        "print(sorted(m for m in ('meraki', 'mac_vendor_lookup', 'aiohttp', "
+        "'shared.config.environment_detector') if m in sys.modules)); "
+        "print(mac_vendor.DB_PATH.exists())"
+    )
+    env = {"PYTHONPATH": str(ROOT), "HOME": str(tmp_path), "PATH": "/usr/bin:/bin"}
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split("\n")[:2] == ["[]", "False"]
+
+
+def test_detection_can_be_deferred():
+    manager = ConfigManager(detect_environment=False)
+    assert not manager.environment_detected
+    manager.detect_environment()
+    assert manager.environment_detected
+
+
+def test_import_timing_report():
+    profile = StartupProfile()
+    profile.enable_import_timing()
+    try:
+        with profile.phase("imports"):
+            import email.mime.audio  # noqa: F401  (not imported anywhere else in the suite)
+    finally:
+        profile.mark_ready()
+
+    report = profile.report()
+    assert report["phases"][0]["phase"] == "imports"
+    assert report["ready_ms"] is not None
+    modules = {entry["module"] for entry in report["slowest_imports"]}
+    assert report["modules_imported"] >= 1 and "email.mime.audio" in profile.import_timer.timings
+    assert modules <= set(profile.import_timer.timings)
+
+
+def test_inventory_watcher_follows_lifespan():
+    from fastapi.testclient import TestClient
+
+    from api.main import create_application
+    from shared.services.fortigate_inventory_service import get_fortigate_inventory_service
+
+    app = create_application()
+    service = get_fortigate_inventory_service()
+    assert service._watcher is None  # building the app starts no thread
+
+    with TestClient(app):
+        assert service._watcher is not None and service._watcher.is_alive()
+    assert service._watcher is None
@@ -0,0 +1,69 @@
+import shutil
+import ssl
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from shared.network_utils.tls import SharedTLS
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        # Every request needs a new connection, so resumption is what saves the handshake
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def https_server(tmp_path, monkeypatch):
+    # requests would otherwise replace verify=True/False with the environment's bundle
+    for var in ("REQUESTS_CA_BUNDLE", "CURL_CA_BUNDLE"):
+        monkeypatch.delenv(var, raising=False)
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl not available")
+    cert, key = tmp_path / "cert.pem", tmp_path / "key.pem"
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost",
+                    "-keyout", str(key), "-out", str(cert)], check=True, capture_output=True)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(str(cert), str(key))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"https://localhost:{server.server_address[1]}/", str(cert)
+    server.shutdown()
+    server.server_close()
+
+
+def test_sessions_share_pool_and_resume(https_server):
+    url, cert = https_server
+    tls = SharedTLS([cert])
+    first, second = tls.session(), tls.session()
+    assert first.get_adapter(url) is second.get_adapter(url)
+
+    for session in (first, second, first, second):
+        assert session.get(url, timeout=5).text == "ok"
+
+    stats = tls.context(True).stats()
+    assert stats["handshakes"] == 4
+    assert stats["resumed"] >= 2
+
+
+def test_unverified_context_is_separate(https_server):
+    url, _ = https_server
+    tls = SharedTLS([])
+    assert tls.session(verify=False).get(url, timeout=5).status_code == 200
+    assert tls.context(False).verify_mode == ssl.CERT_NONE
+    assert tls.context(True) is tls.context(True)
@@ -61,3 +61,150 @@ def test_layered_layout():
     assert "root" in positions
     assert "pc1" in positions
     assert positions["root"]["y"] != positions["pc1"]["y"]
+
+def test_find_related_devices():
+    """Related devices come from the connection adjacency index"""
+    tb = TopologyBuilder()
+    devices = [
+        {"id": "sw1", "type": "switch"},
+        {"id": "ap1", "type": "ap"},
+        {"id": "pc1", "type": "client"},
+        {"id": "pc2", "type": "client"}
+    ]
+    tb.build_topology(devices, [("sw1", "ap1"), ("ap1", "pc1"), ("sw1", "pc2")])
+
+    assert sorted(tb._find_related_devices("sw1", ["ap", "client"])) == ["ap1", "pc2"]
+    assert sorted(tb.add_device_relationships()) == [("ap1", "pc1"), ("sw1", "ap1"), ("sw1", "pc2")]
+
+def test_validate_topology_reports_bad_connections():
+    """Validation reports unknown endpoints and malformed connections"""
+    tb = TopologyBuilder()
+    topology = {
+        "devices": [{"id": "a"}, {"id": "b"}],
+        "connections": [("a", "ghost"), "bogus"],
+        "layout": {"positions": {"a": {}}}
+    }
+    res = tb.validate_topology(topology)
+
+    assert res["valid"] is False
+    assert "Connection target ghost not found in devices" in res["errors"]
+    assert "Invalid connection format: bogus" in res["errors"]
+    assert "Device b has no position" in res["warnings"]
+    assert "Device a has no connections" in res["warnings"]
+
+def test_force_directed_layout_is_deterministic():
+    """Force-directed layout keeps layers on their planes and is reproducible per seed"""
+    devices = [{"id": "fgt", "type": "fortigate"}] + \
+        [{"id": f"sw{i}", "type": "switch"} for i in range(3)] + \
+        [{"id": f"pc{i}", "type": "client"} for i in range(30)]
+    connections = [("fgt", f"sw{i}") for i in range(3)] + [(f"sw{i % 3}", f"pc{i}") for i in range(30)]
+
+    tb = TopologyBuilder()
+    tb.build_topology(devices, connections)
+    first = tb.apply_layout("force_directed", iterations=40)
+    second = tb.apply_layout("force_directed", iterations=40)
+
+    assert first["positions"] == second["positions"]
+    assert first["iterations"] == 40
+    ys = {pos["layer"]: pos["y"] for pos in first["positions"].values()}
+    assert all(pos["y"] == ys[pos["layer"]] for pos in first["positions"].values())
+    assert ys["core"] < ys["access"] < ys["endpoints"]
+
+def test_optimize_layout_wraps_wide_layers():
+    """Optimized layout wraps a wide layer into a grid and orders it under its parents"""
+    devices = [{"id": "sw1", "type": "switch"}, {"id": "sw2", "type": "switch"}] + \
+        [{"id": f"pc{i}", "type": "client"} for i in range(100)]
+    connections = [("sw1", f"pc{i}") for i in range(50)] + [("sw2", f"pc{i}") for i in range(50, 100)]
+
+    tb = TopologyBuilder()
+    tb.build_topology(devices, connections)
+    layout = tb.apply_layout("optimized")
+    positions = layout["positions"]
+
+    client_xs = [positions[f"pc{i}"]["x"] for i in range(100)]
+    assert max(client_xs) - min(client_xs) <= 10 * 120
+    assert len({positions[f"pc{i}"]["z"] for i in range(100)}) == 10
+    # Children of the left switch come first in the barycenter order
+    order = sorted(range(100), key=lambda i: (positions[f"pc{i}"]["z"], positions[f"pc{i}"]["x"]))
+    assert set(order[:50]) == set(range(50))
+
+def test_tree_layout_groups_clients_by_port():
+    """Tree layout hangs clients under virtual port nodes and relayout only moves the changed subtree"""
+    devices = [{"id": "fgt", "type": "fortigate"}, {"id": "sw1", "type": "switch"}, {"id": "sw2", "type": "switch"}] + \
+        [{"id": f"pc{i}", "type": "client",
+          "metadata": {"connected_to_switch": "sw1", "connected_port": f"port{i % 2 + 1}"}} for i in range(10)] + \
+        [{"id": f"ap{i}", "type": "client"} for i in range(8)]
+    connections = [("fgt", "sw1"), ("fgt", "sw2")] + [("sw1", f"pc{i}") for i in range(10)] + \
+        [("sw2", f"ap{i}") for i in range(8)]
+
+    tb = TopologyBuilder()
+    tb.build_topology(devices, connections)
+    layout = tb.apply_layout("tree")
+    positions = layout["positions"]
+
+    assert set(layout["ports"]) == {"sw1#port:port1", "sw1#port:port2"}
+    assert positions["pc0"]["parent"] == "sw1#port:port1"
+    assert positions["sw1"]["parent"] == "fgt"
+    assert positions["fgt"]["y"] < positions["sw1"]["y"] < layout["ports"]["sw1#port:port1"]["y"] < positions["pc0"]["y"]
+    # Parent centered over its children
+    assert positions["fgt"]["x"] == (positions["sw1"]["x"] + positions["sw2"]["x"]) / 2
+
+    # One more client in sw2's 3x3 block fits its slot: only the new client moves
+    tb.build_topology(devices + [{"id": "ap8", "type": "client"}], connections + [("sw2", "ap8")])
+    updated = tb.relayout_subtree("sw2")
+    assert updated["moved"] == ["ap8"]
+    for device_id in ["fgt", "sw1", "pc0", "pc9"]:
+        assert updated["positions"][device_id] == positions[device_id]
+
+def test_radial_layout_centers_gateway():
+    devices = [{"id": "fgt", "type": "fortigate"}] + [{"id": f"sw{i}", "type": "switch"} for i in range(4)]
+    tb = TopologyBuilder()
+    tb.build_topology(devices, [("fgt", f"sw{i}") for i in range(4)])
+    positions = tb.apply_layout("radial")["positions"]
+
+    assert (positions["fgt"]["x"], positions["fgt"]["z"]) == (0, 0)
+    radii = {round((p["x"] ** 2 + p["z"] ** 2) ** 0.5, 6) for k, p in positions.items() if k != "fgt"}
+    assert len(radii) == 1
+
+def test_layout_cache_hits_on_reordered_topology(tmp_path):
+    """Same structure in a different order reuses the cached layout, also from the disk tier"""
+    from shared.network_utils.layout_cache import LayoutCache
+
+    devices = [{"id": "fgt", "type": "fortigate"}] + [{"id": f"pc{i}", "type": "client"} for i in range(5)]
+    connections = [("fgt", f"pc{i}") for i in range(5)]
+
+    cache = LayoutCache(max_entries=4, disk_dir=tmp_path)
+    first = TopologyBuilder(layout_cache=cache).build_topology(devices, connections)["layout"]
+    second = TopologyBuilder(layout_cache=cache).build_topology(
+        list(reversed(devices)), [(t, s) for s, t in reversed(connections)]
+    )["layout"]
+
+    assert first["cached"] is False and second["cached"] is True
+    assert second["positions"] == first["positions"]
+
+    # A fresh memory tier falls back to disk
+    cold = LayoutCache(max_entries=4, disk_dir=tmp_path)
+    third = TopologyBuilder(layout_cache=cold).build_topology(devices, connections)["layout"]
+    assert third["cached"] is True and cold.disk_hits == 1
+
+    # Mutating a returned layout does not leak into the cache
+    third["positions"]["fgt"]["x"] = 12345
+    assert TopologyBuilder(layout_cache=cold).build_topology(devices, connections)["layout"]["positions"]["fgt"]["x"] != 12345
+
+def test_layout_cache_lru_and_warm_start():
+    from shared.network_utils.layout_cache import LayoutCache
+
+    cache = LayoutCache(max_entries=2)
+    devices = [{"id": "fgt", "type": "fortigate"}] + [{"id": f"pc{i}", "type": "client"} for i in range(20)]
+    connections = [("fgt", f"pc{i}") for i in range(20)]
+
+    tb = TopologyBuilder(layout_cache=cache)
+    tb.build_topology(devices, connections)
+    base = tb.apply_layout("force_directed", iterations=30)
+    assert base["warm_start"] is False
+
+    # One extra client: nearest cached layout seeds the simulation
+    tb.build_topology(devices + [{"id": "pc20", "type": "client"}], connections + [("fgt", "pc20")])
+    warm = tb.apply_layout("force_directed", iterations=30)
+    assert warm["warm_start"] is True and warm["iterations"] == 10
+    assert cache.stats()["entries"] == 2
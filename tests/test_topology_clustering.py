@@ -0,0 +1,59 @@
+from fastapi.testclient import TestClient
+
+from api.main import create_application
+from shared.network_utils.topology_clustering import ClusteredTopology
+
+
+def _store(clients_per_switch=30, switches=3):
+    devices = [{"id": "fgt", "type": "fortigate"}] + [{"id": f"sw{s}", "type": "switch"} for s in range(switches)]
+    connections = [{"source": "fgt", "target": f"sw{s}"} for s in range(switches)]
+    for s in range(switches):
+        for c in range(clients_per_switch):
+            client_id = f"c{s}-{c}"
+            devices.append({"id": client_id, "type": "client",
+                            "metadata": {"restaurant_category": "pos" if c % 3 else "kitchen"}})
+            connections.append({"source": f"sw{s}", "target": client_id, "type": "ethernet", "port": f"port{c % 2 + 1}"})
+    return devices, connections
+
+
+def test_levels_collapse_endpoints():
+    """Clients collapse per switch, then per switch port, while infrastructure stays visible"""
+    devices, connections = _store()
+    clustered = ClusteredTopology(devices, connections)
+
+    assert [level["nodes"] for level in clustered.level_summary()] == [4 + 3, 4 + 6, 94]
+    assert clustered.pick_level(50) == 1
+    assert clustered.pick_level(8) == 0
+
+    view = clustered.view(0)
+    cluster = next(n for n in view["nodes"] if n["id"] == "cluster0:sw1")
+    assert cluster["count"] == 30
+    assert {"source": "sw1", "target": "cluster0:sw1"} in view["links"]
+
+
+def test_expand_returns_subclusters_then_members():
+    devices, connections = _store()
+    clustered = ClusteredTopology(devices, connections, group_by="category")
+
+    subclusters = clustered.expand("cluster0:sw0")
+    assert sorted(n["id"] for n in subclusters["nodes"]) == ["cluster1:sw0:kitchen", "cluster1:sw0:pos"]
+
+    page = clustered.expand("cluster1:sw0:pos", limit=5)
+    assert page["total"] == 20 and len(page["nodes"]) == 5 and page["has_more"]
+    assert all(link["source"] == "sw0" for link in page["links"])
+    assert clustered.expand("cluster1:nope") is None
+
+
+def test_lod_api_round_trip():
+    devices, connections = _store()
+    client = TestClient(create_application())
+
+    response = client.post("/api/v1/topology/lod", json={"devices": devices, "connections": connections, "max_nodes": 8})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["level"] == 0 and len(data["nodes"]) == 7
+
+    expanded = client.get(f"/api/v1/topology/clusters/{data['key']}/cluster0:sw2")
+    assert expanded.status_code == 200
+    assert {n["id"] for n in expanded.json()["nodes"]} == {"cluster1:sw2:port1", "cluster1:sw2:port2"}
+    assert client.get(f"/api/v1/topology/clusters/{data['key']}/cluster0:missing").status_code == 404
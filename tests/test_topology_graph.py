@@ -0,0 +1,50 @@
+import numpy as np
+
+from shared.network_utils.topology_graph import TopologyGraph, classify_layer
+
+
+def test_graph_csr_dedupes_edges():
+    """Duplicate, reversed and self-loop connections collapse into one undirected edge"""
+    devices = [{"id": "fgt", "type": "fortigate"}, {"id": "sw1", "type": "switch"}, {"id": "pc1", "type": "client"}]
+    connections = [("fgt", "sw1"), ("sw1", "fgt"), {"source": "sw1", "target": "pc1"}, ("pc1", "pc1")]
+
+    graph = TopologyGraph.from_topology(devices, connections)
+
+    assert graph.node_count == 3
+    assert graph.edge_count == 2
+    assert sorted(graph.neighbors("sw1")) == ["fgt", "pc1"]
+    assert graph.degrees.tolist() == [1, 2, 1]
+    assert graph.neighbors("missing") == []
+
+
+def test_graph_diagnostics():
+    """Invalid input is recorded instead of raising"""
+    devices = [{"id": "a"}, {"id": "a"}, {"name": "no id"}, {"id": "b"}]
+    graph = TopologyGraph.from_topology(devices, [("a", "ghost"), "bogus"])
+
+    assert graph.node_ids == ["a", "b"]
+    assert graph.duplicate_ids == ["a"]
+    assert graph.missing_id_count == 1
+    assert graph.invalid_edges == [("a", "ghost")]
+    assert graph.malformed_edges == ["bogus"]
+    assert sorted(graph.isolated_ids()) == ["a", "b"]
+
+
+def test_graph_bfs_and_components():
+    """BFS levels and components on two disjoint trees"""
+    devices = [{"id": f"n{i}"} for i in range(6)]
+    connections = [("n0", "n1"), ("n1", "n2"), ("n0", "n3"), ("n4", "n5")]
+    graph = TopologyGraph.from_topology(devices, connections)
+
+    assert graph.bfs_levels([0]).tolist() == [0, 1, 2, 1, -1, -1]
+    labels = graph.connected_components()
+    assert len(np.unique(labels)) == 2
+    assert labels[0] == labels[2] and labels[4] == labels[5] and labels[0] != labels[4]
+
+
+def test_classify_layer():
+    assert classify_layer({"type": "fortigate"}) == "core"
+    assert classify_layer({"type": "fortiswitch", "name": "Core-SW"}) == "distribution"
+    assert classify_layer({"type": "fortiswitch", "name": "IDF-1"}) == "access"
+    assert classify_layer({"type": "client"}) == "endpoints"
+    assert classify_layer({}) == "access"
@@ -0,0 +1,115 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from api.main import create_application
+from shared.services import topology_stream_service
+from shared.services.topology_stream_service import TopologyStreamService
+
+
+def _devices(*ids, status="online"):
+    return [{"id": i, "name": i.upper(), "type": "switch", "status": status, "metadata": {"vlan": 1}} for i in ids]
+
+
+def test_publish_emits_only_changes():
+    """Republishing computes node/link deltas and skips no-op updates"""
+    service = TopologyStreamService()
+    first = service.publish_topology(_devices("a", "b"), [["a", "b"]])
+    assert first["version"] == 1
+    assert [n["id"] for n in first["nodes"]["added"]] == ["a", "b"]
+    assert first["links"]["added"] == [{"source": "a", "target": "b"}]
+
+    assert service.publish_topology(_devices("a", "b"), [{"source": "b", "target": "a"}]) is None
+
+    second = service.publish_topology(_devices("a", "c"), [["a", "c"]])
+    assert second["nodes"]["removed"] == ["b"]
+    assert [n["id"] for n in second["nodes"]["added"]] == ["c"]
+    assert second["links"]["removed"] == [["a", "b"]]
+
+    status = service.publish_status({"a": "offline", "c": "online", "missing": "offline"})
+    assert status["status"] == {"a": "offline"}
+    assert service.node_status()["a"]["status"] == "offline"
+    assert service.snapshot()["version"] == 3
+
+
+def test_subscribe_resumes_from_version():
+    """A subscriber that knows a recent version gets only the missed events, not a snapshot"""
+    service = TopologyStreamService()
+    service.publish_topology(_devices("a"), [])
+    service.publish_topology(_devices("a", "b"), [["a", "b"]])
+
+    async def first_event(since):
+        async for event in service.subscribe(since=since):
+            return event
+
+    assert asyncio.run(first_event(None))["type"] == "snapshot"
+    resumed = asyncio.run(first_event(1))
+    assert resumed["type"] == "delta" and resumed["version"] == 2
+
+
+def test_websocket_streams_snapshot_then_delta(monkeypatch):
+    """The viewer socket gets the current topology first, then live deltas"""
+    service = TopologyStreamService()
+    monkeypatch.setattr(topology_stream_service, "_svc", service)
+    service.publish_topology(_devices("fgt"), [])
+
+    client = TestClient(create_application())
+    with client.websocket_connect("/api/v1/topology/ws") as ws:
+        snapshot = ws.receive_json()
+        assert snapshot["type"] == "snapshot"
+        assert [n["id"] for n in snapshot["nodes"]] == ["fgt"]
+
+        service.publish_topology(_devices("fgt", "sw1"), [["fgt", "sw1"]])
+        delta = ws.receive_json()
+        assert delta["type"] == "delta" and delta["version"] == snapshot["version"] + 1
+        assert [n["id"] for n in delta["nodes"]["added"]] == ["sw1"]
+
+    assert client.get("/api/node-status").json()["fgt"]["status"] == "online"
+
+
+def test_collector_publishes_cached_layout_positions(monkeypatch):
+    """Published nodes carry force-directed positions, and an unchanged topology reuses the cached layout"""
+    from shared.device_handling import device_store
+    from shared.device_handling.device_collector import UnifiedDeviceCollector
+    from shared.device_handling.device_store import DeviceStore
+    from shared.network_utils import layout_cache
+    from shared.network_utils.layout_cache import LayoutCache
+
+    cache = LayoutCache()
+    monkeypatch.setattr(layout_cache, "_cache", cache)
+    monkeypatch.setattr(device_store, "_store", DeviceStore())
+    monkeypatch.setattr(topology_stream_service, "_svc", TopologyStreamService())
+    collector = UnifiedDeviceCollector()
+    monkeypatch.setattr(collector, "topology_snapshot",
+                        lambda: (_devices("fgt", "sw1", "sw2"), [["fgt", "sw1"], ["fgt", "sw2"]]))
+
+    event = collector.publish_topology()
+    assert all({"x", "y", "z"} <= node.keys() for node in event["nodes"]["added"])
+
+    hits = cache.hits
+    assert collector.publish_topology() is None
+    assert cache.hits > hits
+
+
+def test_large_topology_streams_clustered_view(monkeypatch):
+    """Above max_nodes viewers get the clustered level of detail, expandable through the cluster API"""
+    service = TopologyStreamService(max_nodes=10)
+    monkeypatch.setattr(topology_stream_service, "_svc", service)
+    devices = [{"id": "sw1", "type": "switch", "x": 0.0, "y": 0.0, "z": 0.0}]
+    devices += [{"id": f"c{i}", "type": "client", "status": "online", "x": float(i), "y": 200.0, "z": 0.0}
+                for i in range(30)]
+    service.publish_topology(devices, [["sw1", f"c{i}"] for i in range(30)])
+
+    snapshot = service.snapshot()
+    assert snapshot["clusters"] and [n["id"] for n in snapshot["nodes"]][0] == "sw1"
+    cluster = next(n for n in snapshot["nodes"] if n.get("cluster"))
+    assert cluster["count"] == 30 and cluster["x"] == 14.5
+    assert service.publish_status({"c7": "offline"})["status"] == {"c7": "offline"}
+
+    client = TestClient(create_application())
+    expanded = client.get(f"/api/v1/topology/clusters/{snapshot['clusters']}/{cluster['id']}").json()
+    assert len(expanded["nodes"]) == 30 and expanded["nodes"][7]["x"] == 7.0
+
+    delta = service.publish_topology(devices[:3], [["sw1", "c0"], ["sw1", "c1"]])
+    assert delta["clusters"] is None
+    assert {n["id"] for n in delta["nodes"]["added"]} == {"c0", "c1"}
@@ -0,0 +1,69 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from api.main import create_application
+from shared.observability import tracing
+from shared.observability.tracing import Tracer, in_current_context, parse_traceparent, traced
+
+
+def test_spans_nest_and_follow_threads(monkeypatch):
+    tracer = Tracer()
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+
+    @traced("child")
+    def child():
+        return tracing.current_span().parent_id
+
+    with tracer.span("root") as root, ThreadPoolExecutor(max_workers=2) as executor:
+        parents = [executor.submit(in_current_context(child)).result() for _ in range(2)]
+    assert parents == [root.span_id, root.span_id]
+    assert tracing.current_span() is None
+
+    trace = tracer.trace(root.trace_id)
+    assert trace["complete"]
+    assert [span["name"] for span in trace["spans"]] == ["root", "child", "child"]
+    assert all(span["traceId"] == root.trace_id for span in trace["spans"])
+
+
+def test_errors_and_traceparent_continuation():
+    tracer = Tracer()
+    incoming = "00-" + "a" * 32 + "-" + "b" * 16 + "-01"
+    try:
+        with tracer.span("request", incoming):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+
+    span = tracer.trace("a" * 32)["spans"][0]
+    assert span["parentSpanId"] == "b" * 16
+    assert span["status"] == {"code": "ERROR", "message": "ValueError: boom"}
+    assert parse_traceparent("00-" + "0" * 32 + "-" + "b" * 16 + "-01") is None
+
+
+def test_ring_buffer_and_slow_span_log(caplog):
+    tracer = Tracer(buffer_size=3, slow_span_ms=5)
+    for index in range(5):
+        with tracer.span(f"job-{index}"):
+            pass
+    assert [trace["name"] for trace in tracer.traces()] == ["job-4", "job-3", "job-2"]
+
+    with caplog.at_level(logging.WARNING, logger=tracing.__name__), tracer.span("slow"):
+        time.sleep(0.01)
+    assert "Slow span slow" in caplog.text
+
+
+def test_debug_traces_endpoint():
+    client = TestClient(create_application())
+    incoming = "00-" + "c" * 32 + "-" + "d" * 16 + "-01"
+    client.get("/api/v1/devices/stats", headers={"traceparent": incoming})
+
+    summaries = client.get("/debug/traces").json()["traces"]
+    assert summaries[0]["trace_id"] == "c" * 32
+    assert summaries[0]["name"] == "GET /api/v1/devices/stats"
+
+    spans = client.get(f"/debug/traces/{'c' * 32}").json()["spans"]
+    assert spans[0]["attributes"]["http.status_code"] == 200
+    assert client.get("/debug/traces/missing").status_code == 404